@@ -90,6 +90,16 @@ elif EMAIL_BACKEND == 'django.core.mail.backends.smtp.EmailBackend':
     EMAIL_TIMEOUT = int(os.environ.get('EMAIL_TIMEOUT', '30'))
     DEFAULT_FROM_EMAIL = DEFAULT_FROM_EMAIL or f'Antir Database <{EMAIL_HOST_USER}>'
 
+# Queue account emails in the database and deliver them from the
+# send_queued_email worker instead of inside the request. Only enable this
+# where that worker runs (cron or a service); otherwise queued mail is not sent.
+AUTHZ_EMAIL_QUEUE_ENABLED = _env_truthy('AUTHZ_EMAIL_QUEUE_ENABLED', '0')
+
+# Store membership roster and legacy authorization uploads and process them
+# from the run_upload_jobs worker instead of inside the request. Only enable
+# this where that worker runs; otherwise uploads stay queued.
+AUTHZ_UPLOAD_JOBS_ENABLED = _env_truthy('AUTHZ_UPLOAD_JOBS_ENABLED', '0')
+
 #Custom user model
 AUTH_USER_MODEL = 'authorizations.User'
 
@@ -107,6 +117,7 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'authorizations.middleware.RequestMetricsMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -176,6 +187,50 @@ CACHES = {
     }
 }
 
+# Seconds a user's resolved offices and marshal statuses stay in the shared cache.
+# Set to 0 to resolve them once per request only.
+AUTHZ_CAPABILITY_CACHE_SECONDS = int(os.environ.get('AUTHZ_CAPABILITY_CACHE_SECONDS', '300'))
+
+# Seconds each process may reuse the portal settings row (maintenance lock and
+# Kingdom AO sign-off) before re-reading it. Saving the row retires other
+# processes' copies within about a second through the shared cache; with a
+# per-process cache backend they see it when this time runs out. Set to 0 to
+# read it on every check.
+AUTHZ_PORTAL_SETTING_CACHE_SECONDS = int(os.environ.get('AUTHZ_PORTAL_SETTING_CACHE_SECONDS', '10'))
+
+# Maximum age in seconds of the in-process name index behind the officer person
+# lookup. Name changes reach other processes' indexes one person at a time
+# through the shared cache before then. Set to 0 to rebuild it for every lookup.
+AUTHZ_PERSON_LOOKUP_INDEX_SECONDS = int(os.environ.get('AUTHZ_PERSON_LOOKUP_INDEX_SECONDS', '900'))
+
+# Seconds the search and marshal-search dropdown option lists stay cached.
+# Writes to the underlying models retire them sooner. Set to 0 to disable.
+AUTHZ_OPTION_LIST_CACHE_SECONDS = int(os.environ.get('AUTHZ_OPTION_LIST_CACHE_SECONDS', '3600'))
+
+# Seconds a finished fighter card PDF stays cached. Cards are keyed on every
+# value printed on them, so edits never serve a stale card. Set to 0 to disable.
+AUTHZ_FIGHTER_CARD_CACHE_SECONDS = int(os.environ.get('AUTHZ_FIGHTER_CARD_CACHE_SECONDS', '86400'))
+
+# Largest selection accepted by the batch fighter card download, which renders
+# inside the request. Larger batches go through the generate_fighter_cards command.
+AUTHZ_FIGHTER_CARD_BATCH_LIMIT = int(os.environ.get('AUTHZ_FIGHTER_CARD_BATCH_LIMIT', '100'))
+
+# Seconds the live "Current" report stays cached. Authorization, person, and
+# user changes are replayed into the cached counts on the next view, so this
+# only bounds how long writes made outside the app can go unseen. Set to 0 to
+# rebuild the report on every view.
+AUTHZ_REPORT_SNAPSHOT_CACHE_SECONDS = int(os.environ.get('AUTHZ_REPORT_SNAPSHOT_CACHE_SECONDS', '900'))
+
+# Opt-in per-view query count and latency measurement. Site administrators see a
+# summary on the home page; requests over their view budget are logged as JSON
+# warnings on the performance.requests logger, and AUTHZ_REQUEST_METRICS_LOG
+# logs every request. AUTHZ_VIEW_BUDGETS overrides the budgets declared on
+# views, e.g. {'search': {'queries': 30, 'milliseconds': 800}}.
+AUTHZ_REQUEST_METRICS_ENABLED = _env_truthy('AUTHZ_REQUEST_METRICS_ENABLED', '0')
+AUTHZ_REQUEST_METRICS_LOG = _env_truthy('AUTHZ_REQUEST_METRICS_LOG', '0')
+AUTHZ_REQUEST_METRICS_WINDOW = int(os.environ.get('AUTHZ_REQUEST_METRICS_WINDOW', '200'))
+AUTHZ_VIEW_BUDGETS = {}
+
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
 
@@ -216,6 +271,14 @@ STATIC_ROOT = BASE_DIR / 'staticfiles'
 
 MEDIA_URL = '/media/'
 MEDIA_ROOT = Path(os.environ.get('MEDIA_ROOT') or str(BASE_DIR / 'media'))
+
+# Let the web server send supporting document files once Django has checked
+# permissions. 'x-sendfile' (Apache mod_xsendfile, Passenger) passes the file's
+# path under MEDIA_ROOT; 'x-accel-redirect' (nginx) passes
+# AUTHZ_PROTECTED_MEDIA_URL plus the file name, which must map to an
+# internal-only location serving MEDIA_ROOT. Leave empty to stream through Django.
+AUTHZ_FILE_DELIVERY = os.environ.get('AUTHZ_FILE_DELIVERY', '')
+AUTHZ_PROTECTED_MEDIA_URL = os.environ.get('AUTHZ_PROTECTED_MEDIA_URL', '/protected-media/')
 RUNNING_TESTS = any(arg.startswith('test') for arg in sys.argv)
 
 SECURE_PROXY_SSL_HEADER = ('HTTP_X_FORWARDED_PROTO', 'https')
@@ -276,6 +339,11 @@ LOGGING = {
             'level': 'WARNING',
             'propagate': False,
         },
+        'performance.requests': {
+            'handlers': ['console'],
+            'level': 'INFO',
+            'propagate': False,
+        },
     },
     'root': {
         'handlers': ['console'],
@@ -16,6 +16,8 @@ from .models import (
     SupportingDocument,
     SupportingDocumentPerson,
     SupportingDocumentAuthorization,
+    OutboundEmail,
+    UploadJob,
 )
 
 admin.site.register(AuthorizationNote)
@@ -198,3 +200,21 @@ class ReportValueAdmin(admin.ModelAdmin):
         'region_name',
         'display_order',
     )
+
+
+@admin.register(OutboundEmail)
+class OutboundEmailAdmin(admin.ModelAdmin):
+    list_display = ('subject', 'status', 'attempts', 'next_attempt_at', 'created_at', 'sent_at')
+    list_filter = ('status',)
+    search_fields = ('subject',)
+    readonly_fields = ('dedup_key', 'created_at', 'sent_at', 'last_error')
+    ordering = ('-created_at',)
+
+
+@admin.register(UploadJob)
+class UploadJobAdmin(admin.ModelAdmin):
+    list_display = ('source_filename', 'kind', 'status', 'rows_processed', 'requested_by', 'created_at', 'finished_at')
+    list_filter = ('kind', 'status')
+    search_fields = ('source_filename',)
+    readonly_fields = ('created_at', 'started_at', 'heartbeat_at', 'finished_at', 'result_messages', 'error')
+    ordering = ('-created_at',)
@@ -1,4 +1,6 @@
 import base64
+import os
+import threading
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 
@@ -9,6 +11,31 @@ from google.oauth2.credentials import Credentials
 from googleapiclient.discovery import build
 
 
+_gmail_clients = threading.local()
+
+
+def gmail_service():
+    """
+    Return this thread's Gmail API client, rebuilding it only when the token file changes.
+
+    The HTTP transport under the client is not thread-safe, so each thread
+    keeps its own; the credentials refresh their access token in memory.
+    """
+    token_file = settings.GMAIL_TOKEN_FILE
+    token_version = (token_file, os.path.getmtime(token_file))
+    cached = getattr(_gmail_clients, 'client', None)
+    if cached and cached[0] == token_version:
+        return cached[1]
+
+    creds = Credentials.from_authorized_user_file(
+        token_file,
+        scopes=["https://www.googleapis.com/auth/gmail.send"],
+    )
+    service = build("gmail", "v1", credentials=creds)
+    _gmail_clients.client = (token_version, service)
+    return service
+
+
 class GmailAPIBackend(BaseEmailBackend):
     """
     Django email backend that sends mail via Gmail API (HTTPS).
@@ -18,12 +45,7 @@ class GmailAPIBackend(BaseEmailBackend):
         if not email_messages:
             return 0
 
-        creds = Credentials.from_authorized_user_file(
-            settings.GMAIL_TOKEN_FILE,
-            scopes=["https://www.googleapis.com/auth/gmail.send"],
-        )
-
-        service = build("gmail", "v1", credentials=creds)
+        service = gmail_service()
 
         sent_count = 0
 
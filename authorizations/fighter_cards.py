@@ -0,0 +1,634 @@
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import zipfile
+from collections import defaultdict
+from datetime import date
+from io import BytesIO
+from typing import NamedTuple
+
+from django.conf import settings
+from django.contrib.staticfiles import finders
+from django.core.cache import cache
+from django.db.models import Q
+from django.utils.text import slugify
+from pdfrw import PageMerge, PdfReader, PdfWriter
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.ttfonts import TTFont
+from reportlab.pdfgen import canvas
+
+from .models import Authorization, Person, WeaponStyle
+from .option_cache import cached_option_list
+from .permissions import youth_age_category_for_style_name, youth_base_style_name
+
+logger = logging.getLogger(__name__)
+
+FIGHTER_CARD_WATERMARK = ''
+PDF_FONT_NAME = 'DejaVuSans'
+PDF_NAME_MIN_FONT_SIZE = 8
+_PDF_FONT_REGISTERED = False
+
+YOUTH_DISCIPLINES = ['Youth Armored', 'Youth Rapier']
+FIGHTER_CARD_TEMPLATES = {
+    '1': 'pdf_forms/fighter_auth.pdf',
+    '2': 'pdf_forms/youth_auth.pdf',
+    '3': 'pdf_forms/equestrian_auth.pdf',
+}
+FIGHTER_CARD_BATCH_CHUNK_SIZE = 200
+_MISSING_AUTHORIZATION_MESSAGES = {
+    '1': 'No fighter authorizations found',
+    '2': 'No youth authorizations found',
+    '3': 'No equestrian authorizations found',
+}
+
+
+class FighterCardError(Exception):
+    """Raised when a card cannot be produced for the requested person and template."""
+
+
+class CardField(NamedTuple):
+    name: str
+    left: float
+    bottom: float
+    right: float
+    top: float
+    font_size: float
+    rotation: float
+
+
+class CardPage(NamedTuple):
+    width: float
+    height: float
+    fields: tuple
+
+
+class FighterCardTemplate(NamedTuple):
+    template_id: str
+    path: str
+    pdf_bytes: bytes
+    digest: str
+    pages: tuple
+
+
+_template_cache = {}
+_template_cache_lock = threading.Lock()
+
+
+def _ensure_pdf_font_registered():
+    global _PDF_FONT_REGISTERED
+    if _PDF_FONT_REGISTERED:
+        return
+    font_path = finders.find('fonts/DejaVuSans.ttf') or finders.find('authorizations/static/fonts/DejaVuSans.ttf')
+    if not font_path:
+        raise Exception('DejaVuSans.ttf font file not found for PDF generation.')
+    pdfmetrics.registerFont(TTFont(PDF_FONT_NAME, font_path))
+    _PDF_FONT_REGISTERED = True
+
+
+def _to_float(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        try:
+            return float(str(value))
+        except (TypeError, ValueError):
+            return 0.0
+
+
+def _get_page_size(page):
+    media_box = getattr(page, 'MediaBox', None)
+    if not media_box:
+        return (612, 792)  # Default to letter
+    lower_left_x, lower_left_y, upper_right_x, upper_right_y = [_to_float(coord) for coord in media_box]
+    return upper_right_x - lower_left_x, upper_right_y - lower_left_y
+
+
+def _extract_font_size(annotation, default=10):
+    default_appearance = getattr(annotation, 'DA', None)
+    if not default_appearance:
+        return default
+    tokens = default_appearance.strip().split()
+    if 'Tf' in tokens:
+        idx = tokens.index('Tf')
+        if idx >= 2:
+            try:
+                return float(tokens[idx - 1])
+            except (TypeError, ValueError):
+                return default
+    return default
+
+
+def _extract_rotation(annotation):
+    mk = getattr(annotation, 'MK', None)
+    if mk is None:
+        return 0
+    rot = None
+    if hasattr(mk, 'R'):
+        rot = mk.R
+    elif isinstance(mk, dict):
+        rot = mk.get('/R')
+    if rot is None:
+        return 0
+    try:
+        return float(str(rot))
+    except (TypeError, ValueError):
+        return 0
+
+
+def _pdf_field_contains_name(field_name):
+    normalized = (field_name or '').strip().lower()
+    return (
+        normalized in {'sca_name', 'modern_name'}
+        or 'marshal' in normalized
+    )
+
+
+def _truncate_pdf_text_to_width(text, font_name, font_size, max_width):
+    text = str(text or '').strip()
+    if not text or pdfmetrics.stringWidth(text, font_name, font_size) <= max_width:
+        return text
+
+    space_indexes = [match.start() for match in re.finditer(r'\s+', text)]
+    for index in reversed(space_indexes):
+        candidate = text[:index].rstrip()
+        if candidate and pdfmetrics.stringWidth(candidate, font_name, font_size) <= max_width:
+            return candidate
+
+    candidate = ''
+    for character in text:
+        next_candidate = candidate + character
+        if pdfmetrics.stringWidth(next_candidate, font_name, font_size) > max_width:
+            break
+        candidate = next_candidate
+    return candidate
+
+
+def _fit_pdf_text_for_field(field_name, value, font_name, font_size, max_width):
+    text = str(value)
+    if not _pdf_field_contains_name(field_name):
+        return text, font_size
+
+    fitted_size = font_size
+    while (
+        fitted_size > PDF_NAME_MIN_FONT_SIZE
+        and pdfmetrics.stringWidth(text, font_name, fitted_size) > max_width
+    ):
+        fitted_size = max(PDF_NAME_MIN_FONT_SIZE, fitted_size - 0.5)
+
+    return _truncate_pdf_text_to_width(text, font_name, fitted_size, max_width), fitted_size
+
+
+def _draw_watermark(
+    can,
+    width,
+    height,
+    text,
+    image_path=None,
+    image_opacity=0.15,
+    scale=0.2,
+    x_ratio=0.5,
+    y_ratio=0.5,
+):
+    if not text and not image_path:
+        return
+    can.saveState()
+    if hasattr(can, 'setFillAlpha'):
+        can.setFillAlpha(image_opacity)
+    if image_path and os.path.exists(image_path):
+        target_width = width * scale
+        target_height = height * scale
+        x = (width * x_ratio) - (target_width / 2)
+        y = (height * y_ratio) - (target_height / 2)
+        can.drawImage(
+            image_path,
+            x,
+            y,
+            width=target_width,
+            height=target_height,
+            mask='auto',
+            preserveAspectRatio=True,
+        )
+    elif text:
+        can.setFont('Helvetica-Bold', 42)
+        can.setFillColorRGB(0.85, 0.85, 0.85)
+        can.translate(width / 2, height / 2)
+        can.rotate(45)
+        can.drawCentredString(0, 0, text)
+    can.restoreState()
+
+
+def _template_page_layout(page):
+    """Read a template page's size and fillable widget geometry once so renders skip the annotation walk."""
+    page_width, page_height = _get_page_size(page)
+    fields = []
+    for annotation in getattr(page, 'Annots', []) or []:
+        if getattr(annotation, 'Subtype', None) != '/Widget' or not getattr(annotation, 'T', None):
+            continue
+        rect = getattr(annotation, 'Rect', None)
+        if not rect:
+            continue
+        left, bottom, right, top = [_to_float(coord) for coord in rect]
+        fields.append(CardField(
+            name=annotation.T[1:-1].strip(),
+            left=left,
+            bottom=bottom,
+            right=right,
+            top=top,
+            font_size=_extract_font_size(annotation),
+            rotation=_extract_rotation(annotation),
+        ))
+    return CardPage(width=page_width, height=page_height, fields=tuple(fields))
+
+
+def _find_template_path(template_path):
+    absolute_template_path = finders.find(template_path)
+    if not absolute_template_path:
+        # Try to find the file in the static directory
+        absolute_template_path = finders.find(f'authorizations/static/{template_path}')
+    if not absolute_template_path:
+        raise Exception(f'Could not find PDF template file: {template_path}. Looked in: {finders.searched_locations}')
+    return absolute_template_path
+
+
+def load_fighter_card_template(template_id):
+    """
+    Return the parsed template for ``template_id``, reading and measuring it
+    only the first time each process asks for it.
+    """
+    template_id = str(template_id)
+    cached = _template_cache.get(template_id)
+    if cached is not None:
+        return cached
+    template_path = FIGHTER_CARD_TEMPLATES.get(template_id)
+    if not template_path:
+        raise FighterCardError('Invalid template id')
+    with _template_cache_lock:
+        cached = _template_cache.get(template_id)
+        if cached is not None:
+            return cached
+        absolute_template_path = _find_template_path(template_path)
+        try:
+            with open(absolute_template_path, 'rb') as template_file:
+                pdf_bytes = template_file.read()
+            template = PdfReader(BytesIO(pdf_bytes))
+        except Exception as e:
+            raise Exception(f'Error reading PDF template file {absolute_template_path}: {str(e)}')
+        cached = FighterCardTemplate(
+            template_id=template_id,
+            path=absolute_template_path,
+            pdf_bytes=pdf_bytes,
+            digest=hashlib.sha256(pdf_bytes).hexdigest(),
+            pages=tuple(_template_page_layout(page) for page in template.pages),
+        )
+        _template_cache[template_id] = cached
+        return cached
+
+
+def _build_overlay_page(page, layout, data, watermark_text, watermark_overlays):
+    packet = BytesIO()
+    can = canvas.Canvas(packet, pagesize=(layout.width, layout.height))
+    _ensure_pdf_font_registered()
+    for overlay in watermark_overlays:
+        _draw_watermark(
+            can,
+            layout.width,
+            layout.height,
+            watermark_text if overlay.get('use_text') else '',
+            image_path=overlay.get('image_path'),
+            image_opacity=overlay.get('opacity', 0.15),
+            scale=overlay.get('scale', 0.2),
+            x_ratio=overlay.get('x_ratio', 0.5),
+            y_ratio=overlay.get('y_ratio', 0.5),
+        )
+
+    for field in layout.fields:
+        value = data.get(field.name)
+        if not value:
+            continue
+
+        rotation = field.rotation
+        field_width = (
+            abs(field.top - field.bottom) if rotation in {90, 270} else abs(field.right - field.left)
+        )
+        value, font_size = _fit_pdf_text_for_field(field.name, value, PDF_FONT_NAME, field.font_size, field_width)
+        if not value:
+            continue
+
+        can.setFont(PDF_FONT_NAME, font_size)
+        can.setFillColorRGB(0, 0, 0)
+
+        if rotation:
+            center_x = (field.left + field.right) / 2
+            center_y = (field.bottom + field.top) / 2
+            can.saveState()
+            can.translate(center_x, center_y)
+            can.rotate(rotation)
+            can.drawCentredString(0, -font_size / 2, str(value))
+            can.restoreState()
+        else:
+            can.drawString(field.left, field.top - font_size, str(value))
+
+    can.save()
+    packet.seek(0)
+    overlay_pdf = PdfReader(packet)
+    overlay_page = overlay_pdf.pages[0]
+    if getattr(page, 'Rotate', None):
+        overlay_page.Rotate = page.Rotate
+    return overlay_page
+
+
+def _flatten_pdf_template(card_template, data, watermark_text=FIGHTER_CARD_WATERMARK, watermark_overlays=None):
+    # pdfrw edits the page tree in place, so every render starts from a fresh
+    # parse of the cached template bytes.
+    template = PdfReader(BytesIO(card_template.pdf_bytes))
+    watermark_overlays = watermark_overlays or []
+    for page, layout in zip(template.pages, card_template.pages):
+        overlay_page = _build_overlay_page(page, layout, data, watermark_text, watermark_overlays)
+        PageMerge(page).add(overlay_page).render()
+        if getattr(page, 'Annots', None) is not None:
+            page.Annots = []
+
+    if hasattr(template.Root, 'AcroForm'):
+        try:
+            del template.Root.AcroForm
+        except AttributeError:
+            template.Root.AcroForm = None
+
+    return template
+
+
+def fighter_card_watermark_overlays(template_id):
+    add_watermark = False
+    if not add_watermark:
+        return []
+    watermark_image_path = finders.find('pdf_forms/Fighter_Card_Watermark.png') or finders.find('authorizations/static/pdf_forms/Fighter_Card_Watermark.png')
+    if not watermark_image_path:
+        return []
+    if template_id == '1':
+        return [
+            {'image_path': watermark_image_path, 'scale': .20, 'x_ratio': 0.33, 'y_ratio': 0.13},
+            {'image_path': watermark_image_path, 'scale': .22, 'x_ratio': 0.70, 'y_ratio': 0.13},
+        ]
+    if template_id == '2':
+        return [
+            {'image_path': watermark_image_path, 'scale': .20, 'x_ratio': 0.70, 'y_ratio': 0.16},
+        ]
+    return [
+        {'image_path': watermark_image_path, 'scale': .2, 'x_ratio': 0.5, 'y_ratio': 0.13},
+    ]
+
+
+def fighter_card_style_rows():
+    """``(style_id, discipline name, style name)`` for every weapon style, shared through the option-list cache."""
+    return cached_option_list(
+        'fighter-card-styles',
+        lambda: WeaponStyle.objects.order_by('id').values_list('id', 'discipline__name', 'name'),
+    )
+
+
+def _card_includes_discipline(template_id, discipline_name):
+    if template_id == '1':
+        return discipline_name not in ['Equestrian', *YOUTH_DISCIPLINES]
+    if template_id == '2':
+        return discipline_name in YOUTH_DISCIPLINES
+    return discipline_name == 'Equestrian'
+
+
+def fighter_card_authorizations(person_ids=None):
+    """Active authorizations with everything the card needs already joined in."""
+    authorizations = Authorization.objects.effectively_active().select_related(
+        'person__user',
+        'person__branch',
+        'style__discipline',
+        'marshal',
+    )
+    if person_ids is not None:
+        authorizations = authorizations.filter(person_id__in=person_ids)
+    return authorizations.order_by(
+        'style__discipline__name',
+        'effective_expiration_date', 'style__name')
+
+
+def build_fighter_card_data(person, authorizations, template_id, style_rows):
+    """
+    Build the form-field values for one card from already loaded rows.
+
+    ``authorizations`` are the person's active authorizations ordered by
+    discipline, expiration, and style; ``style_rows`` comes from
+    :func:`fighter_card_style_rows`.
+    """
+    template_id = str(template_id)
+    if template_id not in FIGHTER_CARD_TEMPLATES:
+        raise FighterCardError('Invalid template id')
+    authorizations = [
+        auth for auth in authorizations
+        if _card_includes_discipline(template_id, auth.style.discipline.name)
+    ]
+    if not authorizations:
+        raise FighterCardError(_MISSING_AUTHORIZATION_MESSAGES[template_id])
+
+    earliest_auth = min(authorizations, key=lambda auth: auth.effective_expiration_date or date.max)
+    expiration = earliest_auth.effective_expiration
+
+    authorized_style_ids = {auth.style_id for auth in authorizations}
+    status_map = {}
+    for style_id, discipline_name, style_name in style_rows:
+        is_authorized = style_id in authorized_style_ids
+        if template_id == '2' and discipline_name in YOUTH_DISCIPLINES:
+            style_name = youth_base_style_name(style_name)
+        status_key = f'{discipline_name} - {style_name}'
+        if is_authorized or status_key not in status_map:
+            status_map[status_key] = 'X' if is_authorized else ''
+
+    marshal_list = []
+    seen_disciplines = set()
+    for auth in authorizations:
+        if auth.style.discipline.name not in seen_disciplines:
+            seen_disciplines.add(auth.style.discipline.name)
+            marshal_list.append({
+                'discipline': f'{auth.style.discipline.name} marshal',  # Use the discipline's name for display
+                'marshal': auth.marshal.sca_name if auth.marshal else '',  # Use the marshal's SCA name for display
+            })
+
+    data = {
+        'sca_name': person.sca_name,
+        'modern_name': person.user.first_name + ' ' + person.user.last_name,
+        'expiration': expiration.strftime('%m/%d/%Y'),
+        'minor': 'X' if person.minor_status == 'Yes' else ''
+    }
+    for style_key, is_authorized in status_map.items():
+        data[style_key] = is_authorized
+
+    if template_id == '2':
+        data['Youth Marshal'] = marshal_list[0]['marshal']
+        youth_categories = set()
+        for auth in authorizations:
+            if auth.style.name in ['Junior Marshal', 'Senior Marshal']:
+                continue
+            category = youth_age_category_for_style_name(auth.style.name)
+            if category:
+                youth_categories.add(category)
+        for category in youth_categories:
+            data[category] = 'X'
+        if not youth_categories:
+            data['Background_expiration'] = expiration.strftime('%m/%d/%Y')
+
+    else:
+        for marshal in marshal_list:
+            data[marshal['discipline']] = marshal['marshal']
+
+    return data
+
+
+def _fighter_card_cache_key(card_template, person_id, data, watermark_overlays):
+    payload = json.dumps([data, watermark_overlays], sort_keys=True, default=str)
+    content_hash = hashlib.sha256(f'{card_template.digest}:{payload}'.encode('utf-8')).hexdigest()
+    return f'authz:fighter-card:{card_template.template_id}:{person_id}:{content_hash}'
+
+
+def _render_card_pdf(card_template, data, watermark_overlays):
+    template = _flatten_pdf_template(card_template, data, watermark_overlays=watermark_overlays)
+    output = BytesIO()
+    PdfWriter(output, trailer=template).write()
+    return output.getvalue()
+
+
+def render_fighter_card(person, authorizations, template_id, style_rows=None):
+    """
+    Return the finished card PDF as bytes.
+
+    Finished cards are cached for AUTHZ_FIGHTER_CARD_CACHE_SECONDS under a hash
+    of every value printed on them, so any change to the person or their
+    active authorizations produces a new key instead of a stale card.
+    """
+    template_id = str(template_id)
+    if style_rows is None:
+        style_rows = fighter_card_style_rows()
+    data = build_fighter_card_data(person, authorizations, template_id, style_rows)
+    card_template = load_fighter_card_template(template_id)
+    watermark_overlays = fighter_card_watermark_overlays(template_id)
+
+    timeout = getattr(settings, 'AUTHZ_FIGHTER_CARD_CACHE_SECONDS', 0)
+    cache_key = _fighter_card_cache_key(card_template, person.user_id, data, watermark_overlays)
+    if timeout:
+        pdf_bytes = cache.get(cache_key)
+        if pdf_bytes is not None:
+            return pdf_bytes
+
+    logger.debug('Rendering fighter card %s for person %s', template_id, person.user_id)
+    pdf_bytes = _render_card_pdf(card_template, data, watermark_overlays)
+    if timeout:
+        cache.set(cache_key, pdf_bytes, timeout=timeout)
+    return pdf_bytes
+
+
+def render_fighter_card_for_person(person_id, template_id):
+    person = Person.objects.select_related('user').get(user_id=person_id)
+    return render_fighter_card(person, fighter_card_authorizations([person_id]), template_id)
+
+
+def fighter_card_batch_person_ids(*, branch=None, region=None, person_ids=None):
+    """
+    User ids of people with at least one active authorization in a branch,
+    a region (including its sub-branches), or an explicit id list, ordered by
+    SCA name.
+    """
+    people = Person.objects.filter(
+        user_id__in=Authorization.objects.effectively_active().values('person_id'),
+    )
+    if branch is not None:
+        people = people.filter(branch=branch)
+    if region is not None:
+        people = people.filter(
+            Q(branch=region) | Q(branch__region=region) | Q(branch__region__region=region)
+        )
+    if person_ids is not None:
+        people = people.filter(user_id__in=person_ids)
+    return list(people.order_by('sca_name', 'user_id').values_list('user_id', flat=True))
+
+
+class FighterCardBatchResult(NamedTuple):
+    rendered: list
+    skipped: list
+
+
+def _batch_card_filename(person):
+    slug = slugify(person.sca_name) or 'fighter'
+    return f'{slug}-{person.user_id}.pdf'
+
+
+def render_fighter_card_batch(
+    person_ids,
+    template_id,
+    output_file,
+    *,
+    archive=False,
+    chunk_size=FIGHTER_CARD_BATCH_CHUNK_SIZE,
+):
+    """
+    Write cards for ``person_ids`` to ``output_file`` as one merged PDF, or as
+    a zip of individual PDFs when ``archive`` is true.
+
+    The template and style list are loaded once for the whole batch and
+    authorizations are prefetched one chunk of people at a time. A zip gets
+    each card as soon as it is rendered; a merged PDF keeps every page until
+    the end, so large batches are better written as a zip.
+
+    Returns a :class:`FighterCardBatchResult` of rendered user ids and
+    ``(user_id, reason)`` pairs for people without a card of this type.
+    """
+    template_id = str(template_id)
+    card_template = load_fighter_card_template(template_id)
+    watermark_overlays = fighter_card_watermark_overlays(template_id)
+    style_rows = fighter_card_style_rows()
+    timeout = getattr(settings, 'AUTHZ_FIGHTER_CARD_CACHE_SECONDS', 0)
+    _ensure_pdf_font_registered()
+
+    rendered = []
+    skipped = []
+    merged = None if archive else PdfWriter()
+    archive_file = zipfile.ZipFile(output_file, 'w', compression=zipfile.ZIP_DEFLATED) if archive else None
+
+    person_ids = list(person_ids)
+    for offset in range(0, len(person_ids), chunk_size):
+        chunk_ids = person_ids[offset:offset + chunk_size]
+        people = Person.objects.select_related('user').in_bulk(chunk_ids, field_name='user_id')
+        authorizations_by_person = defaultdict(list)
+        for auth in fighter_card_authorizations(chunk_ids):
+            authorizations_by_person[auth.person_id].append(auth)
+
+        for person_id in chunk_ids:
+            person = people.get(person_id)
+            if person is None:
+                skipped.append((person_id, 'Person not found'))
+                continue
+            try:
+                data = build_fighter_card_data(
+                    person,
+                    authorizations_by_person.get(person_id, []),
+                    template_id,
+                    style_rows,
+                )
+            except FighterCardError as e:
+                skipped.append((person_id, str(e)))
+                continue
+            cache_key = _fighter_card_cache_key(card_template, person_id, data, watermark_overlays)
+            pdf_bytes = cache.get(cache_key) if timeout else None
+            if pdf_bytes is None:
+                pdf_bytes = _render_card_pdf(card_template, data, watermark_overlays)
+                if timeout:
+                    cache.set(cache_key, pdf_bytes, timeout=timeout)
+            if archive:
+                archive_file.writestr(_batch_card_filename(person), pdf_bytes)
+            else:
+                merged.addpages(PdfReader(BytesIO(pdf_bytes)).pages)
+            rendered.append(person_id)
+
+    if archive:
+        archive_file.close()
+    elif rendered:
+        merged.write(output_file)
+    return FighterCardBatchResult(rendered=rendered, skipped=skipped)
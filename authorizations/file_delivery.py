@@ -0,0 +1,134 @@
+import hashlib
+import mimetypes
+import re
+from urllib.parse import quote
+
+from django.conf import settings
+from django.http import FileResponse, HttpResponse, StreamingHttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import content_disposition_header, http_date, parse_http_date_safe
+
+FILE_DELIVERY_SENDFILE = 'x-sendfile'
+FILE_DELIVERY_ACCEL_REDIRECT = 'x-accel-redirect'
+FILE_DELIVERY_MODES = {FILE_DELIVERY_SENDFILE, FILE_DELIVERY_ACCEL_REDIRECT}
+FILE_RANGE_CHUNK_SIZE = 64 * 1024
+
+_BYTE_RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+def file_delivery_mode() -> str:
+    mode = (getattr(settings, 'AUTHZ_FILE_DELIVERY', '') or '').strip().lower()
+    return mode if mode in FILE_DELIVERY_MODES else ''
+
+
+def _file_validators(field_file):
+    """Return (etag, last_modified timestamp, size) for a stored file, or Nones when storage cannot say."""
+    storage = field_file.storage
+    try:
+        size = storage.size(field_file.name)
+        modified = storage.get_modified_time(field_file.name).timestamp()
+    except (NotImplementedError, OSError):
+        return None, None, None
+    fingerprint = hashlib.sha1(f'{field_file.name}:{size}:{modified}'.encode('utf-8')).hexdigest()[:20]
+    return f'"{fingerprint}"', int(modified), size
+
+
+def _requested_byte_range(request, size, etag, last_modified):
+    """
+    Return the (start, end) of a single satisfiable byte range, ``None`` to
+    send the whole file, or ``False`` when the range cannot be satisfied.
+    """
+    header = request.META.get('HTTP_RANGE', '').strip()
+    if not header or size is None:
+        return None
+    if_range = request.META.get('HTTP_IF_RANGE', '').strip()
+    if if_range and if_range != etag:
+        if_range_date = parse_http_date_safe(if_range)
+        if if_range_date is None or last_modified is None or last_modified > if_range_date:
+            return None
+    match = _BYTE_RANGE_RE.match(header)
+    if not match or match.groups() == ('', ''):
+        # Multiple or malformed ranges: answering with the whole file is allowed.
+        return None
+    first, last = match.groups()
+    if first:
+        start = int(first)
+        if last and int(last) < start:
+            # An inverted range is syntactically invalid, so it is ignored (RFC 7233 2.1).
+            return None
+        end = min(int(last), size - 1) if last else size - 1
+    else:
+        start = max(size - int(last), 0)
+        end = size - 1
+    if start >= size:
+        return False
+    return start, end
+
+
+def _iter_file_range(handle, start, length):
+    try:
+        handle.seek(start)
+        while length > 0:
+            chunk = handle.read(min(FILE_RANGE_CHUNK_SIZE, length))
+            if not chunk:
+                break
+            length -= len(chunk)
+            yield chunk
+    finally:
+        handle.close()
+
+
+def protected_file_response(request, field_file, *, filename):
+    """
+    Respond with a stored file the caller has already authorized ``request`` to read.
+
+    With AUTHZ_FILE_DELIVERY set the web server sends the file itself (and
+    handles ranges); otherwise Django streams it and answers conditional and
+    single-range requests. Raises FileNotFoundError when the file is gone.
+    """
+    content_type = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+    etag, last_modified, size = _file_validators(field_file)
+
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is None:
+        mode = file_delivery_mode()
+        if mode == FILE_DELIVERY_SENDFILE:
+            response = HttpResponse(content_type=content_type)
+            response['X-Sendfile'] = field_file.path
+        elif mode == FILE_DELIVERY_ACCEL_REDIRECT:
+            response = HttpResponse(content_type=content_type)
+            response['X-Accel-Redirect'] = settings.AUTHZ_PROTECTED_MEDIA_URL.rstrip('/') + '/' + quote(field_file.name)
+        else:
+            response = _streamed_file_response(request, field_file, content_type, size, etag, last_modified)
+        response['Content-Disposition'] = content_disposition_header(False, filename)
+
+    if etag:
+        response['ETag'] = etag
+    if last_modified is not None:
+        response['Last-Modified'] = http_date(last_modified)
+    # Permissions can change, so browsers keep the file but revalidate each view.
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+
+def _streamed_file_response(request, field_file, content_type, size, etag, last_modified):
+    byte_range = _requested_byte_range(request, size, etag, last_modified)
+    if byte_range is False:
+        response = HttpResponse(status=416, content_type=content_type)
+        response['Content-Range'] = f'bytes */{size}'
+        return response
+
+    handle = field_file.storage.open(field_file.name, 'rb')
+    if byte_range is None:
+        response = FileResponse(handle, content_type=content_type)
+    else:
+        start, end = byte_range
+        response = StreamingHttpResponse(
+            _iter_file_range(handle, start, end - start + 1),
+            status=206,
+            content_type=content_type,
+        )
+        response['Content-Length'] = str(end - start + 1)
+        response['Content-Range'] = f'bytes {start}-{end}/{size}'
+    response['Accept-Ranges'] = 'bytes'
+    return response
@@ -1,5 +1,10 @@
+import copy
+import time
+
+from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.contrib.sessions.models import Session
+from django.core.cache import cache
 from django.db import OperationalError, ProgrammingError
 from django.utils import timezone
 
@@ -9,30 +14,94 @@ DEFAULT_MAINTENANCE_LOCK_MESSAGE = (
     'The authorization portal is temporarily locked for maintenance. Please try again shortly.'
 )
 
+_GENERATION_KEY = 'authz:portal-setting:generation'
+# A snapshot compares its generation with the shared one at most this often,
+# so a save in another process is seen within about a second without a
+# shared-cache read on every check.
+PORTAL_SETTING_GENERATION_CHECK_SECONDS = 1
+# (generation, monotonic expiry, monotonic next generation check, setting row or None) for this process.
+_cached_portal_setting = None
 
-def get_portal_setting(create=False):
+
+def portal_setting_cache_seconds() -> int:
+    return getattr(settings, 'AUTHZ_PORTAL_SETTING_CACHE_SECONDS', 0)
+
+
+def invalidate_portal_setting_cache() -> None:
+    """Drop the cached portal settings here and, through the shared cache, in every other process."""
+    global _cached_portal_setting
+    _cached_portal_setting = None
+    if not portal_setting_cache_seconds():
+        return
     try:
-        if create:
-            setting, _ = AuthorizationPortalSetting.objects.get_or_create(pk=1)
-        else:
-            setting = AuthorizationPortalSetting.objects.filter(pk=1).first()
+        cache.incr(_GENERATION_KEY)
+    except ValueError:
+        cache.set(_GENERATION_KEY, 1, timeout=None)
+
+
+def _portal_setting_snapshot():
+    """
+    Return the portal settings row as cached by this process, or None when there is none.
+
+    The row is re-read after AUTHZ_PORTAL_SETTING_CACHE_SECONDS, or sooner when
+    a save elsewhere has bumped the shared generation. The generation is read
+    at most once every PORTAL_SETTING_GENERATION_CHECK_SECONDS, so most checks
+    touch neither the database nor the shared cache. Callers must not modify
+    the returned instance.
+    """
+    global _cached_portal_setting
+    timeout = portal_setting_cache_seconds()
+    now = time.monotonic()
+    cached = _cached_portal_setting
+    if timeout and cached and cached[1] > now:
+        generation, expires_at, check_at, setting = cached
+        if check_at > now:
+            return setting
+        if cache.get(_GENERATION_KEY, 0) == generation:
+            _cached_portal_setting = (generation, expires_at, now + PORTAL_SETTING_GENERATION_CHECK_SECONDS, setting)
+            return setting
+    # Read the generation before the row, so a save in between costs one extra reload, not a missed one.
+    generation = cache.get(_GENERATION_KEY, 0) if timeout else 0
+    try:
+        setting = AuthorizationPortalSetting.objects.order_by('id').first()
     except (OperationalError, ProgrammingError):
+        # Migration not applied yet.
         return None
+    if timeout:
+        now = time.monotonic()
+        _cached_portal_setting = (generation, now + timeout, now + PORTAL_SETTING_GENERATION_CHECK_SECONDS, setting)
     return setting
 
 
+def get_portal_setting(create=False):
+    if create:
+        try:
+            setting, _ = AuthorizationPortalSetting.objects.get_or_create(pk=1)
+        except (OperationalError, ProgrammingError):
+            return None
+        return setting
+    setting = _portal_setting_snapshot()
+    # A copy, so a caller that edits and saves it cannot change the cached row.
+    return copy.copy(setting) if setting else None
+
+
 def maintenance_lock_enabled():
-    setting = get_portal_setting()
+    setting = _portal_setting_snapshot()
     return bool(setting and setting.maintenance_lock_enabled)
 
 
 def maintenance_lock_message():
-    setting = get_portal_setting()
+    setting = _portal_setting_snapshot()
     if not setting:
         return DEFAULT_MAINTENANCE_LOCK_MESSAGE
     return setting.maintenance_lock_message or DEFAULT_MAINTENANCE_LOCK_MESSAGE
 
 
+def authorization_officer_sign_off_required():
+    setting = _portal_setting_snapshot()
+    return bool(setting and setting.require_kao_verification)
+
+
 def can_manage_maintenance_lock(user):
     if not user or not getattr(user, 'is_authenticated', False):
         return False
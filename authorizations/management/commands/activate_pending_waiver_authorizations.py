@@ -3,8 +3,17 @@ from datetime import date
 from django.core.management.base import BaseCommand, CommandError
 from django.db import transaction
 
-from authorizations.models import Authorization, AuthorizationStatus, sync_authorization_validity_interval
-from authorizations.permissions import _JUNIOR_GROUND_CREW_STYLES, _SENIOR_GROUND_CREW_STYLES
+from authorizations.models import (
+    Authorization,
+    AuthorizationStatus,
+    refresh_effective_expirations,
+    sync_authorization_validity_intervals,
+)
+from authorizations.permissions import (
+    _JUNIOR_GROUND_CREW_STYLES,
+    _SENIOR_GROUND_CREW_STYLES,
+    invalidate_user_capabilities,
+)
 
 
 WAIVER_BLOCKED_STATUS_NAMES = ("Awaiting Waiver", "Pending Waiver", "Needs Waiver")
@@ -50,12 +59,19 @@ class Command(BaseCommand):
         with transaction.atomic():
             authorization_ids = [authorization.id for authorization in pending_authorizations]
             Authorization.objects.filter(id__in=authorization_ids).update(status=active_status)
+            effective_expirations = refresh_effective_expirations(
+                {authorization.person_id for authorization in pending_authorizations}
+            )
             for authorization in pending_authorizations:
                 authorization.status = active_status
-                sync_authorization_validity_interval(
-                    authorization,
-                    note="Generated when waiver-blocked authorization became active by repair command.",
+                authorization.effective_expiration_date = effective_expirations.get(
+                    authorization.id,
+                    authorization.effective_expiration_date,
                 )
+            sync_authorization_validity_intervals(
+                pending_authorizations,
+                note="Generated when waiver-blocked authorization became active by repair command.",
+            )
             senior_ground_crew_user_ids = {
                 authorization.person.user_id
                 for authorization in pending_authorizations
@@ -71,6 +87,7 @@ class Command(BaseCommand):
                     style__discipline__name="Equestrian",
                     style__name__in=_JUNIOR_GROUND_CREW_STYLES,
                 ).update(status=inactive_status)
+            invalidate_user_capabilities(*{authorization.person_id for authorization in pending_authorizations})
 
         self.stdout.write(
             self.style.SUCCESS(f"Marked {len(pending_authorizations)} authorization(s) Active.")
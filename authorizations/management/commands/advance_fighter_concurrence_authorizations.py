@@ -3,7 +3,7 @@ from datetime import date
 from django.core.management.base import BaseCommand, CommandError
 from django.db import transaction
 
-from authorizations.models import Authorization, AuthorizationStatus
+from authorizations.models import Authorization, AuthorizationStatus, deferred_authorization_audit
 from authorizations.permissions import (
     KINGDOM_APPROVAL_STATUS,
     KINGDOM_EQUESTRIAN_WAIVER_STATUS,
@@ -97,7 +97,7 @@ class Command(BaseCommand):
             self.stdout.write("Dry run only. Re-run with --write to advance these authorizations.")
             return
 
-        with transaction.atomic():
+        with transaction.atomic(), deferred_authorization_audit():
             for authorization, target_status in planned:
                 authorization.status = target_status
                 authorization.concurring_fighter = None
@@ -1,12 +1,14 @@
 import csv
+import json
 from collections import Counter
-from dataclasses import dataclass
+from concurrent.futures import ProcessPoolExecutor
 from datetime import date, datetime
 from pathlib import Path
 
+import django
 from django.conf import settings
 from django.core.management.base import BaseCommand, CommandError
-from django.db import connection, transaction
+from django.db import connection, connections, transaction
 from django.db.models import Q
 from django.utils import timezone
 from django.utils.dateparse import parse_date, parse_datetime
@@ -15,16 +17,24 @@ from authorizations.management.commands.populate_restore_validity_intervals impo
     Command as RestorePopulationCommand,
     IntervalCandidate,
 )
-from authorizations.models import Authorization, AuthorizationValidityInterval
+from authorizations.models import (
+    Authorization,
+    AuthorizationValidityInterval,
+    replace_authorization_validity_intervals,
+    validity_intervals_by_authorization,
+)
+
+
+CHECKPOINT_FILENAME = "validity_interval_catch_up_checkpoint.json"
 
 
-@dataclass
-class CatchUpPlan:
-    authorization_id: int
-    action: str
-    existing_count: int
-    merged_count: int
-    note: str
+def _init_plan_worker():
+    # Spawned workers start without Django configured; forked ones already are.
+    django.setup()
+
+
+def _plan_chunk_in_worker(authorization_ids, snapshot_date):
+    return Command()._plan_chunk(authorization_ids, snapshot_date)
 
 
 class Command(BaseCommand):
@@ -48,12 +58,32 @@ class Command(BaseCommand):
         parser.add_argument(
             "--snapshot-date",
             default=None,
-            help="Date to use for missing membership/background-check fallback. Defaults to today.",
+            help=(
+                "Date to use for missing membership/background-check fallback. Defaults to today, or to the "
+                "date recorded in the checkpoint when resuming an interrupted --write run."
+            ),
         )
         parser.add_argument(
             "--output-dir",
             default=str(Path(settings.BASE_DIR) / "tmp" / "validity_interval_population"),
         )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=500,
+            help="Authorizations planned, written, and checkpointed together.",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=1,
+            help="Processes used to plan batches. Writes always happen in this process, in authorization order.",
+        )
+        parser.add_argument(
+            "--restart",
+            action="store_true",
+            help="Ignore a checkpoint left by an interrupted --write run and start from the first authorization.",
+        )
 
     def handle(self, *args, **options):
         since = self._parse_since(options["since"])
@@ -61,6 +91,8 @@ class Command(BaseCommand):
         write = options["write"]
         allow_empty = options["allow_empty"]
         snapshot_date = self._parse_snapshot_date(options["snapshot_date"])
+        batch_size = options["batch_size"]
+        workers = options["workers"]
         output_dir = Path(options["output_dir"])
         output_dir.mkdir(parents=True, exist_ok=True)
 
@@ -68,6 +100,10 @@ class Command(BaseCommand):
             raise CommandError("Use either --since or --all, not both.")
         if not since and not use_all:
             raise CommandError("Provide --since for a scoped catch-up, or --all for an intentional full current-data reconciliation.")
+        if batch_size < 1:
+            raise CommandError("--batch-size must be at least 1.")
+        if workers < 1:
+            raise CommandError("--workers must be at least 1.")
 
         self._validate_interval_table()
         existing_total = AuthorizationValidityInterval.objects.count()
@@ -76,9 +112,123 @@ class Command(BaseCommand):
                 "The validity interval table is empty. Import the vetted history first, or use --allow-empty intentionally."
             )
 
-        authorizations = self._authorizations_since(since) if since else self._all_authorizations()
+        checkpoint_path = output_dir / CHECKPOINT_FILENAME
+        run_key = {
+            "since": since.isoformat() if since else "",
+            "all": use_all,
+        }
+        checkpoint = (
+            self._load_checkpoint(checkpoint_path, run_key, snapshot_date)
+            if write and not options["restart"]
+            else None
+        )
+        if checkpoint:
+            snapshot_date = parse_date(checkpoint["snapshot_date"])
+        elif snapshot_date is None:
+            snapshot_date = date.today()
+        run_key["snapshot_date"] = snapshot_date.isoformat()
+        counts = Counter(checkpoint["counts"]) if checkpoint else Counter()
+        considered = checkpoint["considered"] if checkpoint else 0
+        applied = checkpoint["applied"] if checkpoint else 0
+        if checkpoint:
+            existing_total = checkpoint["existing_intervals_before"]
+
+        authorization_ids = self._authorization_ids(since)
+        if checkpoint:
+            authorization_ids = [
+                authorization_id for authorization_id in authorization_ids
+                if authorization_id > checkpoint["last_authorization_id"]
+            ]
+            self.stdout.write(
+                f"Resuming after authorization {checkpoint['last_authorization_id']}; "
+                f"{len(authorization_ids)} authorization(s) remain."
+            )
+        chunks = [
+            authorization_ids[offset:offset + batch_size]
+            for offset in range(0, len(authorization_ids), batch_size)
+        ]
+
+        review_path = output_dir / "validity_interval_catch_up_review.csv"
+        with review_path.open("a" if checkpoint else "w", newline="", encoding="utf-8") as review_handle:
+            review_writer = csv.DictWriter(review_handle, fieldnames=self._report_fields())
+            if not checkpoint:
+                review_writer.writeheader()
+            for chunk_ids, (report_rows, chunk_counts, merged_by_authorization) in zip(
+                chunks,
+                self._planned_chunks(chunks, snapshot_date, workers),
+            ):
+                if write:
+                    with transaction.atomic():
+                        replace_authorization_validity_intervals(merged_by_authorization)
+                    applied += len(merged_by_authorization)
+                # Rows are written only once their batch is applied, so a resumed run does not repeat them.
+                review_writer.writerows(report_rows)
+                review_handle.flush()
+                counts.update(chunk_counts)
+                considered += len(chunk_ids)
+                if not write:
+                    continue
+                self._save_checkpoint(
+                    checkpoint_path,
+                    {
+                        **run_key,
+                        "last_authorization_id": chunk_ids[-1],
+                        "existing_intervals_before": existing_total,
+                        "considered": considered,
+                        "applied": applied,
+                        "counts": dict(counts),
+                    },
+                )
+
+        self._write_csv(
+            output_dir / "validity_interval_catch_up_summary.csv",
+            ["metric", "value"],
+            [{"metric": key, "value": value} for key, value in {
+                "target_database": settings.DATABASES["default"]["NAME"],
+                "since": since.isoformat() if since else "",
+                "all": use_all,
+                "snapshot_date": snapshot_date.isoformat(),
+                "existing_intervals_before": existing_total,
+                "authorizations_considered": considered,
+                **counts,
+            }.items()],
+        )
+
+        self.stdout.write(f"Target database: {settings.DATABASES['default']['NAME']}")
+        self.stdout.write(f"Existing intervals before catch-up: {existing_total}")
+        self.stdout.write(f"Authorizations considered: {considered}")
+        for key, value in sorted(counts.items()):
+            self.stdout.write(f"{key}: {value}")
+        self.stdout.write(str(output_dir / "validity_interval_catch_up_summary.csv"))
+        self.stdout.write(str(review_path))
+
+        if not write:
+            self.stdout.write("Dry run only. Re-run with --write to apply these catch-up changes.")
+            return
+
+        checkpoint_path.unlink(missing_ok=True)
+        self.stdout.write(self.style.SUCCESS(f"Applied catch-up changes for {applied} authorization(s)."))
+
+    def _planned_chunks(self, chunks, snapshot_date, workers):
+        """Yield chunk plans in authorization order, planning ahead in a process pool when asked."""
+        if workers == 1 or len(chunks) < 2:
+            for chunk_ids in chunks:
+                yield self._plan_chunk(chunk_ids, snapshot_date)
+            return
+        # Forked workers must not share this process's database connections.
+        connections.close_all()
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_plan_worker) as executor:
+            yield from executor.map(
+                _plan_chunk_in_worker,
+                chunks,
+                [snapshot_date] * len(chunks),
+            )
+
+    def _plan_chunk(self, authorization_ids, snapshot_date):
+        """Return (review rows, action counts, merged intervals to write) for one batch of authorizations."""
+        authorizations = list(self._base_authorizations().filter(id__in=authorization_ids).order_by("id"))
+        intervals_by_authorization = validity_intervals_by_authorization(authorization_ids)
         helper = RestorePopulationCommand()
-        plans = []
         merged_by_authorization = {}
         report_rows = []
         counts = Counter()
@@ -96,13 +246,10 @@ class Command(BaseCommand):
                     "start uses stored authorization expiration and end uses effective expiration."
                 ),
             )
-            existing_intervals = list(
-                AuthorizationValidityInterval.objects.filter(authorization=authorization).order_by("start_date", "end_date", "id")
-            )
+            existing_intervals = intervals_by_authorization.get(authorization.id, [])
 
             if isinstance(candidate, str):
                 counts[f"skipped_{candidate}"] += 1
-                plans.append(CatchUpPlan(authorization.id, f"skipped_{candidate}", len(existing_intervals), len(existing_intervals), ""))
                 report_rows.append(self._report_row(authorization, candidate, existing_intervals, None, ""))
                 continue
 
@@ -121,66 +268,39 @@ class Command(BaseCommand):
             )
             action = self._action_for(existing_intervals, merged)
             counts[action] += 1
-            plans.append(CatchUpPlan(authorization.id, action, len(existing_intervals), len(merged), ""))
             report_rows.append(self._report_row(authorization, action, existing_intervals, candidate, merged))
 
             if action != "unchanged":
                 merged_by_authorization[authorization.id] = merged
 
-        self._write_csv(output_dir / "validity_interval_catch_up_review.csv", self._report_fields(), report_rows)
-        self._write_csv(
-            output_dir / "validity_interval_catch_up_summary.csv",
-            ["metric", "value"],
-            [{"metric": key, "value": value} for key, value in {
-                "target_database": settings.DATABASES["default"]["NAME"],
-                "since": since.isoformat() if since else "",
-                "all": use_all,
-                "snapshot_date": snapshot_date.isoformat(),
-                "existing_intervals_before": existing_total,
-                "authorizations_considered": len(plans),
-                **counts,
-            }.items()],
-        )
-
-        self.stdout.write(f"Target database: {settings.DATABASES['default']['NAME']}")
-        self.stdout.write(f"Existing intervals before catch-up: {existing_total}")
-        self.stdout.write(f"Authorizations considered: {len(plans)}")
-        for key, value in sorted(counts.items()):
-            self.stdout.write(f"{key}: {value}")
-        self.stdout.write(str(output_dir / "validity_interval_catch_up_summary.csv"))
-        self.stdout.write(str(output_dir / "validity_interval_catch_up_review.csv"))
-
-        if not write:
-            self.stdout.write("Dry run only. Re-run with --write to apply these catch-up changes.")
-            return
-
-        with transaction.atomic():
-            for authorization_id, merged_intervals in merged_by_authorization.items():
-                AuthorizationValidityInterval.objects.filter(authorization_id=authorization_id).delete()
-                AuthorizationValidityInterval.objects.bulk_create(
-                    [
-                        AuthorizationValidityInterval(
-                            authorization_id=interval.authorization_id,
-                            start_date=interval.start_date,
-                            end_date=interval.end_date,
-                            source=interval.source,
-                            note=interval.note,
-                        )
-                        for interval in merged_intervals
-                    ]
-                )
+        return report_rows, counts, merged_by_authorization
 
-        self.stdout.write(self.style.SUCCESS(f"Applied catch-up changes for {len(merged_by_authorization)} authorization(s)."))
+    def _load_checkpoint(self, path, run_key, snapshot_date):
+        if not path.exists():
+            return None
+        checkpoint = json.loads(path.read_text(encoding="utf-8"))
+        if any(checkpoint.get(key) != value for key, value in run_key.items()):
+            raise CommandError(
+                f"{path} was left by a run with different --since/--all options. "
+                "Re-run with those options to resume it, or pass --restart to discard it."
+            )
+        if snapshot_date and checkpoint["snapshot_date"] != snapshot_date.isoformat():
+            raise CommandError(
+                f"{path} was left by a run with --snapshot-date {checkpoint['snapshot_date']}. "
+                "Omit --snapshot-date or pass that date to resume it, or pass --restart to discard it."
+            )
+        return checkpoint
 
-    def _authorizations_since(self, since):
-        return list(
-            self._base_authorizations()
-            .filter(Q(updated_at__gte=since) | Q(person__user__updated_at__gte=since))
-            .order_by("id")
-        )
+    def _save_checkpoint(self, path, checkpoint):
+        temporary_path = path.with_suffix(".tmp")
+        temporary_path.write_text(json.dumps(checkpoint), encoding="utf-8")
+        temporary_path.replace(path)
 
-    def _all_authorizations(self):
-        return list(self._base_authorizations().order_by("id"))
+    def _authorization_ids(self, since):
+        authorizations = Authorization.objects.all()
+        if since:
+            authorizations = authorizations.filter(Q(updated_at__gte=since) | Q(person__user__updated_at__gte=since))
+        return list(authorizations.order_by("id").values_list("id", flat=True))
 
     def _base_authorizations(self):
         return Authorization.objects.select_related("person__user", "style__discipline", "status")
@@ -227,7 +347,7 @@ class Command(BaseCommand):
 
     def _parse_snapshot_date(self, value):
         if not value:
-            return date.today()
+            return None
         parsed = parse_date(value)
         if not parsed:
             raise CommandError("--snapshot-date must be YYYY-MM-DD.")
@@ -1,7 +1,7 @@
 from django.core.management.base import BaseCommand
 from django.db import transaction
 
-from authorizations.models import Authorization, AuthorizationStatus
+from authorizations.models import Authorization, AuthorizationStatus, deferred_authorization_audit
 
 
 class Command(BaseCommand):
@@ -39,7 +39,7 @@ class Command(BaseCommand):
             self.stdout.write("Dry run only. Re-run with --apply to mark these authorizations Inactive.")
             return
 
-        with transaction.atomic():
+        with transaction.atomic(), deferred_authorization_audit():
             for authorization in junior_authorizations:
                 authorization.status = inactive_status
                 authorization.save(update_fields=["status", "updated_at"])
@@ -0,0 +1,90 @@
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from authorizations.fighter_cards import (
+    FIGHTER_CARD_BATCH_CHUNK_SIZE,
+    FIGHTER_CARD_TEMPLATES,
+    fighter_card_batch_person_ids,
+    render_fighter_card_batch,
+)
+from authorizations.models import Branch
+
+
+class Command(BaseCommand):
+    help = "Generate fighter cards for a branch, region, or list of people as one merged PDF or a zip of PDFs."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--output",
+            required=True,
+            help="File to write. A .zip name writes one PDF per person; anything else writes one merged PDF.",
+        )
+        parser.add_argument(
+            "--template-id",
+            choices=sorted(FIGHTER_CARD_TEMPLATES),
+            default="1",
+            help="Card type: 1 = fighter, 2 = youth, 3 = equestrian.",
+        )
+        parser.add_argument("--branch", help="Branch name. Only people assigned to this branch are included.")
+        parser.add_argument("--region", help="Region or principality name. Includes people in its sub-branches.")
+        parser.add_argument(
+            "--person-id",
+            action="append",
+            type=int,
+            default=[],
+            help="Person (user) ID to include. May be repeated.",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=FIGHTER_CARD_BATCH_CHUNK_SIZE,
+            help="Number of people whose authorizations are loaded per query.",
+        )
+
+    def _branch(self, name, *, region=False):
+        branches = Branch.objects.regions() if region else Branch.objects.all()
+        matches = list(branches.filter(name__iexact=name.strip()))
+        label = "Region" if region else "Branch"
+        if not matches:
+            raise CommandError(f'{label} "{name}" was not found.')
+        if len(matches) > 1:
+            raise CommandError(f'{label} name "{name}" matches more than one branch.')
+        return matches[0]
+
+    def handle(self, *args, **options):
+        if options["batch_size"] < 1:
+            raise CommandError("--batch-size must be at least 1.")
+        if not (options["branch"] or options["region"] or options["person_id"]):
+            raise CommandError("Provide --branch, --region, or at least one --person-id.")
+
+        branch = self._branch(options["branch"]) if options["branch"] else None
+        region = self._branch(options["region"], region=True) if options["region"] else None
+        person_ids = fighter_card_batch_person_ids(
+            branch=branch,
+            region=region,
+            person_ids=options["person_id"] or None,
+        )
+        self.stdout.write(f"People with active authorizations selected: {len(person_ids)}")
+        if not person_ids:
+            return
+
+        output_path = Path(options["output"])
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        archive = output_path.suffix.lower() == ".zip"
+        with output_path.open("wb") as output_file:
+            result = render_fighter_card_batch(
+                person_ids,
+                options["template_id"],
+                output_file,
+                archive=archive,
+                chunk_size=options["batch_size"],
+            )
+
+        for person_id, reason in result.skipped:
+            self.stdout.write(f"Skipped person {person_id}: {reason}")
+        if not result.rendered:
+            output_path.unlink(missing_ok=True)
+            self.stdout.write("No cards were generated.")
+            return
+        self.stdout.write(self.style.SUCCESS(f"Wrote {len(result.rendered)} card(s) to {output_path}."))
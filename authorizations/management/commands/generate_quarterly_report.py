@@ -4,7 +4,11 @@ from django.core.management.base import BaseCommand, CommandError
 from django.db import transaction
 
 from authorizations.models import ReportValue, ReportingPeriod
-from authorizations.reporting import ReportingConfigurationError, build_current_report_snapshot
+from authorizations.reporting import (
+    ReportingConfigurationError,
+    build_current_report_snapshot,
+    build_historical_report_snapshots,
+)
 
 
 QUARTER_END_DATES = {
@@ -15,6 +19,9 @@ QUARTER_END_DATES = {
 }
 
 
+DEFAULT_OFFICER_NAME = 'Generated by authorization portal'
+
+
 def quarter_for_date(value):
     return ((value.month - 1) // 3) + 1
 
@@ -34,7 +41,8 @@ def is_quarter_end(value):
 class Command(BaseCommand):
     help = (
         'Generate and store one quarterly report snapshot from current authorization data. '
-        'Existing quarterly reports are immutable unless --force is provided.'
+        'Existing quarterly reports are immutable unless --force is provided. '
+        'Use --as-of to count from authorization validity intervals, which can regenerate past quarters.'
     )
 
     def add_arguments(self, parser):
@@ -51,26 +59,129 @@ class Command(BaseCommand):
         )
         parser.add_argument(
             '--authorization-officer-name',
-            default='Generated by authorization portal',
-            help='Authorization officer name to store on the reporting period.',
+            help=(
+                'Authorization officer name to store on the reporting period. Defaults to '
+                f'"{DEFAULT_OFFICER_NAME}" for new periods; with --all-periods, backfilled '
+                'periods keep their recorded name unless this is given.'
+            ),
         )
         parser.add_argument(
             '--force',
             action='store_true',
             help='Replace an existing stored report for the selected quarter.',
         )
+        parser.add_argument(
+            '--as-of',
+            action='store_true',
+            help=(
+                'Count who was authorized on each quarter end from authorization validity intervals '
+                'instead of current authorization rows. Requires --year/--quarter or --all-periods.'
+            ),
+        )
+        parser.add_argument(
+            '--all-periods',
+            action='store_true',
+            help=(
+                'With --as-of, backfill every stored reporting period that has ended. Periods that '
+                'already have report values are skipped unless --force is provided.'
+            ),
+        )
+
+    def _store_report(self, period, year, quarter, officer_name, snapshot):
+        with transaction.atomic():
+            if period:
+                if officer_name is not None:
+                    period.authorization_officer_name = officer_name
+                    period.save(update_fields=['authorization_officer_name', 'updated_at'])
+                ReportValue.objects.filter(reporting_period=period).delete()
+            else:
+                period = ReportingPeriod.objects.create(
+                    year=year,
+                    quarter=quarter,
+                    authorization_officer_name=officer_name,
+                )
+
+            report_values = []
+            for report_family, rows in snapshot.items():
+                for row in rows:
+                    report_values.append(
+                        ReportValue(
+                            reporting_period=period,
+                            report_family=report_family,
+                            region_name=row['region_name'],
+                            subject_name=row['subject_name'],
+                            metric_name=row['metric_name'],
+                            value=row['value'],
+                            display_order=row['display_order'],
+                        )
+                    )
+            ReportValue.objects.bulk_create(report_values, batch_size=1000)
+        return report_values
+
+    def _backfill_all_periods(self, force, today, officer_name=None):
+        periods = [
+            period
+            for period in ReportingPeriod.objects.order_by('year', 'quarter')
+            if period.end_date < today
+        ]
+        stored_period_ids = set(
+            ReportValue.objects.filter(reporting_period__in=periods)
+            .values_list('reporting_period_id', flat=True)
+            .distinct()
+        )
+        selected = []
+        for period in periods:
+            if period.id in stored_period_ids and not force:
+                self.stdout.write(f'Skipped Q{period.quarter} {period.year}: already has a stored report.')
+                continue
+            selected.append(period)
+        if not selected:
+            self.stdout.write('No reporting periods to backfill.')
+            return
+
+        try:
+            snapshots = build_historical_report_snapshots([period.end_date for period in selected])
+        except ReportingConfigurationError as exc:
+            raise CommandError('; '.join(exc.messages))
+
+        for period in selected:
+            report_values = self._store_report(
+                period,
+                period.year,
+                period.quarter,
+                officer_name,
+                snapshots[period.end_date],
+            )
+            action = 'Replaced' if period.id in stored_period_ids else 'Backfilled'
+            self.stdout.write(
+                f'{action} stored report for Q{period.quarter} {period.year} as of '
+                f'{period.end_date.isoformat()} ({len(report_values)} values).'
+            )
+        self.stdout.write(self.style.SUCCESS(f'Reporting periods backfilled: {len(selected)}'))
 
     def handle(self, *args, **options):
         year = options['year']
         quarter = options['quarter']
         force = options['force']
-        officer_name = options['authorization_officer_name'].strip()
+        use_intervals = options['as_of']
+        officer_name = options['authorization_officer_name']
         today = date.today()
 
         if bool(year) != bool(quarter):
             raise CommandError('--year and --quarter must be provided together.')
-        if not officer_name:
-            raise CommandError('--authorization-officer-name cannot be blank.')
+        if officer_name is not None:
+            officer_name = officer_name.strip()
+            if not officer_name:
+                raise CommandError('--authorization-officer-name cannot be blank.')
+        if options['all_periods']:
+            if not use_intervals:
+                raise CommandError('--all-periods requires --as-of.')
+            if year:
+                raise CommandError('--all-periods cannot be combined with --year/--quarter.')
+            self._backfill_all_periods(force, today, officer_name)
+            return
+        if use_intervals and not year:
+            raise CommandError('--as-of requires --year/--quarter or --all-periods.')
 
         if year and quarter:
             as_of = quarter_end_date(year, quarter)
@@ -92,38 +203,20 @@ class Command(BaseCommand):
             )
 
         try:
-            snapshot = build_current_report_snapshot(as_of=as_of)
+            if use_intervals:
+                snapshot = build_historical_report_snapshots([as_of])[as_of]
+            else:
+                snapshot = build_current_report_snapshot(as_of=as_of)
         except ReportingConfigurationError as exc:
             raise CommandError('; '.join(exc.messages))
 
-        with transaction.atomic():
-            if existing_period:
-                existing_period.authorization_officer_name = officer_name
-                existing_period.save(update_fields=['authorization_officer_name', 'updated_at'])
-                ReportValue.objects.filter(reporting_period=existing_period).delete()
-                period = existing_period
-            else:
-                period = ReportingPeriod.objects.create(
-                    year=year,
-                    quarter=quarter,
-                    authorization_officer_name=officer_name,
-                )
-
-            report_values = []
-            for report_family, rows in snapshot.items():
-                for row in rows:
-                    report_values.append(
-                        ReportValue(
-                            reporting_period=period,
-                            report_family=report_family,
-                            region_name=row['region_name'],
-                            subject_name=row['subject_name'],
-                            metric_name=row['metric_name'],
-                            value=row['value'],
-                            display_order=row['display_order'],
-                        )
-                    )
-            ReportValue.objects.bulk_create(report_values, batch_size=1000)
+        report_values = self._store_report(
+            existing_period,
+            year,
+            quarter,
+            officer_name or DEFAULT_OFFICER_NAME,
+            snapshot,
+        )
 
         action = 'Replaced' if existing_period else 'Generated'
         self.stdout.write(
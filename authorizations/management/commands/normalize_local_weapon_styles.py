@@ -7,6 +7,7 @@ from authorizations.models import (
     LegacyAuthorizationRecoveryEntry,
     Sanction,
     WeaponStyle,
+    refresh_effective_expirations,
 )
 
 
@@ -76,9 +77,14 @@ class Command(BaseCommand):
             )
 
         planned_changes = []
+        self._affected_person_ids = set()
         with transaction.atomic(using=database_alias):
             planned_changes.extend(self._normalize_disciplines(database_alias, apply_changes))
             planned_changes.extend(self._normalize_styles(database_alias, apply_changes))
+            if apply_changes and self._affected_person_ids:
+                # Prerequisite limits are matched by discipline and style name, so
+                # renames move effective expirations as well as merges.
+                refresh_effective_expirations(self._affected_person_ids, using=database_alias)
             if not apply_changes:
                 transaction.set_rollback(True, using=database_alias)
 
@@ -106,6 +112,7 @@ class Command(BaseCommand):
                 messages.append(f'Merge discipline {old_name!r} into {new_name!r}.')
             else:
                 if apply_changes:
+                    self._collect_affected_people(database_alias, style__discipline=old_discipline)
                     old_discipline.name = new_name
                     old_discipline.save(update_fields=['name'])
                 messages.append(f'Rename discipline {old_name!r} to {new_name!r}.')
@@ -136,6 +143,7 @@ class Command(BaseCommand):
                     )
                 else:
                     if apply_changes:
+                        self._collect_affected_people(database_alias, style=old_style)
                         old_style.name = new_name
                         old_style.save(update_fields=['name'])
                     messages.append(
@@ -153,6 +161,7 @@ class Command(BaseCommand):
             if matching_new_style:
                 self._merge_style(database_alias, old_style, matching_new_style, apply_changes)
             elif apply_changes:
+                self._collect_affected_people(database_alias, style=old_style)
                 old_style.discipline = new_discipline
                 old_style.save(update_fields=['discipline'])
         if apply_changes:
@@ -175,7 +184,15 @@ class Command(BaseCommand):
         if not apply_changes:
             return
 
+        self._collect_affected_people(database_alias, style=old_style)
         Authorization.objects.using(database_alias).filter(style=old_style).update(style=new_style)
         LegacyAuthorizationRecoveryEntry.objects.using(database_alias).filter(style=old_style).update(style=new_style)
         Sanction.objects.using(database_alias).filter(style=old_style).update(style=new_style)
         old_style.delete()
+
+    def _collect_affected_people(self, database_alias, **filters):
+        self._affected_person_ids.update(
+            Authorization.objects.using(database_alias)
+            .filter(**filters)
+            .values_list('person_id', flat=True)
+        )
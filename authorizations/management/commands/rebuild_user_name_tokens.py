@@ -0,0 +1,65 @@
+from collections import defaultdict
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from authorizations.models import User, UserNameToken, user_name_tokens
+
+
+class Command(BaseCommand):
+    help = "Rebuild the indexed first/last name tokens used by private name search."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--apply",
+            action="store_true",
+            help="Persist changes. Without this flag, only report users whose tokens are out of date.",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Number of users to compare per query batch.",
+        )
+
+    def handle(self, *args, **options):
+        apply_changes = options["apply"]
+        batch_size = options["batch_size"]
+        if batch_size < 1:
+            raise CommandError("--batch-size must be at least 1.")
+
+        user_ids = list(User.objects.order_by("id").values_list("id", flat=True))
+        stale_tokens = {}
+        for offset in range(0, len(user_ids), batch_size):
+            batch_ids = user_ids[offset:offset + batch_size]
+            stored = defaultdict(set)
+            for user_id, name_field, position, token in UserNameToken.objects.filter(
+                user_id__in=batch_ids,
+            ).values_list("user_id", "name_field", "position", "token"):
+                stored[user_id].add((name_field, position, token))
+            for user_id, first_name, last_name in User.objects.filter(id__in=batch_ids).values_list(
+                "id",
+                "first_name",
+                "last_name",
+            ):
+                expected = user_name_tokens(user_id, first_name, last_name)
+                if {(row.name_field, row.position, row.token) for row in expected} != stored[user_id]:
+                    stale_tokens[user_id] = expected
+
+        self.stdout.write(f"Users considered: {len(user_ids)}")
+        self.stdout.write(f"Users with out-of-date name tokens: {len(stale_tokens)}")
+
+        if not stale_tokens:
+            return
+        if not apply_changes:
+            self.stdout.write("Dry run only. Re-run with --apply to rebuild these name tokens.")
+            return
+
+        with transaction.atomic():
+            UserNameToken.objects.filter(user_id__in=stale_tokens).delete()
+            UserNameToken.objects.bulk_create(
+                [token for tokens in stale_tokens.values() for token in tokens],
+                batch_size=batch_size,
+            )
+
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt name tokens for {len(stale_tokens)} user(s)."))
@@ -0,0 +1,61 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from authorizations.models import Authorization, effective_expiration_changes
+
+
+class Command(BaseCommand):
+    help = "Recompute the stored effective expiration for authorizations whose derived value has drifted."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--apply",
+            action="store_true",
+            help="Persist changes. Without this flag, only report matching records.",
+        )
+        parser.add_argument(
+            "--person-id",
+            type=int,
+            action="append",
+            dest="person_ids",
+            help="Limit the recompute to one person. May be repeated.",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=500,
+            help="Number of people to recompute per query batch.",
+        )
+
+    def handle(self, *args, **options):
+        apply_changes = options["apply"]
+        batch_size = options["batch_size"]
+        if batch_size < 1:
+            raise CommandError("--batch-size must be at least 1.")
+
+        person_ids = options["person_ids"] or list(
+            Authorization.objects.order_by("person_id").values_list("person_id", flat=True).distinct()
+        )
+
+        considered = 0
+        changed_rows = []
+        for offset in range(0, len(person_ids), batch_size):
+            computed, changed = effective_expiration_changes(person_ids[offset:offset + batch_size])
+            considered += len(computed)
+            changed_rows.extend(changed)
+
+        self.stdout.write(f"Authorizations considered: {considered}")
+        self.stdout.write(f"Stored effective expirations out of date: {len(changed_rows)}")
+        for row in changed_rows:
+            self.stdout.write(f"- authorization_id={row.id}: effective expiration {row.effective_expiration_date}")
+
+        if not changed_rows:
+            return
+        if not apply_changes:
+            self.stdout.write("Dry run only. Re-run with --apply to store the recomputed values.")
+            return
+
+        with transaction.atomic():
+            Authorization.objects.bulk_update(changed_rows, ["effective_expiration_date"], batch_size=batch_size)
+
+        self.stdout.write(self.style.SUCCESS(f"Updated {len(changed_rows)} stored effective expiration(s)."))
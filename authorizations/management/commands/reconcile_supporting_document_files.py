@@ -0,0 +1,74 @@
+import posixpath
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from authorizations.models import SupportingDocument
+
+SUPPORTING_DOCUMENT_ROOT = "supporting_documents"
+
+
+def stored_file_names(storage, root):
+    """Return every file name under ``root`` in storage, listing each directory once."""
+    names = set()
+    pending = [root]
+    while pending:
+        directory = pending.pop()
+        try:
+            subdirectories, files = storage.listdir(directory)
+        except FileNotFoundError:
+            continue
+        names.update(posixpath.join(directory, name) for name in files)
+        pending.extend(posixpath.join(directory, name) for name in subdirectories)
+    return names
+
+
+class Command(BaseCommand):
+    help = "Refresh the stored file-present flag on supporting documents from one walk of the upload folders."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--apply",
+            action="store_true",
+            help="Persist changes. Without this flag, only report documents whose flag is out of date.",
+        )
+
+    def handle(self, *args, **options):
+        storage = SupportingDocument._meta.get_field("file").storage
+        present_names = stored_file_names(storage, SUPPORTING_DOCUMENT_ROOT)
+
+        now_missing = []
+        now_present = []
+        considered = 0
+        for document_id, name, file_present in (
+            SupportingDocument.objects.order_by("id").values_list("id", "file", "file_present").iterator()
+        ):
+            considered += 1
+            exists = bool(name) and name in present_names
+            if file_present and not exists:
+                now_missing.append(document_id)
+            elif exists and not file_present:
+                now_present.append(document_id)
+
+        self.stdout.write(f"Supporting documents considered: {considered}")
+        self.stdout.write(f"Files found under {SUPPORTING_DOCUMENT_ROOT}/: {len(present_names)}")
+        self.stdout.write(f"Documents whose file has gone missing: {len(now_missing)}")
+        for document_id in now_missing:
+            self.stdout.write(f"- document_id={document_id}: file missing")
+        self.stdout.write(f"Documents whose file has reappeared: {len(now_present)}")
+        for document_id in now_present:
+            self.stdout.write(f"- document_id={document_id}: file present")
+
+        if not now_missing and not now_present:
+            return
+        if not options["apply"]:
+            self.stdout.write("Dry run only. Re-run with --apply to store the file-present flags.")
+            return
+
+        with transaction.atomic():
+            SupportingDocument.objects.filter(id__in=now_missing).update(file_present=False)
+            SupportingDocument.objects.filter(id__in=now_present).update(file_present=True)
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Updated {len(now_missing) + len(now_present)} supporting document flag(s).")
+        )
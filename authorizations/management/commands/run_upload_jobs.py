@@ -0,0 +1,55 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from authorizations.models import UploadJob
+from authorizations.upload_jobs import UPLOAD_JOB_HANDLERS, claim_upload_job, run_upload_job
+
+
+class Command(BaseCommand):
+    help = "Process queued membership roster and legacy authorization uploads."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--loop",
+            action="store_true",
+            help="Keep running and poll for new uploads instead of exiting once the queue is empty.",
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=5,
+            help="Seconds to wait between polls with --loop when nothing is queued.",
+        )
+        parser.add_argument(
+            "--max-jobs",
+            type=int,
+            default=0,
+            help="Exit after this many jobs. 0 means no limit.",
+        )
+
+    def handle(self, *args, **options):
+        if options["interval"] <= 0:
+            raise CommandError("--interval must be greater than 0.")
+        if options["max_jobs"] < 0:
+            raise CommandError("--max-jobs cannot be negative.")
+
+        totals = {UploadJob.Status.SUCCEEDED: 0, UploadJob.Status.FAILED: 0}
+        while not options["max_jobs"] or sum(totals.values()) < options["max_jobs"]:
+            job = claim_upload_job()
+            if job is None:
+                if not options["loop"]:
+                    break
+                time.sleep(options["interval"])
+                continue
+            run_upload_job(job, UPLOAD_JOB_HANDLERS[job.kind])
+            totals[job.status] += 1
+            outcome = job.error or "; ".join(text for _, text in job.result_messages)
+            self.stdout.write(f"Job {job.pk} {job.kind} {job.source_filename}: {job.status}. {outcome}")
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Uploads processed: {totals[UploadJob.Status.SUCCEEDED]} succeeded, "
+                f"{totals[UploadJob.Status.FAILED]} failed."
+            )
+        )
@@ -0,0 +1,85 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from authorizations.models import OutboundEmail
+from authorizations.outbound_email import EMAIL_MAX_ATTEMPTS, deliver_queued_email, purge_failed_email_bodies
+
+
+class Command(BaseCommand):
+    help = "Deliver queued outbound email through the configured email backend, retrying failures with backoff."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=50,
+            help="Messages sent over one backend connection per batch.",
+        )
+        parser.add_argument(
+            "--max-attempts",
+            type=int,
+            default=EMAIL_MAX_ATTEMPTS,
+            help="Attempts before a message is marked failed.",
+        )
+        parser.add_argument(
+            "--loop",
+            action="store_true",
+            help="Keep running and poll for new mail instead of exiting once the queue is drained.",
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=15,
+            help="Seconds to wait between polls with --loop when nothing is due.",
+        )
+        parser.add_argument(
+            "--requeue-failed",
+            action="store_true",
+            help=(
+                "Move messages marked failed back into the queue with their attempt count reset, then deliver. "
+                "Messages whose body has already been cleared are left failed."
+            ),
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        max_attempts = options["max_attempts"]
+        if batch_size < 1:
+            raise CommandError("--batch-size must be at least 1.")
+        if max_attempts < 1:
+            raise CommandError("--max-attempts must be at least 1.")
+
+        purged = purge_failed_email_bodies()
+        if purged:
+            self.stdout.write(f"Cleared bodies of old failed messages: {purged}")
+
+        if options["requeue_failed"]:
+            requeued = OutboundEmail.objects.filter(status=OutboundEmail.Status.FAILED).exclude(body="").update(
+                status=OutboundEmail.Status.QUEUED,
+                attempts=0,
+                next_attempt_at=timezone.now(),
+            )
+            self.stdout.write(f"Failed messages requeued: {requeued}")
+
+        totals = {"sent": 0, "retried": 0, "failed": 0}
+        while True:
+            result = deliver_queued_email(batch_size=batch_size, max_attempts=max_attempts)
+            for key in totals:
+                totals[key] += result[key]
+            if result:
+                self.stdout.write(
+                    f"Batch: sent {result['sent']}, retrying {result['retried']}, failed {result['failed']}"
+                )
+                continue
+            if not options["loop"]:
+                break
+            time.sleep(options["interval"])
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Sent {totals['sent']} message(s); {totals['retried']} scheduled for retry; "
+                f"{totals['failed']} failed."
+            )
+        )
@@ -1,4 +1,11 @@
+import logging
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
 from django.contrib import messages
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
 from django.shortcuts import redirect
 from django.urls import Resolver404, resolve
 
@@ -7,6 +14,18 @@ from .maintenance import (
     maintenance_lock_enabled,
     maintenance_lock_message,
 )
+from .request_metrics import (
+    UNRESOLVED_VIEW_NAME,
+    QueryTimer,
+    RequestSample,
+    budget_for_view,
+    instrument_template_rendering,
+    log_request_metrics,
+    request_metrics_enabled,
+    request_metrics_store,
+    start_template_timer,
+    stop_template_timer,
+)
 
 
 class MaintenanceLockMiddleware:
@@ -41,3 +60,68 @@ class MaintenanceLockMiddleware:
         ):
             return False
         return True
+
+
+class RequestMetricsMiddleware:
+    """
+    Record query count, database time, template time, and latency per URL name.
+
+    Opt in with AUTHZ_REQUEST_METRICS_ENABLED. Requests over their view budget
+    are logged as warnings; AUTHZ_REQUEST_METRICS_LOG also logs every request.
+    """
+
+    def __init__(self, get_response):
+        if not request_metrics_enabled():
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        instrument_template_rendering()
+
+    def __call__(self, request):
+        query_timer = QueryTimer()
+        template_timer, template_token = start_template_timer()
+        started = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(query_timer))
+                response = self.get_response(request)
+        finally:
+            stop_template_timer(template_token)
+        total_ms = (time.perf_counter() - started) * 1000
+
+        resolver_match = getattr(request, 'resolver_match', None)
+        url_name = getattr(resolver_match, 'url_name', None) or UNRESOLVED_VIEW_NAME
+        budget = budget_for_view(url_name, getattr(resolver_match, 'func', None))
+        over_budget = bool(
+            (budget.queries is not None and query_timer.queries > budget.queries)
+            or (budget.milliseconds is not None and total_ms > budget.milliseconds)
+        )
+        sample = RequestSample(
+            queries=query_timer.queries,
+            db_ms=query_timer.seconds * 1000,
+            template_ms=template_timer.seconds * 1000,
+            total_ms=total_ms,
+            over_budget=over_budget,
+        )
+        request_metrics_store.record(url_name, sample, budget)
+
+        fields = {
+            'url_name': url_name,
+            'method': request.method,
+            'status': getattr(response, 'status_code', None),
+            'queries': sample.queries,
+            'db_ms': round(sample.db_ms, 1),
+            'template_ms': round(sample.template_ms, 1),
+            'total_ms': round(sample.total_ms, 1),
+        }
+        if over_budget:
+            log_request_metrics(
+                'view_budget_exceeded',
+                level=logging.WARNING,
+                budget_queries=budget.queries,
+                budget_ms=budget.milliseconds,
+                **fields,
+            )
+        elif getattr(settings, 'AUTHZ_REQUEST_METRICS_LOG', False):
+            log_request_metrics('request_metrics', **fields)
+        return response
@@ -0,0 +1,135 @@
+from collections import defaultdict
+from datetime import date
+
+from django.db import migrations, models
+
+MARSHAL_STATUS_STYLE_NAMES = ['Junior Marshal', 'Senior Marshal']
+YOUTH_MARSHAL_DISCIPLINE_NAMES = ['Youth Armored', 'Youth Rapier']
+YOUTH_RAPIER_CATEGORY_NAMES = ['Lion', 'Gryphon', 'Dragon']
+EQUESTRIAN_MOUNTED_WEAPON_GAME_STYLE_NAMES = [
+    'Mounted Archery',
+    'Crest Combat',
+    'Mounted Crest Combat',
+    'Jousting',
+    'Foam-Tipped Jousting',
+]
+EQUESTRIAN_MOUNTED_HEAVY_COMBAT_STYLE_NAMES = ['Mounted Heavy Combat', 'Mounted Combat']
+EXPIRED_EFFECTIVE_EXPIRATION = date(1000, 1, 1)
+
+
+def compute_effective_expiration(
+    *,
+    style_name,
+    discipline_name,
+    expiration,
+    membership_expiration,
+    background_check_expiration,
+    active_authorizations,
+):
+    if not style_name or not discipline_name:
+        return expiration
+
+    def latest(discipline, names=None, exclude=()):
+        expirations = [
+            row_expiration
+            for row_discipline, row_style, row_expiration in active_authorizations
+            if row_discipline == discipline
+            and (names is None or row_style in names)
+            and row_style not in exclude
+        ]
+        return max(expirations) if expirations else EXPIRED_EFFECTIVE_EXPIRATION
+
+    if style_name in MARSHAL_STATUS_STYLE_NAMES:
+        base_expiration = min(expiration, membership_expiration or EXPIRED_EFFECTIVE_EXPIRATION)
+        if discipline_name in YOUTH_MARSHAL_DISCIPLINE_NAMES:
+            return min(base_expiration, background_check_expiration or EXPIRED_EFFECTIVE_EXPIRATION)
+        return base_expiration
+    if discipline_name == 'Rapier Combat' and style_name != 'Single Sword':
+        return min(expiration, latest('Rapier Combat', ['Single Sword']))
+    if (
+        discipline_name == 'Youth Rapier'
+        and style_name != 'Single Sword'
+        and not style_name.endswith(' - Single Sword')
+    ):
+        single_sword_names = ['Single Sword']
+        for category in YOUTH_RAPIER_CATEGORY_NAMES:
+            if style_name.startswith(f'{category} - '):
+                single_sword_names.append(f'{category} - Single Sword')
+                break
+        return min(expiration, latest('Youth Rapier', single_sword_names))
+    if discipline_name == 'Cut & Thrust' and style_name == 'Spear':
+        return min(
+            expiration,
+            latest('Cut & Thrust', exclude=['Spear', *MARSHAL_STATUS_STYLE_NAMES]),
+        )
+    if discipline_name == 'Equestrian':
+        if style_name in EQUESTRIAN_MOUNTED_HEAVY_COMBAT_STYLE_NAMES:
+            return min(
+                expiration,
+                latest('Equestrian', ['Mounted Gaming']),
+                latest('Equestrian', ['General Riding']),
+            )
+        if style_name in EQUESTRIAN_MOUNTED_WEAPON_GAME_STYLE_NAMES:
+            return min(expiration, latest('Equestrian', ['Mounted Gaming']))
+        if style_name == 'Mounted Gaming':
+            return min(expiration, latest('Equestrian', ['General Riding']))
+    return expiration
+
+
+def backfill_effective_expiration_dates(apps, schema_editor):
+    Authorization = apps.get_model('authorizations', 'Authorization')
+    db_alias = schema_editor.connection.alias
+
+    rows = list(
+        Authorization.objects.using(db_alias).values(
+            'id',
+            'person_id',
+            'expiration',
+            'status__name',
+            'style__name',
+            'style__discipline__name',
+            'person__user__membership_expiration',
+            'person__user__background_check_expiration',
+        )
+    )
+    active_by_person = defaultdict(list)
+    for row in rows:
+        if row['status__name'] == 'Active' and row['style__name']:
+            active_by_person[row['person_id']].append(
+                (row['style__discipline__name'], row['style__name'], row['expiration'])
+            )
+
+    updates = []
+    for row in rows:
+        updates.append(Authorization(
+            id=row['id'],
+            effective_expiration_date=compute_effective_expiration(
+                style_name=row['style__name'],
+                discipline_name=row['style__discipline__name'],
+                expiration=row['expiration'],
+                membership_expiration=row['person__user__membership_expiration'],
+                background_check_expiration=row['person__user__background_check_expiration'],
+                active_authorizations=active_by_person[row['person_id']],
+            ),
+        ))
+    Authorization.objects.using(db_alias).bulk_update(updates, ['effective_expiration_date'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('authorizations', '0038_authorizationnote_officer_deleted_action'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='authorization',
+            name='effective_expiration_date',
+            field=models.DateField(blank=True, db_index=True, editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='authorization',
+            index=models.Index(fields=['person', 'effective_expiration_date'], name='authorizati_person__8449c4_idx'),
+        ),
+        migrations.RunPython(backfill_effective_expiration_dates, migrations.RunPython.noop),
+    ]
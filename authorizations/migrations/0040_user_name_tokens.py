@@ -0,0 +1,52 @@
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def normalize_private_name(value):
+    return ' '.join(
+        ''.join(character.casefold() if character.isalnum() else ' ' for character in (value or '')).split()
+    )
+
+
+def backfill_user_name_tokens(apps, schema_editor):
+    User = apps.get_model('authorizations', 'User')
+    UserNameToken = apps.get_model('authorizations', 'UserNameToken')
+    db_alias = schema_editor.connection.alias
+
+    tokens = []
+    for user_id, first_name, last_name in User.objects.using(db_alias).values_list('id', 'first_name', 'last_name').iterator():
+        for name_field, value in [('first', first_name), ('last', last_name)]:
+            for position, token in enumerate(normalize_private_name(value).split()):
+                tokens.append(UserNameToken(user_id=user_id, name_field=name_field, position=position, token=token))
+        if len(tokens) >= 1000:
+            UserNameToken.objects.using(db_alias).bulk_create(tokens)
+            tokens = []
+    UserNameToken.objects.using(db_alias).bulk_create(tokens)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('authorizations', '0039_authorization_effective_expiration_date'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserNameToken',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name_field', models.CharField(choices=[('first', 'First Name'), ('last', 'Last Name')], max_length=5)),
+                ('position', models.PositiveSmallIntegerField()),
+                ('token', models.CharField(max_length=150)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='name_tokens', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'user name token',
+                'verbose_name_plural': 'user name tokens',
+                'indexes': [models.Index(fields=['name_field', 'token', 'position'], name='authorizati_name_fi_0352f0_idx')],
+                'constraints': [models.UniqueConstraint(fields=('user', 'name_field', 'position'), name='unique_user_name_token_position')],
+            },
+        ),
+        migrations.RunPython(backfill_user_name_tokens, migrations.RunPython.noop),
+    ]
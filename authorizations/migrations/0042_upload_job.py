@@ -0,0 +1,38 @@
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('authorizations', '0041_outbound_email'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UploadJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('membership_roster', 'Membership Roster'), ('legacy_authorizations', 'Legacy Authorizations')], max_length=30)),
+                ('status', models.CharField(choices=[('queued', 'Queued'), ('running', 'Running'), ('succeeded', 'Succeeded'), ('failed', 'Failed')], default='queued', max_length=10)),
+                ('upload', models.FileField(blank=True, upload_to='upload_jobs/%Y/%m/')),
+                ('source_filename', models.CharField(max_length=255)),
+                ('attempts', models.PositiveSmallIntegerField(default=0)),
+                ('rows_processed', models.PositiveIntegerField(default=0)),
+                ('result_messages', models.JSONField(blank=True, default=list)),
+                ('error', models.TextField(blank=True, default='')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('heartbeat_at', models.DateTimeField(blank=True, null=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('requested_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='upload_jobs', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'upload job',
+                'verbose_name_plural': 'upload jobs',
+                'ordering': ['id'],
+                'indexes': [models.Index(fields=['status', 'heartbeat_at'], name='authorizati_status_d8cb1f_idx'), models.Index(fields=['requested_by', 'created_at'], name='authorizati_request_7a6cb1_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,53 @@
+import posixpath
+
+from django.db import migrations, models
+
+
+SUPPORTING_DOCUMENT_ROOT = 'supporting_documents'
+
+
+def stored_file_names(storage, root):
+    names = set()
+    pending = [root]
+    while pending:
+        directory = pending.pop()
+        try:
+            subdirectories, files = storage.listdir(directory)
+        except FileNotFoundError:
+            continue
+        names.update(posixpath.join(directory, name) for name in files)
+        pending.extend(posixpath.join(directory, name) for name in subdirectories)
+    return names
+
+
+def mark_missing_supporting_document_files(apps, schema_editor):
+    SupportingDocument = apps.get_model('authorizations', 'SupportingDocument')
+    db_alias = schema_editor.connection.alias
+    storage = SupportingDocument._meta.get_field('file').storage
+    present_names = stored_file_names(storage, SUPPORTING_DOCUMENT_ROOT)
+
+    missing_ids = [
+        document_id
+        for document_id, name in SupportingDocument.objects.using(db_alias).values_list('id', 'file').iterator()
+        if not name or name not in present_names
+    ]
+    for offset in range(0, len(missing_ids), 1000):
+        SupportingDocument.objects.using(db_alias).filter(
+            id__in=missing_ids[offset:offset + 1000],
+        ).update(file_present=False)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('authorizations', '0042_upload_job'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='supportingdocument',
+            name='file_present',
+            field=models.BooleanField(default=True),
+        ),
+        migrations.RunPython(mark_missing_supporting_document_files, migrations.RunPython.noop),
+    ]
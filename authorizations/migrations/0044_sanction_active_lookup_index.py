@@ -0,0 +1,19 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('authorizations', '0043_supporting_document_file_present'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='sanction',
+            name='authorizati_person__9f60b8_idx',
+        ),
+        migrations.AddIndex(
+            model_name='sanction',
+            index=models.Index(fields=['person', 'discipline', 'style', 'start_date', 'end_date', 'lifted_at'], name='authorizati_person__4bfb3d_idx'),
+        ),
+    ]
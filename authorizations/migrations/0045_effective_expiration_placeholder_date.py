@@ -0,0 +1,25 @@
+from datetime import date
+
+from django.db import migrations
+
+
+EXPIRED_EFFECTIVE_EXPIRATION = date(1000, 1, 1)
+
+
+def raise_effective_expiration_placeholder(apps, schema_editor):
+    Authorization = apps.get_model('authorizations', 'Authorization')
+    db_alias = schema_editor.connection.alias
+    Authorization.objects.using(db_alias).filter(
+        effective_expiration_date__lt=EXPIRED_EFFECTIVE_EXPIRATION,
+    ).update(effective_expiration_date=EXPIRED_EFFECTIVE_EXPIRATION)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('authorizations', '0044_sanction_active_lookup_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(raise_effective_expiration_placeholder, migrations.RunPython.noop),
+    ]
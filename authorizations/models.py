@@ -1,3 +1,6 @@
+import contextvars
+from collections import defaultdict
+from contextlib import contextmanager
 from datetime import date
 
 from dateutil.relativedelta import relativedelta
@@ -6,8 +9,10 @@ from django.contrib.auth.models import AbstractUser
 from django.core.exceptions import ValidationError
 from django.core.validators import MaxValueValidator, MinValueValidator, RegexValidator
 from django.db import connections, models
-from django.db.models import Case, When, F, Exists, OuterRef, Q, Subquery, Value
-from django.db.models.functions import Coalesce, Least
+from django.db.models import F, Exists, OuterRef, Q
+from django.utils import timezone
+
+from .report_journal import mark_report_people_changed
 
 BRANCH_TYPE_CHOICES = [
     ('Kingdom', 'Kingdom'),
@@ -123,14 +128,18 @@ class User(AbstractUser):
     def save(self, *args, **kwargs):
         previous_membership_expiration = None
         previous_background_check_expiration = None
+        previous_names = None
         if self.pk:
             previous_values = User.objects.filter(pk=self.pk).values(
                 'membership_expiration',
                 'background_check_expiration',
+                'first_name',
+                'last_name',
             ).first()
             if previous_values:
                 previous_membership_expiration = previous_values['membership_expiration']
                 previous_background_check_expiration = previous_values['background_check_expiration']
+                previous_names = (previous_values['first_name'], previous_values['last_name'])
 
         # Automatically set sca_name to user first name if not provided
         if not self.membership or not self.membership_expiration:
@@ -151,6 +160,13 @@ class User(AbstractUser):
                     self.waiver_expiration = self.membership_expiration
 
         super().save(*args, **kwargs)
+        if self.pk and (self.first_name, self.last_name) != previous_names:
+            sync_user_name_tokens(self, using=self._state.db or 'default')
+        if self.pk and (
+            self.membership_expiration != previous_membership_expiration
+            or self.background_check_expiration != previous_background_check_expiration
+        ):
+            refresh_effective_expirations([self.pk], using=self._state.db or 'default')
         if self.pk and self.membership_expiration != previous_membership_expiration:
             sync_active_authorization_validity_for_user(
                 self,
@@ -175,6 +191,79 @@ class User(AbstractUser):
         ]
 
 
+def normalize_private_name(value):
+    """Case-fold a name and treat every non-alphanumeric run as one space."""
+    return ' '.join(
+        ''.join(character.casefold() if character.isalnum() else ' ' for character in (value or '')).split()
+    )
+
+
+class UserNameToken(models.Model):
+    """One normalized word of a user's private first or last name, for indexed name search."""
+
+    class NameField(models.TextChoices):
+        FIRST = 'first', 'First Name'
+        LAST = 'last', 'Last Name'
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='name_tokens')
+    name_field = models.CharField(max_length=5, choices=NameField.choices)
+    position = models.PositiveSmallIntegerField()
+    token = models.CharField(max_length=150)
+
+    class Meta:
+        verbose_name = 'user name token'
+        verbose_name_plural = 'user name tokens'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'name_field', 'position'],
+                name='unique_user_name_token_position',
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['name_field', 'token', 'position']),
+        ]
+
+
+def user_name_tokens(user_id, first_name, last_name):
+    """Build unsaved name tokens for a user's current first and last name."""
+    tokens = []
+    for name_field, value in [
+        (UserNameToken.NameField.FIRST, first_name),
+        (UserNameToken.NameField.LAST, last_name),
+    ]:
+        for position, token in enumerate(normalize_private_name(value).split()):
+            tokens.append(UserNameToken(user_id=user_id, name_field=name_field, position=position, token=token))
+    return tokens
+
+
+def sync_user_name_tokens(user, *, using='default'):
+    UserNameToken.objects.using(using).filter(user_id=user.pk).delete()
+    UserNameToken.objects.using(using).bulk_create(user_name_tokens(user.pk, user.first_name, user.last_name))
+
+
+def private_name_match_user_ids(name_field, search_term, *, using='default'):
+    """
+    Return a user-ID queryset for users whose name contains the normalized term
+    as a complete word or contiguous phrase.
+    """
+    term_tokens = normalize_private_name(search_term).split()
+    if not term_tokens:
+        return UserNameToken.objects.using(using).none().values('user_id')
+    matches = UserNameToken.objects.using(using).filter(name_field=name_field, token=term_tokens[0])
+    for offset, token in enumerate(term_tokens[1:], start=1):
+        matches = matches.filter(
+            Exists(
+                UserNameToken.objects.using(using).filter(
+                    user_id=OuterRef('user_id'),
+                    name_field=name_field,
+                    position=OuterRef('position') + offset,
+                    token=token,
+                )
+            )
+        )
+    return matches.values('user_id')
+
+
 class AuthorizationPortalSetting(models.Model):
     """Persisted portal-level configuration toggles."""
     require_kao_verification = models.BooleanField(default=False)
@@ -440,215 +529,189 @@ class Title(models.Model):
     def __str__(self):
         return self.name
 
-class AuthorizationQuerySet(models.QuerySet):
-    def with_effective_expiration(self):
-        marshal = models.Q(style__name__in=['Junior Marshal', 'Senior Marshal'])
-        youth_marshal = (
-            models.Q(style__name__in=['Junior Marshal', 'Senior Marshal'])
-            & models.Q(style__discipline__name__in=['Youth Armored', 'Youth Rapier'])
-        )
-        rapier_secondary = (
-            models.Q(style__discipline__name='Rapier Combat')
-            & ~models.Q(style__name__in=['Single Sword', 'Junior Marshal', 'Senior Marshal'])
-        )
-        youth_rapier_secondary = (
-            models.Q(style__discipline__name='Youth Rapier')
-            & ~models.Q(style__name__in=['Single Sword', 'Junior Marshal', 'Senior Marshal'])
-            & ~models.Q(style__name__endswith=' - Single Sword')
-        )
-        cut_and_thrust_spear = (
-            models.Q(style__discipline__name='Cut & Thrust')
-            & models.Q(style__name='Spear')
-        )
-        equestrian_mounted_gaming = (
-            models.Q(style__discipline__name='Equestrian')
-            & models.Q(style__name__in=['Mounted Gaming'])
-        )
-        equestrian_mounted_weapon_game = (
-            models.Q(style__discipline__name='Equestrian')
-            & models.Q(style__name__in=[
-                'Mounted Archery',
-                'Crest Combat',
-                'Mounted Crest Combat',
-                'Jousting',
-                'Foam-Tipped Jousting',
-            ])
-        )
-        equestrian_mounted_heavy_combat = (
-            models.Q(style__discipline__name='Equestrian')
-            & models.Q(style__name__in=['Mounted Heavy Combat', 'Mounted Combat'])
-        )
-        expired_fallback = Value(date.today() - relativedelta(years=1), output_field=models.DateField())
-        single_sword_expiration = Subquery(
-            Authorization.objects.filter(
-                person_id=OuterRef('person_id'),
-                style__discipline__name='Rapier Combat',
-                style__name='Single Sword',
-                status__name='Active',
-            )
-            .order_by('-expiration')
-            .values('expiration')[:1],
-            output_field=models.DateField(),
-        )
-        youth_single_sword_expiration = Subquery(
-            Authorization.objects.filter(
-                person_id=OuterRef('person_id'),
-                style__discipline__name='Youth Rapier',
-                style__name='Single Sword',
-                status__name='Active',
-            )
-            .order_by('-expiration')
-            .values('expiration')[:1],
-            output_field=models.DateField(),
-        )
-        lion_single_sword_expiration = Subquery(
-            Authorization.objects.filter(
-                person_id=OuterRef('person_id'),
-                style__discipline__name='Youth Rapier',
-                style__name__in=['Single Sword', 'Lion - Single Sword'],
-                status__name='Active',
-            )
-            .order_by('-expiration')
-            .values('expiration')[:1],
-            output_field=models.DateField(),
-        )
-        gryphon_single_sword_expiration = Subquery(
-            Authorization.objects.filter(
-                person_id=OuterRef('person_id'),
-                style__discipline__name='Youth Rapier',
-                style__name__in=['Single Sword', 'Gryphon - Single Sword'],
-                status__name='Active',
-            )
-            .order_by('-expiration')
-            .values('expiration')[:1],
-            output_field=models.DateField(),
-        )
-        dragon_single_sword_expiration = Subquery(
-            Authorization.objects.filter(
-                person_id=OuterRef('person_id'),
-                style__discipline__name='Youth Rapier',
-                style__name__in=['Single Sword', 'Dragon - Single Sword'],
-                status__name='Active',
-            )
-            .order_by('-expiration')
-            .values('expiration')[:1],
-            output_field=models.DateField(),
-        )
-        youth_rapier_single_sword_expiration = Case(
-            When(style__name__startswith='Lion - ', then=lion_single_sword_expiration),
-            When(style__name__startswith='Gryphon - ', then=gryphon_single_sword_expiration),
-            When(style__name__startswith='Dragon - ', then=dragon_single_sword_expiration),
-            default=youth_single_sword_expiration,
-            output_field=models.DateField(),
-        )
-        cut_and_thrust_foundation_expiration = Subquery(
-            Authorization.objects.filter(
-                person_id=OuterRef('person_id'),
-                style__discipline__name='Cut & Thrust',
-                status__name='Active',
-            )
-            .exclude(style__name__in=['Spear', 'Junior Marshal', 'Senior Marshal'])
-            .order_by('-expiration')
-            .values('expiration')[:1],
-            output_field=models.DateField(),
+MARSHAL_STATUS_STYLE_NAMES = ['Junior Marshal', 'Senior Marshal']
+YOUTH_MARSHAL_DISCIPLINE_NAMES = ['Youth Armored', 'Youth Rapier']
+YOUTH_RAPIER_CATEGORY_NAMES = ['Lion', 'Gryphon', 'Dragon']
+EQUESTRIAN_MOUNTED_WEAPON_GAME_STYLE_NAMES = [
+    'Mounted Archery',
+    'Crest Combat',
+    'Mounted Crest Combat',
+    'Jousting',
+    'Foam-Tipped Jousting',
+]
+EQUESTRIAN_MOUNTED_HEAVY_COMBAT_STYLE_NAMES = ['Mounted Heavy Combat', 'Mounted Combat']
+# Stored when a cap has nothing on file to run to (no membership, background
+# check, or prerequisite). Fixed, so the stored value does not drift day to day,
+# and the lowest date MySQL's DATE type supports. Shown as "Expired", not a date.
+EXPIRED_EFFECTIVE_EXPIRATION = date(1000, 1, 1)
+
+
+def effective_expiration_text(value) -> str:
+    """Export text for an effective expiration: ISO date, "Expired" for the placeholder, blank for none."""
+    if value is None:
+        return ''
+    if value <= EXPIRED_EFFECTIVE_EXPIRATION:
+        return 'Expired'
+    return value.isoformat()
+
+
+def compute_effective_expiration(
+    *,
+    style_name,
+    discipline_name,
+    expiration,
+    membership_expiration,
+    background_check_expiration,
+    active_authorizations,
+):
+    """
+    Apply membership, background-check and prerequisite caps to one authorization.
+
+    active_authorizations holds (discipline_name, style_name, expiration) tuples for
+    the person's Active rows. Every cap only looks at the same person's rows, so the
+    person is the unit of recalculation.
+    """
+    if not style_name or not discipline_name:
+        return expiration
+    expired_fallback = EXPIRED_EFFECTIVE_EXPIRATION
+
+    def latest(discipline, names=None, exclude=()):
+        expirations = [
+            row_expiration
+            for row_discipline, row_style, row_expiration in active_authorizations
+            if row_discipline == discipline
+            and (names is None or row_style in names)
+            and row_style not in exclude
+        ]
+        return max(expirations) if expirations else expired_fallback
+
+    if style_name in MARSHAL_STATUS_STYLE_NAMES:
+        base_expiration = min(expiration, membership_expiration or expired_fallback)
+        if discipline_name in YOUTH_MARSHAL_DISCIPLINE_NAMES:
+            return min(base_expiration, background_check_expiration or expired_fallback)
+        return base_expiration
+    if discipline_name == 'Rapier Combat' and style_name != 'Single Sword':
+        return min(expiration, latest('Rapier Combat', ['Single Sword']))
+    if (
+        discipline_name == 'Youth Rapier'
+        and style_name != 'Single Sword'
+        and not style_name.endswith(' - Single Sword')
+    ):
+        single_sword_names = ['Single Sword']
+        for category in YOUTH_RAPIER_CATEGORY_NAMES:
+            if style_name.startswith(f'{category} - '):
+                single_sword_names.append(f'{category} - Single Sword')
+                break
+        return min(expiration, latest('Youth Rapier', single_sword_names))
+    if discipline_name == 'Cut & Thrust' and style_name == 'Spear':
+        return min(
+            expiration,
+            latest('Cut & Thrust', exclude=['Spear', *MARSHAL_STATUS_STYLE_NAMES]),
         )
-        equestrian_general_riding_expiration = Subquery(
-            Authorization.objects.filter(
-                person_id=OuterRef('person_id'),
-                style__discipline__name='Equestrian',
-                style__name__in=['General Riding'],
-                status__name='Active',
+    if discipline_name == 'Equestrian':
+        if style_name in EQUESTRIAN_MOUNTED_HEAVY_COMBAT_STYLE_NAMES:
+            return min(
+                expiration,
+                latest('Equestrian', ['Mounted Gaming']),
+                latest('Equestrian', ['General Riding']),
             )
-            .order_by('-expiration')
-            .values('expiration')[:1],
-            output_field=models.DateField(),
+        if style_name in EQUESTRIAN_MOUNTED_WEAPON_GAME_STYLE_NAMES:
+            return min(expiration, latest('Equestrian', ['Mounted Gaming']))
+        if style_name == 'Mounted Gaming':
+            return min(expiration, latest('Equestrian', ['General Riding']))
+    return expiration
+
+
+def effective_expiration_changes(person_ids, *, using='default'):
+    """
+    Compute effective expirations for every authorization the people hold.
+
+    Returns ({authorization_id: effective_expiration}, [unsaved rows whose stored
+    value differs]) without writing anything.
+    """
+    person_ids = {person_id for person_id in person_ids if person_id}
+    if not person_ids:
+        return {}, []
+
+    rows = list(
+        Authorization.objects.using(using).filter(person_id__in=person_ids).values(
+            'id',
+            'person_id',
+            'expiration',
+            'effective_expiration_date',
+            'status__name',
+            'style__name',
+            'style__discipline__name',
+            'person__user__membership_expiration',
+            'person__user__background_check_expiration',
         )
-        equestrian_mounted_gaming_expiration = Subquery(
-            Authorization.objects.filter(
-                person_id=OuterRef('person_id'),
-                style__discipline__name='Equestrian',
-                style__name__in=['Mounted Gaming'],
-                status__name='Active',
+    )
+    active_by_person = defaultdict(list)
+    for row in rows:
+        if row['status__name'] == 'Active' and row['style__name']:
+            active_by_person[row['person_id']].append(
+                (row['style__discipline__name'], row['style__name'], row['expiration'])
             )
-            .order_by('-expiration')
-            .values('expiration')[:1],
-            output_field=models.DateField(),
-        )
-        base_membership = Least(
-            F('expiration'),
-            Coalesce(F('person__user__membership_expiration'), expired_fallback),
+
+    computed = {}
+    changed = []
+    for row in rows:
+        effective_expiration = compute_effective_expiration(
+            style_name=row['style__name'],
+            discipline_name=row['style__discipline__name'],
+            expiration=row['expiration'],
+            membership_expiration=row['person__user__membership_expiration'],
+            background_check_expiration=row['person__user__background_check_expiration'],
+            active_authorizations=active_by_person[row['person_id']],
         )
-        effective_expiration = Case(
-            When(
-                youth_marshal,
-                then=Least(
-                    base_membership,
-                    Coalesce(F('person__user__background_check_expiration'), expired_fallback),
-                ),
-            ),
-            When(
-                marshal,
-                then=base_membership,
-            ),
-            When(
-                rapier_secondary,
-                then=Least(
-                    F('expiration'),
-                    Coalesce(single_sword_expiration, expired_fallback),
-                ),
-            ),
-            When(
-                youth_rapier_secondary,
-                then=Least(
-                    F('expiration'),
-                    Coalesce(youth_rapier_single_sword_expiration, expired_fallback),
-                ),
-            ),
-            When(
-                cut_and_thrust_spear,
-                then=Least(
-                    F('expiration'),
-                    Coalesce(cut_and_thrust_foundation_expiration, expired_fallback),
-                ),
-            ),
-            When(
-                equestrian_mounted_heavy_combat,
-                then=Least(
-                    F('expiration'),
-                    Coalesce(equestrian_mounted_gaming_expiration, expired_fallback),
-                    Coalesce(equestrian_general_riding_expiration, expired_fallback),
-                ),
-            ),
-            When(
-                equestrian_mounted_weapon_game,
-                then=Least(
-                    F('expiration'),
-                    Coalesce(equestrian_mounted_gaming_expiration, expired_fallback),
-                ),
-            ),
-            When(
-                equestrian_mounted_gaming,
-                then=Least(
-                    F('expiration'),
-                    Coalesce(equestrian_general_riding_expiration, expired_fallback),
-                ),
-            ),
-            default=F('expiration'),
-            output_field=models.DateField(),
+        computed[row['id']] = effective_expiration
+        if effective_expiration != row['effective_expiration_date']:
+            changed.append(Authorization(id=row['id'], effective_expiration_date=effective_expiration))
+    return computed, changed
+
+
+def refresh_effective_expirations(person_ids, *, using='default'):
+    """
+    Recompute the stored effective expiration for every authorization the people hold.
+
+    Returns a {authorization_id: effective_expiration} map for the rows considered so
+    callers can keep in-memory instances current without re-reading them.
+    """
+    person_ids = list(person_ids)
+    computed, changed = effective_expiration_changes(person_ids, using=using)
+    if changed:
+        Authorization.objects.using(using).bulk_update(
+            changed,
+            ['effective_expiration_date'],
+            batch_size=500,
         )
-        return self.annotate(effective_expiration_date=effective_expiration)
+    # Every authorization write path ends here, including queryset updates.
+    mark_report_people_changed(person_ids, using=using)
+    return computed
+
+
+class AuthorizationQuerySet(models.QuerySet):
+    def with_effective_expiration(self):
+        """
+        Effective expiration is stored on the row and kept current by
+        refresh_effective_expirations(); this stays so callers read the same way
+        whether or not they filter on it.
+        """
+        return self.all()
 
     def with_sanction_flag(self, today=None):
         if today is None:
             today = date.today()
+        # A style sanction matches on its style alone and a whole-discipline
+        # sanction on the discipline, as in permissions.ActiveSanctionMap, so a
+        # style later moved to another discipline stays sanctioned.
         active_sanctions = Sanction.objects.filter(
+            Q(style_id=OuterRef('style_id'))
+            | Q(style__isnull=True, discipline_id=OuterRef('style__discipline_id')),
             person_id=OuterRef('person_id'),
             start_date__lte=today,
             end_date__gte=today,
             lifted_at__isnull=True,
-        ).filter(
-            Q(style_id=OuterRef('style_id'))
-            | (Q(style__isnull=True) & Q(discipline_id=OuterRef('style__discipline_id')))
         )
         return self.annotate(has_active_sanction=Exists(active_sanctions))
 
@@ -755,6 +818,18 @@ class Person(models.Model):
         super().clean()
 
 
+# Fields whose changes are recorded as AuthorizationAuditEntry rows.
+AUTHORIZATION_AUDIT_TRACKED_FIELDS = (
+    'person_id',
+    'style_id',
+    'status_id',
+    'expiration',
+    'marshal_id',
+    'concurring_fighter_id',
+    'created_by_id',
+    'updated_by_id',
+)
+
 
 class Authorization(models.Model):
     """These are the authorizations. They are the primary entity that the system manages."""
@@ -772,6 +847,8 @@ class Authorization(models.Model):
         db_index=True,
     )
     expiration = models.DateField(db_index=True)
+    # Maintained by refresh_effective_expirations(); see compute_effective_expiration().
+    effective_expiration_date = models.DateField(null=True, blank=True, editable=False, db_index=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     created_by = models.ForeignKey(User, null=True, blank=True,
@@ -784,121 +861,68 @@ class Authorization(models.Model):
     def __str__(self):
         return self.person.sca_name + ': ' + self.style.discipline.name + ' ' + self.style.name + ' authorization'
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance.remember_audit_state()
+        return instance
+
+    def refresh_from_db(self, *args, **kwargs):
+        super().refresh_from_db(*args, **kwargs)
+        self.remember_audit_state()
+
+    def remember_audit_state(self):
+        """Keep the tracked values as loaded so the audit signal can skip re-reading the row."""
+        if self.get_deferred_fields().intersection(AUTHORIZATION_AUDIT_TRACKED_FIELDS):
+            self._loaded_audit_state = None
+        else:
+            self._loaded_audit_state = {field: getattr(self, field) for field in AUTHORIZATION_AUDIT_TRACKED_FIELDS}
+
     def save(self, *args, **kwargs):
         super().save(*args, **kwargs)
+        computed = refresh_effective_expirations([self.person_id], using=self._state.db or 'default')
+        if self.pk in computed:
+            self.effective_expiration_date = computed[self.pk]
         sync_authorization_validity_interval(self)
         sync_dependent_authorization_validity_intervals(self)
 
+    @property
+    def effective_expiration_is_placeholder(self):
+        """True when a cap had nothing on file, so there is no real date to show."""
+        effective_expiration = self.effective_expiration
+        return effective_expiration is not None and effective_expiration <= EXPIRED_EFFECTIVE_EXPIRATION
+
     @property
     def effective_expiration(self):
-        annotated = getattr(self, 'effective_expiration_date', None)
-        if annotated is not None:
-            if isinstance(annotated, str):
-                return date.fromisoformat(annotated)
-            return annotated
-        if self.style and self.style.name in ['Junior Marshal', 'Senior Marshal']:
-            expired_fallback = date.today() - relativedelta(years=1)
-            membership_expiration = self.person.user.membership_expiration or expired_fallback
-            base_expiration = self.expiration
-            base_expiration = min(base_expiration, membership_expiration)
-            if self.style.discipline.name in ['Youth Armored', 'Youth Rapier']:
-                background_expiration = self.person.user.background_check_expiration or expired_fallback
-                return min(base_expiration, background_expiration)
-            return base_expiration
-        if (
-            self.style
-            and self.style.discipline.name == 'Rapier Combat'
-            and self.style.name not in ['Single Sword', 'Junior Marshal', 'Senior Marshal']
-        ):
-            expired_fallback = date.today() - relativedelta(years=1)
-            single_sword_expiration = Authorization.objects.filter(
-                person=self.person,
-                style__discipline__name='Rapier Combat',
-                style__name='Single Sword',
-                status__name='Active',
-            ).order_by('-expiration').values_list('expiration', flat=True).first()
-            return min(self.expiration, single_sword_expiration or expired_fallback)
-        if (
-            self.style
-            and self.style.discipline.name == 'Youth Rapier'
-            and self.style.name not in ['Single Sword', 'Junior Marshal', 'Senior Marshal']
-            and not self.style.name.endswith(' - Single Sword')
-        ):
-            expired_fallback = date.today() - relativedelta(years=1)
-            single_sword_names = ['Single Sword']
-            for category in ['Lion', 'Gryphon', 'Dragon']:
-                if self.style.name.startswith(f'{category} - '):
-                    single_sword_names.append(f'{category} - Single Sword')
-                    break
-            single_sword_expiration = Authorization.objects.filter(
-                person=self.person,
-                style__discipline__name='Youth Rapier',
-                style__name__in=single_sword_names,
-                status__name='Active',
-            ).order_by('-expiration').values_list('expiration', flat=True).first()
-            return min(self.expiration, single_sword_expiration or expired_fallback)
-        if (
-            self.style
-            and self.style.discipline.name == 'Cut & Thrust'
-            and self.style.name == 'Spear'
-        ):
-            expired_fallback = date.today() - relativedelta(years=1)
-            foundation_expiration = Authorization.objects.filter(
-                person=self.person,
-                style__discipline__name='Cut & Thrust',
+        if self.effective_expiration_date is not None:
+            return self.effective_expiration_date
+        if not self.style:
+            return self.expiration
+        user = self.person.user
+        active_authorizations = [
+            (discipline_name, style_name, expiration)
+            for discipline_name, style_name, expiration in Authorization.objects.filter(
+                person_id=self.person_id,
                 status__name='Active',
-            ).exclude(
-                style__name__in=['Spear', 'Junior Marshal', 'Senior Marshal'],
-            ).order_by('-expiration').values_list('expiration', flat=True).first()
-            return min(self.expiration, foundation_expiration or expired_fallback)
-        if self.style and self.style.discipline.name == 'Equestrian':
-            expired_fallback = date.today() - relativedelta(years=1)
-            if self.style.name in ['Mounted Gaming']:
-                general_riding_expiration = Authorization.objects.filter(
-                    person=self.person,
-                    style__discipline__name='Equestrian',
-                    style__name__in=['General Riding'],
-                    status__name='Active',
-                ).order_by('-expiration').values_list('expiration', flat=True).first()
-                return min(self.expiration, general_riding_expiration or expired_fallback)
-            if self.style.name in ['Mounted Heavy Combat', 'Mounted Combat']:
-                mounted_gaming_expiration = Authorization.objects.filter(
-                    person=self.person,
-                    style__discipline__name='Equestrian',
-                    style__name__in=['Mounted Gaming'],
-                    status__name='Active',
-                ).order_by('-expiration').values_list('expiration', flat=True).first()
-                general_riding_expiration = Authorization.objects.filter(
-                    person=self.person,
-                    style__discipline__name='Equestrian',
-                    style__name__in=['General Riding'],
-                    status__name='Active',
-                ).order_by('-expiration').values_list('expiration', flat=True).first()
-                return min(
-                    self.expiration,
-                    mounted_gaming_expiration or expired_fallback,
-                    general_riding_expiration or expired_fallback,
-                )
-            if self.style.name in [
-                'Mounted Archery',
-                'Crest Combat',
-                'Mounted Crest Combat',
-                'Jousting',
-                'Foam-Tipped Jousting',
-            ]:
-                mounted_gaming_expiration = Authorization.objects.filter(
-                    person=self.person,
-                    style__discipline__name='Equestrian',
-                    style__name__in=['Mounted Gaming'],
-                    status__name='Active',
-                ).order_by('-expiration').values_list('expiration', flat=True).first()
-                return min(self.expiration, mounted_gaming_expiration or expired_fallback)
-        return self.expiration
+                style__isnull=False,
+            ).values_list('style__discipline__name', 'style__name', 'expiration')
+        ]
+        return compute_effective_expiration(
+            style_name=self.style.name,
+            discipline_name=self.style.discipline.name,
+            expiration=self.expiration,
+            membership_expiration=user.membership_expiration,
+            background_check_expiration=user.background_check_expiration,
+            active_authorizations=active_authorizations,
+        )
 
     class Meta:
         constraints = [
             models.UniqueConstraint(fields=['person', 'style'], name='unique_person_style')
         ]
+        indexes = [
+            models.Index(fields=['person', 'effective_expiration_date']),
+        ]
 
 
 AUTHORIZATION_VALIDITY_INTERVAL_SOURCE_CHOICES = [
@@ -977,66 +1001,210 @@ def authorization_validity_candidate_dates(authorization: Authorization):
     return authorization.expiration - relativedelta(years=years), authorization.effective_expiration
 
 
-def sync_authorization_validity_interval(
-    authorization: Authorization,
+_deferred_validity_syncs = contextvars.ContextVar('authz_deferred_validity_syncs', default=None)
+
+
+@contextmanager
+def deferred_authorization_validity_sync():
+    """
+    Queue validity-interval syncs made inside the block and apply them in batches on exit.
+
+    Bulk jobs such as roster uploads otherwise sync each saved user's
+    authorizations separately. Queued authorizations are reloaded when the block
+    ends, so the sync sees their final state. Nested blocks join the outer one,
+    and nothing is applied if the block raises.
+    """
+    if _deferred_validity_syncs.get() is not None:
+        yield
+        return
+    pending = {}
+    token = _deferred_validity_syncs.set(pending)
+    try:
+        yield
+    finally:
+        _deferred_validity_syncs.reset(token)
+    for (source, note, resume_date, db_alias), authorization_ids in pending.items():
+        sync_authorization_validity_intervals(
+            list(authorization_ids),
+            source=source,
+            note=note,
+            resume_date=resume_date,
+            using=db_alias,
+        )
+
+
+def sync_authorization_validity_intervals(
+    authorizations,
     *,
     source='portal_authorization',
     note='Generated from active authorization update.',
     resume_date=None,
+    using=None,
 ):
-    """Merge the current active authorization window into validity history."""
-    if not authorization.pk:
-        return None
-
-    db_alias = authorization._state.db or 'default'
-    status_name = getattr(authorization.status, 'name', None)
-    if status_name is None and authorization.status_id:
-        status_name = AuthorizationStatus.objects.using(db_alias).filter(pk=authorization.status_id).values_list('name', flat=True).first()
-    if status_name != 'Active':
-        return None
+    """
+    Merge the current active window of each authorization into validity history.
+
+    Accepts Authorization instances or primary keys; keys are loaded in one query.
+    Existing intervals for the whole set are read together, merged in memory,
+    and written with bulk_update/bulk_create. Returns {authorization_id: interval}
+    for the authorizations that have a window.
+    """
+    instances = {}
+    authorization_ids = []
+    for item in authorizations:
+        if isinstance(item, Authorization):
+            if item.pk and item.pk not in instances:
+                instances[item.pk] = item
+        elif item:
+            authorization_ids.append(item)
+    if not instances and not authorization_ids:
+        return {}
+    db_alias = using or next(
+        (authorization._state.db for authorization in instances.values() if authorization._state.db),
+        'default',
+    )
 
-    start_date, end_date = authorization_validity_candidate_dates(authorization)
-    if not start_date or not end_date or end_date < start_date:
-        return None
+    pending = _deferred_validity_syncs.get()
+    if pending is not None:
+        queued = pending.setdefault((source, note, resume_date, db_alias), {})
+        queued.update(dict.fromkeys([*instances, *authorization_ids]))
+        return {}
+
+    missing_ids = [authorization_id for authorization_id in authorization_ids if authorization_id not in instances]
+    if missing_ids:
+        for authorization in Authorization.objects.using(db_alias).select_related(
+            'person__user',
+            'style__discipline',
+            'status',
+        ).filter(pk__in=missing_ids):
+            instances[authorization.pk] = authorization
+
+    windows = {}
+    for authorization in instances.values():
+        status_name = authorization.status.name if authorization.status_id else None
+        if status_name != 'Active':
+            continue
+        start_date, end_date = authorization_validity_candidate_dates(authorization)
+        if not start_date or not end_date or end_date < start_date:
+            continue
+        windows[authorization.pk] = (start_date, end_date)
+    if not windows:
+        return {}
 
     interval_query = AuthorizationValidityInterval.objects.using(db_alias).filter(
-        authorization_id=authorization.pk,
+        authorization_id__in=list(windows),
     )
     if connections[db_alias].in_atomic_block:
         interval_query = interval_query.select_for_update()
-    intervals = list(interval_query.order_by('start_date', 'end_date', 'id'))
-    if resume_date and intervals:
-        latest_end = max(interval.end_date for interval in intervals)
-        if latest_end < resume_date:
+    intervals_by_authorization = defaultdict(list)
+    for interval in interval_query.order_by('authorization_id', 'start_date', 'end_date', 'id'):
+        intervals_by_authorization[interval.authorization_id].append(interval)
+
+    now = timezone.now()
+    synced = {}
+    changed_intervals = []
+    new_intervals = []
+    for authorization_id, (start_date, end_date) in windows.items():
+        intervals = intervals_by_authorization[authorization_id]
+        if resume_date and (not intervals or max(interval.end_date for interval in intervals) < resume_date):
             start_date = max(start_date, resume_date)
             if end_date < start_date:
-                return None
-    elif resume_date and not intervals:
-        start_date = max(start_date, resume_date)
-        if end_date < start_date:
-            return None
+                continue
 
-    for interval in intervals:
-        if start_date <= interval.end_date and end_date >= interval.start_date:
-            changed = False
-            if start_date < interval.start_date:
-                interval.start_date = start_date
-                changed = True
-            if end_date != interval.end_date:
-                interval.end_date = end_date
-                changed = True
-            if changed:
-                interval.note = f'{interval.note} Merged with active authorization update.'.strip()
-                interval.save(using=db_alias, update_fields=['start_date', 'end_date', 'note', 'updated_at'])
-            return interval
-
-    return AuthorizationValidityInterval.objects.using(db_alias).create(
-        authorization_id=authorization.pk,
-        start_date=start_date,
-        end_date=end_date,
+        overlapping = next(
+            (
+                interval for interval in intervals
+                if start_date <= interval.end_date and end_date >= interval.start_date
+            ),
+            None,
+        )
+        if overlapping is None:
+            interval = AuthorizationValidityInterval(
+                authorization_id=authorization_id,
+                start_date=start_date,
+                end_date=end_date,
+                source=source,
+                note=note,
+            )
+            new_intervals.append(interval)
+            synced[authorization_id] = interval
+            continue
+
+        if start_date < overlapping.start_date or end_date != overlapping.end_date:
+            overlapping.start_date = min(start_date, overlapping.start_date)
+            overlapping.end_date = end_date
+            overlapping.note = f'{overlapping.note} Merged with active authorization update.'.strip()
+            overlapping.updated_at = now
+            changed_intervals.append(overlapping)
+        synced[authorization_id] = overlapping
+
+    if changed_intervals:
+        AuthorizationValidityInterval.objects.using(db_alias).bulk_update(
+            changed_intervals,
+            ['start_date', 'end_date', 'note', 'updated_at'],
+            batch_size=500,
+        )
+    if new_intervals:
+        AuthorizationValidityInterval.objects.using(db_alias).bulk_create(new_intervals, batch_size=500)
+    return synced
+
+
+def validity_intervals_by_authorization(authorization_ids, *, using='default'):
+    """Return {authorization_id: [intervals ordered by start]} for the given authorizations in one query."""
+    intervals_by_authorization = defaultdict(list)
+    authorization_ids = list(authorization_ids)
+    for offset in range(0, len(authorization_ids), 1000):
+        for interval in AuthorizationValidityInterval.objects.using(using).filter(
+            authorization_id__in=authorization_ids[offset:offset + 1000],
+        ).order_by('authorization_id', 'start_date', 'end_date', 'id'):
+            intervals_by_authorization[interval.authorization_id].append(interval)
+    return intervals_by_authorization
+
+
+def replace_authorization_validity_intervals(intervals_by_authorization, *, using='default'):
+    """
+    Replace each listed authorization's validity history with the given intervals.
+
+    ``intervals_by_authorization`` maps authorization IDs to objects with
+    start_date, end_date, source, and note attributes. Runs one delete and one
+    bulk_create per batch of authorizations; call inside a transaction.
+    """
+    authorization_ids = list(intervals_by_authorization)
+    for offset in range(0, len(authorization_ids), 500):
+        batch_ids = authorization_ids[offset:offset + 500]
+        AuthorizationValidityInterval.objects.using(using).filter(authorization_id__in=batch_ids).delete()
+        AuthorizationValidityInterval.objects.using(using).bulk_create(
+            [
+                AuthorizationValidityInterval(
+                    authorization_id=authorization_id,
+                    start_date=interval.start_date,
+                    end_date=interval.end_date,
+                    source=interval.source,
+                    note=interval.note,
+                )
+                for authorization_id in batch_ids
+                for interval in intervals_by_authorization[authorization_id]
+            ],
+            batch_size=1000,
+        )
+
+
+def sync_authorization_validity_interval(
+    authorization: Authorization,
+    *,
+    source='portal_authorization',
+    note='Generated from active authorization update.',
+    resume_date=None,
+):
+    """Merge the current active authorization window into validity history."""
+    if not authorization.pk:
+        return None
+    return sync_authorization_validity_intervals(
+        [authorization],
         source=source,
         note=note,
-    )
+        resume_date=resume_date,
+    ).get(authorization.pk)
 
 
 def sync_active_authorization_validity_for_user(
@@ -1046,17 +1214,13 @@ def sync_active_authorization_validity_for_user(
     resume_date=None,
     note='Generated from active authorization update.',
 ):
-    for authorization in Authorization.objects.select_related(
-        'person__user',
-        'style__discipline',
-        'status',
-    ).filter(person__user=user, status__name='Active'):
-        sync_authorization_validity_interval(
-            authorization,
-            source=source,
-            resume_date=resume_date,
-            note=note,
-        )
+    sync_authorization_validity_intervals(
+        list(Authorization.objects.filter(person__user=user, status__name='Active').values_list('pk', flat=True)),
+        source=source,
+        resume_date=resume_date,
+        note=note,
+        using=user._state.db,
+    )
 
 
 def sync_dependent_authorization_validity_intervals(authorization: Authorization):
@@ -1067,16 +1231,16 @@ def sync_dependent_authorization_validity_intervals(authorization: Authorization
         return
     if authorization.effective_expiration < date.today():
         return
-    for dependent in Authorization.objects.select_related(
-        'person__user',
-        'style__discipline',
-        'status',
-    ).filter(person=authorization.person, status__name='Active').exclude(pk=authorization.pk):
-        sync_authorization_validity_interval(
-            dependent,
-            resume_date=date.today(),
-            note='Generated from prerequisite authorization update.',
-        )
+    sync_authorization_validity_intervals(
+        list(
+            Authorization.objects.filter(person_id=authorization.person_id, status__name='Active')
+            .exclude(pk=authorization.pk)
+            .values_list('pk', flat=True)
+        ),
+        resume_date=date.today(),
+        note='Generated from prerequisite authorization update.',
+        using=authorization._state.db,
+    )
 
 
 AUTHORIZATION_AUDIT_EVENT_CHOICES = [
@@ -1166,6 +1330,56 @@ class AuthorizationAuditEntry(models.Model):
         raise ValidationError('Authorization audit entries cannot be deleted.')
 
 
+_deferred_audit_entries = contextvars.ContextVar('authz_deferred_audit_entries', default=None)
+
+
+@contextmanager
+def deferred_authorization_audit():
+    """
+    Collect authorization audit entries made inside the block and write them together on exit.
+
+    Bulk jobs otherwise insert one audit row per saved authorization. Entries
+    are written with one bulk_create per database when the block ends, still
+    inside the caller's transaction. Nested blocks join the outer one, and
+    nothing is written if the block raises.
+    """
+    if _deferred_audit_entries.get() is not None:
+        yield
+        return
+    pending = defaultdict(list)
+    token = _deferred_audit_entries.set(pending)
+    try:
+        yield
+    finally:
+        _deferred_audit_entries.reset(token)
+    for db_alias, entries in pending.items():
+        write_authorization_audit_entries(entries, using=db_alias)
+
+
+def record_authorization_audit_entry(entry, *, using='default'):
+    """Save an unsaved audit entry now, or queue it when a deferred_authorization_audit block is open."""
+    pending = _deferred_audit_entries.get()
+    if pending is None:
+        entry.save(using=using)
+    else:
+        pending[using].append(entry)
+    return entry
+
+
+def write_authorization_audit_entries(entries, *, using='default'):
+    if not entries:
+        return []
+    # An authorization deleted later in the same block keeps its history, as on_delete=SET_NULL would.
+    authorization_ids = {entry.authorization_id for entry in entries if entry.authorization_id}
+    existing_ids = set(
+        Authorization.objects.using(using).filter(pk__in=authorization_ids).values_list('pk', flat=True)
+    )
+    for entry in entries:
+        if entry.authorization_id and entry.authorization_id not in existing_ids:
+            entry.authorization = None
+    return AuthorizationAuditEntry.objects.using(using).bulk_create(entries)
+
+
 class LegacyAuthorizationRecoveryEntry(models.Model):
     """Audit row for one authorization rebuilt from legacy paperwork."""
     person = models.ForeignKey(Person, on_delete=models.CASCADE, related_name='legacy_recovery_entries')
@@ -1292,7 +1506,7 @@ class Sanction(models.Model):
 
     class Meta:
         indexes = [
-            models.Index(fields=['person', 'discipline', 'style']),
+            models.Index(fields=['person', 'discipline', 'style', 'start_date', 'end_date', 'lifted_at']),
             models.Index(fields=['start_date', 'end_date', 'lifted_at']),
         ]
 
@@ -1402,6 +1616,9 @@ class SupportingDocument(models.Model):
     document_type = models.CharField(max_length=50, choices=DocumentType.choices, db_index=True)
     jurisdiction = models.CharField(max_length=2, choices=Jurisdiction.choices, blank=True, default='')
     file = models.FileField(upload_to='supporting_documents/%Y/%m/')
+    # Whether the stored file was there when it was last uploaded, opened, or
+    # reconciled; listing pages read this instead of checking storage per row.
+    file_present = models.BooleanField(default=True)
     uploaded_by = models.ForeignKey(
         User,
         null=True,
@@ -1598,3 +1815,90 @@ class ReportValue(models.Model):
         verbose_name = 'report value'
         verbose_name_plural = 'report values'
 
+
+class OutboundEmail(models.Model):
+    """
+    Queued plain-text email waiting for the send_queued_email worker.
+
+    The body is cleared once the message is sent, and a failed message's body
+    after a few days, because account emails carry login and reset links.
+    """
+
+    class Status(models.TextChoices):
+        QUEUED = 'queued', 'Queued'
+        SENT = 'sent', 'Sent'
+        FAILED = 'failed', 'Failed'
+
+    subject = models.CharField(max_length=255)
+    body = models.TextField()
+    from_email = models.CharField(max_length=255, blank=True, default='')
+    recipients = models.JSONField(default=list)
+    dedup_key = models.CharField(max_length=64, db_index=True)
+    status = models.CharField(max_length=10, choices=Status.choices, default=Status.QUEUED)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True, default='')
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f'{self.subject} -> {", ".join(self.recipients)} ({self.status})'
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at']),
+        ]
+        ordering = ['id']
+        verbose_name = 'outbound email'
+        verbose_name_plural = 'outbound emails'
+
+
+class UploadJob(models.Model):
+    """A roster or legacy authorization upload waiting for the run_upload_jobs worker."""
+
+    class Kind(models.TextChoices):
+        MEMBERSHIP_ROSTER = 'membership_roster', 'Membership Roster'
+        LEGACY_AUTHORIZATIONS = 'legacy_authorizations', 'Legacy Authorizations'
+
+    class Status(models.TextChoices):
+        QUEUED = 'queued', 'Queued'
+        RUNNING = 'running', 'Running'
+        SUCCEEDED = 'succeeded', 'Succeeded'
+        FAILED = 'failed', 'Failed'
+
+    kind = models.CharField(max_length=30, choices=Kind.choices)
+    status = models.CharField(max_length=10, choices=Status.choices, default=Status.QUEUED)
+    # Removed once the job finishes; rosters carry members' personal details.
+    upload = models.FileField(upload_to='upload_jobs/%Y/%m/', blank=True)
+    source_filename = models.CharField(max_length=255)
+    requested_by = models.ForeignKey(
+        User,
+        null=True,
+        blank=True,
+        on_delete=models.SET_NULL,
+        related_name='upload_jobs',
+    )
+    attempts = models.PositiveSmallIntegerField(default=0)
+    rows_processed = models.PositiveIntegerField(default=0)
+    result_messages = models.JSONField(default=list, blank=True)
+    error = models.TextField(blank=True, default='')
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    heartbeat_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f'{self.get_kind_display()} upload {self.source_filename} ({self.status})'
+
+    @property
+    def is_finished(self):
+        return self.status in (self.Status.SUCCEEDED, self.Status.FAILED)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'heartbeat_at']),
+            models.Index(fields=['requested_by', 'created_at']),
+        ]
+        ordering = ['id']
+        verbose_name = 'upload job'
+        verbose_name_plural = 'upload jobs'
@@ -0,0 +1,38 @@
+from django.conf import settings
+from django.core.cache import cache
+
+
+_GENERATION_KEY = 'authz:option-lists:generation'
+
+
+def option_list_generation() -> int:
+    return cache.get_or_set(_GENERATION_KEY, 1, timeout=None)
+
+
+def bump_option_list_generation() -> None:
+    """Invalidate every cached option list; called from model save/delete signals."""
+    if not getattr(settings, 'AUTHZ_OPTION_LIST_CACHE_SECONDS', 0):
+        return
+    try:
+        cache.incr(_GENERATION_KEY)
+    except ValueError:
+        cache.set(_GENERATION_KEY, 2, timeout=None)
+
+
+def cached_option_list(name: str, build):
+    """
+    Return the option list for ``name``, building it with ``build()`` on a miss.
+
+    Entries are keyed on the shared generation counter, so a write to any model
+    feeding the lists retires every cached list at once. A zero
+    AUTHZ_OPTION_LIST_CACHE_SECONDS disables caching.
+    """
+    timeout = getattr(settings, 'AUTHZ_OPTION_LIST_CACHE_SECONDS', 0)
+    if not timeout:
+        return list(build())
+    key = f'authz:option-lists:{option_list_generation()}:{name}'
+    options = cache.get(key)
+    if options is None:
+        options = list(build())
+        cache.set(key, options, timeout=timeout)
+    return options
@@ -0,0 +1,158 @@
+import hashlib
+import json
+import logging
+from collections import Counter
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection, send_mail
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import OutboundEmail
+
+logger = logging.getLogger(__name__)
+
+# A claimed message is not handed to another worker until its lease runs out,
+# so a worker that dies mid-batch only delays those messages.
+EMAIL_SEND_LEASE = timedelta(minutes=10)
+EMAIL_RETRY_BASE_SECONDS = 60
+EMAIL_RETRY_MAX_SECONDS = 3600
+EMAIL_MAX_ATTEMPTS = 6
+EMAIL_DEDUP_WINDOW = timedelta(minutes=10)
+# Bodies carry login and password-reset links. A sent body is cleared at once;
+# a failed one is kept this long so --requeue-failed can still resend it.
+FAILED_EMAIL_BODY_RETENTION = timedelta(days=3)
+
+
+def email_queue_enabled() -> bool:
+    return bool(getattr(settings, 'AUTHZ_EMAIL_QUEUE_ENABLED', False))
+
+
+def email_dedup_key(subject, body, from_email, recipients) -> str:
+    payload = json.dumps([subject, body, from_email or '', sorted(recipients)])
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def queue_email(subject, message, from_email, recipient_list):
+    """
+    Send a plain-text email, through the outbound queue when it is enabled.
+
+    Takes send_mail's positional arguments. With AUTHZ_EMAIL_QUEUE_ENABLED off
+    the message is sent immediately and delivery errors propagate as before.
+    An identical message that is still queued, or was sent within the last
+    few minutes (a double-submitted form), is not queued again.
+    """
+    recipients = list(recipient_list)
+    if not email_queue_enabled():
+        send_mail(subject, message, from_email, recipients, fail_silently=False)
+        return None
+
+    dedup_key = email_dedup_key(subject, message, from_email, recipients)
+    duplicate = OutboundEmail.objects.filter(dedup_key=dedup_key).filter(
+        Q(status=OutboundEmail.Status.QUEUED)
+        | Q(status=OutboundEmail.Status.SENT, created_at__gte=timezone.now() - EMAIL_DEDUP_WINDOW)
+    ).first()
+    if duplicate:
+        return duplicate
+    return OutboundEmail.objects.create(
+        subject=subject[:255],
+        body=message,
+        from_email=from_email or '',
+        recipients=recipients,
+        dedup_key=dedup_key,
+    )
+
+
+def retry_delay(attempts) -> timedelta:
+    return timedelta(seconds=min(EMAIL_RETRY_BASE_SECONDS * 2 ** max(attempts - 1, 0), EMAIL_RETRY_MAX_SECONDS))
+
+
+def claim_queued_email(batch_size, now=None):
+    """Lease up to ``batch_size`` due messages to this worker and return them."""
+    now = now or timezone.now()
+    with transaction.atomic():
+        claimed = list(
+            OutboundEmail.objects.select_for_update(skip_locked=True)
+            .filter(status=OutboundEmail.Status.QUEUED, next_attempt_at__lte=now)
+            .order_by('next_attempt_at', 'id')[:batch_size]
+        )
+        if claimed:
+            OutboundEmail.objects.filter(pk__in=[outbound.pk for outbound in claimed]).update(
+                next_attempt_at=now + EMAIL_SEND_LEASE,
+            )
+    return claimed
+
+
+def purge_failed_email_bodies(now=None) -> int:
+    """Clear the bodies of failed messages older than the retention window."""
+    now = now or timezone.now()
+    return (
+        OutboundEmail.objects.filter(
+            status=OutboundEmail.Status.FAILED,
+            created_at__lt=now - FAILED_EMAIL_BODY_RETENTION,
+        )
+        .exclude(body='')
+        .update(body='')
+    )
+
+
+def _record_send_failure(outbound, exc, max_attempts, result):
+    outbound.attempts += 1
+    outbound.last_error = f'{type(exc).__name__}: {exc}'[:2000]
+    if outbound.attempts >= max_attempts:
+        outbound.status = OutboundEmail.Status.FAILED
+        result['failed'] += 1
+    else:
+        outbound.next_attempt_at = timezone.now() + retry_delay(outbound.attempts)
+        result['retried'] += 1
+    outbound.save(update_fields=['attempts', 'last_error', 'status', 'next_attempt_at'])
+
+
+def deliver_queued_email(*, batch_size=50, max_attempts=EMAIL_MAX_ATTEMPTS):
+    """
+    Send one batch of due messages over a single backend connection.
+
+    Failed messages are retried with exponential backoff and marked failed
+    after ``max_attempts``; a connection that cannot be opened counts as a
+    failed attempt for every claimed message. Sent messages have their body
+    cleared. Returns a Counter of sent, retried, and failed.
+    """
+    result = Counter()
+    claimed = claim_queued_email(batch_size)
+    if not claimed:
+        return result
+
+    connection = get_connection(fail_silently=False)
+    try:
+        try:
+            connection.open()
+        except Exception as exc:
+            logger.exception('Error opening email connection for %s queued message(s)', len(claimed))
+            for outbound in claimed:
+                _record_send_failure(outbound, exc, max_attempts, result)
+            return result
+        for outbound in claimed:
+            try:
+                EmailMessage(
+                    outbound.subject,
+                    outbound.body,
+                    outbound.from_email or None,
+                    outbound.recipients,
+                    connection=connection,
+                ).send()
+            except Exception as exc:
+                logger.exception('Error sending queued email id=%s attempt=%s', outbound.pk, outbound.attempts + 1)
+                _record_send_failure(outbound, exc, max_attempts, result)
+                continue
+            outbound.attempts += 1
+            outbound.status = OutboundEmail.Status.SENT
+            outbound.sent_at = timezone.now()
+            outbound.last_error = ''
+            outbound.body = ''
+            outbound.save(update_fields=['attempts', 'last_error', 'status', 'sent_at', 'body'])
+            result['sent'] += 1
+    finally:
+        connection.close()
+    return result
@@ -1,14 +1,17 @@
+from collections import defaultdict
 from datetime import date, datetime
 import logging
 from dateutil.relativedelta import relativedelta
 from django.contrib.auth.decorators import login_required
 from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
 from django.db.models import Q, Max
-from django.db.utils import OperationalError, ProgrammingError
 from typing import Optional
 
 from authorizations.models import BranchMarshal, Authorization, WeaponStyle, User, Branch, AuthorizationStatus, \
-    Person, Discipline, AuthorizationNote, AuthorizationPortalSetting, Sanction
+    Person, Discipline, AuthorizationNote, Sanction
+from authorizations.maintenance import authorization_officer_sign_off_required
 
 logger = logging.getLogger(__name__)
 
@@ -164,15 +167,7 @@ def is_kingdom_review_status_name(status_name: str) -> bool:
 
 def authorization_officer_sign_off_enabled() -> bool:
     """Return whether Kingdom AO sign-off is currently required for applicable approvals."""
-    try:
-        setting_value = AuthorizationPortalSetting.objects.order_by('id').values_list(
-            'require_kao_verification',
-            flat=True,
-        ).first()
-    except (OperationalError, ProgrammingError):
-        # Migration not applied yet; default to disabled.
-        return False
-    return bool(setting_value) if setting_value is not None else False
+    return authorization_officer_sign_off_required()
 
 def membership_is_current(user):
     if not user.membership:
@@ -235,46 +230,318 @@ def marshal_office_effective_expiration(office: BranchMarshal, today: Optional[d
     return min(office.end_date, user.membership_expiration, marshal_status_expiration)
 
 
-def _has_active_office(query):
-    today = date.today()
-    offices = query.select_related('person__user', 'discipline')
-    for office in offices:
-        effective = marshal_office_effective_expiration(office, today=today)
-        if effective and effective >= today:
+_REGION_BRANCH_TYPES = ('Kingdom', 'Principality', 'Region')
+_CAPABILITY_CACHE_PREFIX = 'authz:user-capabilities'
+_CAPABILITY_CACHE_VERSION_KEY = f'{_CAPABILITY_CACHE_PREFIX}:version'
+# Bumped on every invalidation so per-request snapshots held on user objects
+# in this process are rebuilt after a write.
+_capability_generation = 0
+
+
+def _lookup_name(value):
+    """Accept either a model instance or its name, as the ORM lookups these helpers replaced did."""
+    return getattr(value, 'name', value)
+
+
+class UserCapabilities:
+    """
+    One user's current offices and marshal statuses, loaded once and reused by
+    the is_* helpers below.
+
+    Membership fields are read from the user object at check time, so only the
+    office and marshal-authorization rows are snapshotted.
+    """
+
+    def __init__(self, user, offices, marshal_statuses, today: date, generation: int = 0):
+        self.user = user
+        self.offices = offices
+        self.marshal_statuses = marshal_statuses
+        self.today = today
+        self.generation = generation
+
+    def _has_membership(self) -> bool:
+        return bool(getattr(self.user, 'membership', None) and getattr(self.user, 'membership_expiration', None))
+
+    def membership_is_current(self) -> bool:
+        return self._has_membership() and self.user.membership_expiration >= self.today
+
+    def marshal_status_expiration(self, discipline_id, discipline_name):
+        """Mirror of _marshal_status_expiration_for_office over the loaded statuses."""
+        if not discipline_id:
+            return None
+        if discipline_name in [
+            KINGDOM_AUTHORIZATION_OFFICER_DISCIPLINE,
+            KINGDOM_EQUESTRIAN_AUTHORIZATION_OFFICER_DISCIPLINE,
+        ]:
+            return self.today + relativedelta(years=100)
+        if discipline_name == 'Earl Marshal':
+            expirations = [
+                status['effective_expiration_date']
+                for status in self.marshal_statuses
+                if status['style_name'] == 'Senior Marshal'
+            ]
+        else:
+            expirations = [
+                status['effective_expiration_date']
+                for status in self.marshal_statuses
+                if status['discipline_id'] == discipline_id
+            ]
+        return max(expirations, default=None)
+
+    def office_effective_expiration(self, office):
+        """Mirror of marshal_office_effective_expiration for a loaded office row."""
+        if not self._has_membership():
+            return None
+        marshal_status_expiration = self.marshal_status_expiration(office['discipline_id'], office['discipline_name'])
+        if not marshal_status_expiration:
+            return None
+        return min(office['end_date'], self.user.membership_expiration, marshal_status_expiration)
+
+    def has_active_office(self, predicate=None) -> bool:
+        for office in self.offices:
+            if predicate is not None and not predicate(office):
+                continue
+            effective = self.office_effective_expiration(office)
+            if effective and effective >= self.today:
+                return True
+        return False
+
+    def has_active_non_marshal_office(self, predicate=None) -> bool:
+        if not self.membership_is_current():
+            return False
+        return any(
+            office['start_date'] <= self.today
+            and (predicate is None or predicate(office))
+            for office in self.offices
+        )
+
+    def is_senior_marshal(self, discipline=None) -> bool:
+        discipline = _lookup_name(discipline)
+        if not self.membership_is_current():
+            return False
+        return any(
+            status['style_name'] == 'Senior Marshal'
+            and (not discipline or status['discipline_name'] == discipline)
+            for status in self.marshal_statuses
+        )
+
+    def is_kingdom_earl_marshal(self) -> bool:
+        return self.has_active_office(
+            lambda office: office['branch_name'] == 'An Tir' and office['discipline_name'] == 'Earl Marshal'
+        )
+
+    def is_branch_marshal(self, branch=None, discipline=None) -> bool:
+        branch = _lookup_name(branch)
+        discipline = _lookup_name(discipline)
+        return self.has_active_office(
+            lambda office: (
+                office['branch_type'] not in _REGION_BRANCH_TYPES
+                and (not discipline or office['discipline_name'] == discipline)
+                and (not branch or office['branch_name'] == branch)
+            )
+        )
+
+    def is_kingdom_marshal(self, discipline=None) -> bool:
+        discipline = _lookup_name(discipline)
+        if self.is_kingdom_earl_marshal():
+            return True
+        if discipline:
+            matches_discipline = lambda name: name == discipline
+        else:
+            matches_discipline = lambda name: name not in NON_MARSHAL_OFFICER_DISCIPLINES
+        return self.has_active_office(
+            lambda office: office['branch_name'] == 'An Tir' and matches_discipline(office['discipline_name'])
+        )
+
+    def is_regional_marshal(self, discipline=None, region=None) -> bool:
+        discipline = _lookup_name(discipline)
+        region = _lookup_name(region)
+        if self.is_kingdom_earl_marshal():
             return True
-    return False
+        if self.is_kingdom_marshal(discipline):
+            return True
+        return self.has_active_office(
+            lambda office: (
+                office['branch_type'] in _REGION_BRANCH_TYPES
+                and (not region or office['branch_name'] == region)
+                and (not discipline or office['discipline_name'] in [discipline, 'Earl Marshal'])
+            )
+        )
 
+    def is_regional_discipline_marshal(self, discipline) -> bool:
+        discipline = _lookup_name(discipline)
+        return self.has_active_office(
+            lambda office: office['branch_type'] in _REGION_BRANCH_TYPES and office['discipline_name'] == discipline
+        )
 
-def _has_active_non_marshal_office(query):
-    today = date.today()
-    offices = query.select_related('person__user')
-    for office in offices:
-        user = getattr(office.person, 'user', None) if office.person else None
-        if (
-            user
-            and membership_is_current(user)
-            and office.start_date <= today
-            and office.end_date >= today
-        ):
+    def _is_kingdom_officer(self, discipline_name) -> bool:
+        if not getattr(self.user, 'is_authenticated', False):
+            return False
+        if self.user.is_staff:
             return True
-    return False
+        return self.has_active_office(
+            lambda office: office['branch_name'] == 'An Tir' and office['discipline_name'] == discipline_name
+        )
 
-def is_senior_marshal(user, discipline=None):
+    def is_kingdom_authorization_officer(self) -> bool:
+        return self._is_kingdom_officer(KINGDOM_AUTHORIZATION_OFFICER_DISCIPLINE)
+
+    def is_kingdom_equestrian_authorization_officer(self) -> bool:
+        return self._is_kingdom_officer(KINGDOM_EQUESTRIAN_AUTHORIZATION_OFFICER_DISCIPLINE)
+
+    def is_branch_seneschal(self, branch=None) -> bool:
+        if isinstance(branch, Branch):
+            matches_branch = lambda office: office['branch_id'] == branch.id
+        elif branch is not None:
+            matches_branch = lambda office: office['branch_name'] == branch
+        else:
+            matches_branch = lambda office: True
+        return self.has_active_non_marshal_office(
+            lambda office: office['discipline_name'] == SENESCHAL_DISCIPLINE and matches_branch(office)
+        )
+
+    def is_principality_seneschal(self) -> bool:
+        return self.has_active_non_marshal_office(
+            lambda office: office['discipline_name'] == SENESCHAL_DISCIPLINE and office['branch_type'] == 'Principality'
+        )
+
+
+def _load_capability_snapshot(user_id, today: date):
+    offices = [
+        {
+            'branch_id': row['branch_id'],
+            'branch_name': row['branch__name'],
+            'branch_type': row['branch__type'],
+            'discipline_id': row['discipline_id'],
+            'discipline_name': row['discipline__name'],
+            'start_date': row['start_date'],
+            'end_date': row['end_date'],
+        }
+        for row in BranchMarshal.objects.filter(
+            person__user_id=user_id,
+            end_date__gte=today,
+        ).values(
+            'branch_id',
+            'branch__name',
+            'branch__type',
+            'discipline_id',
+            'discipline__name',
+            'start_date',
+            'end_date',
+        )
+    ]
+    marshal_statuses = [
+        {
+            'style_name': row['style__name'],
+            'discipline_id': row['style__discipline_id'],
+            'discipline_name': row['style__discipline__name'],
+            'effective_expiration_date': _coerce_date(row['effective_expiration_date']),
+        }
+        for row in Authorization.objects.effectively_active(today=today).filter(
+            person__user_id=user_id,
+            style__name__in=['Junior Marshal', 'Senior Marshal'],
+        ).values(
+            'style__name',
+            'style__discipline_id',
+            'style__discipline__name',
+            'effective_expiration_date',
+        )
+    ]
+    return {'offices': offices, 'marshal_statuses': marshal_statuses}
+
+
+def _capability_cache_key(user_id, today: date) -> str:
+    version = cache.get_or_set(_CAPABILITY_CACHE_VERSION_KEY, 1, timeout=None)
+    return f'{_CAPABILITY_CACHE_PREFIX}:{version}:{today.isoformat()}:{user_id}'
+
+
+def user_capabilities(user) -> UserCapabilities:
     """
-    Checks if the user has an active Senior Marshal status for the given discipline.
+    Return the capability snapshot for a user.
+
+    The snapshot is memoized on the user object for the rest of the request and,
+    when AUTHZ_CAPABILITY_CACHE_SECONDS is set, shared across requests through
+    the Django cache until an office, authorization, sanction, or user row for
+    that person changes.
     """
-    query = Authorization.objects.effectively_active().filter(
-        person__user=user,
-        style__name='Senior Marshal',
+    today = date.today()
+    if not user or not getattr(user, 'is_authenticated', False) or user.pk is None:
+        return UserCapabilities(user, [], [], today)
+
+    capabilities = getattr(user, '_authz_capabilities', None)
+    if (
+        capabilities is not None
+        and capabilities.generation == _capability_generation
+        and capabilities.today == today
+    ):
+        return capabilities
+
+    generation = _capability_generation
+    timeout = getattr(settings, 'AUTHZ_CAPABILITY_CACHE_SECONDS', 0)
+    snapshot = None
+    cache_key = None
+    if timeout:
+        cache_key = _capability_cache_key(user.pk, today)
+        snapshot = cache.get(cache_key)
+    if snapshot is None:
+        snapshot = _load_capability_snapshot(user.pk, today)
+        if cache_key:
+            cache.set(cache_key, snapshot, timeout=timeout)
+
+    capabilities = UserCapabilities(
+        user,
+        snapshot['offices'],
+        snapshot['marshal_statuses'],
+        today,
+        generation=generation,
     )
+    user._authz_capabilities = capabilities
+    return capabilities
 
-    if not membership_is_current(user):
-        return False
 
-    if discipline:
-        query = query.filter(style__discipline__name=discipline)
+def _drop_capability_snapshots(user_ids) -> None:
+    global _capability_generation
+    _capability_generation += 1
+    if not getattr(settings, 'AUTHZ_CAPABILITY_CACHE_SECONDS', 0):
+        return
+    today = date.today()
+    cache.delete_many([_capability_cache_key(user_id, today) for user_id in user_ids if user_id is not None])
+
 
-    return query.exists()
+def invalidate_user_capabilities(*user_ids, using='default') -> None:
+    """
+    Drop cached capability snapshots after offices or marshal statuses change.
+
+    Dropped now and again on commit, since another request can cache the
+    pre-commit rows while the writer's transaction is still open.
+    """
+    user_ids = list(user_ids)
+    _drop_capability_snapshots(user_ids)
+    transaction.on_commit(lambda: _drop_capability_snapshots(user_ids), using=using)
+
+
+def _bump_capability_cache_version() -> None:
+    global _capability_generation
+    _capability_generation += 1
+    if not getattr(settings, 'AUTHZ_CAPABILITY_CACHE_SECONDS', 0):
+        return
+    try:
+        cache.incr(_CAPABILITY_CACHE_VERSION_KEY)
+    except ValueError:
+        cache.set(_CAPABILITY_CACHE_VERSION_KEY, 2, timeout=None)
+
+
+def invalidate_all_user_capabilities(using='default') -> None:
+    """Drop every cached capability snapshot, e.g. after a branch or discipline rename; again on commit."""
+    _bump_capability_cache_version()
+    transaction.on_commit(_bump_capability_cache_version, using=using)
+
+
+def is_senior_marshal(user, discipline=None):
+    """
+    Checks if the user has an active Senior Marshal status for the given discipline.
+    """
+    return user_capabilities(user).is_senior_marshal(discipline)
 
 
 def active_sanctions(person: Person, today: Optional[date] = None):
@@ -290,129 +557,123 @@ def active_sanctions(person: Person, today: Optional[date] = None):
     )
 
 
-def active_sanction_for_style(person: Person, style: WeaponStyle, today: Optional[date] = None):
+class ActiveSanctionMap:
+    """
+    Active sanctions for a set of people, grouped by person.
+
+    Answers the per-style questions of active_sanction_for_style and
+    authorization_is_sanctioned from memory, so checking every authorization
+    on a page costs the one query that loaded the map.
+    """
+
+    def __init__(self, sanctions):
+        self.by_person = defaultdict(list)
+        for sanction in sanctions:
+            self.by_person[sanction.person_id].append(sanction)
+
+    def __bool__(self):
+        return bool(self.by_person)
+
+    def sanction_for_style(self, person_id, style_id, discipline_id):
+        """The latest-ending sanction on the style itself, else on its whole discipline."""
+        def latest(sanctions):
+            return max(sanctions, key=lambda sanction: (sanction.end_date, sanction.id), default=None)
+
+        sanctions = self.by_person.get(person_id, ())
+        exact_style = latest(sanction for sanction in sanctions if sanction.style_id == style_id)
+        if exact_style:
+            return exact_style
+        return latest(
+            sanction for sanction in sanctions
+            if sanction.style_id is None and sanction.discipline_id == discipline_id
+        )
+
+    def is_sanctioned(self, person_id, style_id, discipline_id) -> bool:
+        return any(
+            sanction.style_id == style_id
+            or (sanction.style_id is None and sanction.discipline_id == discipline_id)
+            for sanction in self.by_person.get(person_id, ())
+        )
+
+    def authorization_is_sanctioned(self, authorization: Authorization) -> bool:
+        return self.is_sanctioned(authorization.person_id, authorization.style_id, authorization.style.discipline_id)
+
+    def exclude_sanctioned(self, authorizations):
+        """Drop sanctioned rows from an Authorization queryset without a per-row subquery."""
+        sanctioned = Q()
+        for person_id, sanctions in self.by_person.items():
+            style_ids = {sanction.style_id for sanction in sanctions if sanction.style_id}
+            discipline_ids = {sanction.discipline_id for sanction in sanctions if not sanction.style_id}
+            if style_ids:
+                sanctioned |= Q(person_id=person_id, style_id__in=style_ids)
+            if discipline_ids:
+                sanctioned |= Q(person_id=person_id, style__discipline_id__in=discipline_ids)
+        return authorizations.exclude(sanctioned) if sanctioned else authorizations
+
+
+def load_active_sanctions(person_ids=None, today: Optional[date] = None) -> ActiveSanctionMap:
+    """Load the sanctions active on ``today`` for ``person_ids`` (everyone when None) in one query."""
     if today is None:
         today = date.today()
+    sanctions = Sanction.objects.filter(
+        start_date__lte=today,
+        end_date__gte=today,
+        lifted_at__isnull=True,
+    ).select_related('discipline', 'style')
+    if person_ids is not None:
+        sanctions = sanctions.filter(person_id__in=list(person_ids))
+    return ActiveSanctionMap(sanctions)
+
+
+def active_sanction_for_style(person: Person, style: WeaponStyle, today: Optional[date] = None):
     if not person or not style:
         return None
-    sanctions = active_sanctions(person, today=today).filter(
-        Q(style=style) | (Q(style__isnull=True) & Q(discipline=style.discipline))
-    ).select_related('discipline', 'style')
-    exact_style = sanctions.filter(style=style).order_by('-end_date', '-id').first()
-    if exact_style:
-        return exact_style
-    return sanctions.filter(style__isnull=True).order_by('-end_date', '-id').first()
+    return load_active_sanctions([person.pk], today=today).sanction_for_style(
+        person.pk,
+        style.id,
+        style.discipline_id,
+    )
 
 
 def authorization_is_sanctioned(authorization: Authorization, today: Optional[date] = None) -> bool:
     if not authorization or not authorization.person or not authorization.style:
         return False
-    return active_sanction_for_style(authorization.person, authorization.style, today=today) is not None
+    return load_active_sanctions([authorization.person_id], today=today).authorization_is_sanctioned(authorization)
 
 def is_branch_marshal(user, branch=None, discipline=None):
     """
     Checks if the user is a current Branch Marshal for the given branch and discipline.
     """
-
-    query = BranchMarshal.objects.filter(
-        person__user=user,
-        end_date__gte=date.today(),
-        branch__in=Branch.objects.non_regions()
-    )
-
-    if discipline:
-        query = query.filter(discipline__name=discipline)
-
-    if branch:
-        query = query.filter(branch__name=branch)
-
-    return _has_active_office(query)
+    return user_capabilities(user).is_branch_marshal(branch=branch, discipline=discipline)
 
 
 def is_regional_marshal(user, discipline=None, region=None):
     """
     Checks if the user is a current Regional Marshal for the given discipline or is the Earl Marshal.
     """
-    if is_kingdom_earl_marshal(user):
-        return True
-
-    if discipline:
-        if is_kingdom_marshal(user, discipline):
-            return True
-    else:
-        if is_kingdom_marshal(user):
-            return True
-
-    if region:
-        # Check if the region sent by the user is in fact a region.
-        # Get the region branch by name and check if they are a marshal for it
-        try:
-            branch = Branch.objects.get(name=region)
-            if not branch in Branch.objects.regions():
-                return False
-            query = BranchMarshal.objects.filter(
-                person__user=user,
-                branch=branch,
-                end_date__gte=date.today(),
-            )
-        except Branch.DoesNotExist:
-            return False
-    else:
-        # Get all region branches and check if they are a marshal for any of them
-        # Get all region branches
-        region_branches = Branch.objects.regions()
-        query = BranchMarshal.objects.filter(
-            person__user=user,
-            branch__in=region_branches,
-            end_date__gte=date.today(),
-        )
-    
-    if discipline:
-        query = query.filter(discipline__name__in=[discipline, 'Earl Marshal'])
-
-    return _has_active_office(query)
+    return user_capabilities(user).is_regional_marshal(discipline=discipline, region=region)
 
 
 def _can_regionally_approve_authorization(user, discipline, fighter_region=None):
     """Regional-step approval may be done by any regional marshal in the discipline."""
-    if is_kingdom_earl_marshal(user):
+    capabilities = user_capabilities(user)
+    if capabilities.is_kingdom_earl_marshal():
         return True
 
-    if is_kingdom_marshal(user, discipline):
+    if capabilities.is_kingdom_marshal(discipline):
         return True
 
-    regional_discipline_office = BranchMarshal.objects.filter(
-        person__user=user,
-        branch__in=Branch.objects.regions(),
-        discipline__name=discipline,
-        end_date__gte=date.today(),
-    )
-    if _has_active_office(regional_discipline_office):
+    if capabilities.is_regional_discipline_marshal(discipline):
         return True
 
-    return is_regional_marshal(user, 'Earl Marshal')
+    return capabilities.is_regional_marshal('Earl Marshal')
 
 
 def is_kingdom_marshal(user, discipline=None):
     """
     Checks if the user is a current Kingdom Marshal for the given discipline or is the Earl Marshal.
     """
-
-    if is_kingdom_earl_marshal(user):
-        return True
-
-    query = BranchMarshal.objects.filter(
-        person__user=user,
-        branch__name='An Tir',
-        end_date__gte=date.today(),
-    )
-
-    if discipline:
-        query = query.filter(discipline__name=discipline)
-    else:
-        query = query.exclude(discipline__name__in=NON_MARSHAL_OFFICER_DISCIPLINES)
-
-    return _has_active_office(query)
+    return user_capabilities(user).is_kingdom_marshal(discipline)
 
 
 def is_kingdom_authorization_officer(user):
@@ -423,17 +684,7 @@ def is_kingdom_authorization_officer(user):
     # when this helper is called from public views.
     if not user or not getattr(user, 'is_authenticated', False):
         return False
-    if user.is_staff:
-        return True
-
-    query = BranchMarshal.objects.filter(
-        person__user=user,
-        branch__name='An Tir',
-        discipline__name=KINGDOM_AUTHORIZATION_OFFICER_DISCIPLINE,
-        end_date__gte=date.today(),
-    )
-
-    return _has_active_office(query)
+    return user_capabilities(user).is_kingdom_authorization_officer()
 
 
 def is_kingdom_equestrian_authorization_officer(user):
@@ -443,17 +694,7 @@ def is_kingdom_equestrian_authorization_officer(user):
     """
     if not user or not getattr(user, 'is_authenticated', False):
         return False
-    if user.is_staff:
-        return True
-
-    query = BranchMarshal.objects.filter(
-        person__user=user,
-        branch__name='An Tir',
-        discipline__name=KINGDOM_EQUESTRIAN_AUTHORIZATION_OFFICER_DISCIPLINE,
-        end_date__gte=date.today(),
-    )
-
-    return _has_active_office(query)
+    return user_capabilities(user).is_kingdom_equestrian_authorization_officer()
 
 
 def is_branch_seneschal(user, branch=None):
@@ -467,19 +708,7 @@ def is_branch_seneschal(user, branch=None):
     """
     if not user or not getattr(user, 'is_authenticated', False):
         return False
-
-    query = BranchMarshal.objects.filter(
-        person__user=user,
-        discipline__name=SENESCHAL_DISCIPLINE,
-        end_date__gte=date.today(),
-    )
-    if branch is not None:
-        if isinstance(branch, Branch):
-            query = query.filter(branch=branch)
-        else:
-            query = query.filter(branch__name=branch)
-
-    return _has_active_non_marshal_office(query)
+    return user_capabilities(user).is_branch_seneschal(branch)
 
 
 def is_kingdom_seneschal(user):
@@ -490,14 +719,7 @@ def is_kingdom_seneschal(user):
 def is_principality_seneschal(user):
     if not user or not getattr(user, 'is_authenticated', False):
         return False
-
-    query = BranchMarshal.objects.filter(
-        person__user=user,
-        branch__type='Principality',
-        discipline__name=SENESCHAL_DISCIPLINE,
-        end_date__gte=date.today(),
-    )
-    return _has_active_non_marshal_office(query)
+    return user_capabilities(user).is_principality_seneschal()
 
 
 def can_branch_have_seneschal(branch: Branch) -> bool:
@@ -557,29 +779,141 @@ def is_kingdom_earl_marshal(user):
     """
     Checks if the user is a current Earl Marshal.
     """
-    query = BranchMarshal.objects.filter(
-        person__user=user,
-        branch__name='An Tir',
-        discipline__name='Earl Marshal',
-        end_date__gte=date.today(),
-    )
-
-    return _has_active_office(query)
+    return user_capabilities(user).is_kingdom_earl_marshal()
 
 
 def waiver_signed(user):
     """Checks if the user has signed a waiver."""
     return bool(user.waiver_expiration and user.waiver_expiration > date.today())
 
-def authorization_follows_rules(marshal, existing_fighter, style_id, concurring_fighter: Optional[User] = None):
+_TERMINAL_PREREQUISITE_STATUSES = {'Inactive', 'Rejected', 'Revoked'}
+_PENDING_APPROVAL_STATUSES = {
+    'Awaiting Second Marshal Concurrence',
+    'Awaiting Regional Marshal Approval',
+    KINGDOM_APPROVAL_STATUS,
+    KINGDOM_EQUESTRIAN_WAIVER_STATUS,
+}
+
+
+class FighterRuleSnapshot:
+    """
+    A fighter's authorizations and active sanctions, loaded once so every
+    rule in authorization_follows_rules can be checked in memory.
+
+    Each authorization row is ``(discipline name, style name, status name,
+    is effectively active)``. Styles are loaded on first use and kept, so a
+    basket of styles costs one style query. Call :meth:`reload` after writing
+    authorizations for the fighter.
+    """
+
+    def __init__(self, person: Person, styles=None, today: Optional[date] = None):
+        self.person = person
+        self.today = today or date.today()
+        self.styles = dict(styles or {})
+        self._marshal_active_styles = {}
+        self.reload()
+
+    def reload(self):
+        self.sanctions = load_active_sanctions([self.person.pk], today=self.today)
+        rows = Authorization.objects.filter(person=self.person).values_list(
+            'style_id',
+            'style__discipline_id',
+            'style__discipline__name',
+            'style__name',
+            'status__name',
+            'effective_expiration_date',
+        )
+        self.authorizations = [
+            (
+                discipline_name,
+                style_name,
+                status_name,
+                status_name == 'Active'
+                and effective_expiration is not None
+                and effective_expiration >= self.today
+                and not self.sanctions.is_sanctioned(self.person.pk, style_id, discipline_id),
+            )
+            for style_id, discipline_id, discipline_name, style_name, status_name, effective_expiration in rows
+        ]
+
+    def load_styles(self, style_ids):
+        missing = {int(style_id) for style_id in style_ids} - set(self.styles)
+        if missing:
+            self.styles.update(WeaponStyle.objects.select_related('discipline').in_bulk(missing))
+
+    def style(self, style_id) -> WeaponStyle:
+        style_id = int(style_id)
+        if style_id not in self.styles:
+            self.styles[style_id] = WeaponStyle.objects.select_related('discipline').get(id=style_id)
+        return self.styles[style_id]
+
+    def has_authorization(
+        self,
+        *,
+        discipline=None,
+        styles=None,
+        exclude_styles=(),
+        statuses=None,
+        exclude_statuses=(),
+        active=False,
+    ) -> bool:
+        """In-memory equivalent of ``all_authorizations.filter(...).exclude(...).exists()``."""
+        for discipline_name, style_name, status_name, is_active in self.authorizations:
+            if active and not is_active:
+                continue
+            if discipline is not None and discipline_name != discipline:
+                continue
+            if styles is not None and style_name not in styles:
+                continue
+            if style_name in exclude_styles:
+                continue
+            if statuses is not None and status_name not in statuses:
+                continue
+            if status_name in exclude_statuses:
+                continue
+            return True
+        return False
+
+    def active_sanction_for_style(self, style: WeaponStyle):
+        """Mirror of active_sanction_for_style over the loaded sanctions."""
+        return self.sanctions.sanction_for_style(self.person.pk, style.id, style.discipline_id)
+
+    def marshal_has_active_style(self, marshal: User, discipline_name: str, style_names) -> bool:
+        key = (marshal.pk, discipline_name)
+        if key not in self._marshal_active_styles:
+            self._marshal_active_styles[key] = set(
+                Authorization.objects.effectively_active(today=self.today).filter(
+                    person=marshal.person,
+                    style__discipline__name=discipline_name,
+                ).values_list('style__name', flat=True)
+            )
+        return bool(self._marshal_active_styles[key] & set(style_names))
+
+
+def load_fighter_rule_snapshot(person: Person, style_ids=(), today: Optional[date] = None) -> FighterRuleSnapshot:
+    """Load a fighter's rule snapshot, prefetching the styles about to be checked."""
+    snapshot = FighterRuleSnapshot(person, today=today)
+    snapshot.load_styles(style_ids)
+    return snapshot
+
+
+def authorization_follows_rules(
+    marshal,
+    existing_fighter,
+    style_id,
+    concurring_fighter: Optional[User] = None,
+    snapshot: Optional[FighterRuleSnapshot] = None,
+):
     """Will need marshal, fighter, style.
     marshal needs to come in as a User. Existing_fighter comes in as a Person. Style_id comes in as a number.
+    Pass a snapshot from load_fighter_rule_snapshot when checking several styles for the same fighter.
     All of the rules rely on the spelling of the disciplines and weapon styles in the database.
     Some of these permissions rely on the fact that the weapon styles are in the proper order in the database. Where it matters, this will be called out in the rule."""
     # Get information needed to enforce the rules
-    style = WeaponStyle.objects.get(id=style_id)
-    all_authorizations = Authorization.objects.filter(person=existing_fighter)
-    active_authorizations = Authorization.objects.effectively_active().filter(person=existing_fighter)
+    if snapshot is None or snapshot.person.pk != existing_fighter.pk:
+        snapshot = FighterRuleSnapshot(existing_fighter)
+    style = snapshot.style(style_id)
+    discipline_name = style.discipline.name
     style_aliases = _equestrian_aliases_for_style_name(style.name)
     fighter_is_minor = existing_fighter.is_current_minor
     if existing_fighter.user.birthday:
@@ -590,12 +924,12 @@ def authorization_follows_rules(marshal, existing_fighter, style_id, concurring_
 
     # Rule 1: A senior marshal in a discipline, or a Kingdom Authorization Officer, can authorize.
     if not can_authorize_in_discipline(marshal, style.discipline):
-        return False, f'Must have a current {style.discipline.name} senior marshal.'
+        return False, f'Must have a current {discipline_name} senior marshal.'
 
     # Rule 2: A junior marshal must be at least 16 years old
     if style.name == 'Junior Marshal':
         # Rule 2a: Archery and thrown weapons junior marshals must be adults.
-        if style.discipline.name in ['Target Archery', 'Thrown Weapons']:
+        if discipline_name in ['Target Archery', 'Thrown Weapons']:
             if fighter_is_minor:
                 return False, 'Must be an adult to become an archery or thrown weapon junior marshal.'
         if age < 16:
@@ -609,75 +943,70 @@ def authorization_follows_rules(marshal, existing_fighter, style_id, concurring_
     # Rule 4: Rapier secondaries require Single Sword to exist in a non-terminal status.
     # Their effective expiration is capped by Active Single Sword, so they remain invalid
     # until Single Sword becomes active.
-    terminal_prerequisite_statuses = ['Inactive', 'Rejected', 'Revoked']
     style_base_name = youth_base_style_name(style.name)
-    if style.discipline.name == 'Rapier Combat' and style.name not in ['Single Sword', 'Junior Marshal', 'Senior Marshal']:
-        if not all_authorizations.filter(
-            style__discipline__name='Rapier Combat',
-            style__name='Single Sword',
-        ).exclude(status__name__in=terminal_prerequisite_statuses).exists():
+    if discipline_name == 'Rapier Combat' and style.name not in ['Single Sword', 'Junior Marshal', 'Senior Marshal']:
+        if not snapshot.has_authorization(
+            discipline='Rapier Combat',
+            styles={'Single Sword'},
+            exclude_statuses=_TERMINAL_PREREQUISITE_STATUSES,
+        ):
             return False, 'A fighter must have a single sword rapier authorization before adding other rapier authorizations.'
-    if style.discipline.name == 'Youth Rapier' and style_base_name not in ['Single Sword', 'Junior Marshal', 'Senior Marshal']:
+    if discipline_name == 'Youth Rapier' and style_base_name not in ['Single Sword', 'Junior Marshal', 'Senior Marshal']:
         category = youth_age_category_for_style_name(style.name)
-        single_sword_names = ['Single Sword']
+        single_sword_names = {'Single Sword'}
         if category:
-            single_sword_names.append(f'{category} - Single Sword')
-        if not all_authorizations.filter(
-            style__discipline__name='Youth Rapier',
-            style__name__in=single_sword_names,
-        ).exclude(status__name__in=terminal_prerequisite_statuses).exists():
+            single_sword_names.add(f'{category} - Single Sword')
+        if not snapshot.has_authorization(
+            discipline='Youth Rapier',
+            styles=single_sword_names,
+            exclude_statuses=_TERMINAL_PREREQUISITE_STATUSES,
+        ):
             return False, 'A fighter must have a single sword youth rapier authorization before adding other youth rapier authorizations.'
-    
+
     # Rule 5: A Cut & Thrust fighter cannot have spear as their first authorization.
-    if style.discipline.name == 'Cut & Thrust' and style.name == 'Spear':
-        if not all_authorizations.filter(
-            style__discipline__name='Cut & Thrust',
-        ).exclude(
-            style__name__in=['Spear', 'Junior Marshal', 'Senior Marshal'],
-        ).exclude(
-            status__name__in=terminal_prerequisite_statuses,
-        ).exists():
+    if discipline_name == 'Cut & Thrust' and style.name == 'Spear':
+        if not snapshot.has_authorization(
+            discipline='Cut & Thrust',
+            exclude_styles={'Spear', 'Junior Marshal', 'Senior Marshal'},
+            exclude_statuses=_TERMINAL_PREREQUISITE_STATUSES,
+        ):
             return False, 'A fighter cannot be authorized with spear as their first cut and thrust authorization.'
 
     # Rule 6: Rapier fighters must be at lest 14 years old
-    if style.discipline.name == 'Rapier Combat':
+    if discipline_name == 'Rapier Combat':
         if age < 14:
             return False, 'Must be at least 14 years old to become a rapier fighter.'
 
     # Rule 7: Armored Combat and Cut & Thrust fighters must be at least 16 years old.
-    if style.discipline.name in ['Armored Combat', 'Cut & Thrust']:
+    if discipline_name in ['Armored Combat', 'Cut & Thrust']:
         if age < 16:
-            return False, f'Must be at least 16 years old to become authorized in {style.discipline.name}.'
+            return False, f'Must be at least 16 years old to become authorized in {discipline_name}.'
 
     # Rule 8: Ground Crew - Senior requires Ground Crew - Junior and age 16+.
     if style.name in _SENIOR_GROUND_CREW_STYLES:
-        if all_authorizations.filter(
-            style__discipline__name='Equestrian',
-            style__name__in=_JUNIOR_GROUND_CREW_STYLES,
-            status__name__in=[
-                'Awaiting Second Marshal Concurrence',
-                'Awaiting Regional Marshal Approval',
-                KINGDOM_APPROVAL_STATUS,
-                KINGDOM_EQUESTRIAN_WAIVER_STATUS,
-            ],
-        ).exists():
+        if snapshot.has_authorization(
+            discipline='Equestrian',
+            styles=_JUNIOR_GROUND_CREW_STYLES,
+            statuses=_PENDING_APPROVAL_STATUSES,
+        ):
             return False, 'Cannot have a new Ground Crew - Senior if Ground Crew - Junior is pending.'
-        if not active_authorizations.filter(
-            style__discipline__name='Equestrian',
-            style__name__in=_JUNIOR_GROUND_CREW_STYLES,
-        ).exists():
+        if not snapshot.has_authorization(
+            discipline='Equestrian',
+            styles=_JUNIOR_GROUND_CREW_STYLES,
+            active=True,
+        ):
             return False, 'Ground Crew - Senior requires an active Ground Crew - Junior authorization.'
         if age < 16:
             return False, 'Must be at least 16 years old to become authorized as Ground Crew - Senior.'
 
     # Rule 9: Youth combatants must be at least 6 years old and minors.
-    if style.discipline.name in YOUTH_DISCIPLINE_NAMES:
+    if discipline_name in YOUTH_DISCIPLINE_NAMES:
         # Rule 9a: The exception is that marshals can be adults.
         if not style.name in ['Junior Marshal', 'Senior Marshal']:
             if age < 6:
-                return False, f'Must be at least 6 years old to become authorized in {style.discipline.name} combat.'
+                return False, f'Must be at least 6 years old to become authorized in {discipline_name} combat.'
             if not fighter_is_minor:
-                return False, f'Must be a minor to become authorized in {style.discipline.name} combat.'
+                return False, f'Must be a minor to become authorized in {discipline_name} combat.'
             style_category = youth_age_category_for_style_name(style.name)
             fighter_category = youth_age_category_for_age(age)
             if style_category and style_category != fighter_category:
@@ -703,86 +1032,71 @@ def authorization_follows_rules(marshal, existing_fighter, style_id, concurring_
 
     # Rule 11a: Mounted Gaming requires General Riding.
     if style.name in _MOUNTED_GAMING_STYLES:
-        if not all_authorizations.filter(
-            style__discipline__name='Equestrian',
-            style__name__in=_GENERAL_RIDING_STYLES,
-        ).exclude(
-            status__name__in=terminal_prerequisite_statuses,
-        ).exists():
+        if not snapshot.has_authorization(
+            discipline='Equestrian',
+            styles=_GENERAL_RIDING_STYLES,
+            exclude_statuses=_TERMINAL_PREREQUISITE_STATUSES,
+        ):
             return False, 'Mounted Gaming requires a General Riding authorization.'
 
     # Rule 11b: Mounted weapon-game special authorizations require Mounted Gaming.
     if style.name in _MOUNTED_WEAPON_GAME_STYLES:
-        if not all_authorizations.filter(
-            style__discipline__name='Equestrian',
-            style__name__in=_MOUNTED_GAMING_STYLES,
-        ).exclude(
-            status__name__in=terminal_prerequisite_statuses,
-        ).exists():
+        if not snapshot.has_authorization(
+            discipline='Equestrian',
+            styles=_MOUNTED_GAMING_STYLES,
+            exclude_statuses=_TERMINAL_PREREQUISITE_STATUSES,
+        ):
             return False, f'{style.name} requires a Mounted Gaming authorization.'
 
     # Rule 11c: Mounted Heavy Combat additionally requires General Riding.
     if style.name in _MOUNTED_COMBAT_STYLES:
-        if not all_authorizations.filter(
-            style__discipline__name='Equestrian',
-            style__name__in=_GENERAL_RIDING_STYLES,
-        ).exclude(
-            status__name__in=terminal_prerequisite_statuses,
-        ).exists():
+        if not snapshot.has_authorization(
+            discipline='Equestrian',
+            styles=_GENERAL_RIDING_STYLES,
+            exclude_statuses=_TERMINAL_PREREQUISITE_STATUSES,
+        ):
             return False, 'Mounted Heavy Combat requires a General Riding authorization.'
 
     # Rule 12: Youth rapier marshals must already be Junior or Senior Rapier marshals.
-    if style.discipline.name == 'Youth Rapier' and style.name in ['Junior Marshal', 'Senior Marshal']:
-        if not active_authorizations.filter(
-            style__discipline__name='Rapier Combat',
-            style__name__in=['Junior Marshal', 'Senior Marshal'],
-        ).exists():
+    if discipline_name == 'Youth Rapier' and style.name in ['Junior Marshal', 'Senior Marshal']:
+        if not snapshot.has_authorization(
+            discipline='Rapier Combat',
+            styles={'Junior Marshal', 'Senior Marshal'},
+            active=True,
+        ):
             return False, 'Must have a junior or senior rapier marshal authorization to become a youth rapier marshal.'
 
     # Rule 13: An Equestrian Junior marshal must already have Ground Crew - Senior and General Riding Authorizations.
-    if style.discipline.name == 'Equestrian' and style.name == 'Junior Marshal':
+    if discipline_name == 'Equestrian' and style.name == 'Junior Marshal':
         if not (
-            active_authorizations.filter(
-                style__discipline__name='Equestrian',
-                style__name__in=_SENIOR_GROUND_CREW_STYLES,
-            ).exists()
-            and active_authorizations.filter(
-                style__discipline__name='Equestrian',
-                style__name__in=_GENERAL_RIDING_STYLES,
-            ).exists()
+            snapshot.has_authorization(discipline='Equestrian', styles=_SENIOR_GROUND_CREW_STYLES, active=True)
+            and snapshot.has_authorization(discipline='Equestrian', styles=_GENERAL_RIDING_STYLES, active=True)
         ):
             return False, 'Junior Equestrian marshal must have Ground Crew - Senior and General Riding authorization.'
 
     # Rule 14: An Equestrian Senior marshal must already have Junior Marshal and Mounted Gaming Authorizations.
-    if style.discipline.name == 'Equestrian' and style.name == 'Senior Marshal':
-        existing_senior_equestrian = all_authorizations.filter(
-            style__name='Senior Marshal',
-            style__discipline__name='Equestrian',
-        ).exclude(
-            status__name__in=terminal_prerequisite_statuses,
-        ).exists()
-        has_required_junior = existing_senior_equestrian or active_authorizations.filter(
-            style__name='Junior Marshal',
-            style__discipline__name='Equestrian',
-        ).exists()
+    if discipline_name == 'Equestrian' and style.name == 'Senior Marshal':
+        existing_senior_equestrian = snapshot.has_authorization(
+            discipline='Equestrian',
+            styles={'Senior Marshal'},
+            exclude_statuses=_TERMINAL_PREREQUISITE_STATUSES,
+        )
+        has_required_junior = existing_senior_equestrian or snapshot.has_authorization(
+            discipline='Equestrian',
+            styles={'Junior Marshal'},
+            active=True,
+        )
         if not (
             has_required_junior
-            and active_authorizations.filter(style__name='Mounted Gaming').exists()
+            and snapshot.has_authorization(styles={'Mounted Gaming'}, active=True)
         ):
             return False, 'Senior Equestrian marshal must have Junior Equestrian marshal and Mounted Gaming authorization.'
 
     # Rule 15: For first-time special authorizations, the authorizing marshal must hold that skill.
     if style.name in _MOUNTED_SPECIAL_STYLES:
-        first_time_special = not all_authorizations.filter(
-            style__discipline__name='Equestrian',
-            style__name__in=style_aliases,
-        ).exists()
+        first_time_special = not snapshot.has_authorization(discipline='Equestrian', styles=style_aliases)
         if first_time_special:
-            if not Authorization.objects.effectively_active().filter(
-                person=marshal.person,
-                style__discipline__name="Equestrian",
-                style__name__in=style_aliases,
-            ).exists():
+            if not snapshot.marshal_has_active_style(marshal, 'Equestrian', style_aliases):
                 return False, f'Must be authorized in {style.name} to authorize a first-time participant in this skill.'
 
     # Rule 16: Junior and Senior marshals must be current members.
@@ -791,79 +1105,52 @@ def authorization_follows_rules(marshal, existing_fighter, style_id, concurring_
             return False, 'Must be a current member to be authorized as a marshal.'
 
     # Rule 17: You cannot authorize while an active sanction covers the style or discipline.
-    if active_sanction_for_style(existing_fighter, style):
+    if snapshot.active_sanction_for_style(style):
         return False, 'Cannot issue an authorization while a sanction is active for this style or discipline.'
 
     # Rule 18: Cannot duplicate/renew a pending authorization.
-    if all_authorizations.filter(
-        style__name=style.name,
-        style__discipline__name=style.discipline.name,
-        status__name__in=[
-            'Awaiting Second Marshal Concurrence',
-            'Awaiting Regional Marshal Approval',
-            KINGDOM_APPROVAL_STATUS,
-            KINGDOM_EQUESTRIAN_WAIVER_STATUS,
-            'Awaiting Fighter Concurrence',
-        ],
-    ).exists():
+    if snapshot.has_authorization(
+        discipline=discipline_name,
+        styles={style.name},
+        statuses=_PENDING_APPROVAL_STATUSES | {'Awaiting Fighter Concurrence'},
+    ):
         return False, 'Cannot renew a pending authorization.'
 
     # Rule 18a: Ground Crew - Junior cannot be issued when Ground Crew - Senior is active or pending.
     if _is_equestrian_junior_ground_crew_style(style):
-        if active_authorizations.filter(
-            style__discipline__name='Equestrian',
-            style__name__in=_SENIOR_GROUND_CREW_STYLES,
-        ).exists():
+        if snapshot.has_authorization(discipline='Equestrian', styles=_SENIOR_GROUND_CREW_STYLES, active=True):
             return False, 'Cannot make someone Ground Crew - Junior if they are already Ground Crew - Senior.'
-        if not active_authorizations.filter(
-            style__discipline__name='Equestrian',
-            style__name__in=_JUNIOR_GROUND_CREW_STYLES,
-        ).exists():
-            if all_authorizations.filter(
-                style__discipline__name='Equestrian',
-                style__name__in=_SENIOR_GROUND_CREW_STYLES,
-                status__name__in=[
-                    'Awaiting Second Marshal Concurrence',
-                    'Awaiting Regional Marshal Approval',
-                    KINGDOM_APPROVAL_STATUS,
-                    KINGDOM_EQUESTRIAN_WAIVER_STATUS,
-                ],
-            ).exists():
+        if not snapshot.has_authorization(discipline='Equestrian', styles=_JUNIOR_GROUND_CREW_STYLES, active=True):
+            if snapshot.has_authorization(
+                discipline='Equestrian',
+                styles=_SENIOR_GROUND_CREW_STYLES,
+                statuses=_PENDING_APPROVAL_STATUSES,
+            ):
                 return False, 'Cannot have a new Ground Crew - Junior if Ground Crew - Senior is pending.'
 
     # Rule 19: Cannot make someone a junior marshal if they are already a senior marshal.
     if style.name == 'Junior Marshal':
         # If they already have an active senior marshal, they cannot be a junior marshal.
-        if is_senior_marshal(existing_fighter.user, style.discipline.name):
+        if is_senior_marshal(existing_fighter.user, discipline_name):
             return False, 'Cannot make someone a junior marshal if they are already a senior marshal.'
 
         # Do they already have an active junior marshal?
-        if not active_authorizations.filter(style__name='Junior Marshal', style__discipline__name=style.discipline.name).exists():
+        if not snapshot.has_authorization(discipline=discipline_name, styles={'Junior Marshal'}, active=True):
             # We now know this is a new junior marshal. They cannot get a new junior marshal if there is a pending senior marshal.
-            if all_authorizations.filter(
-                style__name='Senior Marshal',
-                style__discipline__name=style.discipline.name,
-                status__name__in=[
-                    'Awaiting Second Marshal Concurrence',
-                    'Awaiting Regional Marshal Approval',
-                    KINGDOM_APPROVAL_STATUS,
-                    KINGDOM_EQUESTRIAN_WAIVER_STATUS,
-                ],
-            ).exists():
+            if snapshot.has_authorization(
+                discipline=discipline_name,
+                styles={'Senior Marshal'},
+                statuses=_PENDING_APPROVAL_STATUSES,
+            ):
                 return False, 'Cannot have a new junior marshal if a senior marshal is pending.'
 
     # Rule 20: Cannot add a new senior marshal if there is a pending junior marshal.
     if style.name == 'Senior Marshal':
-        if all_authorizations.filter(
-            style__name='Junior Marshal',
-            style__discipline__name=style.discipline.name,
-            status__name__in=[
-                'Awaiting Second Marshal Concurrence',
-                'Awaiting Regional Marshal Approval',
-                KINGDOM_APPROVAL_STATUS,
-                KINGDOM_EQUESTRIAN_WAIVER_STATUS,
-            ],
-        ).exists():
+        if snapshot.has_authorization(
+            discipline=discipline_name,
+            styles={'Junior Marshal'},
+            statuses=_PENDING_APPROVAL_STATUSES,
+        ):
             return False, 'Cannot have a new senior marshal if a junior marshal is pending.'
 
     # Rule 21: Cannot make an authorization for yourself.
@@ -871,12 +1158,12 @@ def authorization_follows_rules(marshal, existing_fighter, style_id, concurring_
         return False, 'Cannot make an authorization for yourself.'
 
     # Rule 22: If the fighter is a minor, and authorizing in Rapier, Cut & Thrust, or Armored Combat, they can only be authorized by a regional marshal.
-    if fighter_is_minor and style.discipline.name in ['Rapier Combat', 'Cut & Thrust', 'Armored Combat']:
+    if fighter_is_minor and discipline_name in ['Rapier Combat', 'Cut & Thrust', 'Armored Combat']:
         if not is_regional_marshal(marshal):
             return False, 'Cannot authorize a minor in Rapier, Cut & Thrust, or Armored Combat unless you are a regional marshal.'
 
     # Rule 23: Adults cannot be authorized as youth armored or youth rapier fighters. They can be authorized as youth marshals.
-    if not fighter_is_minor and style.discipline.name in YOUTH_DISCIPLINE_NAMES:
+    if not fighter_is_minor and discipline_name in YOUTH_DISCIPLINE_NAMES:
         if style.name != 'Junior Marshal' and style.name != 'Senior Marshal':
             return False, 'Adults cannot be authorized as youth armored or youth rapier fighters.'
 
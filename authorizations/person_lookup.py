@@ -0,0 +1,249 @@
+import re
+import threading
+import time
+from collections import defaultdict
+from difflib import SequenceMatcher
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from authorizations.models import Person
+
+
+PERSON_LOOKUP_FUZZY_THRESHOLD = 0.72
+_POSITION_KEY = 'authz:person-lookup-index:journal'
+MAX_JOURNAL_CATCH_UP = 500
+
+
+def normalize_lookup_name(value: str) -> str:
+    return re.sub(r'\s+', ' ', (value or '').casefold()).strip()
+
+
+def person_lookup_name_score(query: str, names) -> float:
+    """Best SequenceMatcher ratio between the query and any name, name token, or token average."""
+    normalized_query = normalize_lookup_name(query)
+    if not normalized_query:
+        return 0
+    query_tokens = normalized_query.split()
+    best_score = 0
+    for name in names:
+        normalized_name = normalize_lookup_name(name)
+        if not normalized_name:
+            continue
+        best_score = max(best_score, SequenceMatcher(None, normalized_query, normalized_name).ratio())
+        name_tokens = normalized_name.split()
+        for token in name_tokens:
+            best_score = max(best_score, SequenceMatcher(None, normalized_query, token).ratio())
+        if query_tokens and name_tokens:
+            token_scores = [
+                max(SequenceMatcher(None, query_token, name_token).ratio() for name_token in name_tokens)
+                for query_token in query_tokens
+            ]
+            best_score = max(best_score, sum(token_scores) / len(token_scores))
+    return best_score
+
+
+def person_lookup_names(sca_name, first_name, last_name):
+    full_name = f'{first_name or ""} {last_name or ""}'.strip()
+    return (sca_name or '', first_name or '', last_name or '', full_name)
+
+
+def _trigrams(text: str) -> set[str]:
+    # Padding keeps one- and two-character overlaps at either end of a word
+    # visible, which is where short fuzzy matches (e.g. "Jon" vs "Jo") live.
+    padded = f'  {text} '
+    return {padded[index:index + 3] for index in range(len(padded) - 2)}
+
+
+def _lookup_trigrams(names) -> set[str]:
+    grams = set()
+    for name in names:
+        normalized_name = normalize_lookup_name(name)
+        if not normalized_name:
+            continue
+        grams |= _trigrams(normalized_name)
+        for token in normalized_name.split():
+            grams |= _trigrams(token)
+    return grams
+
+
+class PersonNameIndex:
+    """
+    In-process trigram index over SCA, first, and last names.
+
+    Lookups only score people who share at least one padded trigram with the
+    query, then apply the same SequenceMatcher scoring and threshold the
+    officer lookup has always used. Membership numbers are deliberately left
+    out: the lookup only matches them as typed, so a mistyped number never
+    offers up someone else's record.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._names = {}
+        self._grams = {}
+        self._postings = defaultdict(set)
+        self.built_at = None
+        self.position = None
+
+    def _add(self, user_id, names):
+        grams = _lookup_trigrams(names)
+        self._names[user_id] = names
+        self._grams[user_id] = grams
+        for gram in grams:
+            self._postings[gram].add(user_id)
+
+    def _remove(self, user_id):
+        self._names.pop(user_id, None)
+        for gram in self._grams.pop(user_id, ()):
+            postings = self._postings.get(gram)
+            if postings is None:
+                continue
+            postings.discard(user_id)
+            if not postings:
+                del self._postings[gram]
+
+    def build(self, rows, position=None):
+        with self._lock:
+            self._names = {}
+            self._grams = {}
+            self._postings = defaultdict(set)
+            for user_id, sca_name, first_name, last_name in rows:
+                self._add(user_id, person_lookup_names(sca_name, first_name, last_name))
+            self.built_at = time.monotonic()
+            self.position = position
+
+    def refresh_entries(self, user_ids, rows):
+        """Replace the given people's entries with ``rows``; people without a row are dropped."""
+        with self._lock:
+            for user_id in user_ids:
+                self._remove(user_id)
+            for user_id, sca_name, first_name, last_name in rows:
+                self._add(user_id, person_lookup_names(sca_name, first_name, last_name))
+
+    def candidates(self, query: str) -> set:
+        with self._lock:
+            user_ids = set()
+            for gram in _lookup_trigrams([query]):
+                user_ids |= self._postings.get(gram, set())
+            return user_ids
+
+    def search(self, query: str, threshold: float = PERSON_LOOKUP_FUZZY_THRESHOLD, exclude=(), *, sca_name_only=False):
+        """
+        Return ``{user_id: score}`` for indexed people scoring at or above the threshold.
+
+        With ``sca_name_only`` the first and last names are not scored, for
+        lookups whose users may not see them.
+        """
+        excluded = set(exclude)
+        matches = {}
+        for user_id in self.candidates(query) - excluded:
+            names = self._names.get(user_id)
+            if names is None:
+                continue
+            if sca_name_only:
+                names = names[:1]
+            score = person_lookup_name_score(query, names)
+            if score >= threshold:
+                matches[user_id] = score
+        return matches
+
+
+_person_name_index = PersonNameIndex()
+
+
+def _person_lookup_rows(user_ids=None):
+    query = Person.objects.all()
+    if user_ids is not None:
+        query = query.filter(user_id__in=user_ids)
+    return query.values_list('user_id', 'sca_name', 'user__first_name', 'user__last_name')
+
+
+def _journal_entry_key(position):
+    return f'{_POSITION_KEY}:{position}'
+
+
+def _journal_position() -> int:
+    return cache.get(_POSITION_KEY) or 0
+
+
+def _user_ids_changed_between(start, end):
+    """
+    Return the people recorded in journal entries after ``start`` up to ``end``.
+
+    Returns None when the gap is too large or an entry has been evicted; the
+    caller then rebuilds the index from scratch.
+    """
+    if start is None or end < start or end - start > MAX_JOURNAL_CATCH_UP:
+        return None
+    if end == start:
+        return set()
+    keys = [_journal_entry_key(position) for position in range(start + 1, end + 1)]
+    entries = cache.get_many(keys)
+    if len(entries) != len(keys):
+        return None
+    return {user_id for entry in entries.values() for user_id in entry}
+
+
+def person_lookup_index() -> PersonNameIndex:
+    """
+    Return the process-wide name index.
+
+    It is rebuilt once it is older than AUTHZ_PERSON_LOOKUP_INDEX_SECONDS;
+    in between, names changed by other processes are re-read one person at a
+    time from the shared change journal.
+    """
+    max_age = getattr(settings, 'AUTHZ_PERSON_LOOKUP_INDEX_SECONDS', 0)
+    # Read the position before any rows so a change committed in between is
+    # applied again on the next lookup rather than skipped.
+    position = _journal_position()
+    index = _person_name_index
+    with index._lock:
+        if (
+            index.built_at is None
+            or not max_age
+            or time.monotonic() - index.built_at > max_age
+        ):
+            index.build(_person_lookup_rows(), position=position)
+        elif index.position != position:
+            changed = _user_ids_changed_between(index.position, position)
+            if changed is None:
+                index.build(_person_lookup_rows(), position=position)
+            else:
+                if changed:
+                    index.refresh_entries(changed, _person_lookup_rows(changed))
+                index.position = position
+    return index
+
+
+def refresh_person_lookup_entry(user_id, *, using='default') -> None:
+    """
+    Re-read one person's names into this process's index and journal the
+    change so other processes re-read just that person.
+
+    Both happen once the surrounding transaction commits, so the index never
+    holds uncommitted names.
+    """
+    max_age = getattr(settings, 'AUTHZ_PERSON_LOOKUP_INDEX_SECONDS', 0)
+    if not max_age or user_id is None:
+        return
+
+    def apply():
+        try:
+            position = cache.incr(_POSITION_KEY)
+        except ValueError:
+            cache.add(_POSITION_KEY, 0, timeout=None)
+            position = cache.incr(_POSITION_KEY)
+        # Any process that last caught up before this entry rebuilds within
+        # max_age, so the entry never needs to outlive it.
+        cache.set(_journal_entry_key(position), [user_id], timeout=max_age)
+        index = _person_name_index
+        with index._lock:
+            if index.built_at is None:
+                return
+            index.refresh_entries([user_id], _person_lookup_rows([user_id]))
+            if index.position == position - 1:
+                index.position = position
+
+    transaction.on_commit(apply, using=using)
@@ -0,0 +1,77 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+
+_GENERATION_KEY = 'authz:report-snapshot:generation'
+_POSITION_KEY = 'authz:report-snapshot:journal'
+MAX_JOURNAL_CATCH_UP = 500
+
+
+def report_snapshot_cache_seconds() -> int:
+    return getattr(settings, 'AUTHZ_REPORT_SNAPSHOT_CACHE_SECONDS', 0)
+
+
+def report_snapshot_generation() -> int:
+    return cache.get_or_set(_GENERATION_KEY, 1, timeout=None)
+
+
+def bump_report_snapshot_generation() -> None:
+    """Retire every cached report snapshot; used when regions, disciplines, or styles change."""
+    if not report_snapshot_cache_seconds():
+        return
+    try:
+        cache.incr(_GENERATION_KEY)
+    except ValueError:
+        cache.set(_GENERATION_KEY, 2, timeout=None)
+
+
+def report_journal_position() -> int:
+    return cache.get(_POSITION_KEY) or 0
+
+
+def _journal_entry_key(position):
+    return f'{_POSITION_KEY}:{position}'
+
+
+def mark_report_people_changed(person_ids, *, using='default') -> None:
+    """
+    Record that these people's report contributions may have changed.
+
+    Entries are appended once the surrounding transaction commits, so a
+    snapshot refreshed from the journal never reads uncommitted rows.
+    """
+    timeout = report_snapshot_cache_seconds()
+    if not timeout:
+        return
+    changed = sorted({int(person_id) for person_id in person_ids if person_id})
+    if not changed:
+        return
+
+    def append():
+        try:
+            position = cache.incr(_POSITION_KEY)
+        except ValueError:
+            cache.add(_POSITION_KEY, 0, timeout=None)
+            position = cache.incr(_POSITION_KEY)
+        cache.set(_journal_entry_key(position), changed, timeout=timeout)
+
+    transaction.on_commit(append, using=using)
+
+
+def report_people_changed_between(start, end):
+    """
+    Return the people recorded in journal entries after ``start`` up to ``end``.
+
+    Returns None when the gap is too large or an entry has been evicted; the
+    caller then rebuilds the snapshot from scratch.
+    """
+    if end < start or end - start > MAX_JOURNAL_CATCH_UP:
+        return None
+    if end == start:
+        return set()
+    keys = [_journal_entry_key(position) for position in range(start + 1, end + 1)]
+    entries = cache.get_many(keys)
+    if len(entries) != len(keys):
+        return None
+    return {person_id for entry in entries.values() for person_id in entry}
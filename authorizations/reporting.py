@@ -1,7 +1,23 @@
-from collections import defaultdict
+from bisect import bisect_left, bisect_right
+from collections import Counter, defaultdict
 from datetime import date
 
-from authorizations.models import Authorization, Branch, Discipline, WeaponStyle, is_minor_from_birthday
+from django.core.cache import cache
+
+from authorizations.models import (
+    Authorization,
+    AuthorizationValidityInterval,
+    Branch,
+    Discipline,
+    WeaponStyle,
+    is_minor_from_birthday,
+)
+from authorizations.report_journal import (
+    report_journal_position,
+    report_people_changed_between,
+    report_snapshot_cache_seconds,
+    report_snapshot_generation,
+)
 
 
 MARSHAL_STYLE_NAMES = {'Junior Marshal', 'Senior Marshal'}
@@ -142,128 +158,168 @@ def _equestrian_bucket_for_style(style_name):
     return None
 
 
-def _person_region_name(person):
-    branch = getattr(person, 'branch', None)
-    if not branch:
+def _region_name_for_branch(branch_name, branch_type, parent_region_name):
+    if not branch_name:
         return None
-    if branch.type in ['Kingdom', 'Principality', 'Region']:
-        return branch.name
-    if branch.region:
-        return branch.region.name
-    return None
-
-
-def build_current_report_snapshot(as_of=None):
+    if branch_type in ['Kingdom', 'Principality', 'Region']:
+        return branch_name
+    return parent_region_name
+
+
+# Person-level counter keys are (metric, region_name, subject); region_name is
+# None for kingdom-wide counts.
+def _person_report_keys(style_rows, region_name, is_minor, active_region_set):
+    """Return the set of report counters one person contributes to."""
+    styles_by_discipline = defaultdict(set)
+    for style_name, discipline_name in style_rows:
+        styles_by_discipline[discipline_name].add(style_name)
+
+    scopes = [None]
+    if region_name in active_region_set:
+        scopes.append(region_name)
+
+    keys = set()
+    for discipline_name, style_set in styles_by_discipline.items():
+        metrics = ['people']
+        if style_set - MARSHAL_STYLE_NAMES:
+            metrics.append('combatants')
+        if is_minor:
+            metrics.append('minors')
+        if 'Junior Marshal' in style_set:
+            metrics.append('juniors')
+            if len(style_set) == 1:
+                metrics.append('nf_juniors')
+        if 'Senior Marshal' in style_set:
+            metrics.append('seniors')
+            if len(style_set) == 1:
+                metrics.append('nf_seniors')
+        for scope in scopes:
+            keys.update((metric, scope, discipline_name) for metric in metrics)
+
+        if discipline_name == 'Equestrian':
+            for style_name in style_set:
+                bucket = _equestrian_bucket_for_style(style_name)
+                if bucket:
+                    keys.update(('equestrian', scope, bucket) for scope in scopes)
+    return frozenset(keys)
+
+
+def _load_report_people(as_of, active_region_set, person_ids=None):
     """
-    Build all three current reports from live authorization data without persistence.
+    Return {person_id: counter keys} for people holding Active authorizations on ``as_of``.
 
-    This intentionally depends on the static mappings above; validate assumptions first
-    so config drift fails safely with an actionable message instead of silent bad data.
+    Reads flat value rows rather than model instances, so minor and region
+    resolution happen once per person instead of once per authorization.
     """
-    if as_of is None:
-        as_of = date.today()
-
-    issues = validate_current_reporting_configuration()
-    if issues:
-        raise ReportingConfigurationError(issues)
-    active_regions = _active_region_names()
-    active_region_set = set(active_regions)
-
-    active_auths = (
-        Authorization.objects.with_effective_expiration()
-        .select_related('person__user', 'person__branch__region', 'style__discipline')
-        .filter(status__name='Active', effective_expiration_date__gte=as_of)
+    queryset = Authorization.objects.filter(
+        status__name='Active',
+        effective_expiration_date__gte=as_of,
     )
+    if person_ids is not None:
+        queryset = queryset.filter(person_id__in=person_ids)
+    rows = queryset.values_list(
+        'person_id',
+        'style__name',
+        'style__discipline__name',
+        'person__user__birthday',
+        'person__user__country',
+        'person__user__state_province',
+        'person__branch__name',
+        'person__branch__type',
+        'person__branch__region__name',
+    )
+
+    style_rows = defaultdict(list)
+    person_details = {}
+    for (
+        person_id,
+        style_name,
+        discipline_name,
+        birthday,
+        country,
+        state_province,
+        branch_name,
+        branch_type,
+        parent_region_name,
+    ) in rows.iterator(chunk_size=2000):
+        style_rows[person_id].append((style_name, discipline_name))
+        if person_id not in person_details:
+            person_details[person_id] = (
+                _region_name_for_branch(branch_name, branch_type, parent_region_name),
+                is_minor_from_birthday(birthday, country, state_province, today=as_of),
+            )
 
-    disc_people = defaultdict(set)
-    disc_combatants = defaultdict(set)
-    disc_minors = defaultdict(set)
-    disc_juniors = defaultdict(set)
-    disc_seniors = defaultdict(set)
-    disc_person_styles = defaultdict(lambda: defaultdict(set))
-
-    region_disc_people = defaultdict(set)
-    region_disc_combatants = defaultdict(set)
-    region_disc_minors = defaultdict(set)
-    region_disc_juniors = defaultdict(set)
-    region_disc_seniors = defaultdict(set)
-    region_disc_person_styles = defaultdict(lambda: defaultdict(set))
-
-    equestrian_people = defaultdict(set)
-    equestrian_region_people = defaultdict(set)
-
-    for auth in active_auths:
-        person_id = auth.person_id
-        style_name = auth.style.name
-        discipline_name = auth.style.discipline.name
-        is_minor = is_minor_from_birthday(
-            auth.person.user.birthday,
-            auth.person.user.country,
-            auth.person.user.state_province,
-            today=as_of,
+    return {
+        person_id: _person_report_keys(
+            style_rows[person_id],
+            region_name,
+            is_minor,
+            active_region_set,
         )
-        region_name = _person_region_name(auth.person)
+        for person_id, (region_name, is_minor) in person_details.items()
+    }
 
-        disc_key = discipline_name
-        disc_people[disc_key].add(person_id)
-        disc_person_styles[disc_key][person_id].add(style_name)
-        if style_name not in MARSHAL_STYLE_NAMES:
-            disc_combatants[disc_key].add(person_id)
-        if is_minor:
-            disc_minors[disc_key].add(person_id)
-        if style_name == 'Junior Marshal':
-            disc_juniors[disc_key].add(person_id)
-        if style_name == 'Senior Marshal':
-            disc_seniors[disc_key].add(person_id)
-
-        if region_name in active_region_set:
-            region_disc_key = (region_name, discipline_name)
-            region_disc_people[region_disc_key].add(person_id)
-            region_disc_person_styles[region_disc_key][person_id].add(style_name)
-            if style_name not in MARSHAL_STYLE_NAMES:
-                region_disc_combatants[region_disc_key].add(person_id)
-            if is_minor:
-                region_disc_minors[region_disc_key].add(person_id)
-            if style_name == 'Junior Marshal':
-                region_disc_juniors[region_disc_key].add(person_id)
-            if style_name == 'Senior Marshal':
-                region_disc_seniors[region_disc_key].add(person_id)
-
-        equestrian_bucket = _equestrian_bucket_for_style(style_name) if discipline_name == 'Equestrian' else None
-        if equestrian_bucket:
-            equestrian_people[equestrian_bucket].add(person_id)
-            if region_name in active_region_set:
-                equestrian_region_people[(region_name, equestrian_bucket)].add(person_id)
-
-    disc_nf_juniors = defaultdict(set)
-    disc_nf_seniors = defaultdict(set)
-    for discipline_name, person_styles in disc_person_styles.items():
-        for person_id, style_set in person_styles.items():
-            if 'Junior Marshal' in style_set and len(style_set) == 1:
-                disc_nf_juniors[discipline_name].add(person_id)
-            if 'Senior Marshal' in style_set and len(style_set) == 1:
-                disc_nf_seniors[discipline_name].add(person_id)
-
-    region_disc_nf_juniors = defaultdict(set)
-    region_disc_nf_seniors = defaultdict(set)
-    for region_disc_key, person_styles in region_disc_person_styles.items():
-        for person_id, style_set in person_styles.items():
-            if 'Junior Marshal' in style_set and len(style_set) == 1:
-                region_disc_nf_juniors[region_disc_key].add(person_id)
-            if 'Senior Marshal' in style_set and len(style_set) == 1:
-                region_disc_nf_seniors[region_disc_key].add(person_id)
 
+class ReportSnapshotState:
+    """
+    Live report counters for one as-of date, kept as per-person contributions.
+
+    Every metric counts distinct people, so replacing one person's key set and
+    adjusting the counters is enough to bring the report current after that
+    person's authorizations, branch, or birthday change.
+    """
+
+    def __init__(self, as_of, active_regions):
+        self.as_of = as_of
+        self.active_regions = list(active_regions)
+        self.person_keys = {}
+        self.counters = Counter()
+        self.journal_position = 0
+
+    @classmethod
+    def build(cls, as_of):
+        issues = validate_current_reporting_configuration()
+        if issues:
+            raise ReportingConfigurationError(issues)
+        state = cls(as_of, _active_region_names())
+        for person_id, keys in _load_report_people(as_of, set(state.active_regions)).items():
+            state._set_person(person_id, keys)
+        return state
+
+    def _set_person(self, person_id, keys):
+        previous = self.person_keys.pop(person_id, frozenset())
+        if previous:
+            self.counters.subtract(previous)
+        if keys:
+            self.person_keys[person_id] = keys
+            self.counters.update(keys)
+
+    def refresh_people(self, person_ids):
+        """Reload the contributions of ``person_ids`` only."""
+        person_ids = list(person_ids)
+        active_region_set = set(self.active_regions)
+        for offset in range(0, len(person_ids), 500):
+            batch = person_ids[offset:offset + 500]
+            loaded = _load_report_people(self.as_of, active_region_set, person_ids=batch)
+            for person_id in batch:
+                self._set_person(person_id, loaded.get(person_id, frozenset()))
+
+    def rows(self):
+        return _report_rows_from_counters(self.counters, self.active_regions)
+
+
+def _report_rows_from_counters(counters, active_regions):
     quarterly_rows = []
     display_order = 0
     for discipline_name, report_label in QUARTERLY_DISCIPLINE_MAP:
         metric_values = [
-            ('Total Participants', len(disc_people[discipline_name])),
-            ('Total Combatants', len(disc_combatants[discipline_name])),
-            ('Minors Fighting', len(disc_minors[discipline_name])),
-            ('Junior Marshals', len(disc_juniors[discipline_name])),
-            ('Non-Fighting Junior Marshals', len(disc_nf_juniors[discipline_name])),
-            ('Senior Marshals', len(disc_seniors[discipline_name])),
-            ('Non-Fighting Senior Marshals', len(disc_nf_seniors[discipline_name])),
+            ('Total Participants', counters[('people', None, discipline_name)]),
+            ('Total Combatants', counters[('combatants', None, discipline_name)]),
+            ('Minors Fighting', counters[('minors', None, discipline_name)]),
+            ('Junior Marshals', counters[('juniors', None, discipline_name)]),
+            ('Non-Fighting Junior Marshals', counters[('nf_juniors', None, discipline_name)]),
+            ('Senior Marshals', counters[('seniors', None, discipline_name)]),
+            ('Non-Fighting Senior Marshals', counters[('nf_seniors', None, discipline_name)]),
         ]
         for metric_name, value in metric_values:
             display_order += 1
@@ -283,17 +339,16 @@ def build_current_report_snapshot(as_of=None):
         total_authorizations = 0
         discipline_metric_rows = []
         for discipline_name, report_label in REGIONAL_DISCIPLINE_MAP:
-            region_key = (region_name, discipline_name)
-            combatants_count = len(region_disc_combatants[region_key])
+            combatants_count = counters[('combatants', region_name, discipline_name)]
             total_authorizations += combatants_count
             discipline_metric_rows.extend(
                 [
                     ('Combatants', report_label, combatants_count),
-                    ('Minors', report_label, len(region_disc_minors[region_key])),
-                    ('Seniors', report_label, len(region_disc_seniors[region_key])),
-                    ('Juniors', report_label, len(region_disc_juniors[region_key])),
-                    ('NF Jr Marshals', report_label, len(region_disc_nf_juniors[region_key])),
-                    ('NF Sr Marshals', report_label, len(region_disc_nf_seniors[region_key])),
+                    ('Minors', report_label, counters[('minors', region_name, discipline_name)]),
+                    ('Seniors', report_label, counters[('seniors', region_name, discipline_name)]),
+                    ('Juniors', report_label, counters[('juniors', region_name, discipline_name)]),
+                    ('NF Jr Marshals', report_label, counters[('nf_juniors', region_name, discipline_name)]),
+                    ('NF Sr Marshals', report_label, counters[('nf_seniors', region_name, discipline_name)]),
                 ]
             )
 
@@ -323,7 +378,7 @@ def build_current_report_snapshot(as_of=None):
     display_order = 0
     an_tir_total = 0
     for auth_type in EQUESTRIAN_TYPE_ORDER:
-        value = len(equestrian_people[auth_type])
+        value = counters[('equestrian', None, auth_type)]
         an_tir_total += value
         display_order += 1
         equestrian_rows.append(
@@ -349,7 +404,7 @@ def build_current_report_snapshot(as_of=None):
     for region_name in active_regions:
         region_total = 0
         for auth_type in EQUESTRIAN_TYPE_ORDER:
-            value = len(equestrian_region_people[(region_name, auth_type)])
+            value = counters[('equestrian', region_name, auth_type)]
             region_total += value
             display_order += 1
             equestrian_rows.append(
@@ -377,3 +432,141 @@ def build_current_report_snapshot(as_of=None):
         'regional_breakdown': regional_rows,
         'equestrian': equestrian_rows,
     }
+
+
+def build_current_report_snapshot(as_of=None):
+    """
+    Build all three current reports from live authorization data without persistence.
+
+    This intentionally depends on the static mappings above; validate assumptions first
+    so config drift fails safely with an actionable message instead of silent bad data.
+    """
+    if as_of is None:
+        as_of = date.today()
+    return ReportSnapshotState.build(as_of).rows()
+
+
+def _historical_report_people(as_of_dates, active_region_set):
+    """
+    Return {as_of: {person_id: counter keys}} from authorization validity intervals.
+
+    One range scan reads every interval overlapping the requested dates; each
+    interval is then matched to the dates it covers by binary search over the
+    sorted dates, so many quarters cost a single pass over the interval table.
+    """
+    dates = sorted(set(as_of_dates))
+    if not dates:
+        return {}
+    rows = AuthorizationValidityInterval.objects.filter(
+        start_date__lte=dates[-1],
+        end_date__gte=dates[0],
+    ).values_list(
+        'start_date',
+        'end_date',
+        'authorization__person_id',
+        'authorization__style__name',
+        'authorization__style__discipline__name',
+        'authorization__person__user__birthday',
+        'authorization__person__user__country',
+        'authorization__person__user__state_province',
+        'authorization__person__branch__name',
+        'authorization__person__branch__type',
+        'authorization__person__branch__region__name',
+    )
+
+    styles_by_date = {as_of: defaultdict(set) for as_of in dates}
+    person_details = {}
+    for (
+        start_date,
+        end_date,
+        person_id,
+        style_name,
+        discipline_name,
+        birthday,
+        country,
+        state_province,
+        branch_name,
+        branch_type,
+        parent_region_name,
+    ) in rows.iterator(chunk_size=2000):
+        covered = dates[bisect_left(dates, start_date):bisect_right(dates, end_date)]
+        for as_of in covered:
+            styles_by_date[as_of][person_id].add((style_name, discipline_name))
+        if covered and person_id not in person_details:
+            person_details[person_id] = (
+                _region_name_for_branch(branch_name, branch_type, parent_region_name),
+                birthday,
+                country,
+                state_province,
+            )
+
+    people_by_date = {}
+    for as_of, person_styles in styles_by_date.items():
+        people = {}
+        for person_id, style_rows in person_styles.items():
+            region_name, birthday, country, state_province = person_details[person_id]
+            people[person_id] = _person_report_keys(
+                style_rows,
+                region_name,
+                is_minor_from_birthday(birthday, country, state_province, today=as_of),
+                active_region_set,
+            )
+        people_by_date[as_of] = people
+    return people_by_date
+
+
+def build_historical_report_snapshots(as_of_dates):
+    """
+    Build the three reports for each date from recorded validity intervals.
+
+    Unlike build_current_report_snapshot(), this answers who was actually
+    authorized on each date, so past quarters can be regenerated after their
+    authorizations have expired or been renewed. People are still grouped by
+    their current branch, which is not tracked historically.
+    """
+    issues = validate_current_reporting_configuration()
+    if issues:
+        raise ReportingConfigurationError(issues)
+    active_regions = _active_region_names()
+    people_by_date = _historical_report_people(as_of_dates, set(active_regions))
+    return {
+        as_of: _report_rows_from_counters(
+            Counter(key for keys in people.values() for key in keys),
+            active_regions,
+        )
+        for as_of, people in people_by_date.items()
+    }
+
+
+def cached_report_snapshot(as_of=None):
+    """
+    Return the live report for ``as_of``, kept in the shared cache between requests.
+
+    A cached state is brought current by reloading only the people named in
+    the change journal since it was stored. Reference-data changes bump the
+    generation and force a full rebuild, as does a journal gap. A zero
+    AUTHZ_REPORT_SNAPSHOT_CACHE_SECONDS always rebuilds.
+    """
+    if as_of is None:
+        as_of = date.today()
+    timeout = report_snapshot_cache_seconds()
+    if not timeout:
+        return build_current_report_snapshot(as_of=as_of)
+
+    key = f'authz:report-snapshot:{report_snapshot_generation()}:{as_of.isoformat()}'
+    # Read the journal position first so changes made while building are replayed next time.
+    position = report_journal_position()
+    state = cache.get(key)
+    if state is not None and state.journal_position == position:
+        return state.rows()
+
+    changed = None
+    if state is not None:
+        changed = report_people_changed_between(state.journal_position, position)
+    if changed is None:
+        state = ReportSnapshotState.build(as_of)
+    else:
+        state.refresh_people(sorted(changed))
+    state.journal_position = position
+    cache.set(key, state, timeout=timeout)
+    return state.rows()
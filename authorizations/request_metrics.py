@@ -0,0 +1,195 @@
+import contextvars
+import json
+import logging
+import threading
+import time
+from collections import defaultdict, deque
+from typing import NamedTuple, Optional
+
+from django.conf import settings
+from django.utils import timezone
+
+performance_logger = logging.getLogger("performance.requests")
+
+UNRESOLVED_VIEW_NAME = '<unresolved>'
+
+_template_timer = contextvars.ContextVar('authz_template_timer', default=None)
+_template_patch_lock = threading.Lock()
+_template_rendering_instrumented = False
+
+
+class ViewBudget(NamedTuple):
+    queries: Optional[int] = None
+    milliseconds: Optional[float] = None
+
+
+class RequestSample(NamedTuple):
+    queries: int
+    db_ms: float
+    template_ms: float
+    total_ms: float
+    over_budget: bool
+
+
+def view_budget(queries=None, milliseconds=None):
+    """
+    Declare the query and latency budget for a view.
+
+    Budgets are only checked when AUTHZ_REQUEST_METRICS_ENABLED is on; an entry
+    for the same URL name in AUTHZ_VIEW_BUDGETS takes precedence.
+    """
+    def decorator(view_func):
+        view_func.authz_view_budget = ViewBudget(queries=queries, milliseconds=milliseconds)
+        return view_func
+    return decorator
+
+
+def budget_for_view(url_name, view_func=None) -> ViewBudget:
+    configured = getattr(settings, 'AUTHZ_VIEW_BUDGETS', {}) or {}
+    if url_name in configured:
+        return ViewBudget(**configured[url_name])
+    return getattr(view_func, 'authz_view_budget', None) or ViewBudget()
+
+
+def log_request_metrics(event_type, level=logging.INFO, **fields):
+    """Emit a structured JSON request-metrics line."""
+    event = {
+        "event": event_type,
+        "timestamp": timezone.now().isoformat(),
+        **fields,
+    }
+    performance_logger.log(level, json.dumps(event))
+
+
+class QueryTimer:
+    """Database execute wrapper that counts queries and their wall time."""
+
+    def __init__(self):
+        self.queries = 0
+        self.seconds = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries += 1
+            self.seconds += time.perf_counter() - started
+
+
+class TemplateTimer:
+    def __init__(self):
+        self.seconds = 0.0
+        self.depth = 0
+
+
+def instrument_template_rendering():
+    """
+    Time Django template rendering for requests that are being measured.
+
+    Only the outermost render is timed, so included templates are not counted
+    twice. Requests outside the middleware pay one context-variable lookup.
+    """
+    global _template_rendering_instrumented
+    if _template_rendering_instrumented:
+        return
+    with _template_patch_lock:
+        if _template_rendering_instrumented:
+            return
+        from django.template.base import Template
+
+        original_render = Template.render
+
+        def render(self, context):
+            timer = _template_timer.get()
+            if timer is None:
+                return original_render(self, context)
+            timer.depth += 1
+            started = time.perf_counter()
+            try:
+                return original_render(self, context)
+            finally:
+                timer.depth -= 1
+                if timer.depth == 0:
+                    timer.seconds += time.perf_counter() - started
+
+        Template.render = render
+        _template_rendering_instrumented = True
+
+
+def start_template_timer():
+    timer = TemplateTimer()
+    return timer, _template_timer.set(timer)
+
+
+def stop_template_timer(token):
+    _template_timer.reset(token)
+
+
+def _percentile(values, fraction):
+    ordered = sorted(values)
+    if not ordered:
+        return 0
+    index = min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))
+    return ordered[index]
+
+
+class RequestMetricsStore:
+    """Rolling window of recent request samples per URL name for this process."""
+
+    def __init__(self, window=200):
+        self.window = window
+        self._lock = threading.Lock()
+        self._samples = defaultdict(lambda: deque(maxlen=self.window))
+        self._totals = defaultdict(int)
+        self._budgets = {}
+
+    def record(self, url_name, sample: RequestSample, budget: ViewBudget = ViewBudget()):
+        with self._lock:
+            self._samples[url_name].append(sample)
+            self._totals[url_name] += 1
+            self._budgets[url_name] = budget
+
+    def reset(self):
+        with self._lock:
+            self._samples.clear()
+            self._totals.clear()
+            self._budgets.clear()
+
+    def summary(self):
+        """Per-view statistics over the rolling window, slowest average first."""
+        with self._lock:
+            snapshot = {url_name: list(samples) for url_name, samples in self._samples.items()}
+            totals = dict(self._totals)
+            budgets = dict(self._budgets)
+        rows = []
+        for url_name, samples in snapshot.items():
+            if not samples:
+                continue
+            count = len(samples)
+            budget = budgets.get(url_name, ViewBudget())
+            rows.append({
+                'url_name': url_name,
+                'requests': totals.get(url_name, count),
+                'window': count,
+                'avg_queries': sum(sample.queries for sample in samples) / count,
+                'max_queries': max(sample.queries for sample in samples),
+                'avg_db_ms': sum(sample.db_ms for sample in samples) / count,
+                'avg_template_ms': sum(sample.template_ms for sample in samples) / count,
+                'avg_total_ms': sum(sample.total_ms for sample in samples) / count,
+                'p95_total_ms': _percentile([sample.total_ms for sample in samples], 0.95),
+                'over_budget': sum(1 for sample in samples if sample.over_budget),
+                'budget_queries': budget.queries,
+                'budget_ms': budget.milliseconds,
+            })
+        rows.sort(key=lambda row: row['avg_total_ms'], reverse=True)
+        return rows
+
+
+request_metrics_store = RequestMetricsStore(
+    window=getattr(settings, 'AUTHZ_REQUEST_METRICS_WINDOW', 200),
+)
+
+
+def request_metrics_enabled() -> bool:
+    return bool(getattr(settings, 'AUTHZ_REQUEST_METRICS_ENABLED', False))
@@ -1,19 +1,32 @@
-from django.db.models.signals import post_save, pre_save
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
 from django.dispatch import receiver
 
-from .models import Authorization, AuthorizationAuditEntry
+from .models import (
+    AUTHORIZATION_AUDIT_TRACKED_FIELDS,
+    Authorization,
+    AuthorizationAuditEntry,
+    AuthorizationPortalSetting,
+    AuthorizationStatus,
+    Branch,
+    BranchMarshal,
+    Discipline,
+    Person,
+    Sanction,
+    SupportingDocument,
+    User,
+    WeaponStyle,
+    record_authorization_audit_entry,
+    refresh_effective_expirations,
+)
+from .maintenance import invalidate_portal_setting_cache
+from .permissions import invalidate_all_user_capabilities, invalidate_user_capabilities
+from .option_cache import bump_option_list_generation
+from .person_lookup import refresh_person_lookup_entry
+from .report_journal import bump_report_snapshot_generation, mark_report_people_changed
 
 
-TRACKED_AUTHORIZATION_FIELDS = [
-    'person_id',
-    'style_id',
-    'status_id',
-    'expiration',
-    'marshal_id',
-    'concurring_fighter_id',
-    'created_by_id',
-    'updated_by_id',
-]
+TRACKED_AUTHORIZATION_FIELDS = list(AUTHORIZATION_AUDIT_TRACKED_FIELDS)
 
 
 def _snapshot_authorization(authorization):
@@ -61,6 +74,12 @@ def cache_authorization_audit_before(sender, instance, raw=False, **kwargs):
     if raw or not instance.pk:
         instance._authorization_audit_before = None
         return
+    # Instances loaded from the database remember their tracked values, so the
+    # row only needs re-reading for hand-built instances.
+    loaded = getattr(instance, '_loaded_audit_state', None)
+    if loaded is not None and not instance._state.adding:
+        instance._authorization_audit_before = dict(loaded)
+        return
     instance._authorization_audit_before = (
         sender.objects
         .filter(pk=instance.pk)
@@ -69,31 +88,33 @@ def cache_authorization_audit_before(sender, instance, raw=False, **kwargs):
     )
 
 
-@receiver(post_save, sender=Authorization)
-def create_authorization_audit_entry(sender, instance, created, raw=False, **kwargs):
-    if raw:
-        return
-    before = getattr(instance, '_authorization_audit_before', None)
-    after = _snapshot_authorization(instance)
+def authorization_audit_entry(authorization, before, *, created=False):
+    """
+    Build the unsaved audit entry for a change from ``before`` to the authorization's current values.
+
+    Returns None when no tracked field changed. Bulk writers that skip save()
+    pass the entry to record_authorization_audit_entry() themselves.
+    """
+    after = _snapshot_authorization(authorization)
     changed_fields = [
         field for field in TRACKED_AUTHORIZATION_FIELDS
         if created or (before and before.get(field) != after.get(field))
     ]
     if not changed_fields:
-        return
+        return None
 
-    event_type = _authorization_audit_event_type(before or {}, after, created, instance)
+    event_type = _authorization_audit_event_type(before or {}, after, created, authorization)
     changed_by_id = after.get('updated_by_id') or after.get('created_by_id')
     person_id = after.get('person_id') or (before or {}).get('person_id')
     style_id = after.get('style_id') or (before or {}).get('style_id')
 
-    AuthorizationAuditEntry.objects.create(
-        authorization=instance,
+    return AuthorizationAuditEntry(
+        authorization=authorization,
         person_id=person_id,
         style_id=style_id,
         event_type=event_type,
         changed_by_id=changed_by_id,
-        summary=_authorization_audit_summary(event_type, before, after, instance),
+        summary=_authorization_audit_summary(event_type, before, after, authorization),
         changed_fields=changed_fields,
         before_person_id=(before or {}).get('person_id'),
         after_person_id=after.get('person_id'),
@@ -112,3 +133,142 @@ def create_authorization_audit_entry(sender, instance, created, raw=False, **kwa
         before_updated_by_id=(before or {}).get('updated_by_id'),
         after_updated_by_id=after.get('updated_by_id'),
     )
+
+
+@receiver(post_save, sender=Authorization)
+def create_authorization_audit_entry(sender, instance, created, raw=False, using='default', **kwargs):
+    if raw:
+        return
+    before = getattr(instance, '_authorization_audit_before', None)
+    entry = authorization_audit_entry(instance, before, created=created)
+    instance._loaded_audit_state = _snapshot_authorization(instance)
+    if entry is not None:
+        record_authorization_audit_entry(entry, using=using)
+
+
+@receiver(pre_save, sender=SupportingDocument)
+def mark_uploaded_supporting_document_present(sender, instance, raw=False, **kwargs):
+    # A newly attached upload is written to storage as part of this save.
+    if not raw and instance.file and not instance.file._committed:
+        instance.file_present = True
+
+
+@receiver(post_delete, sender=Authorization)
+def refresh_effective_expirations_after_delete(sender, instance, using=None, **kwargs):
+    # A deleted prerequisite can shorten the person's remaining authorizations.
+    refresh_effective_expirations([instance.person_id], using=using or 'default')
+
+
+@receiver(post_save, sender=BranchMarshal)
+@receiver(post_delete, sender=BranchMarshal)
+@receiver(post_save, sender=Authorization)
+@receiver(post_delete, sender=Authorization)
+@receiver(post_save, sender=Sanction)
+@receiver(post_delete, sender=Sanction)
+def invalidate_person_capabilities(sender, instance, using='default', **kwargs):
+    # Person rows share their user's primary key.
+    invalidate_user_capabilities(instance.person_id, using=using)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_account_capabilities(sender, instance, update_fields=None, using='default', **kwargs):
+    if update_fields is not None and set(update_fields) <= {'last_login'}:
+        return
+    invalidate_user_capabilities(instance.pk, using=using)
+
+
+@receiver(post_save, sender=Branch)
+@receiver(post_delete, sender=Branch)
+@receiver(post_save, sender=Discipline)
+@receiver(post_delete, sender=Discipline)
+@receiver(post_save, sender=WeaponStyle)
+@receiver(post_delete, sender=WeaponStyle)
+@receiver(post_save, sender=AuthorizationStatus)
+@receiver(post_delete, sender=AuthorizationStatus)
+def invalidate_all_capabilities(sender, instance, using='default', **kwargs):
+    # Capability checks match on branch, discipline, style, and status names.
+    invalidate_all_user_capabilities(using=using)
+
+
+@receiver(post_save, sender=Person)
+@receiver(post_delete, sender=Person)
+def refresh_person_lookup_after_person_change(sender, instance, using=None, **kwargs):
+    refresh_person_lookup_entry(instance.user_id, using=using or 'default')
+
+
+@receiver(post_save, sender=User)
+def refresh_person_lookup_after_user_change(sender, instance, update_fields=None, using=None, **kwargs):
+    if update_fields is not None and not {'first_name', 'last_name'} & set(update_fields):
+        return
+    refresh_person_lookup_entry(instance.pk, using=using or 'default')
+
+
+@receiver(post_save, sender=Person)
+@receiver(post_delete, sender=Person)
+@receiver(post_save, sender=Branch)
+@receiver(post_delete, sender=Branch)
+@receiver(post_save, sender=Discipline)
+@receiver(post_delete, sender=Discipline)
+@receiver(post_save, sender=WeaponStyle)
+@receiver(post_delete, sender=WeaponStyle)
+@receiver(post_save, sender=Authorization)
+@receiver(post_delete, sender=Authorization)
+@receiver(post_save, sender=BranchMarshal)
+@receiver(post_delete, sender=BranchMarshal)
+def invalidate_option_lists(sender, instance, **kwargs):
+    bump_option_list_generation()
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_option_lists_after_user_change(sender, instance, update_fields=None, **kwargs):
+    # Staff and merged accounts are excluded from the people lists.
+    if update_fields is not None and set(update_fields) <= {'last_login'}:
+        return
+    bump_option_list_generation()
+
+
+@receiver(post_save, sender=Authorization)
+def mark_reassigned_authorization_person(sender, instance, raw=False, **kwargs):
+    # Authorization.save() journals the current holder; a reassignment also
+    # changes the previous holder's report counts.
+    before = getattr(instance, '_authorization_audit_before', None) or {}
+    if raw or before.get('person_id') in (None, instance.person_id):
+        return
+    mark_report_people_changed([before['person_id']])
+
+
+@receiver(post_save, sender=Person)
+@receiver(post_delete, sender=Person)
+def mark_report_person_changed(sender, instance, **kwargs):
+    mark_report_people_changed([instance.user_id])
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def mark_report_user_changed(sender, instance, update_fields=None, **kwargs):
+    # Birthday and address decide minor status; last_login never matters.
+    if update_fields is not None and set(update_fields) <= {'last_login'}:
+        return
+    mark_report_people_changed([instance.pk])
+
+
+@receiver(post_save, sender=Branch)
+@receiver(post_delete, sender=Branch)
+@receiver(post_save, sender=Discipline)
+@receiver(post_delete, sender=Discipline)
+@receiver(post_save, sender=WeaponStyle)
+@receiver(post_delete, sender=WeaponStyle)
+@receiver(post_save, sender=AuthorizationStatus)
+@receiver(post_delete, sender=AuthorizationStatus)
+def invalidate_report_snapshots(sender, instance, **kwargs):
+    bump_report_snapshot_generation()
+
+
+@receiver(post_save, sender=AuthorizationPortalSetting)
+@receiver(post_delete, sender=AuthorizationPortalSetting)
+def invalidate_portal_setting(sender, instance, using='default', **kwargs):
+    # Again on commit, in case another process re-read the old row meanwhile.
+    invalidate_portal_setting_cache()
+    transaction.on_commit(invalidate_portal_setting_cache, using=using)
@@ -1,19 +1,24 @@
 
+import csv
 from datetime import date, timedelta
 from io import StringIO
+import json
 import os
 from pathlib import Path
+import shutil
 import tempfile
 from types import SimpleNamespace
 from unittest.mock import patch
 
 from dateutil.relativedelta import relativedelta
 from django.core import mail
+from django.core.cache import cache
 from django.core.exceptions import ValidationError
 from django.core.files.uploadedfile import SimpleUploadedFile
 from django.core.management import call_command, CommandError
-from django.db import IntegrityError
+from django.db import IntegrityError, connection, connections
 from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.utils import timezone
 from django.urls import reverse
 
@@ -32,6 +37,7 @@ from authorizations.models import (
     ReportingPeriod,
     Sanction,
     MembershipRosterEntry,
+    OutboundEmail,
     Title,
     LegacyAuthorizationRecoveryEntry,
     User,
@@ -41,15 +47,29 @@ from authorizations.models import (
     SupportingDocumentAuthorization,
     SupportingDocumentPerson,
     WeaponStyle,
+    deferred_authorization_audit,
+    deferred_authorization_validity_sync,
+    sync_authorization_validity_intervals,
 )
+from authorizations.maintenance import invalidate_portal_setting_cache
+from authorizations.outbound_email import FAILED_EMAIL_BODY_RETENTION, deliver_queued_email, queue_email
 from authorizations.permissions import validate_reject_authorization
-from authorizations.reporting import EQUESTRIAN_TYPE_ORDER, QUARTERLY_DISCIPLINE_MAP, REGION_ORDER, build_current_report_snapshot
+from authorizations.reporting import (
+    EQUESTRIAN_TYPE_ORDER,
+    QUARTERLY_DISCIPLINE_MAP,
+    REGION_ORDER,
+    build_current_report_snapshot,
+    build_historical_report_snapshots,
+    cached_report_snapshot,
+)
 from authorizations.views import CreateAuthorizationForm, CreatePersonForm, _apply_profile_form_to_user_and_person
 from authorizations.changelog import unreleased_has_displayable_entries
 from authorizations.management.commands.populate_restore_validity_intervals import (
     Command as PopulateRestoreValidityIntervalsCommand,
     IntervalCandidate,
 )
+from authorizations.management.commands import catch_up_validity_intervals as catch_up_command_module
+from authorizations.management.commands import normalize_local_weapon_styles as normalize_styles_command_module
 from authorizations.management.commands.catch_up_validity_intervals import Command as CatchUpValidityIntervalsCommand
 
 
@@ -87,6 +107,8 @@ class AdditionalCoverageBase(TestCase):
         cls.style_single_rapier = WeaponStyle.objects.create(name='Single Sword', discipline=cls.discipline_rapier)
 
     def setUp(self):
+        invalidate_portal_setting_cache()
+        self.addCleanup(invalidate_portal_setting_cache)
         self._membership_seed = 300000
 
     def _next_membership(self):
@@ -484,6 +506,51 @@ class AuthorizationValidityIntervalSyncTests(AdditionalCoverageBase):
         interval = AuthorizationValidityInterval.objects.get(authorization=dependent)
         self.assertEqual(interval.end_date, date(2028, 1, 31))
 
+    def test_batch_sync_reads_and_writes_intervals_for_all_authorizations_together(self):
+        authorizations = []
+        for index in range(3):
+            _, person = self.make_person(f'interval_sync_batch_{index}', f'Interval Sync Batch {index}')
+            authorizations.append(
+                self.grant_authorization(person, self.style_weapon_armored, expiration=date(2028, 6, 1))
+            )
+        AuthorizationValidityInterval.objects.filter(authorization__in=authorizations[:2]).delete()
+        AuthorizationValidityInterval.objects.filter(authorization=authorizations[2]).update(end_date=date(2027, 6, 1))
+
+        # Load the authorizations, read their intervals, bulk update, bulk create.
+        with self.assertNumQueries(4):
+            synced = sync_authorization_validity_intervals([authorization.pk for authorization in authorizations])
+
+        self.assertEqual(set(synced), {authorization.pk for authorization in authorizations})
+        self.assertEqual(
+            list(
+                AuthorizationValidityInterval.objects.filter(authorization__in=authorizations)
+                .order_by('authorization_id')
+                .values_list('start_date', 'end_date')
+            ),
+            [(date(2024, 6, 1), date(2028, 6, 1))] * 3,
+        )
+
+    def test_deferred_sync_applies_membership_updates_when_block_exits(self):
+        _, person = self.make_person(
+            'interval_sync_deferred',
+            'Interval Sync Deferred',
+            membership_expiration=date.today() + relativedelta(years=1),
+        )
+        authorization = self.grant_authorization(
+            person,
+            self.style_sm_armored,
+            expiration=date.today() + relativedelta(years=4),
+        )
+
+        with deferred_authorization_validity_sync():
+            person.user.membership_expiration = date.today() + relativedelta(years=2)
+            person.user.save(update_fields=['membership_expiration', 'updated_at'])
+            interval = AuthorizationValidityInterval.objects.get(authorization=authorization)
+            self.assertEqual(interval.end_date, date.today() + relativedelta(years=1))
+
+        interval.refresh_from_db()
+        self.assertEqual(interval.end_date, date.today() + relativedelta(years=2))
+
 
 class PopulateRestoreValidityIntervalsCommandTests(TestCase):
     def test_effective_expiration_shortens_marshal_interval_to_membership(self):
@@ -629,7 +696,7 @@ class PopulateRestoreValidityIntervalsCommandTests(TestCase):
         self.assertIn('manually reviewed', candidate.note)
 
 
-class CatchUpValidityIntervalsCommandTests(TestCase):
+class CatchUpValidityIntervalsCommandTests(AdditionalCoverageBase):
     def test_action_for_identifies_unchanged_created_and_gap_interval(self):
         command = CatchUpValidityIntervalsCommand()
         existing = [
@@ -650,6 +717,162 @@ class CatchUpValidityIntervalsCommandTests(TestCase):
         with self.assertRaises(CommandError):
             call_command('catch_up_validity_intervals')
 
+    def test_interrupted_write_resumes_from_checkpoint(self):
+        authorizations = []
+        for index in range(3):
+            _, person = self.make_person(f'catch_up_resume_{index}', f'Catch Up Resume {index}')
+            authorizations.append(self.grant_authorization(person, self.style_weapon_armored))
+        AuthorizationValidityInterval.objects.filter(authorization__in=authorizations).delete()
+        output_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, output_dir, ignore_errors=True)
+        options = ['--all', '--write', '--allow-empty', '--batch-size', '1', '--output-dir', output_dir]
+        replace_intervals = catch_up_command_module.replace_authorization_validity_intervals
+        calls = []
+
+        def fail_on_second_batch(merged_by_authorization):
+            calls.append(merged_by_authorization)
+            if len(calls) == 2:
+                raise RuntimeError('interrupted')
+            replace_intervals(merged_by_authorization)
+
+        with patch.object(CatchUpValidityIntervalsCommand, '_validate_interval_table'):
+            with patch.object(catch_up_command_module, 'replace_authorization_validity_intervals', fail_on_second_batch):
+                with self.assertRaisesMessage(RuntimeError, 'interrupted'):
+                    call_command('catch_up_validity_intervals', *options, stdout=StringIO())
+            checkpoint_path = Path(output_dir) / catch_up_command_module.CHECKPOINT_FILENAME
+            self.assertEqual(
+                json.loads(checkpoint_path.read_text())['last_authorization_id'],
+                authorizations[0].id,
+            )
+
+            output = StringIO()
+            call_command('catch_up_validity_intervals', *options, stdout=output)
+
+        self.assertIn(f'Resuming after authorization {authorizations[0].id}', output.getvalue())
+        self.assertIn('Applied catch-up changes for 3 authorization(s).', output.getvalue())
+        self.assertFalse(checkpoint_path.exists())
+        self.assertEqual(
+            AuthorizationValidityInterval.objects.filter(authorization__in=authorizations).count(),
+            3,
+        )
+        with (Path(output_dir) / 'validity_interval_catch_up_review.csv').open(newline='') as handle:
+            review_rows = list(csv.DictReader(handle))
+        self.assertEqual(
+            [int(row['authorization_id']) for row in review_rows],
+            [authorization.id for authorization in authorizations],
+        )
+
+
+    def _interrupted_catch_up(self, options):
+        """Run a catch-up --write that stops after its first batch; return the checkpoint path."""
+        replace_intervals = catch_up_command_module.replace_authorization_validity_intervals
+        calls = []
+
+        def fail_on_second_batch(merged_by_authorization):
+            calls.append(merged_by_authorization)
+            if len(calls) == 2:
+                raise RuntimeError('interrupted')
+            replace_intervals(merged_by_authorization)
+
+        with patch.object(catch_up_command_module, 'replace_authorization_validity_intervals', fail_on_second_batch):
+            with self.assertRaisesMessage(RuntimeError, 'interrupted'):
+                call_command('catch_up_validity_intervals', *options, stdout=StringIO())
+        return Path(options[options.index('--output-dir') + 1]) / catch_up_command_module.CHECKPOINT_FILENAME
+
+    def test_resume_without_snapshot_date_uses_the_checkpoint_date(self):
+        for index in range(2):
+            _, person = self.make_person(f'catch_up_snapshot_{index}', f'Catch Up Snapshot {index}')
+            self.grant_authorization(person, self.style_weapon_armored)
+        AuthorizationValidityInterval.objects.all().delete()
+        output_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, output_dir, ignore_errors=True)
+        options = ['--all', '--write', '--allow-empty', '--batch-size', '1', '--output-dir', output_dir]
+
+        class NextDay(date):
+            @classmethod
+            def today(cls):
+                return date.today() + timedelta(days=1)
+
+        with patch.object(CatchUpValidityIntervalsCommand, '_validate_interval_table'):
+            checkpoint_path = self._interrupted_catch_up(options)
+            recorded_date = json.loads(checkpoint_path.read_text())['snapshot_date']
+
+            with patch.object(catch_up_command_module, 'date', NextDay):
+                call_command('catch_up_validity_intervals', *options, stdout=StringIO())
+
+        self.assertFalse(checkpoint_path.exists())
+        with (Path(output_dir) / 'validity_interval_catch_up_summary.csv').open(newline='') as handle:
+            summary = {row['metric']: row['value'] for row in csv.DictReader(handle)}
+        self.assertEqual(summary['snapshot_date'], recorded_date)
+
+    def test_resume_with_a_different_snapshot_date_names_the_checkpoint_date(self):
+        for index in range(2):
+            _, person = self.make_person(f'catch_up_mismatch_{index}', f'Catch Up Mismatch {index}')
+            self.grant_authorization(person, self.style_weapon_armored)
+        AuthorizationValidityInterval.objects.all().delete()
+        output_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, output_dir, ignore_errors=True)
+        options = ['--all', '--write', '--allow-empty', '--batch-size', '1', '--output-dir', output_dir]
+
+        with patch.object(CatchUpValidityIntervalsCommand, '_validate_interval_table'):
+            self._interrupted_catch_up(options + ['--snapshot-date', '2026-06-05'])
+            with self.assertRaisesMessage(CommandError, 'with --snapshot-date 2026-06-05'):
+                call_command(
+                    'catch_up_validity_intervals',
+                    *options,
+                    '--snapshot-date',
+                    '2026-06-06',
+                    stdout=StringIO(),
+                )
+
+    def test_workers_plan_batches_in_a_process_pool_in_authorization_order(self):
+        authorizations = []
+        for index in range(3):
+            _, person = self.make_person(f'catch_up_workers_{index}', f'Catch Up Workers {index}')
+            authorizations.append(self.grant_authorization(person, self.style_weapon_armored))
+        AuthorizationValidityInterval.objects.all().delete()
+        output_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, output_dir, ignore_errors=True)
+        pools = []
+
+        class InlinePool:
+            # Plans in this process so the chunks can read the test transaction's rows.
+            def __init__(self, max_workers, initializer):
+                pools.append(max_workers)
+                self.initializer = initializer
+
+            def __enter__(self):
+                self.initializer()
+                return self
+
+            def __exit__(self, *exc_info):
+                return False
+
+            def map(self, function, *iterables):
+                return [function(*arguments) for arguments in zip(*iterables)]
+
+        options = ['--all', '--write', '--allow-empty', '--batch-size', '1', '--workers', '2', '--output-dir', output_dir]
+
+        with patch.object(CatchUpValidityIntervalsCommand, '_validate_interval_table'):
+            with patch.object(catch_up_command_module, 'ProcessPoolExecutor', InlinePool):
+                with patch.object(catch_up_command_module, 'connections') as mocked_connections:
+                    # Re-running setup here would reconfigure logging for the rest of the suite.
+                    with patch.object(catch_up_command_module.django, 'setup') as worker_setup:
+                        call_command('catch_up_validity_intervals', *options, stdout=StringIO())
+
+        self.assertEqual(pools, [2])
+        mocked_connections.close_all.assert_called_once_with()
+        worker_setup.assert_called_once_with()
+        self.assertEqual(
+            AuthorizationValidityInterval.objects.filter(authorization__in=authorizations).count(),
+            3,
+        )
+        with (Path(output_dir) / 'validity_interval_catch_up_review.csv').open(newline='') as handle:
+            review_rows = list(csv.DictReader(handle))
+        self.assertEqual(
+            [int(row['authorization_id']) for row in review_rows],
+            [authorization.id for authorization in authorizations],
+        )
 
 class RepairMergedAccountHistoryCommandTests(AdditionalCoverageBase):
     def _merged_pair(self, source_username='repair_merge_source', survivor_username='repair_merge_survivor'):
@@ -995,6 +1218,34 @@ class ActivatePendingWaiverAuthorizationsCommandTests(AdditionalCoverageBase):
         self.assertIn('No waiver-blocked authorizations were found', out.getvalue())
 
 
+class NormalizeLocalWeaponStylesCommandTests(AdditionalCoverageBase):
+    def test_apply_refreshes_effective_expirations_for_moved_styles(self):
+        _, person = self.make_person('normalize_styles_refresh', 'Normalize Styles Refresh')
+        legacy_rapier = Discipline.objects.create(name='Rapier')
+        legacy_single_sword = WeaponStyle.objects.create(name='Single Sword', discipline=legacy_rapier)
+        legacy_case = WeaponStyle.objects.create(name='Case', discipline=legacy_rapier)
+        single_sword_expiration = date.today() + relativedelta(months=6)
+        self.grant_authorization(person, legacy_single_sword, expiration=single_sword_expiration)
+        case_authorization = self.grant_authorization(
+            person,
+            legacy_case,
+            expiration=date.today() + relativedelta(years=1),
+        )
+        case_authorization.refresh_from_db()
+        self.assertEqual(case_authorization.effective_expiration_date, date.today() + relativedelta(years=1))
+
+        with patch.object(
+            normalize_styles_command_module,
+            'EXPECTED_DATABASE_NAME',
+            str(connections.databases['default']['NAME']),
+        ):
+            call_command('normalize_local_weapon_styles', '--apply', stdout=StringIO())
+
+        case_authorization.refresh_from_db()
+        self.assertEqual(case_authorization.style.discipline, self.discipline_rapier)
+        self.assertEqual(case_authorization.effective_expiration_date, single_sword_expiration)
+
+
 class ProfileFormWaiverActivationTests(AdditionalCoverageBase):
     def test_profile_update_roster_waiver_activates_pending_waiver_authorizations(self):
         actor_user, _ = self.make_person('profile_waiver_actor', 'Profile Waiver Actor')
@@ -2306,6 +2557,65 @@ class ModelValidationAndConstraintTests(AdditionalCoverageBase):
 
         self.assertFalse(AuthorizationAuditEntry.objects.filter(authorization=auth).exists())
 
+    def test_authorization_audit_uses_loaded_values_instead_of_rereading_row(self):
+        user, person = self.make_person('audit_loaded_user', 'Audit Loaded User')
+        auth = self.grant_authorization(person, self.style_weapon_armored)
+        AuthorizationAuditEntry.objects.filter(authorization=auth).delete()
+        loaded = Authorization.objects.get(pk=auth.pk)
+        loaded.status = self.status_rejected
+        loaded.updated_by = user
+
+        with CaptureQueriesContext(connection) as queries:
+            loaded.save()
+
+        audit_reads = [
+            query['sql'] for query in queries.captured_queries
+            if query['sql'].startswith('SELECT') and '"updated_by_id" AS "updated_by_id" FROM' in query['sql']
+        ]
+        self.assertEqual(audit_reads, [])
+        entry = AuthorizationAuditEntry.objects.get(authorization=auth)
+        self.assertEqual(entry.before_status, self.status_active)
+        self.assertEqual(entry.after_status, self.status_rejected)
+
+        loaded.expiration = loaded.expiration + timedelta(days=30)
+        loaded.save()
+
+        latest = AuthorizationAuditEntry.objects.filter(authorization=auth, event_type='renewed').get()
+        self.assertEqual(latest.before_status, self.status_rejected)
+        self.assertEqual(latest.changed_fields, ['expiration'])
+
+    def test_deferred_authorization_audit_writes_entries_together_on_exit(self):
+        user, person = self.make_person('audit_deferred_user', 'Audit Deferred User')
+        first = self.grant_authorization(person, self.style_weapon_armored)
+        second = self.grant_authorization(person, self.style_polearm_armored)
+        AuthorizationAuditEntry.objects.all().delete()
+
+        with deferred_authorization_audit():
+            with deferred_authorization_audit():
+                for auth in (first, second):
+                    auth.status = self.status_rejected
+                    auth.updated_by = user
+                    auth.save()
+            self.assertFalse(AuthorizationAuditEntry.objects.exists())
+
+        self.assertEqual(
+            set(AuthorizationAuditEntry.objects.values_list('authorization_id', 'event_type')),
+            {(first.id, 'rejected'), (second.id, 'rejected')},
+        )
+
+    def test_deferred_authorization_audit_writes_nothing_when_block_raises(self):
+        _, person = self.make_person('audit_deferred_error', 'Audit Deferred Error')
+        auth = self.grant_authorization(person, self.style_weapon_armored)
+        AuthorizationAuditEntry.objects.all().delete()
+
+        with self.assertRaises(RuntimeError):
+            with deferred_authorization_audit():
+                auth.status = self.status_rejected
+                auth.save()
+                raise RuntimeError('stop')
+
+        self.assertFalse(AuthorizationAuditEntry.objects.exists())
+
     def test_authorization_audit_entry_is_immutable(self):
         _, person = self.make_person('audit_immutable_user', 'Audit Immutable User')
         auth = self.grant_authorization(person, self.style_weapon_armored)
@@ -3350,14 +3660,152 @@ class GenerateQuarterlyReportCommandTests(TestCase):
         self.assertFalse(ReportingPeriod.objects.exists())
         self.assertIn('is not the last day of a quarter', output.getvalue())
 
+    def test_as_of_all_periods_backfills_empty_past_periods_in_one_pass(self):
+        empty_period = ReportingPeriod.objects.create(year=2024, quarter=3, authorization_officer_name='Past Officer')
+        stored_period = ReportingPeriod.objects.create(year=2024, quarter=4, authorization_officer_name='Stored')
+        ReportValue.objects.create(
+            reporting_period=stored_period,
+            report_family=ReportValue.ReportFamily.QUARTERLY_MARSHAL,
+            region_name='',
+            subject_name='Armored Combat',
+            metric_name='Total Participants',
+            value=5,
+            display_order=1,
+        )
+        output = StringIO()
+
+        with patch(
+            'authorizations.management.commands.generate_quarterly_report.build_historical_report_snapshots',
+            return_value={date(2024, 9, 30): self.snapshot(9)},
+        ) as build_snapshots:
+            call_command('generate_quarterly_report', '--as-of', '--all-periods', stdout=output)
+
+        build_snapshots.assert_called_once_with([date(2024, 9, 30)])
+        empty_period.refresh_from_db()
+        self.assertEqual(empty_period.authorization_officer_name, 'Past Officer')
+        self.assertEqual(list(empty_period.report_values.values_list('value', flat=True)), [9])
+        self.assertEqual(list(stored_period.report_values.values_list('value', flat=True)), [5])
+        self.assertIn('Skipped Q4 2024', output.getvalue())
+
+    def test_as_of_all_periods_stores_given_officer_name_on_backfilled_periods(self):
+        period = ReportingPeriod.objects.create(year=2024, quarter=3, authorization_officer_name='Past Officer')
+
+        with patch(
+            'authorizations.management.commands.generate_quarterly_report.build_historical_report_snapshots',
+            return_value={date(2024, 9, 30): self.snapshot(9)},
+        ):
+            call_command(
+                'generate_quarterly_report',
+                '--as-of',
+                '--all-periods',
+                '--authorization-officer-name',
+                'Backfill Officer',
+                stdout=StringIO(),
+            )
+
+        period.refresh_from_db()
+        self.assertEqual(period.authorization_officer_name, 'Backfill Officer')
+
+    def test_all_periods_requires_as_of(self):
+        with self.assertRaisesMessage(CommandError, '--all-periods requires --as-of.'):
+            call_command('generate_quarterly_report', '--all-periods', stdout=StringIO())
+
+
+@override_settings(AUTHZ_EMAIL_QUEUE_ENABLED=True)
+class OutboundEmailQueueTests(TestCase):
+    def test_queued_email_is_deduplicated_and_delivered_by_worker(self):
+        first = queue_email('Subject', 'Body', 'from@example.com', ['person@example.com'])
+        duplicate = queue_email('Subject', 'Body', 'from@example.com', ['person@example.com'])
+
+        self.assertEqual(first.pk, duplicate.pk)
+        self.assertEqual(len(mail.outbox), 0)
+
+        output = StringIO()
+        call_command('send_queued_email', stdout=output)
+
+        first.refresh_from_db()
+        self.assertEqual(first.status, OutboundEmail.Status.SENT)
+        self.assertEqual(first.attempts, 1)
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, ['person@example.com'])
+        self.assertIn('Sent 1 message(s)', output.getvalue())
+        # A resubmission shortly after delivery is still treated as a duplicate.
+        self.assertEqual(queue_email('Subject', 'Body', 'from@example.com', ['person@example.com']).pk, first.pk)
+
+    def test_failed_send_is_retried_with_backoff_then_marked_failed(self):
+        outbound = queue_email('Subject', 'Body', 'from@example.com', ['person@example.com'])
+
+        with patch('authorizations.outbound_email.EmailMessage.send', side_effect=OSError('provider down')):
+            call_command('send_queued_email', '--max-attempts', '2', stdout=StringIO())
+            outbound.refresh_from_db()
+            self.assertEqual(outbound.status, OutboundEmail.Status.QUEUED)
+            self.assertEqual(outbound.attempts, 1)
+            self.assertGreater(outbound.next_attempt_at, timezone.now() + timedelta(seconds=30))
+            self.assertIn('provider down', outbound.last_error)
+
+            OutboundEmail.objects.filter(pk=outbound.pk).update(next_attempt_at=timezone.now())
+            call_command('send_queued_email', '--max-attempts', '2', stdout=StringIO())
+
+        outbound.refresh_from_db()
+        self.assertEqual(outbound.status, OutboundEmail.Status.FAILED)
+        self.assertEqual(len(mail.outbox), 0)
+
+        call_command('send_queued_email', '--requeue-failed', stdout=StringIO())
+        outbound.refresh_from_db()
+        self.assertEqual(outbound.status, OutboundEmail.Status.SENT)
+        self.assertEqual(len(mail.outbox), 1)
+
+    def test_sent_message_body_is_cleared(self):
+        outbound = queue_email('Reset', 'Reset link: https://example.com/reset/token/', None, ['person@example.com'])
+
+        call_command('send_queued_email', stdout=StringIO())
+
+        outbound.refresh_from_db()
+        self.assertEqual(outbound.status, OutboundEmail.Status.SENT)
+        self.assertEqual(outbound.body, '')
+        self.assertIn('/reset/token/', mail.outbox[0].body)
+
+    def test_connection_failure_counts_an_attempt_for_every_claimed_message(self):
+        first = queue_email('First', 'Body', None, ['first@example.com'])
+        second = queue_email('Second', 'Body', None, ['second@example.com'])
+
+        with patch('django.core.mail.backends.locmem.EmailBackend.open', side_effect=OSError('no route')):
+            result = deliver_queued_email(max_attempts=1)
+
+        self.assertEqual(result['failed'], 2)
+        for outbound in (first, second):
+            outbound.refresh_from_db()
+            self.assertEqual(outbound.status, OutboundEmail.Status.FAILED)
+            self.assertEqual(outbound.attempts, 1)
+            self.assertIn('no route', outbound.last_error)
+            self.assertEqual(outbound.body, 'Body')
+        self.assertEqual(len(mail.outbox), 0)
+
+    def test_old_failed_bodies_are_cleared_and_not_requeued(self):
+        old = queue_email('Old', 'Old body', None, ['old@example.com'])
+        recent = queue_email('Recent', 'Recent body', None, ['recent@example.com'])
+        OutboundEmail.objects.filter(pk__in=[old.pk, recent.pk]).update(status=OutboundEmail.Status.FAILED)
+        OutboundEmail.objects.filter(pk=old.pk).update(
+            created_at=timezone.now() - FAILED_EMAIL_BODY_RETENTION - timedelta(hours=1),
+        )
+
+        call_command('send_queued_email', '--requeue-failed', stdout=StringIO())
+
+        old.refresh_from_db()
+        recent.refresh_from_db()
+        self.assertEqual(old.status, OutboundEmail.Status.FAILED)
+        self.assertEqual(old.body, '')
+        self.assertEqual(recent.status, OutboundEmail.Status.SENT)
+        self.assertEqual([message.subject for message in mail.outbox], ['Recent'])
+
 
 class CurrentReportSnapshotTests(TestCase):
-    def test_minor_counts_use_snapshot_date(self):
-        status_active, _ = AuthorizationStatus.objects.get_or_create(name='Active')
+    def setUp(self):
+        self.status_active, _ = AuthorizationStatus.objects.get_or_create(name='Active')
         branch_an_tir = Branch.objects.create(name='An Tir', type='Kingdom')
         for region_name in REGION_ORDER:
             Branch.objects.create(name=region_name, type='Region', region=branch_an_tir)
-        local_branch = Branch.objects.create(
+        self.local_branch = Branch.objects.create(
             name='Central Local',
             type='Barony',
             region=Branch.objects.get(name='Central'),
@@ -3370,37 +3818,156 @@ class CurrentReportSnapshotTests(TestCase):
         equestrian = discipline_map['Equestrian']
         for style_name in EQUESTRIAN_TYPE_ORDER:
             WeaponStyle.objects.create(name=style_name, discipline=equestrian)
-        armored_style = WeaponStyle.objects.create(
+        self.armored_style = WeaponStyle.objects.create(
             name='Weapon & Shield',
             discipline=discipline_map['Armored Combat'],
         )
 
+    def create_person(self, username, birthday=None):
         user = User.objects.create_user(
-            username='historic_minor_report',
+            username=username,
             password='StrongPass!123',
-            email='historic_minor_report@example.com',
-            first_name='Historic',
-            last_name='Minor',
-            birthday=date(2007, 7, 1),
+            email=f'{username}@example.com',
+            first_name='Report',
+            last_name='Person',
+            birthday=birthday,
             country='United States',
             state_province='Oregon',
         )
-        person = Person.objects.create(user=user, sca_name='Historic Minor', branch=local_branch)
+        return Person.objects.create(user=user, sca_name=username, branch=self.local_branch)
+
+    def report_value(self, snapshot, family, subject_name, metric_name, region_name=''):
+        return next(
+            row['value'] for row in snapshot[family]
+            if row['subject_name'] == subject_name
+            and row['metric_name'] == metric_name
+            and row['region_name'] == region_name
+        )
+
+    def test_minor_counts_use_snapshot_date(self):
+        person = self.create_person('historic_minor_report', birthday=date(2007, 7, 1))
         Authorization.objects.create(
             person=person,
-            style=armored_style,
-            status=status_active,
+            style=self.armored_style,
+            status=self.status_active,
             expiration=date(2030, 6, 30),
             marshal=person,
         )
 
         snapshot = build_current_report_snapshot(as_of=date(2025, 6, 30))
 
-        minor_row = next(
-            row for row in snapshot[ReportValue.ReportFamily.QUARTERLY_MARSHAL]
-            if row['subject_name'] == 'Armored Combat' and row['metric_name'] == 'Minors Fighting'
+        self.assertEqual(
+            self.report_value(snapshot, ReportValue.ReportFamily.QUARTERLY_MARSHAL, 'Armored Combat', 'Minors Fighting'),
+            1,
+        )
+
+    def test_historical_snapshots_count_people_valid_on_each_date(self):
+        early = self.create_person('historical_report_early')
+        late = self.create_person('historical_report_late', birthday=date(2008, 1, 1))
+        for person, start_date, end_date in [
+            (early, date(2024, 1, 1), date(2024, 12, 31)),
+            (late, date(2025, 2, 1), date(2026, 1, 31)),
+        ]:
+            authorization = Authorization.objects.create(
+                person=person,
+                style=self.armored_style,
+                status=self.status_active,
+                expiration=end_date,
+                marshal=person,
+            )
+            authorization.validity_intervals.all().delete()
+            AuthorizationValidityInterval.objects.create(
+                authorization=authorization,
+                start_date=start_date,
+                end_date=end_date,
+                source='manual_repair',
+            )
+
+        snapshots = build_historical_report_snapshots([date(2024, 6, 30), date(2025, 6, 30), date(2026, 6, 30)])
+
+        counts = {
+            as_of: (
+                self.report_value(snapshot, ReportValue.ReportFamily.QUARTERLY_MARSHAL, 'Armored Combat', 'Total Combatants'),
+                self.report_value(snapshot, ReportValue.ReportFamily.QUARTERLY_MARSHAL, 'Armored Combat', 'Minors Fighting'),
+            )
+            for as_of, snapshot in snapshots.items()
+        }
+        self.assertEqual(
+            counts,
+            {
+                date(2024, 6, 30): (1, 0),
+                date(2025, 6, 30): (1, 1),
+                date(2026, 6, 30): (0, 0),
+            },
+        )
+
+    @override_settings(AUTHZ_REPORT_SNAPSHOT_CACHE_SECONDS=300)
+    def test_cached_snapshot_replays_journaled_people(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        as_of = date.today()
+        first = self.create_person('cached_report_first')
+        Authorization.objects.create(
+            person=first,
+            style=self.armored_style,
+            status=self.status_active,
+            expiration=as_of + timedelta(days=365),
+            marshal=first,
+        )
+
+        snapshot = cached_report_snapshot(as_of=as_of)
+        self.assertEqual(
+            self.report_value(snapshot, ReportValue.ReportFamily.QUARTERLY_MARSHAL, 'Armored Combat', 'Total Combatants'),
+            1,
+        )
+        with self.assertNumQueries(0):
+            self.assertEqual(cached_report_snapshot(as_of=as_of), snapshot)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            second = self.create_person('cached_report_second')
+            Authorization.objects.create(
+                person=second,
+                style=self.armored_style,
+                status=self.status_active,
+                expiration=as_of + timedelta(days=365),
+                marshal=second,
+            )
+        summits = Branch.objects.get(name='Summits')
+        with self.captureOnCommitCallbacks(execute=True):
+            first.branch = summits
+            first.save()
+
+        with patch(
+            'authorizations.reporting.validate_current_reporting_configuration',
+            side_effect=AssertionError('full rebuild'),
+        ):
+            snapshot = cached_report_snapshot(as_of=as_of)
+
+        self.assertEqual(snapshot, build_current_report_snapshot(as_of=as_of))
+        self.assertEqual(
+            self.report_value(snapshot, ReportValue.ReportFamily.QUARTERLY_MARSHAL, 'Armored Combat', 'Total Combatants'),
+            2,
+        )
+        self.assertEqual(
+            self.report_value(
+                snapshot,
+                ReportValue.ReportFamily.REGIONAL_BREAKDOWN,
+                'Armored Combat',
+                'Combatants',
+                region_name='Central',
+            ),
+            1,
+        )
+        self.assertEqual(
+            self.report_value(
+                snapshot,
+                ReportValue.ReportFamily.REGIONAL_BREAKDOWN,
+                'Armored Combat',
+                'Combatants',
+                region_name='Summits',
+            ),
+            1,
         )
-        self.assertEqual(minor_row['value'], 1)
 
 
 class ReleaseReadinessTests(TestCase):
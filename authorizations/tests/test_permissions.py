@@ -2,11 +2,14 @@ from datetime import date, timedelta
 from io import StringIO
 
 from dateutil.relativedelta import relativedelta
+from django.core.cache import cache
 from django.core.management import call_command
 from unittest.mock import patch
 from django.test import RequestFactory, TestCase, override_settings
+from django.utils import timezone
 
 from authorizations.models import (
+    EXPIRED_EFFECTIVE_EXPIRATION,
     Authorization,
     AuthorizationNote,
     AuthorizationStatus,
@@ -17,8 +20,11 @@ from authorizations.models import (
     Sanction,
     User,
     WeaponStyle,
+    effective_expiration_changes,
 )
+from authorizations.maintenance import invalidate_portal_setting_cache
 from authorizations.permissions import (
+    _capability_cache_key,
     appoint_branch_marshal,
     approve_authorization,
     authorization_note_office_label,
@@ -32,6 +38,8 @@ from authorizations.permissions import (
     is_kingdom_seneschal,
     is_regional_marshal,
     is_senior_marshal,
+    load_active_sanctions,
+    load_fighter_rule_snapshot,
     membership_is_current,
 )
 
@@ -106,6 +114,8 @@ class AuthorizationTestBase(TestCase):
 
     def setUp(self):
         self.factory = RequestFactory()
+        invalidate_portal_setting_cache()
+        self.addCleanup(invalidate_portal_setting_cache)
         self._membership_seed = 100000
 
     def _next_membership(self):
@@ -238,10 +248,10 @@ class EffectiveExpirationTests(AuthorizationTestBase):
 
         annotated_auth = Authorization.objects.with_effective_expiration().get(id=auth.id)
 
-        self.assertEqual(auth.effective_expiration, date.today() - relativedelta(years=1))
+        self.assertEqual(auth.effective_expiration, EXPIRED_EFFECTIVE_EXPIRATION)
         self.assertEqual(
             self._date_value(annotated_auth.effective_expiration_date),
-            date.today() - relativedelta(years=1),
+            EXPIRED_EFFECTIVE_EXPIRATION,
         )
 
     def test_youth_rapier_secondary_effective_expiration_is_limited_by_category_single_sword(self):
@@ -282,10 +292,10 @@ class EffectiveExpirationTests(AuthorizationTestBase):
 
         annotated_auth = Authorization.objects.with_effective_expiration().get(id=auth.id)
 
-        self.assertEqual(auth.effective_expiration, date.today() - relativedelta(years=1))
+        self.assertEqual(auth.effective_expiration, EXPIRED_EFFECTIVE_EXPIRATION)
         self.assertEqual(
             self._date_value(annotated_auth.effective_expiration_date),
-            date.today() - relativedelta(years=1),
+            EXPIRED_EFFECTIVE_EXPIRATION,
         )
 
     def test_cut_and_thrust_spear_effective_expiration_is_limited_by_foundation_style(self):
@@ -315,10 +325,10 @@ class EffectiveExpirationTests(AuthorizationTestBase):
 
         annotated_auth = Authorization.objects.with_effective_expiration().get(id=auth.id)
 
-        self.assertEqual(auth.effective_expiration, date.today() - relativedelta(years=1))
+        self.assertEqual(auth.effective_expiration, EXPIRED_EFFECTIVE_EXPIRATION)
         self.assertEqual(
             self._date_value(annotated_auth.effective_expiration_date),
-            date.today() - relativedelta(years=1),
+            EXPIRED_EFFECTIVE_EXPIRATION,
         )
 
     def test_mounted_gaming_effective_expiration_is_limited_by_general_riding(self):
@@ -369,10 +379,10 @@ class EffectiveExpirationTests(AuthorizationTestBase):
 
         annotated_auth = Authorization.objects.with_effective_expiration().get(id=auth.id)
 
-        self.assertEqual(auth.effective_expiration, date.today() - relativedelta(years=1))
+        self.assertEqual(auth.effective_expiration, EXPIRED_EFFECTIVE_EXPIRATION)
         self.assertEqual(
             self._date_value(annotated_auth.effective_expiration_date),
-            date.today() - relativedelta(years=1),
+            EXPIRED_EFFECTIVE_EXPIRATION,
         )
 
     def test_marshal_effective_expiration_is_limited_by_membership(self):
@@ -407,7 +417,7 @@ class EffectiveExpirationTests(AuthorizationTestBase):
         base_exp = date.today() + relativedelta(years=2)
         auth = self.grant_authorization(fighter, self.style_jm_armored, expiration=base_exp)
 
-        self.assertEqual(auth.effective_expiration, date.today() - relativedelta(years=1))
+        self.assertEqual(auth.effective_expiration, EXPIRED_EFFECTIVE_EXPIRATION)
 
     def test_youth_marshal_effective_expiration_is_limited_by_background_check(self):
         user, fighter = self.make_person(
@@ -431,7 +441,7 @@ class EffectiveExpirationTests(AuthorizationTestBase):
         base_exp = date.today() + relativedelta(years=2)
         auth = self.grant_authorization(fighter, self.style_sm_youth_armored, expiration=base_exp)
 
-        self.assertEqual(auth.effective_expiration, date.today() - relativedelta(years=1))
+        self.assertEqual(auth.effective_expiration, EXPIRED_EFFECTIVE_EXPIRATION)
 
     def test_queryset_annotation_supports_filter_and_sort(self):
         user_a, fighter_a = self.make_person(
@@ -506,8 +516,8 @@ class EffectiveExpirationTests(AuthorizationTestBase):
             )
         }
 
-        self.assertEqual(expirations[no_membership_auth.id], date.today() - relativedelta(years=1))
-        self.assertEqual(expirations[no_background_auth.id], date.today() - relativedelta(years=1))
+        self.assertEqual(expirations[no_membership_auth.id], EXPIRED_EFFECTIVE_EXPIRATION)
+        self.assertEqual(expirations[no_background_auth.id], EXPIRED_EFFECTIVE_EXPIRATION)
 
     def test_annotated_effective_expiration_property_returns_date(self):
         _, fighter = self.make_person(
@@ -526,6 +536,71 @@ class EffectiveExpirationTests(AuthorizationTestBase):
         self.assertIsInstance(annotated_auth.effective_expiration, date)
         self.assertLess(annotated_auth.effective_expiration, auth.expiration)
 
+    def test_stored_effective_expiration_follows_membership_change(self):
+        user, fighter = self.make_person(
+            'fighter_stored_membership',
+            'Fighter Stored Membership',
+            membership_expiration=date.today() + timedelta(days=90),
+        )
+        auth = self.grant_authorization(
+            fighter,
+            self.style_sm_armored,
+            expiration=date.today() + relativedelta(years=2),
+        )
+        auth.refresh_from_db()
+        self.assertEqual(auth.effective_expiration_date, date.today() + timedelta(days=90))
+
+        user.membership_expiration = date.today() + timedelta(days=200)
+        user.save()
+
+        auth.refresh_from_db()
+        self.assertEqual(auth.effective_expiration_date, date.today() + timedelta(days=200))
+
+    def test_stored_effective_expiration_follows_prerequisite_changes(self):
+        _, fighter = self.make_person('fighter_stored_prereq', 'Fighter Stored Prereq')
+        general_riding = self.grant_authorization(
+            fighter,
+            self.style_general_riding,
+            expiration=date.today() + timedelta(days=40),
+        )
+        mounted_gaming = self.grant_authorization(
+            fighter,
+            self.style_mounted_gaming,
+            expiration=date.today() + relativedelta(years=2),
+        )
+        mounted_gaming.refresh_from_db()
+        self.assertEqual(mounted_gaming.effective_expiration_date, date.today() + timedelta(days=40))
+
+        general_riding.expiration = date.today() + timedelta(days=120)
+        general_riding.save()
+        mounted_gaming.refresh_from_db()
+        self.assertEqual(mounted_gaming.effective_expiration_date, date.today() + timedelta(days=120))
+
+        general_riding.delete()
+        mounted_gaming.refresh_from_db()
+        self.assertEqual(mounted_gaming.effective_expiration_date, EXPIRED_EFFECTIVE_EXPIRATION)
+        self.assertEqual(effective_expiration_changes([fighter.user_id])[1], [])
+
+
+class RecomputeEffectiveExpirationsCommandTests(AuthorizationTestBase):
+    def test_dry_run_reports_drift_and_apply_repairs_it(self):
+        _, fighter = self.make_person('fighter_recompute', 'Fighter Recompute')
+        auth = self.grant_authorization(fighter, self.style_weapon_armored)
+        Authorization.objects.filter(id=auth.id).update(effective_expiration_date=date.today() - timedelta(days=5))
+        out = StringIO()
+
+        call_command('recompute_effective_expirations', stdout=out)
+
+        auth.refresh_from_db()
+        self.assertEqual(auth.effective_expiration_date, date.today() - timedelta(days=5))
+        self.assertIn('Stored effective expirations out of date: 1', out.getvalue())
+        self.assertIn('Dry run only.', out.getvalue())
+
+        call_command('recompute_effective_expirations', '--apply', stdout=StringIO())
+
+        auth.refresh_from_db()
+        self.assertEqual(auth.effective_expiration_date, auth.expiration)
+
 
 class AuthorizationExpirationCalculationTests(AuthorizationTestBase):
     def test_adult_non_youth_defaults_to_four_years(self):
@@ -666,6 +741,64 @@ class MarshalRoleCheckTests(AuthorizationTestBase):
         self.assertFalse(is_senior_marshal(user, 'Armored Combat'))
 
 
+class UserCapabilitiesTests(AuthorizationTestBase):
+    def test_role_checks_share_one_snapshot_per_user(self):
+        user, marshal = self.make_person('capabilities_shared', 'Capabilities Shared')
+        self.grant_authorization(marshal, self.style_sm_armored)
+        self.appoint(marshal, self.branch_an_tir, self.discipline_armored)
+        user = User.objects.get(pk=user.pk)
+
+        with self.assertNumQueries(2):
+            self.assertTrue(is_senior_marshal(user, 'Armored Combat'))
+        with self.assertNumQueries(0):
+            self.assertTrue(is_kingdom_marshal(user, 'Armored Combat'))
+            self.assertTrue(is_regional_marshal(user))
+            self.assertFalse(is_kingdom_authorization_officer(user))
+            self.assertFalse(is_kingdom_seneschal(user))
+
+    def test_snapshot_is_rebuilt_after_office_changes(self):
+        user, marshal = self.make_person('capabilities_rebuilt', 'Capabilities Rebuilt')
+        self.grant_authorization(marshal, self.style_sm_armored)
+        self.assertFalse(is_kingdom_marshal(user, 'Armored Combat'))
+
+        office = self.appoint(marshal, self.branch_an_tir, self.discipline_armored)
+        self.assertTrue(is_kingdom_marshal(user, 'Armored Combat'))
+
+        office.delete()
+        self.assertFalse(is_kingdom_marshal(user, 'Armored Combat'))
+
+    @override_settings(AUTHZ_CAPABILITY_CACHE_SECONDS=300)
+    def test_shared_cache_is_reused_across_requests_until_invalidated(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        user, marshal = self.make_person('capabilities_cached', 'Capabilities Cached')
+        self.grant_authorization(marshal, self.style_sm_armored)
+
+        self.assertFalse(is_kingdom_marshal(User.objects.get(pk=user.pk), 'Armored Combat'))
+        next_request_user = User.objects.get(pk=user.pk)
+        with self.assertNumQueries(0):
+            self.assertFalse(is_kingdom_marshal(next_request_user, 'Armored Combat'))
+
+        self.appoint(marshal, self.branch_an_tir, self.discipline_armored)
+
+        self.assertTrue(is_kingdom_marshal(User.objects.get(pk=user.pk), 'Armored Combat'))
+
+    @override_settings(AUTHZ_CAPABILITY_CACHE_SECONDS=300)
+    def test_shared_cache_is_dropped_again_when_the_change_commits(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        user, marshal = self.make_person('capabilities_on_commit', 'Capabilities On Commit')
+        self.grant_authorization(marshal, self.style_sm_armored)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.appoint(marshal, self.branch_an_tir, self.discipline_armored)
+            # Another request caches the pre-commit rows before the writer commits.
+            cache.set(_capability_cache_key(user.pk, date.today()), {'offices': [], 'marshal_statuses': []})
+
+        self.assertIsNone(cache.get(_capability_cache_key(user.pk, date.today())))
+        self.assertTrue(is_kingdom_marshal(User.objects.get(pk=user.pk), 'Armored Combat'))
+
+
 class AuthorizationRuleTests(AuthorizationTestBase):
     def test_blocks_self_authorization(self):
         user, marshal = self.make_person('self_auth_user', 'Self Auth User')
@@ -1162,6 +1295,146 @@ class AuthorizationRuleTests(AuthorizationTestBase):
         self.assertEqual(return_msg, 'Authorization follows all rules.')
 
 
+class FighterRuleSnapshotTests(AuthorizationTestBase):
+    def test_basket_checks_run_against_one_snapshot(self):
+        marshal_user, marshal = self.make_person('basket_marshal', 'Basket Marshal')
+        _, fighter = self.make_person('basket_target', 'Basket Target')
+        self.grant_authorization(marshal, self.style_sm_armored)
+        self.grant_authorization(marshal, self.style_sm_equestrian)
+        self.grant_authorization(fighter, self.style_general_riding)
+        basket = [
+            self.style_weapon_armored.id,
+            self.style_single_rapier.id,
+            self.style_mounted_gaming.id,
+            self.style_junior_ground_crew.id,
+            self.style_siege_engine.id,
+        ]
+        snapshot = load_fighter_rule_snapshot(fighter, style_ids=basket)
+        # The first check resolves the marshal's capabilities; the rest are in memory.
+        authorization_follows_rules(marshal_user, fighter, basket[0], snapshot=snapshot)
+
+        with self.assertNumQueries(0):
+            results = [
+                authorization_follows_rules(marshal_user, fighter, style_id, snapshot=snapshot)
+                for style_id in basket[1:]
+            ]
+
+        self.assertEqual(
+            [ok for ok, _ in results],
+            [False, True, True, False],
+        )
+
+    def test_snapshot_treats_sanctioned_authorizations_as_inactive(self):
+        marshal_user, marshal = self.make_person('snapshot_sanction_marshal', 'Snapshot Sanction Marshal')
+        _, fighter = self.make_person('snapshot_sanction_target', 'Snapshot Sanction Target')
+        self.grant_authorization(marshal, self.style_sm_equestrian)
+        self.grant_authorization(fighter, self.style_junior_ground_crew)
+        Sanction.objects.create(
+            person=fighter,
+            discipline=self.discipline_equestrian,
+            start_date=date.today(),
+            end_date=date.today() + relativedelta(days=30),
+            issue_note='Sanctioned for testing.',
+            issued_by=marshal_user,
+        )
+
+        ok, msg = authorization_follows_rules(
+            marshal_user,
+            fighter,
+            self.style_senior_ground_crew.id,
+            snapshot=load_fighter_rule_snapshot(fighter),
+        )
+
+        self.assertFalse(ok)
+        self.assertEqual(msg, 'Ground Crew - Senior requires an active Ground Crew - Junior authorization.')
+
+
+class ActiveSanctionMapTests(AuthorizationTestBase):
+    def test_map_answers_style_checks_like_the_sanction_queries(self):
+        issuer_user, _ = self.make_person('map_sanction_issuer', 'Map Sanction Issuer')
+        _, style_sanctioned = self.make_person('map_style_sanctioned', 'Map Style Sanctioned')
+        _, discipline_sanctioned = self.make_person('map_discipline_sanctioned', 'Map Discipline Sanctioned')
+        _, lifted = self.make_person('map_lifted_sanction', 'Map Lifted Sanction')
+        authorizations = [
+            self.grant_authorization(person, style)
+            for person in (style_sanctioned, discipline_sanctioned, lifted)
+            for style in (self.style_weapon_armored, self.style_single_rapier)
+        ]
+        sanction_defaults = {
+            'start_date': date.today() - timedelta(days=1),
+            'end_date': date.today() + timedelta(days=30),
+            'issue_note': 'Sanctioned for testing.',
+            'issued_by': issuer_user,
+        }
+        style_sanction = Sanction.objects.create(
+            person=style_sanctioned,
+            style=self.style_weapon_armored,
+            discipline=self.discipline_armored,
+            **sanction_defaults,
+        )
+        discipline_sanction = Sanction.objects.create(
+            person=discipline_sanctioned,
+            discipline=self.discipline_rapier,
+            **sanction_defaults,
+        )
+        Sanction.objects.create(
+            person=lifted,
+            discipline=self.discipline_armored,
+            lifted_at=timezone.now(),
+            **sanction_defaults,
+        )
+        person_ids = [style_sanctioned.pk, discipline_sanctioned.pk, lifted.pk]
+
+        with self.assertNumQueries(1):
+            sanction_map = load_active_sanctions(person_ids)
+        with self.assertNumQueries(0):
+            sanctioned = {
+                (authorization.person_id, authorization.style_id)
+                for authorization in authorizations
+                if sanction_map.authorization_is_sanctioned(authorization)
+            }
+            found = [
+                sanction_map.sanction_for_style(style_sanctioned.pk, self.style_weapon_armored.id, self.discipline_armored.id),
+                sanction_map.sanction_for_style(discipline_sanctioned.pk, self.style_single_rapier.id, self.discipline_rapier.id),
+                sanction_map.sanction_for_style(lifted.pk, self.style_weapon_armored.id, self.discipline_armored.id),
+            ]
+
+        self.assertEqual(
+            sanctioned,
+            {
+                (style_sanctioned.pk, self.style_weapon_armored.id),
+                (discipline_sanctioned.pk, self.style_single_rapier.id),
+            },
+        )
+        self.assertEqual(found, [style_sanction, discipline_sanction, None])
+        candidates = Authorization.objects.filter(person_id__in=person_ids)
+        self.assertEqual(
+            set(sanction_map.exclude_sanctioned(candidates).values_list('id', flat=True)),
+            set(Authorization.objects.effectively_active().filter(person_id__in=person_ids).values_list('id', flat=True)),
+        )
+        self.assertEqual(len(sanction_map.exclude_sanctioned(candidates)), 4)
+
+    def test_style_sanction_matches_its_style_even_when_the_discipline_differs(self):
+        issuer_user, _ = self.make_person('moved_style_issuer', 'Moved Style Issuer')
+        _, fighter = self.make_person('moved_style_fighter', 'Moved Style Fighter')
+        authorization = self.grant_authorization(fighter, self.style_weapon_armored)
+        sanction = Sanction.objects.create(
+            person=fighter,
+            style=self.style_weapon_armored,
+            discipline=self.discipline_armored,
+            start_date=date.today() - timedelta(days=1),
+            end_date=date.today() + timedelta(days=30),
+            issue_note='Sanctioned for testing.',
+            issued_by=issuer_user,
+        )
+        # As if the style had been moved to another discipline after the sanction was issued.
+        Sanction.objects.filter(pk=sanction.pk).update(discipline=self.discipline_rapier)
+
+        self.assertTrue(load_active_sanctions([fighter.pk]).authorization_is_sanctioned(authorization))
+        self.assertTrue(Authorization.objects.with_sanction_flag().get(pk=authorization.pk).has_active_sanction)
+        self.assertFalse(Authorization.objects.effectively_active().filter(pk=authorization.pk).exists())
+
+
 class ConcurrenceRequirementTests(AuthorizationTestBase):
     def test_concurrence_requirement_is_disabled_by_default(self):
         _, fighter = self.make_person('concur_disabled', 'Concur Disabled')
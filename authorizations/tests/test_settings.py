@@ -11,9 +11,19 @@ DATABASES = {
 }
 
 EMAIL_BACKEND = 'django.core.mail.backends.locmem.EmailBackend'
+AUTHZ_EMAIL_QUEUE_ENABLED = False
+AUTHZ_UPLOAD_JOBS_ENABLED = False
 PASSWORD_HASHERS = ['django.contrib.auth.hashers.MD5PasswordHasher']
 AUTHZ_TEST_FEATURES = os.environ.get('AUTHZ_TEST_FEATURES', '1').strip().lower() in {'1', 'true', 'yes', 'on'}
 SITE_URL = 'http://testserver'
+# Test transactions roll back without firing signals, so keep capability
+# snapshots, lookup indexes, option lists, report counts, and portal settings
+# request-local unless a test opts in.
+AUTHZ_CAPABILITY_CACHE_SECONDS = 0
+AUTHZ_PERSON_LOOKUP_INDEX_SECONDS = 0
+AUTHZ_OPTION_LIST_CACHE_SECONDS = 0
+AUTHZ_REPORT_SNAPSHOT_CACHE_SECONDS = 0
+AUTHZ_PORTAL_SETTING_CACHE_SECONDS = 0
 ALLOWED_HOSTS = ['testserver', 'localhost', '127.0.0.1']
 
 # Keep logs quiet in test output.
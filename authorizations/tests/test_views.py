@@ -1,6 +1,11 @@
+import json
+import os
+import shutil
+import tempfile
+import time
 import zipfile
 from datetime import date, timedelta
-from io import BytesIO
+from io import BytesIO, StringIO
 from unittest.mock import patch
 
 from dateutil.relativedelta import relativedelta
@@ -10,6 +15,9 @@ from django.contrib.messages import get_messages
 from django.core.cache import cache
 from django.core.files.uploadedfile import SimpleUploadedFile
 from django.core.files.base import ContentFile
+from django.core.management import call_command
+from django.db import connection
+from django.db.models import Value
 from reportlab.pdfbase import pdfmetrics
 from django.test import TestCase, override_settings
 from django.utils import timezone
@@ -17,8 +25,10 @@ from django.utils.formats import date_format
 from django.utils.encoding import force_bytes
 from django.utils.http import urlsafe_base64_encode
 from django.urls import reverse
+from pdfrw import PdfReader
 
 from authorizations.models import (
+    EXPIRED_EFFECTIVE_EXPIRATION,
     Authorization,
     AuthorizationAuditEntry,
     AuthorizationNote,
@@ -35,6 +45,7 @@ from authorizations.models import (
     MembershipRosterEntry,
     MembershipRosterImport,
     WaiverRecord,
+    UploadJob,
     SupportingDocument,
     SupportingDocumentAuthorization,
     SupportingDocumentPerson,
@@ -44,12 +55,26 @@ from authorizations.models import (
     LegacyAuthorizationRecoveryEntry,
     SYSTEM_USER_IDS,
 )
-from authorizations.reporting import EQUESTRIAN_TYPE_ORDER, QUARTERLY_DISCIPLINE_MAP, REGION_ORDER
-from authorizations.views import (
+from authorizations import fighter_cards
+from authorizations import person_lookup
+from authorizations import upload_jobs as upload_jobs_module
+from authorizations.fighter_cards import (
     _fit_pdf_text_for_field,
-    _legacy_recovery_paper_rules_were_met,
+    build_fighter_card_data,
+    fighter_card_authorizations,
+    fighter_card_style_rows,
     PDF_NAME_MIN_FONT_SIZE,
 )
+from authorizations.reporting import EQUESTRIAN_TYPE_ORDER, QUARTERLY_DISCIPLINE_MAP, REGION_ORDER
+from authorizations.maintenance import (
+    PORTAL_SETTING_GENERATION_CHECK_SECONDS,
+    get_portal_setting,
+    invalidate_portal_setting_cache,
+    maintenance_lock_enabled,
+)
+from authorizations.permissions import authorization_officer_sign_off_enabled
+from authorizations.request_metrics import request_metrics_store
+from authorizations.views import _build_search_csv_response, _import_membership_roster, _legacy_recovery_paper_rules_were_met
 
 
 class ViewTestBase(TestCase):
@@ -97,6 +122,8 @@ class ViewTestBase(TestCase):
 
     def setUp(self):
         cache.clear()
+        invalidate_portal_setting_cache()
+        self.addCleanup(invalidate_portal_setting_cache)
         self._membership_seed = 200000
 
     def _next_membership(self):
@@ -355,7 +382,7 @@ class ContactViewTests(ViewTestBase):
         self.assertContains(response, 'name="membership_number"')
 
     @override_settings(AUTHZ_EMAIL_CHANGE_MIN_SECONDS=0)
-    @patch('authorizations.views.send_mail')
+    @patch('authorizations.views.queue_email')
     def test_email_change_request_sends_admin_email(self, mock_send_mail):
         self.client.get(reverse('contact'))
 
@@ -375,7 +402,7 @@ class ContactViewTests(ViewTestBase):
         )
 
     @override_settings(AUTHZ_EMAIL_CHANGE_MIN_SECONDS=0)
-    @patch('authorizations.views.send_mail')
+    @patch('authorizations.views.queue_email')
     def test_email_change_honeypot_does_not_send_email(self, mock_send_mail):
         self.client.get(reverse('contact'))
 
@@ -388,7 +415,7 @@ class ContactViewTests(ViewTestBase):
         self.assertEqual(mock_send_mail.call_count, 0)
 
     @override_settings(AUTHZ_EMAIL_CHANGE_MIN_SECONDS=5)
-    @patch('authorizations.views.send_mail')
+    @patch('authorizations.views.queue_email')
     def test_email_change_direct_post_without_session_does_not_send_email(self, mock_send_mail):
         response = self.client.post(reverse('contact'), self.email_change_payload(), follow=True)
 
@@ -453,6 +480,173 @@ class FighterCardPdfTextTests(TestCase):
         self.assertEqual(font_size, 12)
 
 
+class FighterCardRenderTests(ViewTestBase):
+    def card_url(self, person, template_id='1'):
+        return reverse('fighter', kwargs={'person_id': person.user_id}) + f'?pdf=true&template_id={template_id}'
+
+    def test_card_data_builds_style_marks_without_queries(self):
+        _, fighter = self.make_person('card_data_fighter', 'Card Data Fighter')
+        self.grant_authorization(fighter, self.style_weapon_armored)
+        authorizations = list(fighter_card_authorizations([fighter.user_id]))
+        style_rows = fighter_card_style_rows()
+        person = Person.objects.select_related('user').get(pk=fighter.pk)
+
+        with self.assertNumQueries(0):
+            data = build_fighter_card_data(person, authorizations, '1', style_rows)
+
+        self.assertEqual(data['Armored Combat - Weapon & Shield'], 'X')
+        self.assertEqual(data['Rapier Combat - Single Sword'], '')
+        self.assertEqual(data['Armored Combat marshal'], 'Card Data Fighter')
+
+    @override_settings(AUTHZ_FIGHTER_CARD_CACHE_SECONDS=300)
+    def test_finished_card_is_reused_until_authorizations_change(self):
+        user, fighter = self.make_person('card_cache_fighter', 'Card Cache Fighter')
+        authorization = self.grant_authorization(fighter, self.style_weapon_armored)
+        self.client.login(username=user.username, password='StrongPass!123')
+        self.addCleanup(cache.clear)
+
+        with patch(
+            'authorizations.fighter_cards._flatten_pdf_template',
+            wraps=fighter_cards._flatten_pdf_template,
+        ) as flatten:
+            first = self.client.get(self.card_url(fighter))
+            second = self.client.get(self.card_url(fighter))
+            self.assertEqual(flatten.call_count, 1)
+
+            authorization.expiration = date.today() + relativedelta(months=6)
+            authorization.save()
+            third = self.client.get(self.card_url(fighter))
+            self.assertEqual(flatten.call_count, 2)
+
+        self.assertEqual(first['Content-Type'], 'application/pdf')
+        self.assertTrue(first.content.startswith(b'%PDF'))
+        self.assertEqual(first.content, second.content)
+        self.assertNotEqual(first.content, third.content)
+
+    def test_card_without_matching_authorizations_redirects_to_fighter_page(self):
+        user, fighter = self.make_person('card_missing_fighter', 'Card Missing Fighter')
+        self.grant_authorization(fighter, self.style_weapon_armored)
+        self.client.login(username=user.username, password='StrongPass!123')
+
+        response = self.client.get(self.card_url(fighter, template_id='3'))
+
+        self.assertRedirects(response, reverse('fighter', kwargs={'person_id': fighter.user_id}))
+
+    def make_card_batch(self):
+        marshal_user, marshal = self.make_person('card_batch_marshal', 'Card Batch Marshal')
+        self.grant_authorization(marshal, self.style_sm_armored)
+        _, first = self.make_person('card_batch_first', 'Card Batch First')
+        self.grant_authorization(first, self.style_weapon_armored, marshal=marshal)
+        _, second = self.make_person('card_batch_second', 'Card Batch Second')
+        self.grant_authorization(second, self.style_single_rapier, marshal=marshal)
+        _, elsewhere = self.make_person('card_batch_elsewhere', 'Card Batch Elsewhere', branch=self.region_tir_righ)
+        self.grant_authorization(elsewhere, self.style_weapon_armored, marshal=marshal)
+        return marshal_user, [marshal, first, second]
+
+    def test_batch_download_merges_one_card_per_person_in_branch(self):
+        marshal_user, people = self.make_card_batch()
+        self.client.login(username=marshal_user.username, password='StrongPass!123')
+
+        response = self.client.get(
+            reverse('batch_fighter_cards'),
+            {'branch_id': self.branch_gd.id, 'template_id': '1'},
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'application/pdf')
+        merged = PdfReader(fdata=b''.join(response.streaming_content))
+        self.assertEqual(len(merged.pages), len(people))
+
+    def test_batch_download_can_return_zip_for_person_list(self):
+        marshal_user, people = self.make_card_batch()
+        self.client.login(username=marshal_user.username, password='StrongPass!123')
+
+        response = self.client.get(
+            reverse('batch_fighter_cards'),
+            {'person_ids': f'{people[1].user_id}, {people[2].user_id}', 'format': 'zip'},
+        )
+
+        self.assertEqual(response.status_code, 200)
+        with zipfile.ZipFile(BytesIO(b''.join(response.streaming_content))) as archive:
+            self.assertEqual(
+                sorted(archive.namelist()),
+                [f'card-batch-first-{people[1].user_id}.pdf', f'card-batch-second-{people[2].user_id}.pdf'],
+            )
+
+    def test_batch_download_requires_marshal_or_officer(self):
+        self.make_card_batch()
+        user, fighter = self.make_person('card_batch_regular', 'Card Batch Regular')
+        self.grant_authorization(fighter, self.style_weapon_armored)
+        self.client.login(username=user.username, password='StrongPass!123')
+
+        response = self.client.get(reverse('batch_fighter_cards'), {'branch_id': self.branch_gd.id})
+
+        self.assertEqual(response.status_code, 403)
+
+    def test_generate_fighter_cards_command_writes_region_cards(self):
+        _, people = self.make_card_batch()
+        output_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, output_dir)
+        output_path = os.path.join(output_dir, 'summits.pdf')
+        stdout = StringIO()
+
+        call_command('generate_fighter_cards', '--region', 'Summits', '--output', output_path, stdout=stdout)
+
+        self.assertIn(f'Wrote {len(people)} card(s)', stdout.getvalue())
+        self.assertEqual(len(PdfReader(output_path).pages), len(people))
+
+
+class RequestMetricsMiddlewareTests(ViewTestBase):
+    def setUp(self):
+        super().setUp()
+        request_metrics_store.reset()
+        self.addCleanup(request_metrics_store.reset)
+
+    def make_admin(self, username):
+        admin_user, _ = self.make_person(username, username.replace('_', ' ').title())
+        admin_user.is_superuser = True
+        admin_user.save()
+        self.client.login(username=admin_user.username, password='StrongPass!123')
+        return admin_user
+
+    @override_settings(AUTHZ_REQUEST_METRICS_ENABLED=True)
+    def test_superuser_sees_per_view_summary_on_index(self):
+        self.make_admin('metrics_summary_admin')
+
+        self.client.get(reverse('search'))
+        response = self.client.get(reverse('index'))
+
+        rows = {row['url_name']: row for row in request_metrics_store.summary()}
+        self.assertEqual(rows['search']['requests'], 1)
+        self.assertGreater(rows['search']['avg_queries'], 0)
+        self.assertGreater(rows['search']['avg_template_ms'], 0)
+        self.assertEqual(rows['search']['budget_queries'], 40)
+        self.assertContains(response, 'Request Performance')
+        self.assertContains(response, '<td>search</td>', html=True)
+
+    @override_settings(AUTHZ_REQUEST_METRICS_ENABLED=True, AUTHZ_VIEW_BUDGETS={'search': {'queries': 0}})
+    def test_over_budget_request_logs_json_warning(self):
+        self.make_admin('metrics_budget_admin')
+
+        with self.assertLogs('performance.requests', level='WARNING') as logs:
+            self.client.get(reverse('search'))
+
+        event = json.loads(logs.records[0].getMessage())
+        self.assertEqual(event['event'], 'view_budget_exceeded')
+        self.assertEqual(event['url_name'], 'search')
+        self.assertEqual(event['budget_queries'], 0)
+        self.assertGreater(event['queries'], 0)
+        self.assertEqual(request_metrics_store.summary()[0]['over_budget'], 1)
+
+    def test_metrics_are_off_unless_enabled(self):
+        self.make_admin('metrics_disabled_admin')
+
+        response = self.client.get(reverse('index'))
+
+        self.assertEqual(request_metrics_store.summary(), [])
+        self.assertNotContains(response, 'Request Performance')
+
+
 class IndexViewTests(ViewTestBase):
     @override_settings(AUTHZ_TEST_FEATURES=False)
     def test_header_uses_standard_logo_when_test_features_disabled(self):
@@ -594,7 +788,7 @@ class IndexViewTests(ViewTestBase):
         self.assertContains(response, 'Index Staff KAO Target')
         self.assertContains(response, 'Awaiting Kingdom Authorization Officer Review')
 
-    @patch('authorizations.views.send_mail')
+    @patch('authorizations.views.queue_email')
     def test_register_minor_requires_parent_id_or_parent_first_and_last_name(self, mock_send_mail):
         response = self.client.post(
             reverse('register'),
@@ -610,7 +804,7 @@ class IndexViewTests(ViewTestBase):
         self.assertContains(response, 'A minor must have either a parent ID or parent first and last name.')
         self.assertFalse(User.objects.filter(username='minor_without_parent').exists())
 
-    @patch('authorizations.views.send_mail')
+    @patch('authorizations.views.queue_email')
     def test_register_minor_can_store_parent_name_without_parent_id(self, mock_send_mail):
         payload = self.registration_payload(
             username='minor_with_parent_name',
@@ -641,7 +835,7 @@ class IndexViewTests(ViewTestBase):
         self.assertEqual(person.parent_last_name, 'Parent')
         self.assertEqual(person.parent_sca_name, 'Parent of An Tir')
 
-    @patch('authorizations.views.send_mail')
+    @patch('authorizations.views.queue_email')
     def test_register_minor_parent_id_discards_parent_name_fields(self, mock_send_mail):
         parent_user, parent = self.make_person('minor_parent_id_parent', 'Minor Parent')
         payload = self.registration_payload(
@@ -869,6 +1063,61 @@ class IndexViewTests(ViewTestBase):
         self.assertRedirects(response, reverse('index'))
         self.assertContains(response, 'Maintenance is in progress.')
 
+    @override_settings(AUTHZ_PORTAL_SETTING_CACHE_SECONDS=60)
+    def test_portal_settings_are_read_once_until_the_row_is_saved(self):
+        invalidate_portal_setting_cache()
+        self.addCleanup(invalidate_portal_setting_cache)
+        AuthorizationPortalSetting.objects.update_or_create(pk=1, defaults={'require_kao_verification': True})
+        self.assertFalse(maintenance_lock_enabled())
+
+        with self.assertNumQueries(0):
+            self.assertFalse(maintenance_lock_enabled())
+            self.assertTrue(authorization_officer_sign_off_enabled())
+            self.assertTrue(get_portal_setting().require_kao_verification)
+
+        AuthorizationPortalSetting.objects.update_or_create(
+            pk=1,
+            defaults={
+                'maintenance_lock_enabled': True,
+                'maintenance_lock_message': 'Cached maintenance.',
+            },
+        )
+
+        self.assertTrue(maintenance_lock_enabled())
+        response = self.client.post(reverse('register'), follow=True)
+        self.assertContains(response, 'Cached maintenance.')
+
+    @override_settings(AUTHZ_PORTAL_SETTING_CACHE_SECONDS=60)
+    def test_portal_settings_changed_elsewhere_are_read_when_the_snapshot_expires(self):
+        invalidate_portal_setting_cache()
+        self.addCleanup(invalidate_portal_setting_cache)
+        AuthorizationPortalSetting.objects.update_or_create(pk=1, defaults={'maintenance_lock_enabled': False})
+        self.assertFalse(maintenance_lock_enabled())
+        # An update that skips the save signals stands in for a save in another process.
+        AuthorizationPortalSetting.objects.filter(pk=1).update(maintenance_lock_enabled=True)
+
+        with self.assertNumQueries(0):
+            self.assertFalse(maintenance_lock_enabled())
+
+        later = time.monotonic() + 61
+        with patch('authorizations.maintenance.time.monotonic', return_value=later):
+            self.assertTrue(maintenance_lock_enabled())
+
+    @override_settings(AUTHZ_PORTAL_SETTING_CACHE_SECONDS=60)
+    def test_portal_settings_saved_in_another_process_are_read_after_the_generation_check(self):
+        AuthorizationPortalSetting.objects.update_or_create(pk=1, defaults={'maintenance_lock_enabled': False})
+        self.assertFalse(maintenance_lock_enabled())
+        # What a save in another process leaves behind: a new row and a bumped shared generation.
+        AuthorizationPortalSetting.objects.filter(pk=1).update(maintenance_lock_enabled=True)
+        cache.incr('authz:portal-setting:generation')
+
+        with self.assertNumQueries(0):
+            self.assertFalse(maintenance_lock_enabled())
+
+        later = time.monotonic() + PORTAL_SETTING_GENERATION_CHECK_SECONDS + 0.5
+        with patch('authorizations.maintenance.time.monotonic', return_value=later):
+            self.assertTrue(maintenance_lock_enabled())
+
     def test_bulk_approve_button_only_shows_for_kao_when_sign_off_enabled(self):
         kao_user, kao_person = self.make_person('index_bulk_btn_kao', 'Index Bulk Button KAO')
         self.appoint(kao_person, self.branch_an_tir, self.discipline_auth_officer)
@@ -1730,6 +1979,26 @@ class SearchViewTests(ViewTestBase):
         self.assertEqual(response.status_code, 200)
         self.assertTemplateUsed(response, 'authorizations/search_form.html')
 
+    @override_settings(AUTHZ_OPTION_LIST_CACHE_SECONDS=600)
+    def test_search_option_lists_are_cached_until_a_person_changes(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        _, person = self.make_person('cached_option_person', 'Cached Option Original')
+
+        response = self.client.get(reverse('search'), {'goal': 'search'})
+        self.assertIn('Cached Option Original', response.context['sca_name_options'])
+
+        # A queryset update skips signals, so the cached list is still served.
+        Person.objects.filter(pk=person.pk).update(sca_name='Cached Option Updated')
+        response = self.client.get(reverse('search'), {'goal': 'search'})
+        self.assertIn('Cached Option Original', response.context['sca_name_options'])
+
+        person.refresh_from_db()
+        person.save()
+        response = self.client.get(reverse('search'), {'goal': 'search'})
+        self.assertIn('Cached Option Updated', response.context['sca_name_options'])
+        self.assertNotIn('Cached Option Original', response.context['sca_name_options'])
+
     def test_private_name_fields_are_hidden_from_anonymous_and_regular_users(self):
         response = self.client.get(reverse('search'), {'goal': 'search'})
         self.assertNotContains(response, 'name="first_name"')
@@ -1894,6 +2163,28 @@ class SearchViewTests(ViewTestBase):
         self.assertEqual(response.context['page_obj'].paginator.count, 0)
         self.assertEqual(response.context['person_fallback_results'], [])
 
+    def test_rebuild_user_name_tokens_repairs_names_changed_outside_save(self):
+        viewer_user, viewer_person = self.make_person('private_token_searcher', 'Private Token Searcher')
+        self.grant_authorization(viewer_person, self.style_sm_armored, status=self.status_active)
+        user, person = self.make_person('private_token_target', 'Private Token Target')
+        expected_auth = self.grant_authorization(person, self.style_weapon_armored, status=self.status_active)
+        User.objects.filter(pk=user.pk).update(first_name='Raw', last_name='Imported')
+        self.client.force_login(viewer_user)
+        search_params = {'first_name': 'Raw', 'last_name': 'Imported'}
+
+        self.assertEqual(self.client.get(reverse('search'), search_params).context['page_obj'].paginator.count, 0)
+
+        out = StringIO()
+        call_command('rebuild_user_name_tokens', stdout=out)
+        self.assertIn('Users with out-of-date name tokens: 1', out.getvalue())
+        call_command('rebuild_user_name_tokens', '--apply', stdout=StringIO())
+
+        response = self.client.get(reverse('search'), search_params)
+        self.assertEqual(
+            [authorization.id for authorization in response.context['page_obj'].object_list],
+            [expected_auth.id],
+        )
+
     def test_membership_filter_in_table_view(self):
         _, fighter_a = self.make_person('search_table_a', 'Search Table A', membership='1111111111')
         _, fighter_b = self.make_person('search_table_b', 'Search Table B', membership='2222222222')
@@ -2049,8 +2340,10 @@ class SearchViewTests(ViewTestBase):
         self.assertEqual(response.status_code, 200)
         self.assertTrue(response['Content-Type'].startswith('text/csv'))
         self.assertIn('attachment; filename=\"authorizations_search.csv\"', response['Content-Disposition'])
-        self.assertTrue(response.content.startswith(b'\xef\xbb\xbf'))
-        content = response.content.decode('utf-8-sig')
+        self.assertTrue(response.streaming)
+        raw_content = b''.join(response.streaming_content)
+        self.assertTrue(raw_content.startswith(b'\xef\xbb\xbf'))
+        content = raw_content.decode('utf-8-sig')
         self.assertIn('SCA Name,Region,Branch,Discipline,Weapon Style,Marshal,Expiration,Minor', content)
         self.assertIn('Search CSV A', content)
         self.assertIn('Search CSV B', content)
@@ -2058,6 +2351,62 @@ class SearchViewTests(ViewTestBase):
         self.assertNotIn('Search CSV C', content)
         self.assertNotIn('<a ', content)
 
+    def test_table_view_download_csv_includes_effective_expiration_and_minor_flag(self):
+        _, minor_fighter = self.make_person(
+            'search_csv_minor',
+            'Search CSV Minor',
+            birthday=date.today() - relativedelta(years=12),
+        )
+        expiration = date.today() + relativedelta(months=6)
+        self.grant_authorization(
+            minor_fighter,
+            self.style_weapon_armored,
+            status=self.status_active,
+            expiration=expiration,
+        )
+
+        response = self.client.get(reverse('search'), {'sca_name': 'Search CSV Minor', 'download': 'csv'})
+
+        rows = b''.join(response.streaming_content).decode('utf-8-sig').splitlines()
+        self.assertEqual(len(rows), 2)
+        self.assertTrue(rows[1].startswith('Search CSV Minor,'))
+        self.assertTrue(rows[1].endswith(f',{expiration.isoformat()},Yes'))
+
+    def test_search_and_csv_show_expired_for_a_missing_prerequisite(self):
+        _, fighter = self.make_person('search_missing_prereq', 'Search Missing Prereq')
+        style_case = WeaponStyle.objects.create(name='Case', discipline=self.discipline_rapier)
+        authorization = self.grant_authorization(fighter, style_case, status=self.status_active)
+        self.assertEqual(
+            Authorization.objects.get(pk=authorization.pk).effective_expiration_date,
+            EXPIRED_EFFECTIVE_EXPIRATION,
+        )
+
+        card = self.client.get(reverse('search'), {'sca_name': 'Search Missing Prereq', 'view': 'card'})
+        table = self.client.get(reverse('search'), {'sca_name': 'Search Missing Prereq', 'view': 'table'})
+        csv_response = self.client.get(reverse('search'), {'sca_name': 'Search Missing Prereq', 'download': 'csv'})
+
+        for response in (card, table):
+            self.assertContains(response, 'Search Missing Prereq')
+            self.assertContains(response, 'Expired')
+            self.assertNotContains(response, 'Jan. 1, 1000')
+            self.assertNotContains(response, '1000-01-01')
+        rows = b''.join(csv_response.streaming_content).decode('utf-8-sig').splitlines()
+        self.assertEqual(len(rows), 2)
+        self.assertTrue(rows[1].endswith(',Expired,No'))
+
+    def test_csv_export_without_fighter_only_people(self):
+        _, fighter = self.make_person('search_csv_auth_only', 'Search CSV Auth Only')
+        self.grant_authorization(fighter, self.style_weapon_armored, status=self.status_active)
+        authorizations = Authorization.objects.filter(person=fighter).annotate(
+            inferred_minor=Value(False),
+        )
+
+        response = _build_search_csv_response(authorizations)
+
+        rows = b''.join(response.streaming_content).decode('utf-8-sig').splitlines()
+        self.assertEqual(len(rows), 2)
+        self.assertTrue(rows[1].startswith('Search CSV Auth Only,'))
+
 
 class DeleteAuthorizationsViewTests(ViewTestBase):
     @classmethod
@@ -2323,7 +2672,7 @@ class RegisterViewTests(ViewTestBase):
             'letters, digits, and the symbols @, ., +, -, and _.'
         )
 
-    @patch('authorizations.views.send_mail')
+    @patch('authorizations.views.queue_email')
     def test_register_post_creates_user_and_person(self, mock_send_mail):
         payload = self.registration_payload(username='register_ok', email='register_ok@example.com')
         self.seed_membership_roster(
@@ -2360,7 +2709,7 @@ class RegisterViewTests(ViewTestBase):
         self.assertFalse(User.objects.filter(username='register_membership_not_found').exists())
 
     @override_settings(AUTHZ_TEST_FEATURES=True)
-    @patch('authorizations.views.send_mail')
+    @patch('authorizations.views.queue_email')
     def test_register_skips_membership_roster_validation_in_test_mode(self, mock_send_mail):
         payload = self.registration_payload(
             username='register_test_mode_skip',
@@ -2611,7 +2960,7 @@ class TombstoneBehaviorTests(ViewTestBase):
         self.assertContains(response, 'Officer Positions')
         self.assertContains(response, 'Database Administrator')
 
-    @patch('authorizations.views.send_mail')
+    @patch('authorizations.views.queue_email')
     def test_fighter_login_instructions_can_be_requested_anonymously(self, mock_send_mail):
         target_user, _ = self.make_person('fighter_login_target', 'Fighter Login Target')
 
@@ -2634,7 +2983,7 @@ class TombstoneBehaviorTests(ViewTestBase):
         self.assertTrue(any('Login instructions have been sent to the email on file.' in message for message in response_messages))
         self.assertTrue(any(settings.DEFAULT_FROM_EMAIL in message for message in response_messages))
 
-    @patch('authorizations.views.send_mail')
+    @patch('authorizations.views.queue_email')
     def test_fighter_login_instructions_does_not_send_for_merged_record(self, mock_send_mail):
         survivor_user, _ = self.make_person('fighter_login_survivor', 'Fighter Login Survivor')
         source_user, _ = self._create_merged_user(
@@ -2655,7 +3004,7 @@ class TombstoneBehaviorTests(ViewTestBase):
         self.assertEqual(response.url, reverse('fighter', kwargs={'person_id': survivor_user.id}))
         self.assertEqual(mock_send_mail.call_count, 0)
 
-    @patch('authorizations.views.send_mail')
+    @patch('authorizations.views.queue_email')
     def test_username_recovery_excludes_merged_accounts(self, mock_send_mail):
         survivor_user, _ = self.make_person('recover_survivor', 'Recover Survivor', email='survivor-recover@example.com')
         active_user, _ = self.make_person('recover_active', 'Recover Active', email='shared-recover@example.com')
@@ -2681,7 +3030,7 @@ class TombstoneBehaviorTests(ViewTestBase):
         self.assertIn(active_user.username, email_body)
         self.assertNotIn(merged_user.username, email_body)
 
-    @patch('authorizations.views.send_mail')
+    @patch('authorizations.views.queue_email')
     def test_password_reset_by_username_ignores_merged_accounts(self, mock_send_mail):
         survivor_user, _ = self.make_person('reset_survivor', 'Reset Survivor')
         merged_user, _ = self._create_merged_user(
@@ -2715,7 +3064,7 @@ class TombstoneBehaviorTests(ViewTestBase):
         )
 
     @override_settings(AUTHZ_TEST_FEATURES=False)
-    @patch('authorizations.views.send_mail')
+    @patch('authorizations.views.queue_email')
     @patch('authorizations.views._throttle_request', return_value=False)
     def test_password_reset_uses_production_throttle_defaults(self, mock_throttle, mock_send_mail):
         user, _ = self.make_person('reset_prod_limit_user', 'Reset Prod Limit User')
@@ -2736,7 +3085,7 @@ class TombstoneBehaviorTests(ViewTestBase):
         self.assertEqual(mock_throttle.call_args_list[1].args[1:], (5, 15 * 60))
 
     @override_settings(AUTHZ_TEST_FEATURES=True)
-    @patch('authorizations.views.send_mail')
+    @patch('authorizations.views.queue_email')
     @patch('authorizations.views._throttle_request', return_value=False)
     def test_password_reset_uses_relaxed_test_throttle_defaults(self, mock_throttle, mock_send_mail):
         user, _ = self.make_person('reset_test_limit_user', 'Reset Test Limit User')
@@ -2772,7 +3121,7 @@ class TombstoneBehaviorTests(ViewTestBase):
         self.assertEqual(response.status_code, 200)
         self.assertContains(response, 'invalid or has expired')
 
-    @patch('authorizations.views.send_mail')
+    @patch('authorizations.views.queue_email')
     def test_logged_in_password_change_sends_security_notice(self, mock_send_mail):
         user, _ = self.make_person(
             'password_change_user',
@@ -2803,7 +3152,7 @@ class TombstoneBehaviorTests(ViewTestBase):
         self.assertIn('Pacific Time', call_args[1])
         self.assertIn('antir.authorization.database@gmail.com', call_args[1])
 
-    @patch('authorizations.views.send_mail')
+    @patch('authorizations.views.queue_email')
     def test_password_reset_token_sends_security_notice_after_password_set(self, mock_send_mail):
         user, _ = self.make_person(
             'password_token_user',
@@ -3056,6 +3405,85 @@ class TombstoneBehaviorTests(ViewTestBase):
             ).exists()
         )
 
+    def test_account_merge_preview_plan_is_applied_on_execute(self):
+        self.client.login(username=self.ao_user.username, password='StrongPass!123')
+        survivor_user, survivor_person = self.make_person('merge_plan_survivor', 'Merge Plan Name')
+        source_user, source_person = self.make_person('merge_plan_source', 'Merge Plan Name')
+
+        survivor_auth = self.grant_authorization(survivor_person, self.style_weapon_armored)
+        source_auth = self.grant_authorization(source_person, self.style_weapon_armored)
+        source_auth.updated_at = timezone.now() + timedelta(minutes=1)
+        source_auth.save(update_fields=['updated_at'])
+        source_only_auth = self.grant_authorization(source_person, self.style_single_rapier)
+        survivor_sanction = Sanction.objects.create(
+            person=survivor_person,
+            discipline=self.discipline_armored,
+            style=self.style_weapon_armored,
+            start_date=date.today(),
+            end_date=date.today() + timedelta(days=10),
+            issue_note='Survivor sanction',
+        )
+        Sanction.objects.create(
+            person=source_person,
+            discipline=self.discipline_armored,
+            style=self.style_weapon_armored,
+            start_date=date.today(),
+            end_date=date.today() + timedelta(days=30),
+            issue_note='Longer source sanction',
+        )
+        survivor_office = self.appoint(survivor_person, self.branch_gd, self.discipline_armored)
+        source_office = self.appoint(source_person, self.branch_lg, self.discipline_armored)
+
+        payload = self.account_update_payload(
+            survivor_user,
+            survivor_person,
+            action='preview',
+            old_sca_name=source_person.sca_name,
+            new_sca_name=survivor_person.sca_name,
+            source_user_id=str(source_user.id),
+            survivor_user_id=str(survivor_user.id),
+        )
+        response = self.client.post(reverse('merge_accounts'), payload)
+
+        preview_data = response.context['preview_data']
+        self.assertEqual(preview_data['winner_by_loser'], {survivor_auth.id: source_auth.id})
+        self.assertEqual(
+            {auth.id for auth in preview_data['moved_authorizations']},
+            {source_auth.id, source_only_auth.id},
+        )
+        self.assertEqual(len(preview_data['removed_sanction_ids']), 1)
+        self.assertContains(response, 'Duplicate authorizations removed: 1.')
+
+        payload.update({
+            'action': 'execute',
+            'keep_active_office_ids': [str(survivor_office.id)],
+            'merge_action_note': 'Applying the previewed plan.',
+        })
+        response = self.client.post(reverse('merge_accounts'), payload, follow=True)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(Authorization.objects.filter(pk=survivor_auth.pk).exists())
+        self.assertEqual(
+            set(Authorization.objects.filter(person=survivor_person).values_list('pk', flat=True)),
+            {source_auth.id, source_only_auth.id},
+        )
+        moved_entry = AuthorizationAuditEntry.objects.get(authorization=source_only_auth, event_type='updated')
+        self.assertEqual(moved_entry.before_person_id, source_person.user_id)
+        self.assertEqual(moved_entry.after_person_id, survivor_person.user_id)
+        self.assertEqual(moved_entry.changed_by, self.ao_user)
+        self.assertTrue(AuthorizationValidityInterval.objects.filter(authorization=source_only_auth).exists())
+
+        self.assertEqual(list(Sanction.objects.filter(person__in=[survivor_person, source_person])), [survivor_sanction])
+        survivor_sanction.refresh_from_db()
+        self.assertEqual(survivor_sanction.end_date, date.today() + timedelta(days=30))
+        self.assertEqual(survivor_sanction.issue_note, 'Longer source sanction')
+
+        source_office.refresh_from_db()
+        survivor_office.refresh_from_db()
+        self.assertEqual(source_office.person, survivor_person)
+        self.assertEqual(source_office.end_date, date.today() - timedelta(days=1))
+        self.assertGreaterEqual(survivor_office.end_date, date.today())
+
 
 @override_settings(AUTHZ_TEST_FEATURES=False)
 class UserAccountViewTests(ViewTestBase):
@@ -3563,7 +3991,7 @@ class UserAccountViewTests(ViewTestBase):
         self.assertEqual(response.status_code, 200)
         self.assertIsNone(self.owner_user.background_check_expiration)
 
-    @patch('authorizations.views.send_mail')
+    @patch('authorizations.views.queue_email')
     def test_account_update_sends_notice_to_previous_email_when_email_changes(self, mock_send_mail):
         self.client.login(username=self.owner_user.username, password='StrongPass!123')
         previous_email = self.owner_user.email
@@ -3592,7 +4020,7 @@ class UserAccountViewTests(ViewTestBase):
         self.assertIn('antir.authorization.database@gmail.com', call_args[1])
         self.assertNotIn('owner.updated@example.com', call_args[1])
 
-    @patch('authorizations.views.send_mail')
+    @patch('authorizations.views.queue_email')
     def test_account_update_does_not_send_previous_email_notice_when_email_unchanged(self, mock_send_mail):
         self.client.login(username=self.owner_user.username, password='StrongPass!123')
         payload = self.account_update_payload(
@@ -4263,6 +4691,69 @@ class UserAccountViewTests(ViewTestBase):
         messages = self.messages_for(response)
         self.assertTrue(any('1 user membership expiration(s) were extended' in message for message in messages))
 
+    def test_ao_upload_membership_roster_applies_roster_waivers_for_all_renewed_users(self):
+        self.client.login(username=self.ao_user.username, password='StrongPass!123')
+        renewal = date.today() + relativedelta(years=2)
+        waiver_user, waiver_person = self.make_person(
+            'roster_bulk_waiver',
+            'Roster Bulk Waiver',
+            membership='733001',
+            membership_expiration=date.today() + relativedelta(months=1),
+        )
+        plain_user, plain_person = self.make_person(
+            'roster_bulk_plain',
+            'Roster Bulk Plain',
+            membership='733002',
+            membership_expiration=date.today() + relativedelta(months=1),
+        )
+        waiting = {
+            person: Authorization.objects.create(
+                person=person,
+                style=self.style_weapon_armored,
+                status=self.status_pending_waiver,
+                expiration=date.today() + relativedelta(years=1),
+                marshal=self.ao_person,
+            )
+            for person in (waiver_person, plain_person)
+        }
+        upload = SimpleUploadedFile(
+            'members_bulk.csv',
+            (
+                'Legacy ID (C),Waiver (C),First Name,Last Name,Membership Expiration Date\n'
+                f'733001,Yes,Roster,Tester,{renewal:%m/%d/%Y}\n'
+                f'733002,,Roster,Tester,{renewal:%m/%d/%Y}\n'
+            ).encode('utf-8'),
+            content_type='text/csv',
+        )
+
+        response = self.client.post(
+            reverse('upload_membership_roster'),
+            {'membership_csv': upload, 'next': reverse('index')},
+            follow=True,
+        )
+
+        self.assertEqual(response.status_code, 200)
+        waiver_user.refresh_from_db()
+        plain_user.refresh_from_db()
+        self.assertEqual(waiver_user.membership_expiration, renewal)
+        self.assertEqual(waiver_user.waiver_expiration, renewal)
+        self.assertEqual(plain_user.membership_expiration, renewal)
+        self.assertIsNone(plain_user.waiver_expiration)
+        waiver_record = WaiverRecord.objects.get(covered_user=waiver_user)
+        self.assertEqual(waiver_record.source, WaiverRecord.Source.MEMBERSHIP_ROSTER)
+        self.assertEqual(waiver_record.membership_expiration, renewal)
+        self.assertEqual(waiver_record.recorded_by, self.ao_user)
+        self.assertFalse(WaiverRecord.objects.filter(covered_user=plain_user).exists())
+        waiting[waiver_person].refresh_from_db()
+        waiting[plain_person].refresh_from_db()
+        self.assertEqual(waiting[waiver_person].status, self.status_active)
+        self.assertEqual(waiting[waiver_person].updated_by, self.ao_user)
+        self.assertTrue(AuthorizationValidityInterval.objects.filter(authorization=waiting[waiver_person]).exists())
+        self.assertEqual(waiting[plain_person].status, self.status_pending_waiver)
+        self.assertEqual(UserNote.objects.filter(person__in=[waiver_person, plain_person]).count(), 2)
+        messages = self.messages_for(response)
+        self.assertTrue(any('2 user membership expiration(s) were extended' in message for message in messages))
+
     def test_ao_upload_membership_roster_does_not_shorten_matching_user_expiration(self):
         self.client.login(username=self.ao_user.username, password='StrongPass!123')
         self.owner_user.membership = '222222'
@@ -4532,6 +5023,165 @@ class UserAccountViewTests(ViewTestBase):
         self.assertTrue(yes_entry.has_society_waiver)
         self.assertFalse(no_entry.has_society_waiver)
 
+    def test_membership_roster_import_applies_rows_in_chunks(self):
+        upload = SimpleUploadedFile(
+            'members_chunked.csv',
+            (
+                'Legacy ID (C),First Name,Last Name,Membership Expiration Date\r\n'
+                '710001,First,Chunk,2/2/2031\r\n'
+                '710002,"Quoted, Name",Chunk,2/2/2031\r\n'
+                ',Missing,Number,2/2/2031\r\n'
+                '710001,Repeated,Later,3/3/2033\r\n'
+                '710003,Last,Chunk,4/4/2034\r\n'
+            ).encode('utf-8'),
+            content_type='text/csv',
+        )
+        progress = []
+
+        result = _import_membership_roster(upload, self.ao_user, chunk_size=2, progress=progress.append)
+
+        self.assertEqual(result, (3, 2, 0))
+        self.assertEqual(progress, [2, 4, 5])
+        self.assertEqual(MembershipRosterEntry.objects.get(membership_number='710001').first_name, 'First')
+        self.assertEqual(MembershipRosterEntry.objects.get(membership_number='710002').first_name, 'Quoted, Name')
+        self.assertEqual(
+            MembershipRosterEntry.objects.get(membership_number='710003').membership_expiration,
+            date(2034, 4, 4),
+        )
+
+    def test_membership_roster_import_reads_xlsx_rows_one_at_a_time(self):
+        rows = [
+            ['Legacy ID (C)', 'First Name', 'Last Name', 'Membership Expiration Date'],
+            ['720001', 'Sheet', 'One', (date(2031, 1, 1) - date(1899, 12, 30)).days],
+            [],
+            ['720002', 'Sheet', 'Two', (date(2032, 1, 1) - date(1899, 12, 30)).days],
+        ]
+        upload = SimpleUploadedFile('members_stream.xlsx', self._build_xlsx(rows))
+        progress = []
+
+        result = _import_membership_roster(upload, self.ao_user, chunk_size=1, progress=progress.append)
+
+        self.assertEqual(result, (2, 0, 0))
+        self.assertEqual(progress, [1, 2])
+        self.assertEqual(
+            set(MembershipRosterEntry.objects.filter(last_name__in=['One', 'Two']).values_list('membership_number', flat=True)),
+            {'720001', '720002'},
+        )
+
+    @override_settings(AUTHZ_UPLOAD_JOBS_ENABLED=True)
+    def test_ao_upload_membership_roster_queues_job_for_worker(self):
+        self.client.login(username=self.ao_user.username, password='StrongPass!123')
+        upload = SimpleUploadedFile(
+            'members_queued.csv',
+            (
+                'Legacy ID (C),First Name,Last Name,Membership Expiration Date\n'
+                '730001,Queued,Member,2/2/2031\n'
+                ',Missing,Number,2/2/2031\n'
+            ).encode('utf-8'),
+            content_type='text/csv',
+        )
+
+        response = self.client.post(
+            reverse('upload_membership_roster'),
+            {'membership_csv': upload, 'next': reverse('index')},
+            follow=True,
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(MembershipRosterEntry.objects.filter(membership_number='730001').exists())
+        job = UploadJob.objects.get(requested_by=self.ao_user)
+        self.assertEqual(job.status, UploadJob.Status.QUEUED)
+        self.assertContains(response, reverse('upload_job_status', args=[job.id]))
+        status = self.client.get(reverse('upload_job_status', args=[job.id])).json()
+        self.assertEqual(status['status'], 'queued')
+        self.assertFalse(status['finished'])
+
+        output = StringIO()
+        call_command('run_upload_jobs', stdout=output)
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, UploadJob.Status.SUCCEEDED)
+        self.assertEqual(job.rows_processed, 2)
+        self.assertFalse(job.upload)
+        self.assertTrue(MembershipRosterEntry.objects.filter(membership_number='730001').exists())
+        self.assertEqual(MembershipRosterImport.objects.get().source_filename, 'members_queued.csv')
+        self.assertIn('1 succeeded, 0 failed', output.getvalue())
+        status = self.client.get(reverse('upload_job_status', args=[job.id])).json()
+        self.assertTrue(status['finished'])
+        self.assertEqual(
+            [message['level'] for message in status['messages']],
+            ['success', 'warning'],
+        )
+
+        self.client.login(username=self.owner_user.username, password='StrongPass!123')
+        self.assertEqual(self.client.get(reverse('upload_job_status', args=[job.id])).status_code, 403)
+
+    @override_settings(AUTHZ_UPLOAD_JOBS_ENABLED=True)
+    def test_upload_job_records_rejected_file(self):
+        self.client.login(username=self.ao_user.username, password='StrongPass!123')
+        self.client.post(
+            reverse('upload_membership_roster'),
+            {'membership_csv': SimpleUploadedFile('broken.xlsx', b'not a workbook'), 'next': reverse('index')},
+        )
+
+        call_command('run_upload_jobs', stdout=StringIO())
+
+        job = UploadJob.objects.get(requested_by=self.ao_user)
+        self.assertEqual(job.status, UploadJob.Status.FAILED)
+        self.assertEqual(job.error, 'Roster upload failed: The uploaded .xlsx file could not be read.')
+        self.assertFalse(job.upload)
+
+    @override_settings(AUTHZ_UPLOAD_JOBS_ENABLED=True)
+    def test_legacy_upload_job_reports_progress_inside_its_import_transaction(self):
+        self.client.force_login(self.ao_user)
+        self.client.post(
+            reverse('upload_legacy_authorizations'),
+            {
+                'authorization_csv': SimpleUploadedFile(
+                    'legacy_queued.csv',
+                    (
+                        'Person ID,Discipline,Weapon Style,Start Date,Marshal SCA Name\n'
+                        f'{self.owner_person.user_id},Armored Combat,Weapon & Shield,2025-01-15,{self.ao_person.sca_name}\n'
+                    ).encode('utf-8'),
+                    content_type='text/csv',
+                ),
+                'next': reverse('index'),
+            },
+        )
+        outer_depth = len(connection.atomic_blocks)
+        progress_depths = []
+        record_progress = upload_jobs_module.record_upload_job_progress
+
+        def record_depth(job, rows_processed):
+            progress_depths.append(len(connection.atomic_blocks))
+            record_progress(job, rows_processed)
+
+        with patch.object(upload_jobs_module, 'record_upload_job_progress', record_depth):
+            call_command('run_upload_jobs', stdout=StringIO())
+
+        job = UploadJob.objects.get(requested_by=self.ao_user)
+        self.assertEqual(job.status, UploadJob.Status.SUCCEEDED)
+        self.assertEqual(job.rows_processed, 1)
+        # The job row stays locked by the import, so no other worker can claim it mid-save.
+        self.assertEqual(len(progress_depths), 1)
+        self.assertGreater(progress_depths[0], outer_depth)
+        self.assertTrue(Authorization.objects.filter(person=self.owner_person, style=self.style_weapon_armored).exists())
+
+    def test_ao_upload_membership_roster_rejects_unreadable_xlsx_without_changes(self):
+        self.client.login(username=self.ao_user.username, password='StrongPass!123')
+        roster_count = MembershipRosterEntry.objects.count()
+        upload = SimpleUploadedFile('broken.xlsx', b'not a workbook')
+
+        response = self.client.post(
+            reverse('upload_membership_roster'),
+            {'membership_csv': upload, 'next': reverse('user_account', kwargs={'user_id': self.owner_user.id})},
+            follow=True,
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(MembershipRosterEntry.objects.count(), roster_count)
+        self.assertTrue(any('could not be read' in message for message in self.messages_for(response)))
+
     def test_ao_can_import_legacy_authorization_for_existing_person(self):
         self.client.force_login(self.ao_user)
         upload = SimpleUploadedFile(
@@ -7243,6 +7893,62 @@ class SupportingDocumentsViewTests(ViewTestBase):
             closer()
         response._resource_closers.clear()
 
+    def test_supporting_document_file_answers_conditional_and_range_requests(self):
+        self.client.login(username=self.kao_user.username, password='StrongPass!123')
+        url = reverse('supporting_document_file', kwargs={'document_id': self.eq_document.id})
+
+        full = self.client.get(url)
+        full.close()
+        not_modified = self.client.get(url, HTTP_IF_NONE_MATCH=full['ETag'])
+        partial = self.client.get(url, HTTP_RANGE='bytes=3-8')
+        suffix = self.client.get(url, HTTP_RANGE='bytes=-7', HTTP_IF_RANGE=full['ETag'])
+        stale_if_range = self.client.get(url, HTTP_RANGE='bytes=3-8', HTTP_IF_RANGE='"stale"')
+        unsatisfiable = self.client.get(url, HTTP_RANGE='bytes=500-')
+        inverted = self.client.get(url, HTTP_RANGE='bytes=5-2')
+
+        self.assertEqual(full.status_code, 200)
+        self.assertEqual(full['Accept-Ranges'], 'bytes')
+        self.assertIn('Last-Modified', full)
+        self.assertIn('private', full['Cache-Control'])
+        self.assertEqual(not_modified.status_code, 304)
+        self.assertEqual(partial.status_code, 206)
+        self.assertEqual(partial['Content-Range'], 'bytes 3-8/17')
+        self.assertEqual(b''.join(partial.streaming_content), b'waiver')
+        self.assertEqual(suffix.status_code, 206)
+        self.assertEqual(b''.join(suffix.streaming_content), b'content')
+        self.assertEqual(stale_if_range.status_code, 200)
+        self.assertEqual(b''.join(stale_if_range.streaming_content), b'eq-waiver-content')
+        stale_if_range.close()
+        self.assertEqual(unsatisfiable.status_code, 416)
+        self.assertEqual(unsatisfiable['Content-Range'], 'bytes */17')
+        self.assertEqual(inverted.status_code, 200)
+        self.assertNotIn('Content-Range', inverted)
+        self.assertEqual(b''.join(inverted.streaming_content), b'eq-waiver-content')
+        inverted.close()
+
+    def test_supporting_document_file_can_be_handed_to_the_web_server(self):
+        self.client.login(username=self.kao_user.username, password='StrongPass!123')
+        url = reverse('supporting_document_file', kwargs={'document_id': self.eq_document.id})
+
+        with override_settings(AUTHZ_FILE_DELIVERY='x-accel-redirect', AUTHZ_PROTECTED_MEDIA_URL='/protected-media/'):
+            accel = self.client.get(url)
+        with override_settings(AUTHZ_FILE_DELIVERY='x-sendfile'):
+            sendfile = self.client.get(url)
+
+        self.assertEqual(accel.status_code, 200)
+        self.assertEqual(accel['X-Accel-Redirect'], f'/protected-media/{self.eq_document.file.name}')
+        self.assertEqual(accel['Content-Type'], 'application/pdf')
+        self.assertEqual(accel.content, b'')
+        self.assertEqual(sendfile['X-Sendfile'], self.eq_document.file.path)
+        self.assertIn('ETag', sendfile)
+
+        self.client.login(username=self.viewer_user.username, password='StrongPass!123')
+        with override_settings(AUTHZ_FILE_DELIVERY='x-accel-redirect'):
+            denied = self.client.get(url)
+
+        self.assertEqual(denied.status_code, 302)
+        self.assertNotIn('X-Accel-Redirect', denied)
+
     def test_viewer_cannot_open_unassociated_supporting_document_file(self):
         self.client.login(username=self.viewer_user.username, password='StrongPass!123')
 
@@ -7282,6 +7988,155 @@ class SupportingDocumentsViewTests(ViewTestBase):
             'That supporting document file was not found.',
             self.messages_for(response),
         )
+        self.bg_document.refresh_from_db()
+        self.assertFalse(self.bg_document.file_present)
+
+    def test_supporting_documents_page_reads_stored_file_presence_without_checking_storage(self):
+        SupportingDocument.objects.filter(pk=self.eq_document.pk).update(file_present=False)
+        self.client.login(username=self.kao_user.username, password='StrongPass!123')
+
+        storage = SupportingDocument._meta.get_field('file').storage
+        with patch.object(storage, 'exists', side_effect=AssertionError('storage checked')):
+            response = self.client.get(reverse('supporting_documents'))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(
+            response,
+            reverse('supporting_document_file', kwargs={'document_id': self.bg_document.id}),
+        )
+        self.assertNotContains(
+            response,
+            reverse('supporting_document_file', kwargs={'document_id': self.eq_document.id}),
+        )
+        self.assertContains(response, 'Missing file')
+
+    def test_reconcile_supporting_document_files_refreshes_flags_in_one_walk(self):
+        missing = SupportingDocument.objects.create(
+            document_type=SupportingDocument.DocumentType.BACKGROUND_CHECK,
+            uploaded_by=self.fighter_user,
+        )
+        missing.file.save('reconcile-missing.pdf', ContentFile(b'missing'), save=True)
+        missing_name = missing.file.name
+        missing.file.storage.delete(missing_name)
+        restored = SupportingDocument.objects.create(
+            document_type=SupportingDocument.DocumentType.BACKGROUND_CHECK,
+            uploaded_by=self.fighter_user,
+        )
+        restored.file.save('reconcile-restored.pdf', ContentFile(b'restored'), save=True)
+        self.addCleanup(restored.file.delete, save=False)
+        SupportingDocument.objects.filter(pk=restored.pk).update(file_present=False)
+        self.assertTrue(SupportingDocument.objects.get(pk=missing.pk).file_present)
+
+        stdout = StringIO()
+        call_command('reconcile_supporting_document_files', stdout=stdout)
+
+        self.assertIn(f'- document_id={missing.pk}: file missing', stdout.getvalue())
+        self.assertIn(f'- document_id={restored.pk}: file present', stdout.getvalue())
+        self.assertIn('Dry run only.', stdout.getvalue())
+        self.assertTrue(SupportingDocument.objects.get(pk=missing.pk).file_present)
+
+        storage = SupportingDocument._meta.get_field('file').storage
+        with patch.object(storage, 'exists', side_effect=AssertionError('storage checked per file')):
+            call_command('reconcile_supporting_document_files', '--apply', stdout=StringIO())
+
+        self.assertFalse(SupportingDocument.objects.get(pk=missing.pk).file_present)
+        self.assertTrue(SupportingDocument.objects.get(pk=restored.pk).file_present)
+
+    def test_supporting_documents_page_walks_pages_by_upload_time(self):
+        extra_document = SupportingDocument.objects.create(
+            document_type=SupportingDocument.DocumentType.BACKGROUND_CHECK,
+            file='supporting_documents/paged-proof.pdf',
+            uploaded_by=self.fighter_user,
+        )
+        SupportingDocumentPerson.objects.create(document=extra_document, person=self.fighter_person)
+        newest_first = [extra_document, self.eq_document, self.bg_document]
+        for days_ago, document in enumerate(newest_first):
+            SupportingDocument.objects.filter(pk=document.pk).update(
+                uploaded_at=timezone.now() - timedelta(days=days_ago),
+            )
+        self.client.login(username=self.kao_user.username, password='StrongPass!123')
+
+        with patch('authorizations.views.SUPPORTING_DOCUMENTS_PAGE_SIZE', 2):
+            first_page = self.client.get(reverse('supporting_documents'), {'document_type': ''})
+            older_page = self.client.get(first_page.context['older_page_url'])
+            newer_page = self.client.get(older_page.context['newer_page_url'])
+
+        self.assertEqual(
+            [document.pk for document in first_page.context['documents']],
+            [extra_document.pk, self.eq_document.pk],
+        )
+        self.assertEqual(first_page.context['newer_page_url'], '')
+        self.assertIn('document_type=', first_page.context['older_page_url'])
+        self.assertEqual([document.pk for document in older_page.context['documents']], [self.bg_document.pk])
+        self.assertEqual(older_page.context['older_page_url'], '')
+        self.assertEqual(
+            [document.pk for document in newer_page.context['documents']],
+            [extra_document.pk, self.eq_document.pk],
+        )
+        self.assertEqual(newer_page.context['newer_page_url'], '')
+        self.assertContains(older_page, 'Docs Fighter')
+
+    def test_supporting_document_upload_lookup_is_scoped_to_uploader(self):
+        child_user = User.objects.create_user(
+            username='docs_viewer_child',
+            password='StrongPass!123',
+            email='docs_viewer_child@example.com',
+            first_name='Docs',
+            last_name='Child',
+            birthday=date.today() - relativedelta(years=10),
+        )
+        child_person = Person.objects.create(
+            user=child_user,
+            sca_name='Docs Viewer Child',
+            branch=self.branch_gd,
+            parent=self.viewer_person,
+        )
+        lookup_url = reverse('officer_person_lookup')
+
+        self.client.login(username=self.viewer_user.username, password='StrongPass!123')
+        denied = self.client.get(lookup_url, {'q': 'Docs', 'purpose': 'background_check_upload'})
+        scoped = self.client.get(lookup_url, {'q': 'Docs', 'purpose': 'equestrian_waiver_upload'})
+        page = self.client.get(reverse('supporting_documents'))
+
+        self.assertEqual(denied.status_code, 403)
+        self.assertEqual(
+            {row['user_id'] for row in scoped.json()['results']},
+            {self.viewer_person.user_id, child_person.user_id},
+        )
+        self.assertEqual(
+            list(page.context['eq_upload_people']),
+            [self.viewer_person, child_person],
+        )
+        self.assertNotContains(page, f'<option value="{self.fighter_person.user_id}">')
+
+        self.client.login(username=self.seneschal_user.username, password='StrongPass!123')
+        response = self.client.get(lookup_url, {'q': 'Docs Fighter', 'purpose': 'background_check_upload'})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(self.fighter_person.user_id, [row['user_id'] for row in response.json()['results']])
+
+    def test_supporting_document_upload_lookup_hides_legal_names_and_membership(self):
+        self.fighter_user.first_name = 'Wilhelmina'
+        self.fighter_user.last_name = 'Quarrington'
+        self.fighter_user.membership = '7788123'
+        self.fighter_user.save()
+        lookup_url = reverse('officer_person_lookup')
+        self.client.login(username=self.seneschal_user.username, password='StrongPass!123')
+
+        by_sca_name = self.client.get(lookup_url, {'q': 'Docs Fighter', 'purpose': 'background_check_upload'})
+        by_legal_name = self.client.get(lookup_url, {'q': 'Quarrington', 'purpose': 'background_check_upload'})
+        by_near_legal_name = self.client.get(lookup_url, {'q': 'Quarington', 'purpose': 'background_check_upload'})
+        by_membership = self.client.get(lookup_url, {'q': '7788123', 'purpose': 'background_check_upload'})
+
+        fighter_rows = [
+            row for row in by_sca_name.json()['results'] if row['user_id'] == self.fighter_person.user_id
+        ]
+        self.assertEqual(fighter_rows, [{'user_id': self.fighter_person.user_id, 'label': self.fighter_person.sca_name}])
+        for response in (by_legal_name, by_near_legal_name, by_membership):
+            self.assertNotIn(
+                self.fighter_person.user_id,
+                [row['user_id'] for row in response.json()['results']],
+            )
 
 
 class RoadmapViewTests(ViewTestBase):
@@ -8344,6 +9199,48 @@ class MarshalOfficerAppointmentPermissionTests(ViewTestBase):
         labels = [row['label'] for row in response.json()['results']]
         self.assertTrue(any('Robert Fuzzy Marshal' in label for label in labels))
 
+    @override_settings(AUTHZ_PERSON_LOOKUP_INDEX_SECONDS=900)
+    def test_officer_person_lookup_index_follows_person_renames(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        _, fighter_person = self.make_person('lookup_index_rename', 'Gwendolyn Indexed')
+        self.grant_authorization(fighter_person, self.style_weapon_armored)
+        self.client.login(username=self.kao_user.username, password='StrongPass!123')
+
+        def lookup_labels(query):
+            response = self.client.get(reverse('officer_person_lookup'), {'q': query, 'purpose': 'active'})
+            self.assertEqual(response.status_code, 200)
+            return [row['label'] for row in response.json()['results']]
+
+        self.assertTrue(any('Gwendolyn Indexed' in label for label in lookup_labels('Gwendolin Indexd')))
+
+        fighter_person.sca_name = 'Rhiannon Reindexed'
+        with self.captureOnCommitCallbacks(execute=True):
+            fighter_person.save()
+
+        self.assertFalse(any('Gwendolyn' in label for label in lookup_labels('Gwendolin Indexd')))
+        self.assertTrue(any('Rhiannon Reindexed' in label for label in lookup_labels('Rhianon Reindexd')))
+
+    @override_settings(AUTHZ_PERSON_LOOKUP_INDEX_SECONDS=900)
+    def test_officer_person_lookup_index_applies_other_process_renames_without_rebuilding(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        _, fighter_person = self.make_person('lookup_index_journal', 'Gwendolyn Journaled')
+        index = person_lookup.person_lookup_index()
+        built_at = index.built_at
+
+        # A rename saved by another process reaches this one only through the journal.
+        with patch.object(person_lookup, '_person_name_index', person_lookup.PersonNameIndex()):
+            fighter_person.sca_name = 'Rhiannon Journaled'
+            with self.captureOnCommitCallbacks(execute=True):
+                fighter_person.save()
+
+        with self.assertNumQueries(1):
+            self.assertIs(person_lookup.person_lookup_index(), index)
+        self.assertEqual(index.built_at, built_at)
+        self.assertNotIn(fighter_person.user_id, index.search('Gwendolin Journald'))
+        self.assertIn(fighter_person.user_id, index.search('Rhianon Journald'))
+
     def test_officer_person_lookup_does_not_fuzzy_match_membership_numbers(self):
         active_user, active_person = self.make_person(
             'lookup_no_fuzzy_member',
@@ -8542,7 +9439,7 @@ class MarshalOfficerAppointmentPermissionTests(ViewTestBase):
         self.assertEqual(response.status_code, 200)
         self.assertEqual(single_sword.status.name, 'Awaiting Fighter Concurrence')
         self.assertEqual(case.status.name, 'Awaiting Fighter Concurrence')
-        self.assertEqual(case.effective_expiration, date.today() - relativedelta(years=1))
+        self.assertEqual(case.effective_expiration, EXPIRED_EFFECTIVE_EXPIRATION)
 
     def test_keao_can_set_authorization_date_when_adding_equestrian_authorization(self):
         discipline_equestrian, _ = Discipline.objects.get_or_create(name='Equestrian')
@@ -8848,7 +9745,7 @@ class MarshalOfficerAppointmentPermissionTests(ViewTestBase):
         self.assertEqual(response.status_code, 200)
         self.assertEqual(general_riding.status, self.status_needs_kingdom_equestrian_waiver)
         self.assertEqual(mounted_gaming.status, self.status_needs_kingdom_equestrian_waiver)
-        self.assertEqual(mounted_gaming.effective_expiration, date.today() - relativedelta(years=1))
+        self.assertEqual(mounted_gaming.effective_expiration, EXPIRED_EFFECTIVE_EXPIRATION)
 
     @override_settings(AUTHZ_REQUIRE_FIGHTER_CONCURRENCE=True)
     def test_cut_and_thrust_foundation_and_spear_can_be_submitted_together_for_concurrence(self):
@@ -8900,7 +9797,7 @@ class MarshalOfficerAppointmentPermissionTests(ViewTestBase):
         self.assertEqual(response.status_code, 200)
         self.assertEqual(longsword.status.name, 'Awaiting Fighter Concurrence')
         self.assertEqual(spear.status.name, 'Awaiting Fighter Concurrence')
-        self.assertEqual(spear.effective_expiration, date.today() - relativedelta(years=1))
+        self.assertEqual(spear.effective_expiration, EXPIRED_EFFECTIVE_EXPIRATION)
 
     def test_basket_processes_new_style_after_existing_style_renewal(self):
         style_two_handed = WeaponStyle.objects.create(
@@ -10855,8 +11752,9 @@ class ReportsViewTests(TestCase):
         self.assertEqual(response.status_code, 200)
         self.assertTrue(response['Content-Type'].startswith('text/csv'))
         self.assertIn('attachment; filename="quarterly_marshal_report.csv"', response['Content-Disposition'])
-        self.assertTrue(response.content.startswith(b'\xef\xbb\xbf'))
-        content = response.content.decode('utf-8-sig')
+        raw_content = b''.join(response.streaming_content)
+        self.assertTrue(raw_content.startswith(b'\xef\xbb\xbf'))
+        content = raw_content.decode('utf-8-sig')
         self.assertIn('Discipline,Authorization Detail,Q4 2025,Q3 2025,Change', content)
         self.assertIn('Armored Combat,Total Participants,595,608,-13', content)
 
@@ -10871,7 +11769,8 @@ class ReportsViewTests(TestCase):
         )
 
         self.assertEqual(response.status_code, 200)
-        self.assertTrue(response.content.startswith(b'\xef\xbb\xbf'))
-        content = response.content.decode('utf-8-sig').splitlines()
+        raw_content = b''.join(response.streaming_content)
+        self.assertTrue(raw_content.startswith(b'\xef\xbb\xbf'))
+        content = raw_content.decode('utf-8-sig').splitlines()
         self.assertEqual(content[0], 'Discipline,Authorization Detail,Q4 2025')
         self.assertIn('Armored Combat,Total Participants,595', content)
@@ -0,0 +1,201 @@
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files import File
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import MembershipRosterImport, UploadJob
+
+logger = logging.getLogger(__name__)
+
+# A running job whose worker has not reported progress for this long is
+# assumed dead and handed to the next worker. Claims skip locked rows, so a
+# job whose import holds its row locked is never handed on while it runs.
+UPLOAD_JOB_STALE_AFTER = timedelta(minutes=30)
+UPLOAD_JOB_MAX_ATTEMPTS = 3
+UPLOAD_JOB_FAILED_MESSAGE = 'The upload could not be processed. The error has been logged for the site administrators.'
+
+
+def upload_jobs_enabled() -> bool:
+    return bool(getattr(settings, 'AUTHZ_UPLOAD_JOBS_ENABLED', False))
+
+
+def queue_upload_job(kind, uploaded_file, requested_by) -> UploadJob:
+    """Store an uploaded file for the run_upload_jobs worker and return its job."""
+    job = UploadJob(kind=kind, source_filename=(uploaded_file.name or '')[:255], requested_by=requested_by)
+    job.upload.save(uploaded_file.name or 'upload', uploaded_file, save=False)
+    job.save()
+    return job
+
+
+def claim_upload_job(now=None):
+    """Mark the oldest waiting (or abandoned) job as running for this worker and return it."""
+    now = now or timezone.now()
+    with transaction.atomic():
+        job = (
+            UploadJob.objects.select_for_update(skip_locked=True)
+            .filter(
+                Q(status=UploadJob.Status.QUEUED)
+                | Q(status=UploadJob.Status.RUNNING, heartbeat_at__lt=now - UPLOAD_JOB_STALE_AFTER)
+            )
+            .order_by('id')
+            .first()
+        )
+        if job is None:
+            return None
+        job.status = UploadJob.Status.RUNNING
+        job.attempts += 1
+        job.started_at = now
+        job.heartbeat_at = now
+        job.save(update_fields=['status', 'attempts', 'started_at', 'heartbeat_at'])
+    return job
+
+
+def record_upload_job_progress(job, rows_processed) -> None:
+    job.rows_processed = rows_processed
+    UploadJob.objects.filter(pk=job.pk).update(rows_processed=rows_processed, heartbeat_at=timezone.now())
+
+
+def _finish_upload_job(job, status, *, result_messages=None, error=''):
+    job.status = status
+    job.result_messages = result_messages or []
+    job.error = error
+    job.finished_at = timezone.now()
+    if job.upload:
+        job.upload.delete(save=False)
+    job.save(update_fields=['status', 'result_messages', 'error', 'finished_at', 'upload'])
+
+
+def run_upload_job(job, handler) -> UploadJob:
+    """
+    Run a claimed job's handler against its stored file and record the outcome.
+
+    ``handler(uploaded_file, requested_by, progress)`` returns (level, text)
+    message pairs and raises ValueError with a message for the uploader when
+    the file is rejected. The stored file is removed either way.
+    """
+    if job.attempts > UPLOAD_JOB_MAX_ATTEMPTS:
+        _finish_upload_job(job, UploadJob.Status.FAILED, error=UPLOAD_JOB_FAILED_MESSAGE)
+        return job
+    try:
+        with job.upload.open('rb') as stored:
+            result_messages = handler(
+                File(stored, name=job.source_filename),
+                job.requested_by,
+                lambda rows_processed: record_upload_job_progress(job, rows_processed),
+            )
+    except ValueError as exc:
+        _finish_upload_job(job, UploadJob.Status.FAILED, error=str(exc))
+    except Exception:
+        logger.exception('Upload job id=%s (%s) failed', job.pk, job.kind)
+        _finish_upload_job(job, UploadJob.Status.FAILED, error=UPLOAD_JOB_FAILED_MESSAGE)
+    else:
+        _finish_upload_job(
+            job,
+            UploadJob.Status.SUCCEEDED,
+            result_messages=[[level, text] for level, text in result_messages],
+        )
+    return job
+
+
+def membership_roster_upload_messages(uploaded_file, imported_by, progress=None):
+    """
+    Import a roster upload and return the (level, text) messages for the uploader.
+
+    Raises ValueError with the uploader-facing message when the file is rejected.
+    """
+    # The importers live with the upload views, which import this module.
+    from .views import _import_membership_roster
+
+    try:
+        row_count, skipped_rows, refreshed_user_count = _import_membership_roster(
+            uploaded_file,
+            imported_by,
+            progress=progress,
+        )
+    except ValueError as exc:
+        raise ValueError(f'Roster upload failed: {exc}') from exc
+    MembershipRosterImport.objects.update_or_create(
+        pk=1,
+        defaults={
+            'source_filename': uploaded_file.name,
+            'imported_by': imported_by,
+            'row_count': row_count,
+        },
+    )
+
+    result_messages = [('success', f'Membership roster updated successfully ({row_count} rows processed).')]
+    if refreshed_user_count:
+        result_messages.append((
+            'success',
+            f'{refreshed_user_count} user membership expiration(s) were extended from matching membership numbers.',
+        ))
+    if skipped_rows:
+        result_messages.append((
+            'warning',
+            f'{skipped_rows} row(s) were skipped because required membership fields were missing or invalid.',
+        ))
+    return result_messages
+
+
+def legacy_authorization_upload_messages(uploaded_file, actor, progress=None):
+    """
+    Import a legacy authorization CSV in one transaction and return the (level, text) messages.
+
+    Raises ValueError with the uploader-facing message when nothing was saved.
+    """
+    from .views import _apply_legacy_authorization_import, _build_legacy_import_rows
+
+    try:
+        rows, pending_people = _build_legacy_import_rows(uploaded_file)
+    except ValueError as exc:
+        raise ValueError(f'Legacy authorization import failed: {exc}') from exc
+
+    try:
+        with transaction.atomic():
+            if progress:
+                # Updating the job inside the transaction keeps its row locked until the
+                # import commits, so claim_upload_job skips it however long the save runs.
+                progress(len(rows))
+            created_count, updated_count, person_count = _apply_legacy_authorization_import(
+                rows,
+                pending_people,
+                actor,
+                uploaded_file.name,
+            )
+    except Exception as exc:
+        logger.exception('Legacy authorization CSV import failed for file %s', uploaded_file.name)
+        raise ValueError('Legacy authorization import failed before any rows were saved.') from exc
+
+    return [(
+        'success',
+        (
+            f'Legacy authorization import complete: {created_count} created, '
+            f'{updated_count} updated, {person_count} placeholder account(s) created.'
+        ),
+    )]
+
+
+# Run by the run_upload_jobs worker when AUTHZ_UPLOAD_JOBS_ENABLED is on.
+UPLOAD_JOB_HANDLERS = {
+    UploadJob.Kind.MEMBERSHIP_ROSTER: membership_roster_upload_messages,
+    UploadJob.Kind.LEGACY_AUTHORIZATIONS: legacy_authorization_upload_messages,
+}
+
+
+def upload_job_payload(job) -> dict:
+    return {
+        'ok': True,
+        'id': job.pk,
+        'kind': job.kind,
+        'status': job.status,
+        'status_label': job.get_status_display(),
+        'finished': job.is_finished,
+        'source_filename': job.source_filename,
+        'rows_processed': job.rows_processed,
+        'messages': [{'level': level, 'text': text} for level, text in job.result_messages],
+        'error': job.error,
+    }
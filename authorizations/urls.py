@@ -12,6 +12,7 @@ urlpatterns = [
     path('password_reset/<uidb64>/<token>', views.password_reset_token, name='password_reset_token'),
     path('search', views.search, name='search'),
     path('fighter/<int:person_id>', views.fighter, name='fighter'),
+    path('fighter_cards/batch', views.batch_fighter_cards, name='batch_fighter_cards'),
     path('sign_waiver/<int:user_id>', views.sign_waiver, name='sign_waiver'),
     path('api/styles/<int:discipline_id>/', views.get_weapon_styles, name='get_weapon_styles'),
     path('api/equestrian_authorizations/', views.get_equestrian_authorizations, name='get_equestrian_authorizations'),
@@ -29,6 +30,7 @@ urlpatterns = [
         name='legacy_authorization_recovery',
     ),
     path('legacy_authorizations/upload', views.upload_legacy_authorizations, name='upload_legacy_authorizations'),
+    path('api/upload_jobs/<int:job_id>/', views.upload_job_status, name='upload_job_status'),
     path('delete', views.delete_authorizations, name='delete_authorizations'),
     path('delete/<int:person_id>', views.delete_authorizations, name='delete_authorizations_for_person'),
     path('supporting_documents', views.supporting_documents, name='supporting_documents'),
@@ -1,10 +1,10 @@
 from dateutil.relativedelta import relativedelta
+import codecs
 import csv
-from difflib import SequenceMatcher
 import uuid
+import tempfile
 import zipfile
 import xml.etree.ElementTree as ET
-from django.core.mail import send_mail
 from django.conf import settings
 from datetime import date, datetime
 from zoneinfo import ZoneInfo
@@ -19,7 +19,8 @@ from datetime import timedelta
 import logging
 from io import BytesIO
 from django.db.models import Q, Prefetch, Max, Case, When, Value, BooleanField, Exists, OuterRef
-from django.http import HttpResponseRedirect, HttpResponse
+from django.db.models import prefetch_related_objects
+from django.http import HttpResponseRedirect, HttpResponse, StreamingHttpResponse
 from django.shortcuts import render, redirect, get_object_or_404
 from django.core.paginator import EmptyPage, Page, PageNotAnInteger, Paginator
 from django.contrib.auth import authenticate, login, logout
@@ -27,20 +28,32 @@ from django.contrib.auth.decorators import login_required
 from django.urls import reverse
 from django.utils.html import format_html
 from django.utils import timezone
+from django.utils.dateparse import parse_datetime
 from django.contrib.staticfiles import finders
 from django.core.cache import cache
-from .models import User, Authorization, AuthorizationAuditEntry, AuthorizationValidityInterval, Branch, Discipline, WeaponStyle, AuthorizationStatus, Person, BranchMarshal, Title, TITLE_RANK_CHOICES, AuthorizationNote, UserNote, AuthorizationPortalSetting, ReportingPeriod, ReportValue, Sanction, MembershipRosterImport, MembershipRosterEntry, WaiverRecord, SupportingDocument, SupportingDocumentPerson, SupportingDocumentAuthorization, LegacyAuthorizationRecoveryEntry, SYSTEM_USER_IDS, CANADIAN_PROVINCE_ABBREVIATIONS, CANADIAN_PROVINCE_NAMES, adult_age_for_jurisdiction, is_minor_from_birthday, sync_authorization_validity_interval
-from .permissions import is_senior_marshal, is_branch_marshal, is_regional_marshal, is_kingdom_marshal, is_kingdom_authorization_officer, is_kingdom_equestrian_authorization_officer, is_kingdom_earl_marshal, is_branch_seneschal, is_kingdom_seneschal, can_authorize_in_discipline, authorization_follows_rules, calculate_age, approve_authorization, appoint_branch_marshal, waiver_signed, authorization_officer_sign_off_enabled, membership_is_current, calculate_authorization_expiration, validate_approve_authorization, validate_reject_authorization, authorization_requires_concurrence, is_authorized_in_discipline, active_sanction_for_style, can_branch_have_seneschal, can_manage_branch_marshal_office, can_manage_any_branch_marshal_office, marshal_office_effective_expiration, create_authorization_note, kingdom_review_status_name_for_style, is_kingdom_review_status_name, youth_age_category_for_age, youth_age_category_for_style_name, youth_base_style_name, KINGDOM_APPROVAL_STATUS, KINGDOM_EQUESTRIAN_WAIVER_STATUS, KINGDOM_AUTHORIZATION_OFFICER_DISCIPLINE, KINGDOM_EQUESTRIAN_AUTHORIZATION_OFFICER_DISCIPLINE, SENESCHAL_DISCIPLINE, _equestrian_aliases_for_style_name, _GENERAL_RIDING_STYLES, _JUNIOR_GROUND_CREW_STYLES, _MOUNTED_ARCHERY_STYLES, _MOUNTED_COMBAT_STYLES, _MOUNTED_CREST_COMBAT_STYLES, _MOUNTED_GAMING_STYLES, _MOUNTED_SPECIAL_STYLES, _MOUNTED_WEAPON_GAME_STYLES, _DRIVING_STYLES, _FOAM_TIPPED_JOUSTING_STYLES, _SENIOR_GROUND_CREW_STYLES
+from .models import User, Authorization, AuthorizationAuditEntry, AuthorizationValidityInterval, Branch, Discipline, WeaponStyle, AuthorizationStatus, Person, BranchMarshal, Title, TITLE_RANK_CHOICES, AuthorizationNote, UserNote, AuthorizationPortalSetting, ReportingPeriod, ReportValue, Sanction, MembershipRosterImport, MembershipRosterEntry, WaiverRecord, SupportingDocument, SupportingDocumentPerson, SupportingDocumentAuthorization, LegacyAuthorizationRecoveryEntry, UploadJob, SYSTEM_USER_IDS, CANADIAN_PROVINCE_ABBREVIATIONS, CANADIAN_PROVINCE_NAMES, adult_age_for_jurisdiction, is_minor_from_birthday, private_name_match_user_ids, refresh_effective_expirations, EXPIRED_EFFECTIVE_EXPIRATION, effective_expiration_text, UserNameToken, deferred_authorization_audit, deferred_authorization_validity_sync, record_authorization_audit_entry, sync_authorization_validity_intervals
+from .permissions import is_senior_marshal, is_branch_marshal, is_regional_marshal, is_kingdom_marshal, is_kingdom_authorization_officer, is_kingdom_equestrian_authorization_officer, is_kingdom_earl_marshal, is_branch_seneschal, is_kingdom_seneschal, can_authorize_in_discipline, authorization_follows_rules, FighterRuleSnapshot, load_fighter_rule_snapshot, calculate_age, approve_authorization, appoint_branch_marshal, waiver_signed, authorization_officer_sign_off_enabled, membership_is_current, calculate_authorization_expiration, validate_approve_authorization, validate_reject_authorization, authorization_requires_concurrence, is_authorized_in_discipline, active_sanction_for_style, ActiveSanctionMap, load_active_sanctions, can_branch_have_seneschal, can_manage_branch_marshal_office, can_manage_any_branch_marshal_office, marshal_office_effective_expiration, create_authorization_note, kingdom_review_status_name_for_style, is_kingdom_review_status_name, youth_age_category_for_age, youth_age_category_for_style_name, youth_base_style_name, invalidate_user_capabilities, KINGDOM_APPROVAL_STATUS, KINGDOM_EQUESTRIAN_WAIVER_STATUS, KINGDOM_AUTHORIZATION_OFFICER_DISCIPLINE, KINGDOM_EQUESTRIAN_AUTHORIZATION_OFFICER_DISCIPLINE, SENESCHAL_DISCIPLINE, _equestrian_aliases_for_style_name, _GENERAL_RIDING_STYLES, _JUNIOR_GROUND_CREW_STYLES, _MOUNTED_ARCHERY_STYLES, _MOUNTED_COMBAT_STYLES, _MOUNTED_CREST_COMBAT_STYLES, _MOUNTED_GAMING_STYLES, _MOUNTED_SPECIAL_STYLES, _MOUNTED_WEAPON_GAME_STYLES, _DRIVING_STYLES, _FOAM_TIPPED_JOUSTING_STYLES, _SENIOR_GROUND_CREW_STYLES
 from .changelog import build_changelog_sections
+from .fighter_cards import FIGHTER_CARD_TEMPLATES, fighter_card_batch_person_ids, render_fighter_card_batch, render_fighter_card_for_person
+from .option_cache import bump_option_list_generation, cached_option_list
+from .file_delivery import protected_file_response
+from .person_lookup import PERSON_LOOKUP_FUZZY_THRESHOLD, person_lookup_index
+from .report_journal import mark_report_people_changed
+from .signals import authorization_audit_entry
+from .upload_jobs import (
+    legacy_authorization_upload_messages,
+    membership_roster_upload_messages,
+    queue_upload_job,
+    upload_job_payload,
+    upload_jobs_enabled,
+)
+from .outbound_email import queue_email
 from .maintenance import active_logged_in_users, can_manage_maintenance_lock, get_portal_setting, maintenance_lock_enabled, maintenance_lock_message
-from itertools import groupby
+from .request_metrics import request_metrics_enabled, request_metrics_store, view_budget
+from itertools import groupby, islice
 from collections import defaultdict
 from operator import attrgetter
 from typing import Optional
-from pdfrw import PdfReader, PdfWriter, PdfName, PageMerge
-from reportlab.pdfgen import canvas
-from reportlab.pdfbase import pdfmetrics
-from reportlab.pdfbase.ttfonts import TTFont
 import os
 from django.contrib import messages
 from django import forms
@@ -50,7 +63,7 @@ import mistune
 import bleach
 from types import SimpleNamespace
 from authorizations.security.events import log_security_event
-from authorizations.reporting import build_current_report_snapshot, ReportingConfigurationError
+from authorizations.reporting import cached_report_snapshot, ReportingConfigurationError
 from authorizations.addressing import (
     jurisdiction_for_state,
     normalize_postal_code,
@@ -157,12 +170,11 @@ def _send_previous_email_change_notice(request, user, person, previous_email):
         'For your security, future account emails and recovery messages for this account will be sent to the updated email address.\n\n'
         f'{_email_sender_notice()}'
     )
-    send_mail(
+    queue_email(
         'Email address changed for an An Tir Authorization account',
         message,
         settings.DEFAULT_FROM_EMAIL,
         [previous_email],
-        fail_silently=False,
     )
 
 
@@ -190,12 +202,11 @@ def _send_password_change_notice(request, user, person):
         f'{admin_email}\n\n'
         f'{_email_sender_notice()}'
     )
-    send_mail(
+    queue_email(
         'Password changed for an An Tir Authorization account',
         message,
         settings.DEFAULT_FROM_EMAIL,
         [user.email],
-        fail_silently=False,
     )
 
 
@@ -406,9 +417,19 @@ def _normalize_membership_number(value: str) -> str:
     return value
 
 
-def _membership_entries_from_dict_rows(rows) -> tuple[list[MembershipRosterEntry], int]:
+MEMBERSHIP_ROSTER_CHUNK_SIZE = 1000
+
+
+def _membership_entries_from_dict_rows(rows, seen_memberships=None) -> tuple[list[MembershipRosterEntry], int]:
+    """
+    Build roster entries from numbered dict rows and count the rows that were skipped.
+
+    Pass the same ``seen_memberships`` set for every chunk of one file so a
+    membership number repeated in a later chunk is still skipped.
+    """
     entries = []
-    seen_memberships = set()
+    if seen_memberships is None:
+        seen_memberships = set()
     skipped_rows = 0
     for row_number, row in rows:
         membership_number = _normalize_membership_number(
@@ -457,17 +478,15 @@ def _membership_entries_from_dict_rows(rows) -> tuple[list[MembershipRosterEntry
             )
         )
 
-    if not entries:
-        raise ValueError('The uploaded file has no member rows.')
     return entries, skipped_rows
 
 
 def _load_membership_csv_rows(uploaded_file):
-    decoded = uploaded_file.read().decode('utf-8-sig', errors='replace')
-    reader = csv.DictReader(decoded.splitlines())
+    # Iterating the upload reads it a chunk at a time; lines are decoded as they arrive.
+    reader = csv.DictReader(codecs.iterdecode(uploaded_file, 'utf-8-sig', errors='replace'))
     if not reader.fieldnames:
         raise ValueError('The uploaded file does not contain a header row.')
-    return enumerate(reader, start=2)
+    yield from enumerate(reader, start=2)
 
 
 def _xlsx_cell_text(cell, shared_strings: list[str]) -> str:
@@ -504,14 +523,37 @@ REPORT_XLSX_NS = {
 }
 
 
+def _xlsx_iter_elements(stream, tag: str):
+    """
+    Yield each completed ``tag`` element from an XML stream.
+
+    Each element is cleared and detached from its parent once the caller
+    moves on, so a large worksheet is never held in memory as a whole.
+    """
+    open_elements = []
+    for event, element in ET.iterparse(stream, events=('start', 'end')):
+        if event == 'start':
+            open_elements.append(element)
+            continue
+        open_elements.pop()
+        if element.tag != tag:
+            continue
+        yield element
+        element.clear()
+        if open_elements:
+            open_elements[-1].remove(element)
+
+
 def _load_membership_xlsx_rows(uploaded_file):
+    main_ns = '{%s}' % REPORT_XLSX_NS['m']
+    headers = None
     try:
         with zipfile.ZipFile(uploaded_file) as archive:
             shared_strings = []
             if 'xl/sharedStrings.xml' in archive.namelist():
-                shared_root = ET.fromstring(archive.read('xl/sharedStrings.xml'))
-                for si in shared_root.findall('m:si', REPORT_XLSX_NS):
-                    shared_strings.append(''.join((t.text or '') for t in si.findall('.//m:t', REPORT_XLSX_NS)))
+                with archive.open('xl/sharedStrings.xml') as shared_stream:
+                    for si in _xlsx_iter_elements(shared_stream, f'{main_ns}si'):
+                        shared_strings.append(''.join((t.text or '') for t in si.findall('.//m:t', REPORT_XLSX_NS)))
 
             workbook = ET.fromstring(archive.read('xl/workbook.xml'))
             rels = ET.fromstring(archive.read('xl/_rels/workbook.xml.rels'))
@@ -526,47 +568,90 @@ def _load_membership_xlsx_rows(uploaded_file):
             target = rid_to_target[rid]
             if not target.startswith('xl/'):
                 target = f'xl/{target}'
-            worksheet = ET.fromstring(archive.read(target))
-
-            rows = []
-            for row_node in worksheet.findall('.//m:sheetData/m:row', REPORT_XLSX_NS):
-                values = {}
-                row_number = int(row_node.attrib.get('r') or len(rows) + 1)
-                for cell in row_node.findall('m:c', REPORT_XLSX_NS):
-                    column_index = _xlsx_column_to_index(cell.attrib.get('r', ''))
-                    if column_index:
-                        values[column_index] = _xlsx_cell_text(cell, shared_strings).strip()
-                if values:
-                    rows.append((row_number, values))
+
+            with archive.open(target) as worksheet:
+                rows_seen = 0
+                for row_node in _xlsx_iter_elements(worksheet, f'{main_ns}row'):
+                    rows_seen += 1
+                    values = {}
+                    row_number = int(row_node.attrib.get('r') or rows_seen)
+                    for cell in row_node.findall('m:c', REPORT_XLSX_NS):
+                        column_index = _xlsx_column_to_index(cell.attrib.get('r', ''))
+                        if column_index:
+                            values[column_index] = _xlsx_cell_text(cell, shared_strings).strip()
+                    if not values:
+                        continue
+                    if headers is None:
+                        headers = [values.get(index, '') for index in range(1, max(values) + 1)]
+                        if not any(headers):
+                            raise ValueError('The uploaded workbook does not contain a header row.')
+                        continue
+                    yield row_number, {
+                        header: values.get(index, '')
+                        for index, header in enumerate(headers, start=1)
+                        if header
+                    }
     except (KeyError, ET.ParseError, zipfile.BadZipFile):
         raise ValueError('The uploaded .xlsx file could not be read.')
 
-    if not rows:
-        raise ValueError('The uploaded workbook does not contain a header row.')
-
-    header_row_number, header_values = rows[0]
-    headers = [header_values.get(index, '') for index in range(1, max(header_values) + 1)]
-    if not any(headers):
+    if headers is None:
         raise ValueError('The uploaded workbook does not contain a header row.')
 
-    dict_rows = []
-    for row_number, values in rows[1:]:
-        row = {
-            header: values.get(index, '')
-            for index, header in enumerate(headers, start=1)
-            if header
-        }
-        dict_rows.append((row_number or header_row_number + len(dict_rows) + 1, row))
-    return dict_rows
-
 
-def _load_membership_rows_from_upload(uploaded_file) -> tuple[list[MembershipRosterEntry], int]:
+def _membership_rows_from_upload(uploaded_file):
+    """Return a lazy iterator of (row number, row dict) pairs from a CSV or .xlsx roster upload."""
     filename = (uploaded_file.name or '').casefold()
     if filename.endswith('.xlsx'):
-        rows = _load_membership_xlsx_rows(uploaded_file)
-    else:
-        rows = _load_membership_csv_rows(uploaded_file)
-    return _membership_entries_from_dict_rows(rows)
+        return _load_membership_xlsx_rows(uploaded_file)
+    return _load_membership_csv_rows(uploaded_file)
+
+
+def _import_membership_roster(uploaded_file, imported_by, *, chunk_size=MEMBERSHIP_ROSTER_CHUNK_SIZE, progress=None):
+    """
+    Stream a roster upload into MembershipRosterEntry and refresh matching users.
+
+    Rows are read and applied ``chunk_size`` at a time, so only one chunk of
+    entries is in memory at once. Each chunk is written in its own atomic
+    block, and ``progress`` is called after each chunk with the number of rows
+    read so far. The upload view runs the whole import in one transaction.
+    The background worker does not, so its progress is visible while it runs.
+    Re-running a partly applied roster is safe because rows only ever extend
+    existing entries. Returns (imported rows, skipped rows, refreshed users).
+    """
+    source_filename = uploaded_file.name
+    rows = _membership_rows_from_upload(uploaded_file)
+    seen_memberships = set()
+    imported_rows = 0
+    skipped_rows = 0
+    refreshed_user_count = 0
+    while True:
+        chunk = list(islice(rows, chunk_size))
+        if not chunk:
+            break
+        entries, chunk_skipped = _membership_entries_from_dict_rows(chunk, seen_memberships)
+        skipped_rows += chunk_skipped
+        if entries:
+            # Validity intervals for the chunk's refreshed members are synced together.
+            with transaction.atomic(), deferred_authorization_validity_sync():
+                effective_rows = _merge_membership_roster_entries(entries)
+                refreshed_user_count += _refresh_user_membership_expirations_from_roster(
+                    effective_rows,
+                    imported_by,
+                    source_filename,
+                )
+            imported_rows += len(entries)
+        logger.info(
+            'Membership roster upload %s: %s rows read, %s imported',
+            source_filename,
+            imported_rows + skipped_rows,
+            imported_rows,
+        )
+        if progress:
+            progress(imported_rows + skipped_rows)
+
+    if not imported_rows:
+        raise ValueError('The uploaded file has no member rows.')
+    return imported_rows, skipped_rows, refreshed_user_count
 
 
 def _merge_membership_roster_entries(uploaded_rows: list[MembershipRosterEntry]) -> list[MembershipRosterEntry]:
@@ -607,6 +692,14 @@ def _merge_membership_roster_entries(uploaded_rows: list[MembershipRosterEntry])
 
 
 def _refresh_user_membership_expirations_from_roster(rows, imported_by, source_filename: str) -> int:
+    """
+    Extend members' expirations from roster rows in one set-based pass.
+
+    Has the same outcome as saving each renewed user: waiver coverage from a
+    roster waiver, validity history, a roster waiver record, activation of
+    Awaiting Waiver authorizations, and an officer note. Each step runs once
+    for the whole set of renewed users.
+    """
     roster_by_membership = {
         row.membership_number: row
         for row in rows
@@ -614,26 +707,75 @@ def _refresh_user_membership_expirations_from_roster(rows, imported_by, source_f
     if not roster_by_membership:
         return 0
 
-    updated_count = 0
-    users = User.objects.select_related('person').filter(membership__in=roster_by_membership.keys())
-    for user in users:
-        roster_entry = roster_by_membership.get(user.membership)
-        if not roster_entry:
-            continue
-        previous_expiration = user.membership_expiration
-        if previous_expiration and previous_expiration >= roster_entry.membership_expiration:
-            continue
+    users = [
+        user
+        for user in User.objects.select_related('person__parent__user').filter(membership__in=roster_by_membership.keys())
+        if not user.membership_expiration
+        or user.membership_expiration < roster_by_membership[user.membership].membership_expiration
+    ]
+    if not users:
+        return 0
 
+    today = date.today()
+    now = timezone.now()
+    # Mirrors User.save(): a roster waiver on file covers the member through the membership expiration.
+    testing_enabled = getattr(settings, 'AUTHZ_TEST_FEATURES', False)
+    previous_expirations = {}
+    for user in users:
+        roster_entry = roster_by_membership[user.membership]
+        previous_expirations[user.pk] = user.membership_expiration
         user.membership_expiration = roster_entry.membership_expiration
         user.updated_by = imported_by
-        user.save()
-        _record_membership_roster_waiver(user, roster_entry=roster_entry, recorded_by=imported_by)
-        if user.waiver_expiration and user.waiver_expiration > date.today():
-            _activate_pending_waiver_authorizations(user, updated_by=imported_by)
-        updated_count += 1
+        user.updated_at = now
+        if testing_enabled or roster_entry.has_society_waiver:
+            if not user.waiver_expiration or user.waiver_expiration < user.membership_expiration:
+                user.waiver_expiration = user.membership_expiration
+    User.objects.bulk_update(
+        users,
+        ['membership_expiration', 'waiver_expiration', 'updated_by', 'updated_at'],
+        batch_size=500,
+    )
 
-        if hasattr(user, 'person') and user.person:
-            UserNote.objects.create(
+    user_ids = [user.pk for user in users]
+    refresh_effective_expirations(user_ids)
+    sync_authorization_validity_intervals(
+        list(
+            Authorization.objects.filter(person__user_id__in=user_ids, status__name='Active')
+            .values_list('pk', flat=True)
+        ),
+        source='membership_update',
+        resume_date=today,
+        note='Generated from membership expiration update.',
+    )
+    # bulk_update skips the User post_save receivers.
+    invalidate_user_capabilities(*user_ids)
+    mark_report_people_changed(user_ids)
+    bump_option_list_generation()
+
+    waiver_users = [user for user in users if roster_by_membership[user.membership].has_society_waiver]
+    existing_waivers = set(
+        WaiverRecord.objects.filter(
+            covered_user_id__in=[user.pk for user in waiver_users],
+            source=WaiverRecord.Source.MEMBERSHIP_ROSTER,
+        ).values_list('covered_user_id', 'membership_number', 'membership_expiration')
+    )
+    WaiverRecord.objects.bulk_create(
+        [
+            _membership_roster_waiver_record(user, roster_by_membership[user.membership], recorded_by=imported_by)
+            for user in waiver_users
+            if (user.pk, user.membership, user.membership_expiration) not in existing_waivers
+        ],
+        batch_size=500,
+    )
+
+    _activate_pending_waiver_authorizations_for_users(
+        [user.pk for user in users if user.waiver_expiration and user.waiver_expiration > today],
+        updated_by=imported_by,
+    )
+
+    UserNote.objects.bulk_create(
+        [
+            UserNote(
                 person=user.person,
                 created_by=imported_by,
                 note_type='officer_note',
@@ -641,12 +783,17 @@ def _refresh_user_membership_expirations_from_roster(rows, imported_by, source_f
                     'Membership expiration refreshed from Society membership roster upload.\n'
                     f'Source file: {source_filename or "-"}\n'
                     f'Membership number: {user.membership or "-"}\n'
-                    f'Previous expiration: {previous_expiration or "-"}\n'
+                    f'Previous expiration: {previous_expirations[user.pk] or "-"}\n'
                     f'New expiration: {user.membership_expiration or "-"}'
                 ),
             )
+            for user in users
+            if hasattr(user, 'person') and user.person
+        ],
+        batch_size=500,
+    )
 
-    return updated_count
+    return len(users)
 
 
 class MembershipRosterUploadForm(forms.Form):
@@ -2807,12 +2954,7 @@ def _handle_supporting_document_upload(request, *, default_person=None, next_url
         if not selected_authorization_ids:
             return False, 'Please select at least one equestrian authorization.'
 
-        has_global_upload_scope = (
-            is_kingdom_authorization_officer(request.user)
-            or is_kingdom_equestrian_authorization_officer(request.user)
-            or is_senior_marshal(request.user, 'Equestrian')
-        )
-        if not has_global_upload_scope:
+        if not _can_upload_equestrian_for_anyone(request.user):
             allowed_person_ids = set()
             if default_person:
                 allowed_person_ids.add(default_person.user_id)
@@ -2999,19 +3141,40 @@ def _can_view_all_supporting_documents(user) -> bool:
     return False
 
 
+SUPPORTING_DOCUMENTS_PAGE_SIZE = 50
+SUPPORTING_DOCUMENT_LOOKUP_PURPOSES = {'background_check_upload', 'equestrian_waiver_upload'}
+
+
 def _can_upload_background_check_for_anyone(user) -> bool:
     return is_kingdom_seneschal(user)
 
 
+def _can_upload_equestrian_for_anyone(user) -> bool:
+    return (
+        is_kingdom_authorization_officer(user)
+        or is_kingdom_equestrian_authorization_officer(user)
+        or is_senior_marshal(user, 'Equestrian')
+    )
+
+
+def _supporting_document_upload_people(user, purpose):
+    """Return the people ``user`` may attach a document to for this lookup purpose, or None."""
+    if not getattr(user, 'is_authenticated', False) or not hasattr(user, 'person'):
+        return None
+    everyone = _exclude_system_people(
+        Person.objects.select_related('user').filter(user__merged_into__isnull=True)
+    )
+    if purpose == 'background_check_upload':
+        return everyone if _can_upload_background_check_for_anyone(user) else None
+    if _can_upload_equestrian_for_anyone(user):
+        return everyone
+    return everyone.filter(Q(user_id=user.person.user_id) | Q(parent_id=user.person.user_id))
+
+
 def _supporting_documents_queryset_for_viewer(user):
     queryset = SupportingDocument.objects.select_related(
         'uploaded_by__person',
         'reviewed_by__person',
-    ).prefetch_related(
-        'person_links__person',
-        'authorization_links__authorization__person',
-        'authorization_links__authorization__style__discipline',
-        'authorization_links__authorization__status',
     ).order_by('-uploaded_at')
     if not user or not getattr(user, 'is_authenticated', False):
         return queryset.none()
@@ -3024,6 +3187,62 @@ def _supporting_documents_queryset_for_viewer(user):
     )
 
 
+def _supporting_document_cursor(document: SupportingDocument) -> str:
+    return f'{document.uploaded_at.isoformat()}_{document.id}'
+
+
+def _parse_supporting_document_cursor(value):
+    uploaded_at, _, document_id = (value or '').rpartition('_')
+    try:
+        parsed = parse_datetime(uploaded_at)
+        document_id = int(document_id)
+    except ValueError:
+        return None
+    if parsed is None:
+        return None
+    return parsed, document_id
+
+
+def _supporting_documents_page(documents, *, page_size, after=None, before=None):
+    """
+    Return one newest-first page of documents and the cursors of its neighbours.
+
+    ``after`` continues with documents older than a cursor and ``before``
+    steps back to newer ones. Both seek on (uploaded_at, id), so a deep page
+    costs the same as the first, and only the page's rows get their links
+    prefetched.
+    """
+    rows = []
+    newer_cursor = older_cursor = ''
+    if before:
+        uploaded_at, document_id = before
+        rows = list(
+            documents.filter(
+                Q(uploaded_at__gt=uploaded_at) | Q(uploaded_at=uploaded_at, id__gt=document_id)
+            ).order_by('uploaded_at', 'id')[:page_size + 1]
+        )
+        has_newer = len(rows) > page_size
+        rows = rows[:page_size][::-1]
+        if rows:
+            newer_cursor = _supporting_document_cursor(rows[0]) if has_newer else ''
+            older_cursor = _supporting_document_cursor(rows[-1])
+    if not rows:
+        older_documents = documents
+        if after and not before:
+            uploaded_at, document_id = after
+            older_documents = documents.filter(
+                Q(uploaded_at__lt=uploaded_at) | Q(uploaded_at=uploaded_at, id__lt=document_id)
+            )
+        rows = list(older_documents.order_by('-uploaded_at', '-id')[:page_size + 1])
+        has_older = len(rows) > page_size
+        rows = rows[:page_size]
+        if rows and after and not before:
+            newer_cursor = _supporting_document_cursor(rows[0])
+        older_cursor = _supporting_document_cursor(rows[-1]) if has_older else ''
+    prefetch_related_objects(rows, 'person_links__person', 'authorization_links')
+    return rows, newer_cursor, older_cursor
+
+
 def _can_view_supporting_document(user, document: SupportingDocument) -> bool:
     if not user or not getattr(user, 'is_authenticated', False):
         return False
@@ -3059,6 +3278,12 @@ def _supporting_document_file_exists(document: SupportingDocument) -> bool:
         return False
 
 
+def _set_supporting_document_file_present(document: SupportingDocument, present: bool) -> None:
+    if document.file_present != present:
+        SupportingDocument.objects.filter(pk=document.pk).update(file_present=present)
+        document.file_present = present
+
+
 def _annotate_homepage_document_alerts(authorizations):
     rows = list(authorizations)
     if not rows:
@@ -3088,7 +3313,7 @@ def _annotate_homepage_document_alerts(authorizations):
         ):
             if link.person_id in latest_bg_uploads:
                 continue
-            if not _supporting_document_file_exists(link.document):
+            if not link.document.file_present:
                 continue
             latest_bg_uploads[link.person_id] = link.document.uploaded_at
             latest_bg_document_ids[link.person_id] = link.document_id
@@ -3106,7 +3331,7 @@ def _annotate_homepage_document_alerts(authorizations):
         ):
             if link.authorization_id in latest_eq_uploads:
                 continue
-            if not _supporting_document_file_exists(link.document):
+            if not link.document.file_present:
                 continue
             latest_eq_uploads[link.authorization_id] = link.document.uploaded_at
             latest_eq_document_ids[link.authorization_id] = link.document_id
@@ -3213,7 +3438,7 @@ def _pending_background_check_review_alerts_for_user(user):
         people_by_id.setdefault(link.person_id, link.person)
         if link.person_id in latest_document_link_by_person_id:
             continue
-        if not _supporting_document_file_exists(link.document):
+        if not link.document.file_present:
             continue
         latest_document_link_by_person_id[link.person_id] = link
 
@@ -3589,36 +3814,6 @@ def _person_lookup_label(person: Person) -> str:
     return f'{person.sca_name}{suffix}'
 
 
-def _person_lookup_name_score(query: str, person: Person) -> float:
-    normalized_query = re.sub(r'\s+', ' ', query.casefold()).strip()
-    if not normalized_query:
-        return 0
-    user = person.user
-    names = [
-        person.sca_name,
-        user.first_name,
-        user.last_name,
-        user.get_full_name(),
-    ]
-    best_score = 0
-    for name in names:
-        normalized_name = re.sub(r'\s+', ' ', (name or '').casefold()).strip()
-        if not normalized_name:
-            continue
-        best_score = max(best_score, SequenceMatcher(None, normalized_query, normalized_name).ratio())
-        name_tokens = normalized_name.split()
-        query_tokens = normalized_query.split()
-        for token in name_tokens:
-            best_score = max(best_score, SequenceMatcher(None, normalized_query, token).ratio())
-        if query_tokens and name_tokens:
-            token_scores = [
-                max(SequenceMatcher(None, query_token, name_token).ratio() for name_token in name_tokens)
-                for query_token in query_tokens
-            ]
-            best_score = max(best_score, sum(token_scores) / len(token_scores))
-    return best_score
-
-
 def _kingdom_officer_can_add_for_discipline(user: User, discipline: Discipline) -> bool:
     if not discipline:
         return False
@@ -3742,10 +3937,15 @@ def validate_authorization_rules(request):
         except User.DoesNotExist:
             return JsonResponse({'ok': False, 'message': 'Selected authorizing marshal not found.'}, status=400)
 
-    person = get_object_or_404(Person, user_id=person_id)
+    person = get_object_or_404(Person.objects.select_related('user'), user_id=person_id)
+    if not all(str(style_id).isdigit() for style_id in style_ids):
+        raise Http404
+    rule_snapshot = load_fighter_rule_snapshot(person, style_ids=style_ids)
 
     for style_id in style_ids:
-        style = get_object_or_404(WeaponStyle.objects.select_related('discipline'), id=style_id)
+        style = rule_snapshot.styles.get(int(style_id))
+        if style is None:
+            raise Http404
         if requested_marshal_override and (
             is_kingdom_authorization_officer(request.user)
             or is_kingdom_equestrian_authorization_officer(request.user)
@@ -3758,6 +3958,7 @@ def validate_authorization_rules(request):
             marshal=authorizing_marshal,
             existing_fighter=person,
             style_id=style_id,
+            snapshot=rule_snapshot,
         )
         if not is_valid:
             return JsonResponse({'ok': False, 'message': mssg}, status=200)
@@ -3767,50 +3968,65 @@ def validate_authorization_rules(request):
 
 @login_required
 def officer_person_lookup(request):
-    if not (
+    purpose = (request.GET.get('purpose') or 'active').strip()
+    if purpose in SUPPORTING_DOCUMENT_LOOKUP_PURPOSES:
+        scoped_people = _supporting_document_upload_people(request.user, purpose)
+    elif (
         is_kingdom_authorization_officer(request.user)
         or is_kingdom_equestrian_authorization_officer(request.user)
     ):
+        scoped_people = _exclude_system_people(
+            Person.objects.select_related('user').filter(user__merged_into__isnull=True)
+        )
+        if purpose == 'senior_marshal':
+            scoped_people = scoped_people.filter(
+                authorization__in=Authorization.objects.effectively_active().filter(
+                    style__name='Senior Marshal',
+                )
+            )
+        elif purpose == 'delete_authorizations':
+            scoped_people = scoped_people.filter(
+                authorization__in=_delete_authorization_queryset_for_user(request.user)
+            )
+        else:
+            scoped_people = scoped_people.filter(
+                authorization__in=Authorization.objects.effectively_active()
+            )
+    else:
+        scoped_people = None
+    if scoped_people is None:
         return JsonResponse({'ok': False, 'message': 'Permission denied.'}, status=403)
 
     query = (request.GET.get('q') or '').strip()
     if len(query) < 2:
         return JsonResponse({'ok': True, 'results': []})
 
-    purpose = (request.GET.get('purpose') or 'active').strip()
-    scoped_people = _exclude_system_people(
-        Person.objects.select_related('user').filter(user__merged_into__isnull=True)
-    )
-    if purpose == 'senior_marshal':
-        scoped_people = scoped_people.filter(
-            authorization__in=Authorization.objects.effectively_active().filter(
-                style__name='Senior Marshal',
-            )
-        )
-    elif purpose == 'delete_authorizations':
-        scoped_people = scoped_people.filter(
-            authorization__in=_delete_authorization_queryset_for_user(request.user)
-        )
-    else:
-        scoped_people = scoped_people.filter(
-            authorization__in=Authorization.objects.effectively_active()
-        )
     scoped_people = scoped_people.distinct()
-
-    exact_people = list(scoped_people.filter(
-        Q(sca_name__icontains=query)
-        | Q(user__first_name__icontains=query)
-        | Q(user__last_name__icontains=query)
-        | Q(user__membership__icontains=query)
-    ).order_by('sca_name', 'user__last_name', 'user__first_name')[:20])
+    # Supporting document uploaders may not see legal names or membership numbers.
+    sca_name_only = purpose in SUPPORTING_DOCUMENT_LOOKUP_PURPOSES
+
+    name_match = Q(sca_name__icontains=query)
+    if not sca_name_only:
+        name_match |= (
+            Q(user__first_name__icontains=query)
+            | Q(user__last_name__icontains=query)
+            | Q(user__membership__icontains=query)
+        )
+    exact_people = list(scoped_people.filter(name_match).order_by('sca_name', 'user__last_name', 'user__first_name')[:20])
 
     people = exact_people
     if len(people) < 20:
         existing_user_ids = {person.user_id for person in people}
+        fuzzy_scores = person_lookup_index().search(
+            query,
+            threshold=PERSON_LOOKUP_FUZZY_THRESHOLD,
+            exclude=existing_user_ids,
+            sca_name_only=sca_name_only,
+        )
         fuzzy_candidates = []
-        for person in scoped_people.exclude(user_id__in=existing_user_ids):
-            score = _person_lookup_name_score(query, person)
-            if score >= 0.72:
+        if fuzzy_scores:
+            for person in scoped_people.filter(user_id__in=fuzzy_scores):
+                score = fuzzy_scores[person.user_id]
                 fuzzy_candidates.append((score, person.sca_name.casefold(), person.user_id, person))
         fuzzy_candidates.sort(key=lambda row: (-row[0], row[1], row[2]))
         people.extend(person for _, _, _, person in fuzzy_candidates[:20 - len(people)])
@@ -3820,7 +4036,7 @@ def officer_person_lookup(request):
         'results': [
             {
                 'user_id': person.user_id,
-                'label': _person_lookup_label(person),
+                'label': person.sca_name if sca_name_only else _person_lookup_label(person),
             }
             for person in people
         ],
@@ -3887,13 +4103,13 @@ def get_equestrian_authorizations(request):
             'id': auth.id,
             'label': (
                 f'{auth.person.sca_name}: {auth.style.name} '
-                f'({auth.status.name}, expires {auth.effective_expiration.isoformat()})'
+                f'({auth.status.name}, expires {effective_expiration_text(auth.effective_expiration)})'
             ),
             'person_id': auth.person_id,
             'person_name': auth.person.sca_name,
             'style_name': auth.style.name,
             'status_name': auth.status.name,
-            'expiration': auth.effective_expiration.isoformat(),
+            'expiration': effective_expiration_text(auth.effective_expiration),
         }
         for auth in authorizations
     ]
@@ -3935,10 +4151,6 @@ def validate_sanction_action(request):
     return JsonResponse(payload)
 
 logger = logging.getLogger(__name__)
-FIGHTER_CARD_WATERMARK = ''
-PDF_FONT_NAME = 'DejaVuSans'
-PDF_NAME_MIN_FONT_SIZE = 8
-_PDF_FONT_REGISTERED = False
 _PASSWORD_TOKEN_GENERATOR = PasswordResetTokenGenerator()
 
 # Removed all_branch_names since we can now use Branch.is_region() to filter branches
@@ -4051,13 +4263,17 @@ def normalize_country(value):
     return COUNTRY_NORMALIZATION.get(raw.upper(), raw.title())
 
 # Create your views here.
+@view_budget(queries=40, milliseconds=1500)
 def index(request):
     """This is the page they land on for the authorization system."""
 
     all_people_qs = _exclude_system_people(
         Person.objects.filter(user__merged_into__isnull=True)
     ).order_by('sca_name')
-    all_people = all_people_qs.values_list('sca_name', flat=True).distinct()
+    all_people = cached_option_list(
+        'index-people',
+        lambda: all_people_qs.values_list('sca_name', flat=True).distinct(),
+    )
     sign_off_required = authorization_officer_sign_off_enabled()
     portal_setting = get_portal_setting()
     maintenance_locked = maintenance_lock_enabled()
@@ -4258,6 +4474,14 @@ def index(request):
             )
             return redirect('index')
 
+        if action == 'reset_request_metrics':
+            if not can_manage_lock:
+                messages.error(request, 'Only a site administrator can reset request metrics.')
+                return redirect('index')
+            request_metrics_store.reset()
+            messages.success(request, 'Request metrics were reset.')
+            return redirect('index')
+
         if action == 'set_authorization_officer_sign_off':
             if not auth_officer:
                 messages.error(request, 'Only the Kingdom Authorization Officer can change this setting.')
@@ -4514,12 +4738,28 @@ def index(request):
         'maintenance_lock_message': maintenance_message,
         'can_manage_maintenance_lock': can_manage_lock,
         'active_logged_in_users': active_logged_in_users() if can_manage_lock else [],
+        'request_metrics_enabled': can_manage_lock and request_metrics_enabled(),
+        'request_metrics_summary': (
+            request_metrics_store.summary()
+            if can_manage_lock and request_metrics_enabled()
+            else []
+        ),
         'can_upload_membership_roster': auth_officer or kingdom_seneschal,
         'membership_roster_import': (
             MembershipRosterImport.objects.first()
             if auth_officer or kingdom_seneschal
             else None
         ),
+        'recent_upload_jobs': (
+            list(
+                UploadJob.objects.filter(
+                    requested_by=request.user,
+                    created_at__gte=timezone.now() - timedelta(days=1),
+                ).order_by('-id')[:5]
+            )
+            if auth_officer or kingdom_seneschal
+            else []
+        ),
         'paper_authorization_entry_enabled': auth_officer or equestrian_auth_officer,
         'pending_authorization_action': pending_authorization_action,
     }
@@ -4699,7 +4939,7 @@ def register(request):
             # Send the login credentials to the user
             reset_link = _build_password_reset_link(user)
             try:
-                send_mail(
+                queue_email(
                     'An Tir Authorization: New Account',
                     f'Your account has been created.\n\n'
                     f'Username: {person_form.cleaned_data["username"]}\n'
@@ -4707,7 +4947,6 @@ def register(request):
                     f'{_email_sender_notice()}',
                     settings.DEFAULT_FROM_EMAIL,
                     [user.email],
-                    fail_silently=False,
                 )
                 messages.success(
                     request,
@@ -4919,7 +5158,7 @@ def recover_account(request):
             
             # Send the password reset link via email
             try:
-                send_mail(
+                queue_email(
                     'An Tir Authorization: Password Reset',
                     f'We received a request to reset your password.\n\n'
                     f'Username: {user.username}\n'
@@ -4928,7 +5167,6 @@ def recover_account(request):
                     f'{_email_sender_notice()}',
                     settings.DEFAULT_FROM_EMAIL,
                     [user.email],
-                    fail_silently=False,
                 )
             except Exception:
                 logger.exception('Error sending password reset email for user_id=%s', user.id)
@@ -4985,7 +5223,7 @@ def recover_account(request):
             
             if users.exists():
                 try:
-                    send_mail(
+                    queue_email(
                         'An Tir Authorization: Username Recovery',
                         f'We found the following usernames associated with this email address:\n\n'
                         f'{username_list}\n\n'
@@ -4994,7 +5232,6 @@ def recover_account(request):
                         f'{_email_sender_notice()}',
                         settings.DEFAULT_FROM_EMAIL,
                         [email],
-                        fail_silently=False,
                     )
                 except Exception:
                     logger.exception('Error sending username recovery email for %s', email)
@@ -5029,34 +5266,59 @@ def _finalize_waiver_signed(request_user: User, target_user: User):
 
 
 def _activate_pending_waiver_authorizations(target_user: User, *, updated_by: Optional[User] = None):
-    pending_qs = Authorization.objects.filter(person__user=target_user, status__name='Awaiting Waiver')
-    if not pending_qs.exists():
-        return 0, None
+    activated = _activate_pending_waiver_authorizations_for_users([target_user.id], updated_by=updated_by)
+    return activated.get(target_user.id, (0, None))
+
+
+def _activate_pending_waiver_authorizations_for_users(user_ids, *, updated_by: Optional[User] = None):
+    """
+    Activate every Awaiting Waiver authorization held by these users together.
+
+    Returns {user_id: (activated count, latest expiration)} for users that had any.
+    """
+    pending_qs = Authorization.objects.filter(person__user_id__in=user_ids, status__name='Awaiting Waiver')
     pending_authorizations = list(pending_qs.select_related('person__user', 'style__discipline', 'status'))
-    max_exp = pending_qs.aggregate(latest=Max('expiration'))['latest']
-    activates_senior_ground_crew = pending_qs.filter(
-        style__discipline__name='Equestrian',
-        style__name__in=_SENIOR_GROUND_CREW_STYLES,
-    ).exists()
+    if not pending_authorizations:
+        return {}
     active_status = AuthorizationStatus.objects.get(name='Active')
     update_values = {'status': active_status}
     if updated_by:
         update_values['updated_by'] = updated_by
-    activated_count = pending_qs.update(**update_values)
+    Authorization.objects.filter(pk__in=[authorization.pk for authorization in pending_authorizations]).update(**update_values)
+
+    activated = {}
+    senior_ground_crew_user_ids = set()
+    for authorization in pending_authorizations:
+        count, latest = activated.get(authorization.person_id, (0, None))
+        latest = max(latest, authorization.expiration) if latest else authorization.expiration
+        activated[authorization.person_id] = (count + 1, latest)
+        if (
+            authorization.style
+            and authorization.style.discipline.name == 'Equestrian'
+            and authorization.style.name in _SENIOR_GROUND_CREW_STYLES
+        ):
+            senior_ground_crew_user_ids.add(authorization.person_id)
+
+    effective_expirations = refresh_effective_expirations(list(activated))
+    invalidate_user_capabilities(*activated)
     for authorization in pending_authorizations:
         authorization.status = active_status
-        sync_authorization_validity_interval(
-            authorization,
-            note='Generated when Awaiting Waiver authorization became active.',
+        authorization.effective_expiration_date = effective_expirations.get(
+            authorization.id,
+            authorization.effective_expiration_date,
         )
-    if activates_senior_ground_crew:
+    sync_authorization_validity_intervals(
+        pending_authorizations,
+        note='Generated when Awaiting Waiver authorization became active.',
+    )
+    if senior_ground_crew_user_ids:
         inactive_status = _get_or_create_status_by_name('Inactive')
         Authorization.objects.filter(
-            person__user=target_user,
+            person__user_id__in=senior_ground_crew_user_ids,
             style__discipline__name='Equestrian',
             style__name__in=_JUNIOR_GROUND_CREW_STYLES,
         ).update(status=inactive_status, updated_by=updated_by)
-    return activated_count, max_exp
+    return activated
 
 
 def _apply_waiver_coverage(request_user: User, target_user: User):
@@ -5198,7 +5460,7 @@ def _parent_snapshot_for_user(user: User):
     )
 
 
-def _create_waiver_record(
+def _build_waiver_record(
     *,
     covered_user: User,
     source: str,
@@ -5220,7 +5482,7 @@ def _create_waiver_record(
     request=None,
 ):
     parent_first, parent_last, parent_sca = _parent_snapshot_for_user(covered_user)
-    return WaiverRecord.objects.create(
+    return WaiverRecord(
         covered_user=covered_user,
         signer_user=signer_user,
         recorded_by=recorded_by,
@@ -5253,6 +5515,29 @@ def _create_waiver_record(
     )
 
 
+def _create_waiver_record(**kwargs):
+    waiver_record = _build_waiver_record(**kwargs)
+    waiver_record.save()
+    return waiver_record
+
+
+def _membership_roster_waiver_record(user: User, roster_entry, *, roster_import=None, recorded_by=None):
+    return _build_waiver_record(
+        covered_user=user,
+        source=WaiverRecord.Source.MEMBERSHIP_ROSTER,
+        waiver_type=WaiverRecord.WaiverType.MEMBERSHIP,
+        resulting_expiration=user.waiver_expiration,
+        recorded_by=recorded_by,
+        signer_first_name=roster_entry.first_name,
+        signer_last_name=roster_entry.last_name,
+        signer_relationship='membership_roster',
+        membership_number=user.membership,
+        membership_expiration=user.membership_expiration,
+        roster_import=roster_import,
+        note='Society membership roster indicated waiver on file.',
+    )
+
+
 def _record_membership_roster_waiver(user: User, *, roster_entry=None, roster_import=None, recorded_by=None):
     if not user.membership or not user.membership_expiration:
         return None
@@ -5271,20 +5556,14 @@ def _record_membership_roster_waiver(user: User, *, roster_entry=None, roster_im
         membership_expiration=user.membership_expiration,
     ).exists():
         return None
-    return _create_waiver_record(
-        covered_user=user,
-        source=WaiverRecord.Source.MEMBERSHIP_ROSTER,
-        waiver_type=WaiverRecord.WaiverType.MEMBERSHIP,
-        resulting_expiration=user.waiver_expiration,
-        recorded_by=recorded_by,
-        signer_first_name=roster_entry.first_name,
-        signer_last_name=roster_entry.last_name,
-        signer_relationship='membership_roster',
-        membership_number=user.membership,
-        membership_expiration=user.membership_expiration,
+    waiver_record = _membership_roster_waiver_record(
+        user,
+        roster_entry,
         roster_import=roster_import,
-        note='Society membership roster indicated waiver on file.',
+        recorded_by=recorded_by,
     )
+    waiver_record.save()
+    return waiver_record
 
 
 def _has_membership_roster_waiver(user: User) -> bool:
@@ -5397,6 +5676,8 @@ def _activate_pending_background_check_authorizations(target_user: User) -> int:
         pending_qs.exclude(style__discipline__name='Equestrian').update(status=kingdom_status)
     else:
         pending_qs.update(status=_get_or_create_status_by_name('Active'))
+        refresh_effective_expirations([target_user.id])
+        invalidate_user_capabilities(target_user.id)
     return count
 
 
@@ -5441,36 +5722,17 @@ def _can_search_private_names(user):
     return False
 
 
-def _normalize_private_name(value):
-    """Case-fold a name and treat every non-alphanumeric run as one space."""
-    return ' '.join(
-        ''.join(character.casefold() if character.isalnum() else ' ' for character in (value or '')).split()
-    )
-
-
-def _private_name_matches(candidate, search_term):
-    """Match a complete normalized word or contiguous phrase within a name."""
-    normalized_candidate = _normalize_private_name(candidate)
-    normalized_term = _normalize_private_name(search_term)
-    if not normalized_candidate or not normalized_term:
-        return False
-    return f' {normalized_term} ' in f' {normalized_candidate} '
-
-
-def _private_name_matching_user_ids(first_name_term='', last_name_term=''):
-    """Return every active, non-staff user ID matching all supplied name terms."""
-    matching_ids = []
+def _private_name_matching_users(first_name_term='', last_name_term=''):
+    """Return active, non-staff users matching all supplied name terms as a lazy queryset."""
     users = User.objects.filter(
         is_staff=False,
         merged_into__isnull=True,
-    ).values_list('id', 'first_name', 'last_name')
-    for user_id, first_name, last_name in users.iterator():
-        if first_name_term and not _private_name_matches(first_name, first_name_term):
-            continue
-        if last_name_term and not _private_name_matches(last_name, last_name_term):
-            continue
-        matching_ids.append(user_id)
-    return matching_ids
+    )
+    if first_name_term:
+        users = users.filter(id__in=private_name_match_user_ids(UserNameToken.NameField.FIRST, first_name_term))
+    if last_name_term:
+        users = users.filter(id__in=private_name_match_user_ids(UserNameToken.NameField.LAST, last_name_term))
+    return users.values('id')
 
 
 class _SeparatedSearchPaginator:
@@ -5524,275 +5786,93 @@ class _SeparatedSearchPaginator:
         return Page(primary_page_results, number, self), fighter_page_results
 
 
-def _ensure_pdf_font_registered():
-    global _PDF_FONT_REGISTERED
-    if _PDF_FONT_REGISTERED:
-        return
-    font_path = finders.find('fonts/DejaVuSans.ttf') or finders.find('authorizations/static/fonts/DejaVuSans.ttf')
-    if not font_path:
-        raise Exception('DejaVuSans.ttf font file not found for PDF generation.')
-    pdfmetrics.registerFont(TTFont(PDF_FONT_NAME, font_path))
-    _PDF_FONT_REGISTERED = True
+class _CsvEchoBuffer:
+    """File-like sink that hands each formatted CSV line straight back to the caller."""
 
+    def write(self, value):
+        return value
 
-def _to_float(value):
-    try:
-        return float(value)
-    except (TypeError, ValueError):
-        try:
-            return float(str(value))
-        except (TypeError, ValueError):
-            return 0.0
 
+def _streaming_csv_response(filename, header, rows):
+    """Stream CSV rows to the client as they are produced instead of buffering the whole file."""
+    writer = csv.writer(_CsvEchoBuffer())
 
-def _get_page_size(page):
-    media_box = getattr(page, 'MediaBox', None)
-    if not media_box:
-        return (612, 792)  # Default to letter
-    lower_left_x, lower_left_y, upper_right_x, upper_right_y = [_to_float(coord) for coord in media_box]
-    return upper_right_x - lower_left_x, upper_right_y - lower_left_y
+    def stream():
+        # UTF-8 BOM helps Excel detect Unicode correctly on Windows.
+        yield '\ufeff'
+        yield writer.writerow(header)
+        for row in rows:
+            yield writer.writerow(row)
 
+    response = StreamingHttpResponse(stream(), content_type='text/csv; charset=utf-8')
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
 
-def _extract_font_size(annotation, default=10):
-    default_appearance = getattr(annotation, 'DA', None)
-    if not default_appearance:
-        return default
-    tokens = default_appearance.strip().split()
-    if 'Tf' in tokens:
-        idx = tokens.index('Tf')
-        if idx >= 2:
-            try:
-                return float(tokens[idx - 1])
-            except (TypeError, ValueError):
-                return default
-    return default
 
+def _build_search_csv_response(authorizations, fighter_only_people=None):
+    """Export search table rows as CSV using current filters without pagination."""
+    if fighter_only_people is None:
+        fighter_only_people = Person.objects.none()
+    authorization_rows = authorizations.values_list(
+        'person__sca_name',
+        'person__branch__region__name',
+        'person__branch__name',
+        'style__discipline__name',
+        'style__name',
+        'marshal__sca_name',
+        'effective_expiration_date',
+        'inferred_minor',
+    ).iterator(chunk_size=2000)
+    fighter_rows = fighter_only_people.annotate(
+        csv_inferred_minor=_inferred_minor_annotation('user__'),
+    ).values_list(
+        'sca_name',
+        'branch__region__name',
+        'branch__name',
+        'csv_inferred_minor',
+    ).iterator(chunk_size=2000)
+
+    def rows():
+        for sca_name, region_name, branch_name, discipline_name, style_name, marshal_name, effective_expiration, minor in authorization_rows:
+            yield [
+                sca_name or '',
+                region_name or '',
+                branch_name or '',
+                discipline_name or '',
+                style_name or '',
+                marshal_name or '',
+                effective_expiration_text(effective_expiration),
+                'Yes' if minor else 'No',
+            ]
+        for sca_name, region_name, branch_name, minor in fighter_rows:
+            yield [
+                sca_name or '',
+                region_name or '',
+                branch_name or '',
+                '',
+                '',
+                '',
+                '',
+                'Yes' if minor else 'No',
+            ]
 
-def _pdf_field_contains_name(field_name):
-    normalized = (field_name or '').strip().lower()
-    return (
-        normalized in {'sca_name', 'modern_name'}
-        or 'marshal' in normalized
+    return _streaming_csv_response(
+        'authorizations_search.csv',
+        [
+            'SCA Name',
+            'Region',
+            'Branch',
+            'Discipline',
+            'Weapon Style',
+            'Marshal',
+            'Expiration',
+            'Minor',
+        ],
+        rows(),
     )
 
 
-def _truncate_pdf_text_to_width(text, font_name, font_size, max_width):
-    text = str(text or '').strip()
-    if not text or pdfmetrics.stringWidth(text, font_name, font_size) <= max_width:
-        return text
-
-    space_indexes = [match.start() for match in re.finditer(r'\s+', text)]
-    for index in reversed(space_indexes):
-        candidate = text[:index].rstrip()
-        if candidate and pdfmetrics.stringWidth(candidate, font_name, font_size) <= max_width:
-            return candidate
-
-    candidate = ''
-    for character in text:
-        next_candidate = candidate + character
-        if pdfmetrics.stringWidth(next_candidate, font_name, font_size) > max_width:
-            break
-        candidate = next_candidate
-    return candidate
-
-
-def _fit_pdf_text_for_field(field_name, value, font_name, font_size, max_width):
-    text = str(value)
-    if not _pdf_field_contains_name(field_name):
-        return text, font_size
-
-    fitted_size = font_size
-    while (
-        fitted_size > PDF_NAME_MIN_FONT_SIZE
-        and pdfmetrics.stringWidth(text, font_name, fitted_size) > max_width
-    ):
-        fitted_size = max(PDF_NAME_MIN_FONT_SIZE, fitted_size - 0.5)
-
-    return _truncate_pdf_text_to_width(text, font_name, fitted_size, max_width), fitted_size
-
-
-def _draw_watermark(
-    can,
-    width,
-    height,
-    text,
-    image_path=None,
-    image_opacity=0.15,
-    scale=0.2,
-    x_ratio=0.5,
-    y_ratio=0.5,
-):
-    if not text and not image_path:
-        return
-    can.saveState()
-    if hasattr(can, 'setFillAlpha'):
-        can.setFillAlpha(image_opacity)
-    if image_path and os.path.exists(image_path):
-        target_width = width * scale
-        target_height = height * scale
-        x = (width * x_ratio) - (target_width / 2)
-        y = (height * y_ratio) - (target_height / 2)
-        can.drawImage(
-            image_path,
-            x,
-            y,
-            width=target_width,
-            height=target_height,
-            mask='auto',
-            preserveAspectRatio=True,
-        )
-    elif text:
-        can.setFont('Helvetica-Bold', 42)
-        can.setFillColorRGB(0.85, 0.85, 0.85)
-        can.translate(width / 2, height / 2)
-        can.rotate(45)
-        can.drawCentredString(0, 0, text)
-    can.restoreState()
-
-
-def _build_overlay_page(page, data, watermark_text, watermark_overlays):
-    page_width, page_height = _get_page_size(page)
-    packet = BytesIO()
-    can = canvas.Canvas(packet, pagesize=(page_width, page_height))
-    _ensure_pdf_font_registered()
-    for overlay in watermark_overlays:
-        _draw_watermark(
-            can,
-            page_width,
-            page_height,
-            watermark_text if overlay.get('use_text') else '',
-            image_path=overlay.get('image_path'),
-            image_opacity=overlay.get('opacity', 0.15),
-            scale=overlay.get('scale', 0.2),
-            x_ratio=overlay.get('x_ratio', 0.5),
-            y_ratio=overlay.get('y_ratio', 0.5),
-        )
-
-    annotations = getattr(page, 'Annots', []) or []
-    for annotation in annotations:
-        if getattr(annotation, 'Subtype', None) != '/Widget' or not getattr(annotation, 'T', None):
-            continue
-
-        field_name = annotation.T[1:-1].strip()
-        value = data.get(field_name)
-        if not value:
-            continue
-
-        rect = getattr(annotation, 'Rect', None)
-        if not rect:
-            continue
-        left, bottom, right, top = [_to_float(coord) for coord in rect]
-        font_size = _extract_font_size(annotation)
-
-        rotation = 0
-        mk = getattr(annotation, 'MK', None)
-        if mk is not None:
-            rot = None
-            if hasattr(mk, 'R'):
-                rot = mk.R
-            elif isinstance(mk, dict):
-                rot = mk.get('/R')
-            if rot is not None:
-                try:
-                    rotation = float(str(rot))
-                except (TypeError, ValueError):
-                    rotation = 0
-
-        field_width = abs(top - bottom) if rotation in {90, 270} else abs(right - left)
-        value, font_size = _fit_pdf_text_for_field(field_name, value, PDF_FONT_NAME, font_size, field_width)
-        if not value:
-            continue
-
-        can.setFont(PDF_FONT_NAME, font_size)
-        can.setFillColorRGB(0, 0, 0)
-
-        if rotation:
-            center_x = (left + right) / 2
-            center_y = (bottom + top) / 2
-            can.saveState()
-            can.translate(center_x, center_y)
-            can.rotate(rotation)
-            can.drawCentredString(0, -font_size / 2, str(value))
-            can.restoreState()
-        else:
-            text_x = left
-            text_y = top - font_size
-            can.drawString(text_x, text_y, str(value))
-
-    can.save()
-    packet.seek(0)
-    overlay_pdf = PdfReader(packet)
-    overlay_page = overlay_pdf.pages[0]
-    if getattr(page, 'Rotate', None):
-        overlay_page.Rotate = page.Rotate
-    return overlay_page
-
-
-def _flatten_pdf_template(template, data, watermark_text=FIGHTER_CARD_WATERMARK, watermark_overlays=None):
-    watermark_overlays = watermark_overlays or []
-    for page in template.pages:
-        overlay_page = _build_overlay_page(page, data, watermark_text, watermark_overlays)
-        PageMerge(page).add(overlay_page).render()
-        if getattr(page, 'Annots', None) is not None:
-            page.Annots = []
-
-    if hasattr(template.Root, 'AcroForm'):
-        try:
-            del template.Root.AcroForm
-        except AttributeError:
-            template.Root.AcroForm = None
-
-    return template
-
-
-def _build_search_csv_response(authorizations, fighter_only_people=()):
-    """Export search table rows as CSV using current filters without pagination."""
-    response = HttpResponse(content_type='text/csv; charset=utf-8')
-    response['Content-Disposition'] = 'attachment; filename="authorizations_search.csv"'
-    # UTF-8 BOM helps Excel detect Unicode correctly on Windows.
-    response.write('\ufeff')
-    writer = csv.writer(response)
-    writer.writerow([
-        'SCA Name',
-        'Region',
-        'Branch',
-        'Discipline',
-        'Weapon Style',
-        'Marshal',
-        'Expiration',
-        'Minor',
-    ])
-    for auth in authorizations:
-        region_name = ''
-        if auth.person.branch and auth.person.branch.region:
-            region_name = auth.person.branch.region.name
-        writer.writerow([
-            auth.person.sca_name or '',
-            region_name,
-            auth.person.branch.name if auth.person.branch else '',
-            auth.style.discipline.name if auth.style and auth.style.discipline else '',
-            auth.style.name if auth.style else '',
-            auth.marshal.sca_name if auth.marshal else '',
-            auth.effective_expiration.isoformat() if auth.effective_expiration else '',
-            auth.person.minor_status,
-        ])
-    for person in fighter_only_people:
-        region_name = ''
-        if person.branch and person.branch.region:
-            region_name = person.branch.region.name
-        writer.writerow([
-            person.sca_name or '',
-            region_name,
-            person.branch.name if person.branch else '',
-            '',
-            '',
-            '',
-            '',
-            person.minor_status,
-        ])
-    return response
-
-
+@view_budget(queries=40, milliseconds=1500)
 def search(request):
     """
     Handles both the search form display and the search results display.
@@ -5806,14 +5886,32 @@ def search(request):
         raise PermissionDenied('You do not have permission to search by first or last name.')
 
     # === Step 1: Get dropdown options (we need these for the search form too) ===
-    sca_name_options = _exclude_system_people(Person.objects.all()).order_by('sca_name').values_list('sca_name', flat=True).distinct()
-    region_options = Branch.objects.regions().order_by('name').values_list('name', flat=True)
-    branch_options = Branch.objects.non_regions().order_by('name').values_list('name', flat=True)
-    discipline_options = Discipline.objects.order_by('name').values_list('name', flat=True)
-    style_options = WeaponStyle.objects.order_by('name').values_list('name', flat=True).distinct()
-    marshal_options = _exclude_system_people(
-        Person.objects.filter(marshal__isnull=False)
-    ).order_by('sca_name').values_list('sca_name', flat=True).distinct()
+    sca_name_options = cached_option_list(
+        'search-sca-names',
+        lambda: _exclude_system_people(Person.objects.all()).order_by('sca_name').values_list('sca_name', flat=True).distinct(),
+    )
+    region_options = cached_option_list(
+        'regions',
+        lambda: Branch.objects.regions().order_by('name').values_list('name', flat=True),
+    )
+    branch_options = cached_option_list(
+        'search-branches',
+        lambda: Branch.objects.non_regions().order_by('name').values_list('name', flat=True),
+    )
+    discipline_options = cached_option_list(
+        'search-disciplines',
+        lambda: Discipline.objects.order_by('name').values_list('name', flat=True),
+    )
+    style_options = cached_option_list(
+        'search-styles',
+        lambda: WeaponStyle.objects.order_by('name').values_list('name', flat=True).distinct(),
+    )
+    marshal_options = cached_option_list(
+        'search-marshals',
+        lambda: _exclude_system_people(
+            Person.objects.filter(marshal__isnull=False)
+        ).order_by('sca_name').values_list('sca_name', flat=True).distinct(),
+    )
 
     # === Step 2: Check if the user is requesting the search form page ===
     if request.GET.get('goal') == 'search':
@@ -5881,7 +5979,7 @@ def search(request):
         dynamic_filter &= Q(person__user__email__iexact=email_addr)
     private_name_user_ids = None
     if private_name_search_requested:
-        private_name_user_ids = _private_name_matching_user_ids(first_name_term, last_name_term)
+        private_name_user_ids = _private_name_matching_users(first_name_term, last_name_term)
         dynamic_filter &= Q(person__user_id__in=private_name_user_ids)
 
     authorization_specific_filter_used = any(
@@ -5904,11 +6002,12 @@ def search(request):
 
     # First, get all authorizations that match the filter.
     # We use this as a base for both views.
-    matching_authorizations = Authorization.objects.with_effective_expiration().with_sanction_flag().annotate(
-        inferred_minor=_inferred_minor_annotation('person__user__'),
-    ).filter(
-        dynamic_filter,
-        has_active_sanction=False,
+    # Active sanctions are few, so they are loaded once and excluded by
+    # (person, style/discipline) instead of probed for every matching row.
+    matching_authorizations = load_active_sanctions().exclude_sanctioned(
+        Authorization.objects.with_effective_expiration().annotate(
+            inferred_minor=_inferred_minor_annotation('person__user__'),
+        ).filter(dynamic_filter)
     ).exclude(person__user__is_staff=True)
     if minor_filter_value is not None:
         matching_authorizations = matching_authorizations.filter(inferred_minor=minor_filter_value)
@@ -6042,6 +6141,7 @@ def search(request):
     )
 
 
+@view_budget(queries=50, milliseconds=1500)
 def fighter(request, person_id):
     """Pass in a single person id. Return all of their current authorizations in a card view.
     Give a link to download or print a pdf or image of their card.
@@ -6110,7 +6210,7 @@ def fighter(request, person_id):
             if not throttled:
                 reset_link = _build_password_reset_link(user)
                 try:
-                    send_mail(
+                    queue_email(
                         'An Tir Authorization: Login Instructions',
                         f'Login instructions were requested for your fighter record.\n\n'
                         f'Username: {user.username}\n'
@@ -6119,7 +6219,6 @@ def fighter(request, person_id):
                         f'{_email_sender_notice()}',
                         sender_email,
                         [user.email],
-                        fail_silently=False,
                     )
                 except Exception:
                     logger.exception('Error sending fighter login instructions for user_id=%s', user.id)
@@ -6366,12 +6465,25 @@ def fighter(request, person_id):
             else:
                 messages.success(request, 'Concurrence recorded. Authorization approved.')
 
+    sanctions_list = _active_sanctions_queryset().filter(person_id=person_id).order_by(
+        'discipline__name', 'end_date', 'style__name'
+    )
+    sanction_map = ActiveSanctionMap(sanctions_list)
+
     # Get the lists of authorizations
-    authorization_list = Authorization.objects.effectively_active().select_related(
-        'person__branch__region',
-        'style__discipline',
-        'concurring_fighter',
-    ).filter(person_id=person_id).order_by('style__discipline__name', 'effective_expiration_date', 'style__name')
+    authorization_list = [
+        authorization
+        for authorization in Authorization.objects.with_effective_expiration().select_related(
+            'person__branch__region',
+            'style__discipline',
+            'concurring_fighter',
+        ).filter(
+            person_id=person_id,
+            status__name='Active',
+            effective_expiration_date__gte=date.today(),
+        ).order_by('style__discipline__name', 'effective_expiration_date', 'style__name')
+        if not sanction_map.authorization_is_sanctioned(authorization)
+    ]
 
     pending_authorization_list = Authorization.objects.with_effective_expiration().select_related(
         'person__branch__region',
@@ -6416,19 +6528,16 @@ def fighter(request, person_id):
                 if _user_can_view_note(request.user, note):
                     visible_notes.append(note)
 
-    sanctions_list = _active_sanctions_queryset().filter(person_id=person_id).order_by(
-        'discipline__name', 'end_date', 'style__name'
-    )
-
     # Group by discipline
 
     equestrian = False
     youth = False
     fighter = False
-    hide_junior_ground_crew = authorization_list.filter(
-        style__discipline__name='Equestrian',
-        style__name__in=_SENIOR_GROUND_CREW_STYLES,
-    ).exists()
+    hide_junior_ground_crew = any(
+        authorization.style.discipline.name == 'Equestrian'
+        and authorization.style.name in _SENIOR_GROUND_CREW_STYLES
+        for authorization in authorization_list
+    )
 
     def can_view_actual_authorization_expiration(auth):
         if not request.user.is_authenticated:
@@ -6524,6 +6633,7 @@ def fighter(request, person_id):
             'expiration': auth.expiration,
             'display_date': auth.expiration,
             'limit_date': auth.expiration if is_expired else auth.effective_expiration,
+            'limit_date_is_placeholder': not is_expired and auth.effective_expiration_is_placeholder,
             'status': 'Actually Expired' if is_expired else 'Effectively Expired',
         }
         discipline_name = auth.style.discipline.name
@@ -6668,6 +6778,9 @@ def fighter(request, person_id):
     for office in branch_officers:
         effective_expiration = marshal_office_effective_expiration(office)
         office.effective_expiration = effective_expiration
+        office.effective_expiration_is_placeholder = bool(
+            effective_expiration and effective_expiration <= EXPIRED_EFFECTIVE_EXPIRATION
+        )
         lower_than_warrant = bool(effective_expiration and effective_expiration < office.end_date)
         viewer_is_self = (
             request.user.is_authenticated
@@ -6817,139 +6930,87 @@ def fighter(request, person_id):
 
 
 def generate_fighter_card(request, person_id, template_id):
+    pdf_bytes = render_fighter_card_for_person(person_id, template_id)
+    response = HttpResponse(pdf_bytes, content_type='application/pdf')
+    response['Content-Disposition'] = f'inline; filename="fighter_card.pdf"'
+    return response
 
-    add_watermark = False
-    watermark_overlays = []
-    if add_watermark:
-        watermark_image_path = finders.find('pdf_forms/Fighter_Card_Watermark.png') or finders.find('authorizations/static/pdf_forms/Fighter_Card_Watermark.png')
-        if watermark_image_path:
-            if template_id == '1':
-                watermark_overlays = [
-                    {'image_path': watermark_image_path, 'scale': .20, 'x_ratio': 0.33, 'y_ratio': 0.13},
-                    {'image_path': watermark_image_path, 'scale': .22, 'x_ratio': 0.70, 'y_ratio': 0.13},
-                ]
-            elif template_id == '2':
-                watermark_overlays = [
-                    {'image_path': watermark_image_path, 'scale': .20, 'x_ratio': 0.70, 'y_ratio': 0.16},
-                ]
-            else:
-                watermark_overlays = [
-                    {'image_path': watermark_image_path, 'scale': .2, 'x_ratio': 0.5, 'y_ratio': 0.13},
-                ]
-
-    # Get core information
-    authorization_list = Authorization.objects.effectively_active().select_related(
-        'person__branch',
-        'style__discipline',
-    ).filter(
-        person_id=person_id,
-    ).order_by(
-        'style__discipline__name',
-        'effective_expiration_date', 'style__name')
-
-    person = Person.objects.get(user_id=person_id)
-
-    # Determine the type of card to generate
-    if template_id == '1':
-        template_path = 'pdf_forms/fighter_auth.pdf'
-        authorization_list = authorization_list.exclude(
-            style__discipline__name__in=['Equestrian', 'Youth Armored', 'Youth Rapier']
-        )
-        if authorization_list.count() == 0:
-            raise Exception('No fighter authorizations found')
-    elif template_id == '2':
-        template_path = 'pdf_forms/youth_auth.pdf'
-        authorization_list = authorization_list.filter(
-            style__discipline__name__in=['Youth Armored', 'Youth Rapier']
-        )
-        if authorization_list.count() == 0:
-            raise Exception('No youth authorizations found')
-    elif template_id == '3':
-        template_path = 'pdf_forms/equestrian_auth.pdf'
-        authorization_list = authorization_list.filter(
-            style__discipline__name='Equestrian'
-        )
-        if authorization_list.count() == 0:
-            raise Exception('No equestrian authorizations found')
-    else:
-        raise Exception('Invalid template id')
 
-    # Get the data for the card
-    earliest_auth = authorization_list.order_by('effective_expiration_date').first()
-    expiration = earliest_auth.effective_expiration if earliest_auth else None
+def _parse_person_id_list(raw_value):
+    person_ids = []
+    for token in re.split(r'[\s,]+', raw_value or ''):
+        if not token:
+            continue
+        if not token.isdigit():
+            raise ValueError(f'"{token}" is not a person id.')
+        person_ids.append(int(token))
+    return person_ids
 
-    weapon_styles = WeaponStyle.objects.select_related('discipline').all()
-    status_map = {}
-    for style in weapon_styles:
-        is_authorized = authorization_list.filter(style=style).exists()
-        style_name = style.name
-        if template_id == '2' and style.discipline.name in ['Youth Armored', 'Youth Rapier']:
-            style_name = youth_base_style_name(style.name)
-        status_key = f'{style.discipline.name} - {style_name}'
-        if is_authorized or status_key not in status_map:
-            status_map[status_key] = 'X' if is_authorized else ''
-
-    marshal_list = []
-    seen_disciplines = set()
-    for auth in authorization_list:
-        if auth.style.discipline.name not in seen_disciplines:
-            seen_disciplines.add(auth.style.discipline.name)
-            marshal_list.append({
-                'discipline': f'{auth.style.discipline.name} marshal',  # Use the discipline's name for display
-                'marshal': auth.marshal.sca_name  # Use the marshal's SCA name for display
-            })
 
-    data = {
-        'sca_name': person.sca_name,
-        'modern_name': person.user.first_name + ' ' + person.user.last_name,
-        'expiration': expiration.strftime('%m/%d/%Y'),
-        'minor': 'X' if person.minor_status == 'Yes' else ''
-    }
-    for style_key, is_authorized in status_map.items():
-        data[style_key] = is_authorized
-
-    if template_id == '2':
-        data['Youth Marshal'] = marshal_list[0]['marshal']
-        youth_categories = set()
-        for auth in authorization_list:
-            if auth.style.name in ['Junior Marshal', 'Senior Marshal']:
-                continue
-            category = youth_age_category_for_style_name(auth.style.name)
-            if category:
-                youth_categories.add(category)
-        for category in youth_categories:
-            data[category] = 'X'
-        if not youth_categories:
-            data['Background_expiration'] = expiration.strftime('%m/%d/%Y')
+@login_required
+def batch_fighter_cards(request):
+    """Download cards for a branch, a region, or a list of people as one merged PDF or a zip of PDFs."""
+    if not (
+        is_senior_marshal(request.user)
+        or is_branch_marshal(request.user)
+        or is_kingdom_authorization_officer(request.user)
+    ):
+        raise PermissionDenied
 
-    else:
-        for marshal in marshal_list:
-            data[marshal['discipline']] = marshal['marshal']
+    template_id = request.GET.get('template_id', '1')
+    if template_id not in FIGHTER_CARD_TEMPLATES:
+        messages.error(request, 'Choose a fighter, youth, or equestrian card.')
+        return redirect('search')
 
-    print(f'PDF data payload for person {person_id}: {data}')
+    branch = region = person_ids = None
+    branch_id = request.GET.get('branch_id')
+    region_id = request.GET.get('region_id')
+    if branch_id:
+        branch = Branch.objects.filter(id=branch_id).first() if branch_id.isdigit() else None
+        if branch is None:
+            messages.error(request, 'Branch not found.')
+            return redirect('search')
+    if region_id:
+        region = Branch.objects.regions().filter(id=region_id).first() if region_id.isdigit() else None
+        if region is None:
+            messages.error(request, 'Region not found.')
+            return redirect('search')
+    if request.GET.get('person_ids'):
+        try:
+            person_ids = _parse_person_id_list(request.GET.get('person_ids'))
+        except ValueError as e:
+            messages.error(request, str(e))
+            return redirect('search')
+    if branch is None and region is None and person_ids is None:
+        messages.error(request, 'Choose a branch, a region, or a list of people to print cards for.')
+        return redirect('search')
 
+    batch_person_ids = fighter_card_batch_person_ids(branch=branch, region=region, person_ids=person_ids)
+    batch_limit = getattr(settings, 'AUTHZ_FIGHTER_CARD_BATCH_LIMIT', 100)
+    if len(batch_person_ids) > batch_limit:
+        messages.error(
+            request,
+            f'That selection has {len(batch_person_ids)} people. Narrow it to {batch_limit} or fewer, '
+            'or ask the database officer to run the generate_fighter_cards command.',
+        )
+        return redirect('search')
 
-    # Build the card
-    # Find the absolute path to the template using Django's static files finder
-    absolute_template_path = finders.find(template_path)
-    if not absolute_template_path:
-        # Try to find the file in the static directory
-        absolute_template_path = finders.find(f'authorizations/static/{template_path}')
-    if not absolute_template_path:
-        raise Exception(f'Could not find PDF template file: {template_path}. Looked in: {finders.searched_locations}')
-    
-    try:
-        template = PdfReader(absolute_template_path)
-    except Exception as e:
-        raise Exception(f'Error reading PDF template file {absolute_template_path}: {str(e)}')
-    
-    print(f'Successfully loaded template from: {absolute_template_path}')
-    template = _flatten_pdf_template(template, data, watermark_overlays=watermark_overlays)
+    archive = request.GET.get('format') == 'zip'
+    output = tempfile.SpooledTemporaryFile(max_size=10 * 1024 * 1024)
+    result = render_fighter_card_batch(batch_person_ids, template_id, output, archive=archive)
+    if not result.rendered:
+        output.close()
+        messages.error(request, 'None of the selected people have authorizations for that card.')
+        return redirect('search')
 
-    response = HttpResponse(content_type='application/pdf')
-    response['Content-Disposition'] = f'inline; filename="fighter_card.pdf"'
-    PdfWriter(response, trailer=template).write()
-    return response
+    output.seek(0)
+    filename = 'fighter_cards.zip' if archive else 'fighter_cards.pdf'
+    return FileResponse(
+        output,
+        as_attachment=True,
+        filename=filename,
+        content_type='application/zip' if archive else 'application/pdf',
+    )
 
 
 def get_weapon_styles(request, discipline_id):
@@ -7033,7 +7094,7 @@ def add_fighter(request):
             
             reset_link = _build_password_reset_link(user)
             try:
-                send_mail(
+                queue_email(
                     'An Tir Authorization: New Account',
                     f'Your account has been created.\n\n'
                     f'Username: {person_form.cleaned_data["username"]}\n'
@@ -7041,7 +7102,6 @@ def add_fighter(request):
                     f'{_email_sender_notice()}',
                     settings.DEFAULT_FROM_EMAIL,
                     [user.email],
-                    fail_silently=False,
                 )
                 messages.success(request,
                                  _email_sent_message('User and person created successfully! A password setup link has been sent to the user.'))
@@ -7285,11 +7345,13 @@ def add_authorization(request, person_id):
                 if is_pending_submit:
                     messages.error(request, 'A note is required when proposing a marshal promotion.')
                     return redirect('fighter', person_id=person_id)
+                rule_snapshot = FighterRuleSnapshot(person, styles=selected_style_map)
                 for style_id in selected_styles:
                     is_valid, mssg = authorization_follows_rules(
                         marshal=authorizing_marshal,
                         existing_fighter=person,
                         style_id=style_id,
+                        snapshot=rule_snapshot,
                     )
                     if not is_valid:
                         messages.error(request, mssg)
@@ -7344,10 +7406,12 @@ def add_authorization(request, person_id):
                     style_id__in=replacement_style_ids,
                     status=active_status,
                 ).update(status=inactive_status, updated_by=authorizing_marshal)
+                refresh_effective_expirations([current_authorization.person_id])
+                invalidate_user_capabilities(current_authorization.person_id)
 
             clear_pending_on_exit = bool(is_pending_submit and action_note)
             try:
-                with transaction.atomic():
+                with transaction.atomic(), deferred_authorization_audit():
                     print(f"Debug: Starting authorization process for person {person_id}")
                     print(f"Debug: Selected styles: {selected_styles}")
                     print(f"Debug: Authorizing marshal: {authorizing_marshal.person.sca_name}")
@@ -7384,11 +7448,15 @@ def add_authorization(request, person_id):
                             messages.error(request, 'Concurring fighter must be different from the authorizing marshal.')
                             return redirect('fighter', person_id=person_id)
                     
-                    for style_id in selected_styles:
+                    rule_snapshot = FighterRuleSnapshot(person, styles=selected_style_map)
+                    for index, style_id in enumerate(selected_styles):
                         print(f"\nDebug: Processing style {style_id}")
+                        if index:
+                            # Earlier styles in the basket may already have been written.
+                            rule_snapshot.reload()
                         try:
                             is_valid, mssg = authorization_follows_rules(marshal=authorizing_marshal, existing_fighter=person,
-                                                                         style_id=style_id)
+                                                                         style_id=style_id, snapshot=rule_snapshot)
                             if not is_valid:
                                 messages.error(request, mssg)
                                 return redirect('fighter', person_id=person_id)
@@ -7933,6 +8001,7 @@ def user_account(request, user_id):
                 if qs.exists():
                     # Set end date to yesterday so it no longer counts as active (we check end_date__gte=today)
                     qs.update(end_date=date.today() - relativedelta(days=1))
+                    invalidate_user_capabilities(person.user_id)
                     messages.success(request, f'Marshal appointment for {discipline.name} in {branch.name} has been ended.')
                 else:
                     messages.info(request, 'No active regional marshal appointment found to remove.')
@@ -8062,11 +8131,7 @@ def user_account(request, user_id):
             'authorization_links__authorization__status',
         ).order_by('-uploaded_at').distinct()[:10]
     )
-    can_upload_equestrian_for_anyone = (
-        is_kingdom_authorization_officer(request.user)
-        or is_kingdom_equestrian_authorization_officer(request.user)
-        or is_senior_marshal(request.user, 'Equestrian')
-    )
+    can_upload_equestrian_for_anyone = _can_upload_equestrian_for_anyone(request.user)
     waiver_records = WaiverRecord.objects.filter(covered_user=user).select_related(
         'signer_user__person',
         'recorded_by__person',
@@ -8216,6 +8281,22 @@ def reject_authorization(request, authorization):
     return True, 'Authorization rejected.'
 
 
+def _add_upload_messages(request, result_messages):
+    for level, text in result_messages:
+        getattr(messages, level)(request, text)
+
+
+def _queue_upload_job_response(request, kind, uploaded_file, next_url):
+    job = queue_upload_job(kind, uploaded_file, request.user)
+    messages.info(
+        request,
+        f'{uploaded_file.name} was received and will be processed in the background. '
+        'Its progress is shown on the home page.',
+    )
+    logger.info('Queued upload job id=%s (%s) for %s', job.pk, kind, uploaded_file.name)
+    return redirect(next_url)
+
+
 @login_required
 def upload_membership_roster(request):
     if not (is_kingdom_authorization_officer(request.user) or is_kingdom_seneschal(request.user)):
@@ -8230,39 +8311,16 @@ def upload_membership_roster(request):
         return redirect(next_url)
 
     uploaded_file = form.cleaned_data['membership_csv']
+    if upload_jobs_enabled():
+        return _queue_upload_job_response(request, UploadJob.Kind.MEMBERSHIP_ROSTER, uploaded_file, next_url)
     try:
-        rows, skipped_rows = _load_membership_rows_from_upload(uploaded_file)
+        with transaction.atomic():
+            result_messages = membership_roster_upload_messages(uploaded_file, request.user)
     except ValueError as exc:
-        messages.error(request, f'Roster upload failed: {exc}')
+        messages.error(request, str(exc))
         return redirect(next_url)
 
-    with transaction.atomic():
-        effective_rows = _merge_membership_roster_entries(rows)
-        refreshed_user_count = _refresh_user_membership_expirations_from_roster(
-            effective_rows,
-            request.user,
-            uploaded_file.name,
-        )
-        MembershipRosterImport.objects.update_or_create(
-            pk=1,
-            defaults={
-                'source_filename': uploaded_file.name,
-                'imported_by': request.user,
-                'row_count': len(rows),
-            },
-        )
-
-    messages.success(request, f'Membership roster updated successfully ({len(rows)} rows processed).')
-    if refreshed_user_count:
-        messages.success(
-            request,
-            f'{refreshed_user_count} user membership expiration(s) were extended from matching membership numbers.',
-        )
-    if skipped_rows:
-        messages.warning(
-            request,
-            f'{skipped_rows} row(s) were skipped because required membership fields were missing or invalid.',
-        )
+    _add_upload_messages(request, result_messages)
     return redirect(next_url)
 
 
@@ -8281,35 +8339,28 @@ def upload_legacy_authorizations(request):
         return redirect(next_url)
 
     uploaded_file = form.cleaned_data['authorization_csv']
+    if upload_jobs_enabled():
+        return _queue_upload_job_response(request, UploadJob.Kind.LEGACY_AUTHORIZATIONS, uploaded_file, next_url)
     try:
-        rows, pending_people = _build_legacy_import_rows(uploaded_file)
+        result_messages = legacy_authorization_upload_messages(uploaded_file, request.user)
     except ValueError as exc:
-        messages.error(request, f'Legacy authorization import failed: {exc}')
-        return redirect(next_url)
-
-    try:
-        with transaction.atomic():
-            created_count, updated_count, person_count = _apply_legacy_authorization_import(
-                rows,
-                pending_people,
-                request.user,
-                uploaded_file.name,
-            )
-    except Exception:
-        logger.exception('Legacy authorization CSV import failed for file %s', uploaded_file.name)
-        messages.error(request, 'Legacy authorization import failed before any rows were saved.')
+        messages.error(request, str(exc))
         return redirect(next_url)
 
-    messages.success(
-        request,
-        (
-            f'Legacy authorization import complete: {created_count} created, '
-            f'{updated_count} updated, {person_count} placeholder account(s) created.'
-        ),
-    )
+    _add_upload_messages(request, result_messages)
     return redirect(next_url)
 
 
+@login_required
+def upload_job_status(request, job_id):
+    job = UploadJob.objects.filter(pk=job_id).first()
+    if job is None:
+        return JsonResponse({'ok': False, 'message': 'Upload not found.'}, status=404)
+    if job.requested_by_id != request.user.id and not is_kingdom_authorization_officer(request.user):
+        return JsonResponse({'ok': False, 'message': 'Permission denied.'}, status=403)
+    return JsonResponse(upload_job_payload(job))
+
+
 @login_required
 def delete_authorizations(request, person_id=None):
     if not (
@@ -8565,21 +8616,46 @@ def supporting_documents(request):
         documents = documents.filter(document_type=selected_document_type)
 
     documents = documents.distinct()
-    documents = list(documents)
-    for document in documents:
-        document.file_available = _supporting_document_file_exists(document)
     document_people = (
         Person.objects.filter(
             user__merged_into__isnull=True,
-            supporting_document_links__document__in=documents,
+            supporting_document_links__document__in=documents.values('id'),
         )
         .order_by('sca_name')
         .values_list('sca_name', flat=True)
         .distinct()
     )
+    page_documents, newer_cursor, older_cursor = _supporting_documents_page(
+        documents,
+        page_size=SUPPORTING_DOCUMENTS_PAGE_SIZE,
+        after=_parse_supporting_document_cursor(request.GET.get('after')),
+        before=_parse_supporting_document_cursor(request.GET.get('before')),
+    )
+    can_upload_equestrian_for_anyone = _can_upload_equestrian_for_anyone(request.user)
+    # Uploaders limited to their own and linked child accounts get those few
+    # fighters up front; everyone else searches the lookup endpoint.
+    eq_upload_people = []
+    if not can_upload_equestrian_for_anyone and hasattr(request.user, 'person'):
+        eq_upload_people = _supporting_document_upload_people(
+            request.user,
+            'equestrian_waiver_upload',
+        ).order_by('sca_name')
+
+    filter_params = request.GET.copy()
+    filter_params.pop('after', None)
+    filter_params.pop('before', None)
+
+    def page_url(**cursor):
+        params = filter_params.copy()
+        params.update(cursor)
+        query_string = params.urlencode()
+        return f"{reverse('supporting_documents')}?{query_string}" if query_string else reverse('supporting_documents')
 
     context = {
-        'documents': documents,
+        'documents': page_documents,
+        'newest_page_url': page_url() if 'after' in request.GET or 'before' in request.GET else '',
+        'newer_page_url': page_url(before=newer_cursor) if newer_cursor else '',
+        'older_page_url': page_url(after=older_cursor) if older_cursor else '',
         'document_people': document_people,
         'document_type_choices': SupportingDocument.DocumentType.choices,
         'review_status_choices': SupportingDocument.ReviewStatus.choices,
@@ -8591,21 +8667,11 @@ def supporting_documents(request):
         'can_upload_supporting_documents': request.user.is_authenticated and hasattr(request.user, 'person'),
         'can_approve_background_check_documents': is_kingdom_authorization_officer(request.user),
         'can_upload_background_check_for_anyone': _can_upload_background_check_for_anyone(request.user),
-        'can_upload_equestrian_for_anyone': (
-            request.user.is_authenticated and (
-                is_kingdom_authorization_officer(request.user)
-                or is_kingdom_equestrian_authorization_officer(request.user)
-                or is_senior_marshal(request.user, 'Equestrian')
-            )
-        ),
+        'can_upload_equestrian_for_anyone': can_upload_equestrian_for_anyone,
         'supporting_document_type_choices': SupportingDocument.DocumentType.choices,
         'supporting_document_jurisdiction_choices': SupportingDocument.Jurisdiction.choices,
         'upload_person': request.user.person if request.user.is_authenticated and hasattr(request.user, 'person') else None,
-        'all_people': _exclude_system_people(
-            Person.objects.filter(user__merged_into__isnull=True)
-        ).order_by('sca_name')
-        if request.user.is_authenticated
-        else [],
+        'eq_upload_people': eq_upload_people,
     }
     return render(request, 'authorizations/supporting_documents.html', context)
 
@@ -8619,18 +8685,20 @@ def supporting_document_file(request, document_id):
     if not _can_view_supporting_document(request.user, document):
         messages.warning(request, 'You do not have authority to view that document.')
         return redirect('index')
-    if not _supporting_document_file_exists(document):
-        messages.warning(request, 'That supporting document file was not found.')
-        return redirect('index')
-
     try:
-        file_handle = document.file.open('rb')
+        response = (
+            protected_file_response(request, document.file, filename=os.path.basename(document.file.name))
+            if _supporting_document_file_exists(document)
+            else None
+        )
     except FileNotFoundError:
+        response = None
+    if response is None:
+        _set_supporting_document_file_present(document, False)
         messages.warning(request, 'That supporting document file was not found.')
         return redirect('index')
-
-    filename = os.path.basename(document.file.name)
-    return FileResponse(file_handle, as_attachment=False, filename=filename)
+    _set_supporting_document_file_present(document, True)
+    return response
 
 
 @login_required
@@ -9086,33 +9154,58 @@ def _build_merge_profile_initial(survivor_user: User, source_user: User, survivo
     }
 
 
-def _build_authorization_merge_preview(survivor_person: Person, source_person: Person):
+def _plan_account_merge(survivor_person: Person, source_person: Person):
+    """
+    Work out everything merging source_person into survivor_person will change, without writing.
+
+    Both people's authorizations, sanctions, and branch offices are read once
+    and resolved in memory. The merge preview displays the plan and
+    _execute_account_merge() applies that same plan.
+    """
+    people = [survivor_person, source_person]
+    today_value = date.today()
+
     auths = list(
         Authorization.objects.select_related('style__discipline', 'status', 'person')
-        .filter(person__in=[survivor_person, source_person], style__isnull=False)
-        .order_by('style__discipline__name', 'style__name', 'id')
+        .filter(person__in=people)
+        .order_by('id')
+    )
+    sanctions = list(Sanction.objects.filter(person__in=people).order_by('id'))
+    offices = list(
+        BranchMarshal.objects.select_related('branch', 'discipline', 'person')
+        .filter(person__in=people)
+        .order_by('-end_date', '-updated_at', '-id')
     )
 
+    active_sanction_keys = {
+        (sanction.discipline_id, sanction.style_id)
+        for sanction in sanctions
+        if sanction.lifted_at is None and sanction.end_date >= today_value
+    }
+
     auths_by_style = defaultdict(list)
+    moved_authorizations = []
     for auth in auths:
-        auths_by_style[auth.style_id].append(auth)
+        if auth.style_id:
+            auths_by_style[auth.style_id].append(auth)
+        elif auth.person_id == source_person.user_id:
+            moved_authorizations.append(auth)
 
-    active_sanction_keys = set(
-        Sanction.objects.filter(
-            person__in=[survivor_person, source_person],
-            lifted_at__isnull=True,
-            end_date__gte=date.today(),
-        ).values_list('discipline_id', 'style_id')
-    )
-
-    preview_rows = []
+    # Newest record wins each style; the rest hand their history to it and are removed.
+    authorization_rows = []
+    winner_by_loser = {}
     for style_id, candidates in auths_by_style.items():
         winner = max(candidates, key=_updated_sort_key)
-        style_discipline_id = winner.style.discipline_id if winner.style else None
-        preview_rows.append({
+        for candidate in candidates:
+            if candidate.id != winner.id:
+                winner_by_loser[candidate.id] = winner.id
+        if winner.person_id != survivor_person.user_id:
+            moved_authorizations.append(winner)
+        style_discipline_id = winner.style.discipline_id
+        authorization_rows.append({
             'style_id': style_id,
-            'discipline_name': winner.style.discipline.name if winner.style and winner.style.discipline else '',
-            'style_name': winner.style.name if winner.style else '',
+            'discipline_name': winner.style.discipline.name if winner.style.discipline else '',
+            'style_name': winner.style.name,
             'winner_id': winner.id,
             'winner_user_id': winner.person_id,
             'winner_sca_name': winner.person.sca_name if winner.person else '',
@@ -9123,23 +9216,43 @@ def _build_authorization_merge_preview(survivor_person: Person, source_person: P
             ),
             'candidates': sorted(candidates, key=_updated_sort_key, reverse=True),
         })
-
-    preview_rows.sort(key=lambda row: (row['discipline_name'], row['style_name']))
-    return preview_rows
-
-
-def _build_branch_office_merge_preview(survivor_person: Person, source_person: Person):
-    offices = list(
-        BranchMarshal.objects.select_related('branch', 'discipline', 'person')
-        .filter(person__in=[survivor_person, source_person])
-        .order_by('-end_date', '-updated_at', '-id')
+    authorization_rows.sort(key=lambda row: (row['discipline_name'], row['style_name']))
+
+    # An unlifted source sanction matching one the survivor already has is folded
+    # into it, keeping the later end date; everything else moves across.
+    open_sanctions = {}
+    for sanction in sanctions:
+        if sanction.person_id == survivor_person.user_id and sanction.lifted_at is None:
+            open_sanctions.setdefault((sanction.discipline_id, sanction.style_id), sanction)
+    moved_sanction_ids = []
+    extended_sanctions = {}
+    removed_sanction_ids = []
+    source_sanctions = sorted(
+        (sanction for sanction in sanctions if sanction.person_id == source_person.user_id),
+        key=_updated_sort_key,
+        reverse=True,
     )
+    for sanction in source_sanctions:
+        key = (sanction.discipline_id, sanction.style_id)
+        existing = open_sanctions.get(key) if sanction.lifted_at is None else None
+        if existing is None:
+            if sanction.lifted_at is None:
+                open_sanctions[key] = sanction
+            moved_sanction_ids.append(sanction.id)
+            continue
+        if sanction.end_date > existing.end_date:
+            existing.end_date = sanction.end_date
+            existing.issue_note = sanction.issue_note
+            # The source account's own references are re-pointed to the survivor as well.
+            existing.issued_by_id = (
+                survivor_person.user_id if sanction.issued_by_id == source_person.user_id else sanction.issued_by_id
+            )
+            extended_sanctions[existing.id] = existing
+        removed_sanction_ids.append(sanction.id)
 
     active_offices = []
     expired_offices = []
     by_branch_and_discipline = defaultdict(list)
-    today_value = date.today()
-
     for office in offices:
         if office.end_date >= today_value:
             active_offices.append(office)
@@ -9153,6 +9266,12 @@ def _build_branch_office_merge_preview(survivor_person: Person, source_person: P
         default_keep_active_office_ids.add(newest.id)
 
     return {
+        'authorization_rows': authorization_rows,
+        'winner_by_loser': winner_by_loser,
+        'moved_authorizations': moved_authorizations,
+        'moved_sanction_ids': moved_sanction_ids,
+        'extended_sanctions': list(extended_sanctions.values()),
+        'removed_sanction_ids': removed_sanction_ids,
         'active_offices': active_offices,
         'expired_offices': expired_offices,
         'default_keep_active_office_ids': sorted(default_keep_active_office_ids),
@@ -9216,37 +9335,56 @@ def _tombstone_user_for_merge(user: User, survivor_user: User, acting_user: User
 
 
 def _move_supporting_document_person_links(source_person: Person, survivor_person: Person):
-    for link in SupportingDocumentPerson.objects.filter(person=source_person).select_related('document'):
-        duplicate = SupportingDocumentPerson.objects.filter(
-            document=link.document,
-            person=survivor_person,
-        ).exclude(pk=link.pk).exists()
-        if duplicate:
-            link.delete()
-        else:
-            link.person = survivor_person
-            link.save(update_fields=['person'])
-
-
-def _move_supporting_document_authorization_links(source_auth: Authorization, target_auth: Authorization):
-    for link in SupportingDocumentAuthorization.objects.filter(authorization=source_auth).select_related('document'):
-        duplicate = SupportingDocumentAuthorization.objects.filter(
-            document=link.document,
-            authorization=target_auth,
-        ).exclude(pk=link.pk).exists()
-        if duplicate:
-            link.delete()
-        else:
-            link.authorization = target_auth
-            link.save(update_fields=['authorization'])
+    links = list(SupportingDocumentPerson.objects.filter(person__in=[source_person, survivor_person]))
+    linked_document_ids = {link.document_id for link in links if link.person_id == survivor_person.user_id}
+    duplicate_ids = [
+        link.id for link in links
+        if link.person_id == source_person.user_id and link.document_id in linked_document_ids
+    ]
+    if duplicate_ids:
+        SupportingDocumentPerson.objects.filter(pk__in=duplicate_ids).delete()
+    SupportingDocumentPerson.objects.filter(person=source_person).update(person=survivor_person)
 
 
-def _reattach_authorization_history_to_winner(loser: Authorization, winner: Authorization):
-    AuthorizationNote.objects.filter(authorization=loser).update(authorization=winner)
-    AuthorizationValidityInterval.objects.filter(authorization=loser).update(authorization=winner)
-    AuthorizationAuditEntry.objects.filter(authorization=loser).update(authorization=winner)
-    LegacyAuthorizationRecoveryEntry.objects.filter(authorization=loser).update(authorization=winner)
-    _move_supporting_document_authorization_links(loser, winner)
+def _reattach_authorization_history_to_winners(winner_by_loser):
+    """Point each duplicate authorization's notes, intervals, audit rows, and documents at the record that won its style."""
+    if not winner_by_loser:
+        return
+    loser_ids = list(winner_by_loser)
+    winner_case = Case(*[
+        When(authorization_id=loser_id, then=Value(winner_id))
+        for loser_id, winner_id in winner_by_loser.items()
+    ])
+    for model in (
+        AuthorizationNote,
+        AuthorizationValidityInterval,
+        AuthorizationAuditEntry,
+        LegacyAuthorizationRecoveryEntry,
+    ):
+        model.objects.filter(authorization_id__in=loser_ids).update(authorization_id=winner_case)
+
+    links = list(
+        SupportingDocumentAuthorization.objects.filter(
+            authorization_id__in=[*loser_ids, *set(winner_by_loser.values())],
+        ).order_by('id')
+    )
+    linked = {(link.document_id, link.authorization_id) for link in links if link.authorization_id not in winner_by_loser}
+    moved_links = []
+    duplicate_ids = []
+    for link in links:
+        winner_id = winner_by_loser.get(link.authorization_id)
+        if winner_id is None:
+            continue
+        if (link.document_id, winner_id) in linked:
+            duplicate_ids.append(link.id)
+            continue
+        linked.add((link.document_id, winner_id))
+        link.authorization_id = winner_id
+        moved_links.append(link)
+    if duplicate_ids:
+        SupportingDocumentAuthorization.objects.filter(pk__in=duplicate_ids).delete()
+    if moved_links:
+        SupportingDocumentAuthorization.objects.bulk_update(moved_links, ['authorization'], batch_size=500)
 
 
 def _reattach_person_history_to_survivor(source_user: User, survivor_user: User):
@@ -9304,13 +9442,25 @@ def _execute_account_merge(
     survivor_user: User,
     source_user: User,
     profile_form,
+    merge_plan,
     keep_active_office_ids,
     action_note: str,
 ):
+    """
+    Apply a plan from _plan_account_merge() with set-based writes.
+
+    Call inside transaction.atomic() with validity syncs and audit entries
+    deferred, so both are written once when the merge finishes. Row writes
+    skip save(), so the audit entries, effective expirations, validity
+    intervals, and cache invalidations its signals would have made are done
+    here for the whole merge.
+    """
     survivor_person = survivor_user.person
     source_person = source_user.person
+    person_ids = [survivor_person.user_id, source_person.user_id]
     today_value = date.today()
     yesterday = today_value - timedelta(days=1)
+    now = timezone.now()
 
     source_username_before = source_user.username
     source_email_before = source_user.email
@@ -9323,87 +9473,83 @@ def _execute_account_merge(
     Person.objects.filter(parent=source_person).update(parent=survivor_person)
     _reattach_person_history_to_survivor(source_user, survivor_user)
 
-    all_auths = list(
-        Authorization.objects.select_related('status', 'style')
-        .filter(person__in=[survivor_person, source_person])
-    )
-    auths_with_style = [auth for auth in all_auths if auth.style_id]
-    auths_without_style = [auth for auth in all_auths if not auth.style_id]
-
-    by_style = defaultdict(list)
-    for auth in auths_with_style:
-        by_style[auth.style_id].append(auth)
-
-    merged_style_count = 0
-    removed_duplicate_authorizations = 0
-
-    for style_id, candidates in by_style.items():
-        winner = max(candidates, key=_updated_sort_key)
-        losers = [candidate for candidate in candidates if candidate.id != winner.id]
-
-        for loser in losers:
-            _reattach_authorization_history_to_winner(loser, winner)
-
-        for loser in losers:
-            loser.delete()
-            removed_duplicate_authorizations += 1
-
-        if winner.person_id != survivor_person.user_id:
-            winner.person = survivor_person
-            winner.updated_by = request.user
-            winner.save()
-
-        merged_style_count += 1
-
-    for auth in auths_without_style:
-        if auth.person_id == source_person.user_id:
-            auth.person = survivor_person
-            auth.updated_by = request.user
-            auth.save()
-
-    source_sanctions = list(
-        Sanction.objects.filter(person=source_person).order_by('-updated_at', '-id')
-    )
-    for sanction in source_sanctions:
-        existing = Sanction.objects.filter(
-            person=survivor_person,
-            discipline=sanction.discipline,
-            style=sanction.style,
-            lifted_at=sanction.lifted_at,
-        ).first()
-        if existing and sanction.lifted_at is None:
-            if sanction.end_date > existing.end_date:
-                existing.end_date = sanction.end_date
-                existing.issue_note = sanction.issue_note
-                existing.issued_by = sanction.issued_by
-                existing.updated_by = request.user
-                existing.save()
-            sanction.delete()
-            continue
-        sanction.person = survivor_person
+    winner_by_loser = merge_plan['winner_by_loser']
+    _reattach_authorization_history_to_winners(winner_by_loser)
+    if winner_by_loser:
+        Authorization.objects.filter(pk__in=list(winner_by_loser)).delete()
+
+    moved_authorizations = merge_plan['moved_authorizations']
+    for auth in moved_authorizations:
+        # The plan was read before the queryset updates above re-pointed these.
+        for field in ('marshal_id', 'concurring_fighter_id', 'created_by_id', 'updated_by_id'):
+            if getattr(auth, field) == source_person.user_id:
+                setattr(auth, field, survivor_person.user_id)
+        auth.remember_audit_state()
+        before = auth._loaded_audit_state
+        auth.person = survivor_person
+        auth.updated_by = request.user
+        auth.updated_at = now
+        entry = authorization_audit_entry(auth, before)
+        if entry is not None:
+            record_authorization_audit_entry(entry)
+    if moved_authorizations:
+        Authorization.objects.bulk_update(moved_authorizations, ['person', 'updated_by', 'updated_at'], batch_size=500)
+
+    if merge_plan['removed_sanction_ids']:
+        Sanction.objects.filter(pk__in=merge_plan['removed_sanction_ids']).delete()
+    extended_sanctions = merge_plan['extended_sanctions']
+    for sanction in extended_sanctions:
         sanction.updated_by = request.user
-        sanction.save()
-
-    all_offices = list(
-        BranchMarshal.objects.filter(person__in=[survivor_person, source_person]).order_by('id')
+        sanction.updated_at = now
+    if extended_sanctions:
+        Sanction.objects.bulk_update(
+            extended_sanctions,
+            ['end_date', 'issue_note', 'issued_by', 'updated_by', 'updated_at'],
+        )
+    Sanction.objects.filter(pk__in=merge_plan['moved_sanction_ids']).update(
+        person=survivor_person,
+        updated_by=request.user,
+        updated_at=now,
     )
+
     keep_active_office_ids = set(keep_active_office_ids)
     active_kept = 0
     active_ended = 0
-
-    for office in all_offices:
-        if office.person_id != survivor_person.user_id:
-            office.person = survivor_person
-
-        if office.end_date >= today_value:
-            if office.id in keep_active_office_ids:
-                active_kept += 1
-            else:
-                office.end_date = yesterday
-                active_ended += 1
-
+    offices = [*merge_plan['active_offices'], *merge_plan['expired_offices']]
+    for office in merge_plan['active_offices']:
+        if office.id in keep_active_office_ids:
+            active_kept += 1
+        else:
+            office.end_date = yesterday
+            active_ended += 1
+    for office in offices:
+        office.person = survivor_person
         office.updated_by = request.user
-        office.save()
+        office.updated_at = now
+    if offices:
+        BranchMarshal.objects.bulk_update(offices, ['person', 'end_date', 'updated_by', 'updated_at'], batch_size=500)
+
+    effective_expirations = refresh_effective_expirations(person_ids)
+    moved_ids = [auth.id for auth in moved_authorizations]
+    sync_authorization_validity_intervals(moved_ids)
+    if any(
+        auth.status
+        and auth.status.name == 'Active'
+        and (effective_expirations.get(auth.id) or auth.expiration) >= today_value
+        for auth in moved_authorizations
+    ):
+        # The moved records may be prerequisites for what the survivor already held.
+        sync_authorization_validity_intervals(
+            list(
+                Authorization.objects.filter(person=survivor_person, status__name='Active')
+                .exclude(pk__in=moved_ids)
+                .values_list('pk', flat=True)
+            ),
+            resume_date=today_value,
+            note='Generated from prerequisite authorization update.',
+        )
+    invalidate_user_capabilities(*person_ids)
+    bump_option_list_generation()
 
     source_person.updated_by = request.user
     source_person.save()
@@ -9421,8 +9567,8 @@ def _execute_account_merge(
     )
 
     return {
-        'merged_style_count': merged_style_count,
-        'removed_duplicate_authorizations': removed_duplicate_authorizations,
+        'merged_style_count': len(merge_plan['authorization_rows']),
+        'removed_duplicate_authorizations': len(winner_by_loser),
         'active_kept': active_kept,
         'active_ended': active_ended,
     }
@@ -9576,14 +9722,13 @@ def merge_accounts(request):
                     survivor_user = survivor_person.user
                     source_user = source_person.user
 
+                    merge_plan = _plan_account_merge(survivor_person, source_person)
                     preview_data = {
                         'survivor_user': survivor_user,
                         'source_user': source_user,
                         'newer_user': _newer_user(survivor_user, source_user),
-                        'authorization_rows': _build_authorization_merge_preview(survivor_person, source_person),
+                        **merge_plan,
                     }
-                    office_preview = _build_branch_office_merge_preview(survivor_person, source_person)
-                    preview_data.update(office_preview)
 
                     if action == 'preview':
                         initial_data = _build_merge_profile_initial(
@@ -9620,12 +9765,13 @@ def merge_accounts(request):
                             messages.error(request, 'A merge action note is required.')
                         elif profile_form.is_valid():
                             try:
-                                with transaction.atomic():
+                                with transaction.atomic(), deferred_authorization_validity_sync(), deferred_authorization_audit():
                                     merge_summary = _execute_account_merge(
                                         request,
                                         survivor_user,
                                         source_user,
                                         profile_form,
+                                        merge_plan,
                                         selected_keep_active_office_ids,
                                         merge_action_note,
                                     )
@@ -9639,6 +9785,8 @@ def merge_accounts(request):
                                     request,
                                     'We could not complete the merge right now. No changes were saved.',
                                 )
+                                # The failed attempt changed the planned records in memory.
+                                preview_data.update(_plan_account_merge(survivor_person, source_person))
                             else:
                                 messages.success(
                                     request,
@@ -9707,13 +9855,27 @@ def branch_marshals(request):
     # --- GET Logic: Display pages ---
 
     # Get dropdown options for the search form
-    current_marshal_offices = BranchMarshal.objects.filter(end_date__gte=date.today())
-    sca_name_options = _exclude_system_people(
-        Person.objects.filter(branchmarshal__in=current_marshal_offices)
-    ).distinct().order_by('sca_name').values_list('sca_name', flat=True)
-    branch_options = Branch.objects.filter(branchmarshal__in=current_marshal_offices).distinct().order_by('name').values_list('name', flat=True)
-    discipline_options = Discipline.objects.filter(branchmarshal__in=current_marshal_offices).distinct().order_by('name').values_list('name', flat=True)
-    region_options = Branch.objects.regions().order_by('name').values_list('name', flat=True)
+    today = date.today()
+    current_marshal_offices = BranchMarshal.objects.filter(end_date__gte=today)
+    # Current offices roll off at midnight, so these lists are also keyed on the date.
+    sca_name_options = cached_option_list(
+        f'marshal-sca-names:{today.isoformat()}',
+        lambda: _exclude_system_people(
+            Person.objects.filter(branchmarshal__in=current_marshal_offices)
+        ).distinct().order_by('sca_name').values_list('sca_name', flat=True),
+    )
+    branch_options = cached_option_list(
+        f'marshal-branches:{today.isoformat()}',
+        lambda: Branch.objects.filter(branchmarshal__in=current_marshal_offices).distinct().order_by('name').values_list('name', flat=True),
+    )
+    discipline_options = cached_option_list(
+        f'marshal-disciplines:{today.isoformat()}',
+        lambda: Discipline.objects.filter(branchmarshal__in=current_marshal_offices).distinct().order_by('name').values_list('name', flat=True),
+    )
+    region_options = cached_option_list(
+        'regions',
+        lambda: Branch.objects.regions().order_by('name').values_list('name', flat=True),
+    )
 
     # Handle request for the dedicated search form
     if request.GET.get('goal') == 'search':
@@ -9941,22 +10103,16 @@ def _build_reports_csv_response(download_key, marshal_rows, regional_rows, eques
     if show_compare_columns:
         headers.extend([compare_label, 'Change'])
 
-    response = HttpResponse(content_type='text/csv; charset=utf-8')
-    response['Content-Disposition'] = f'attachment; filename="{download_key}_report.csv"'
-    # UTF-8 BOM helps Excel detect Unicode correctly on Windows.
-    response.write('\ufeff')
-    writer = csv.writer(response)
-    writer.writerow(headers)
-
-    for row in spec['rows']:
-        csv_row = spec['row_mapper'](row)
-        csv_row.append('' if row['current_value'] is None else row['current_value'])
-        if show_compare_columns:
-            csv_row.append('' if row['compare_value'] is None else row['compare_value'])
-            csv_row.append('' if row['change'] is None else row['change'])
-        writer.writerow(csv_row)
+    def rows():
+        for row in spec['rows']:
+            csv_row = spec['row_mapper'](row)
+            csv_row.append('' if row['current_value'] is None else row['current_value'])
+            if show_compare_columns:
+                csv_row.append('' if row['compare_value'] is None else row['compare_value'])
+                csv_row.append('' if row['change'] is None else row['change'])
+            yield csv_row
 
-    return response
+    return _streaming_csv_response(f'{download_key}_report.csv', headers, rows())
 
 
 def reports_view(request):
@@ -10002,7 +10158,7 @@ def reports_view(request):
     if current_is_dynamic:
         current_reporting_error = None
         try:
-            current_snapshot = build_current_report_snapshot(as_of=date.today())
+            current_snapshot = cached_report_snapshot(as_of=date.today())
         except ReportingConfigurationError as exc:
             current_snapshot = {
                 ReportValue.ReportFamily.QUARTERLY_MARSHAL: [],
@@ -10184,7 +10340,7 @@ def contact_view(request):
             cleaned = form.cleaned_data
             membership_number = cleaned.get('membership_number') or 'Not provided'
             try:
-                send_mail(
+                queue_email(
                     'An Tir Authorization Portal email change request',
                     (
                         'A user submitted a request to change the email address on their authorization account.\n\n'
@@ -10197,7 +10353,6 @@ def contact_view(request):
                     ),
                     settings.DEFAULT_FROM_EMAIL,
                     ['antir.authorization.database@gmail.com'],
-                    fail_silently=False,
                 )
             except Exception:
                 logger.exception('Error sending email change request notification.')